@@ -0,0 +1,62 @@
+"""
+Authentification JWT sans requête en base sur le chemin courant.
+
+- L'utilisateur résolu depuis le jeton est gardé dans le cache Django
+  AUTHENTIFICATION['CACHE_UTILISATEUR'] secondes, et retiré du cache dès
+  qu'il est enregistré ou supprimé (désactivation, changement de rôle ou de
+  mot de passe). Avec le cache par défaut (mémoire locale), un autre
+  processus peut garder l'ancienne version jusqu'à l'expiration ; un cache
+  partagé (CACHES Redis ou Memcached) rend l'invalidation immédiate partout.
+- Les jetons révoqués à la déconnexion sont refusés, à l'accès comme au
+  rafraîchissement (accounts/revocations.py).
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+
+from .revocations import revocations
+
+
+def _cle(user_id):
+    return f"auth:utilisateur:{user_id}"
+
+
+def _verifier_revocation(jeton):
+    if revocations.est_revoque(jeton.get(api_settings.JTI_CLAIM)):
+        raise InvalidToken("Jeton révoqué.")
+
+
+class JWTAuthentificationCache(JWTAuthentication):
+    def get_user(self, validated_token):
+        _verifier_revocation(validated_token)
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return super().get_user(validated_token)
+        utilisateur = cache.get(_cle(user_id))
+        if utilisateur is None:
+            # Contrôles de simplejwt (utilisateur existant et actif) avant la mise en cache
+            utilisateur = super().get_user(validated_token)
+            cache.set(_cle(user_id), utilisateur, settings.AUTHENTIFICATION['CACHE_UTILISATEUR'])
+        return utilisateur
+
+
+class RafraichissementSerializer(TokenRefreshSerializer):
+    def validate(self, attrs):
+        _verifier_revocation(self.token_class(attrs['refresh']))
+        return super().validate(attrs)
+
+
+def invalider_utilisateur(sender, instance, **kwargs):
+    cache.delete(_cle(getattr(instance, api_settings.USER_ID_FIELD)))
+
+
+def connecter():
+    """Branche l'invalidation du cache (appelé par AccountsConfig.ready)."""
+    modele = get_user_model()
+    post_save.connect(invalider_utilisateur, sender=modele, dispatch_uid='auth_cache_save')
+    post_delete.connect(invalider_utilisateur, sender=modele, dispatch_uid='auth_cache_delete')
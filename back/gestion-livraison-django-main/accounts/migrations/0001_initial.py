@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-19 12:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JetonRevoque',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('jti', models.CharField(max_length=64, unique=True)),
+                ('expire', models.DateTimeField(db_index=True)),
+                ('date_revocation', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
@@ -1,3 +1,11 @@
 from django.db import models
 
-# Create your models here.
+
+# JETON_REVOQUE : jetons JWT révoqués avant leur expiration (déconnexion), lus par accounts/revocations.py
+class JetonRevoque(models.Model):
+    jti = models.CharField(max_length=64, unique=True)
+    expire = models.DateTimeField(db_index=True)  # au-delà, le jeton est refusé de toute façon : ligne purgeable
+    date_revocation = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.jti} (expire {self.expire})"
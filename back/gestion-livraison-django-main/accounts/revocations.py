@@ -0,0 +1,105 @@
+"""
+Jetons JWT révoqués (déconnexion) sans lecture en base à chaque requête.
+
+La table JetonRevoque est la référence, partagée par tous les processus.
+Chaque processus en garde un filtre de Bloom : un jeton absent du filtre
+n'a certainement pas été révoqué et passe sans requête ; un jeton présent
+(révoqué, ou faux positif, ~1 % au dimensionnement par défaut) est vérifié
+en base. Le filtre reprend les révocations des autres processus toutes les
+AUTHENTIFICATION['SYNCHRO_REVOCATIONS'] secondes (une requête sur les
+identifiants nouveaux) et est reconstruit périodiquement pour oublier les
+jetons expirés.
+"""
+import hashlib
+import os
+import threading
+import time
+from datetime import datetime, timezone as tz
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import JetonRevoque
+
+
+def config():
+    return settings.AUTHENTIFICATION
+
+
+class FiltreBloom:
+    """Ensemble probabiliste : pas de faux négatif, faux positifs rares."""
+
+    def __init__(self, bits, hachages):
+        self.bits = bits
+        self.hachages = hachages
+        self._tableau = bytearray((bits + 7) // 8)
+
+    def _positions(self, valeur):
+        # Double hachage (Kirsch-Mitzenmacher) : k positions tirées d'une seule empreinte
+        empreinte = hashlib.blake2b(valeur.encode(), digest_size=16).digest()
+        a = int.from_bytes(empreinte[:8], 'little')
+        b = int.from_bytes(empreinte[8:], 'little') | 1
+        return [(a + i * b) % self.bits for i in range(self.hachages)]
+
+    def ajouter(self, valeur):
+        for position in self._positions(valeur):
+            self._tableau[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, valeur):
+        return all(self._tableau[position >> 3] & (1 << (position & 7)) for position in self._positions(valeur))
+
+
+class Revocations:
+    def __init__(self):
+        self._pid = None
+        self._verrou = threading.Lock()
+
+    def _recharger(self):
+        filtre = FiltreBloom(config()['BLOOM_BITS'], config()['BLOOM_HACHAGES'])
+        dernier = 0
+        for identifiant, jti in (
+            JetonRevoque.objects.filter(expire__gt=timezone.now()).values_list('id', 'jti').iterator()
+        ):
+            filtre.ajouter(jti)
+            dernier = max(dernier, identifiant)
+        self._filtre, self._dernier = filtre, dernier
+        self._pid = os.getpid()
+        self._reconstruit = self._synchronise = time.monotonic()
+
+    def _a_jour(self):
+        maintenant = time.monotonic()
+        if self._pid == os.getpid() and maintenant - self._synchronise < config()['SYNCHRO_REVOCATIONS']:
+            return
+        with self._verrou:
+            if self._pid != os.getpid() or maintenant - self._reconstruit >= config()['RECONSTRUCTION_REVOCATIONS']:
+                self._recharger()
+            elif maintenant - self._synchronise >= config()['SYNCHRO_REVOCATIONS']:
+                for identifiant, jti in JetonRevoque.objects.filter(id__gt=self._dernier).values_list('id', 'jti'):
+                    self._filtre.ajouter(jti)
+                    self._dernier = max(self._dernier, identifiant)
+                self._synchronise = maintenant
+
+    def est_revoque(self, jti):
+        self._a_jour()
+        if jti not in self._filtre:
+            return False
+        return JetonRevoque.objects.filter(jti=jti).exists()
+
+    def revoquer(self, jeton):
+        """Révoque un jeton simplejwt (accès ou rafraîchissement) jusqu'à son expiration."""
+        jti = jeton.get('jti')
+        if not jti:
+            return
+        expire = datetime.fromtimestamp(jeton['exp'], tz=tz.utc)
+        JetonRevoque.objects.get_or_create(jti=jti, defaults={'expire': expire})
+        self._a_jour()
+        self._filtre.ajouter(jti)
+
+
+revocations = Revocations()
+
+
+def purger():
+    """Supprime les révocations de jetons expirés ; renvoie le nombre de lignes supprimées."""
+    supprimes, _ = JetonRevoque.objects.filter(expire__lte=timezone.now()).delete()
+    return supprimes
@@ -0,0 +1,9 @@
+from taches.registre import tache
+
+from . import revocations
+
+
+@tache('accounts.purger_jetons_revoques')
+def purger_jetons_revoques(suivi):
+    """Supprime les révocations des jetons déjà expirés."""
+    return {'supprimes': revocations.purger()}
@@ -1,3 +1,49 @@
-from django.test import TestCase
+import uuid
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .revocations import FiltreBloom
+
+
+class FiltreBloomTests(SimpleTestCase):
+    def test_aucun_faux_negatif(self):
+        filtre = FiltreBloom(2 ** 16, 7)
+        valeurs = [uuid.uuid4().hex for _ in range(2000)]
+        for valeur in valeurs:
+            filtre.ajouter(valeur)
+        self.assertTrue(all(valeur in filtre for valeur in valeurs))
+
+    def test_faux_positifs_rares(self):
+        # 2000 valeurs dans 2**16 bits, 7 hachages : ~0,1 % de faux positifs attendus
+        filtre = FiltreBloom(2 ** 16, 7)
+        for _ in range(2000):
+            filtre.ajouter(uuid.uuid4().hex)
+        faux_positifs = sum(uuid.uuid4().hex in filtre for _ in range(10000))
+        self.assertLess(faux_positifs, 100)
+
+    def test_filtre_vide(self):
+        self.assertNotIn('jti', FiltreBloom(1024, 3))
+
+
+class DeconnexionTests(TestCase):
+    def setUp(self):
+        self.utilisateur = get_user_model().objects.create_user(
+            username='agent', email='agent@exemple.dz', password='secret-123',
+        )
+        self.refresh = RefreshToken.for_user(self.utilisateur)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.refresh.access_token}')
+
+    def test_jeton_valide(self):
+        self.assertEqual(self.client.get('/accounts/profile/').status_code, 200)
+
+    def test_jetons_revoques_a_la_deconnexion(self):
+        reponse = self.client.post('/accounts/logout/', {'refresh': str(self.refresh)}, format='json')
+        self.assertEqual(reponse.status_code, 200)
+        # 403 plutôt que 401 : SessionAuthentication, première classe, ne propose pas d'en-tête WWW-Authenticate
+        self.assertEqual(self.client.get('/accounts/profile/').status_code, 403)
+        reponse = APIClient().post('/accounts/token/refresh/', {'refresh': str(self.refresh)}, format='json')
+        self.assertEqual(reponse.status_code, 401)
@@ -2,10 +2,13 @@ from rest_framework import status, serializers
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
 from django.contrib.auth import authenticate, get_user_model
 from django.db import IntegrityError
 
+from .revocations import revocations
+
 User = get_user_model()
 
 # --- SERIALIZER ---
@@ -70,13 +73,15 @@ def register_view(request):
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def logout_view(request):
+    # Le jeton d'accès de la requête et le jeton de rafraîchissement sont refusés jusqu'à leur expiration
     try:
         refresh_token = request.data.get('refresh')
         if refresh_token:
-            token = RefreshToken(refresh_token)
-            token.blacklist()
+            revocations.revoquer(RefreshToken(refresh_token))
+        if isinstance(request.auth, AccessToken):
+            revocations.revoquer(request.auth)
         return Response({'message': 'Déconnexion réussie'})
-    except Exception:
+    except TokenError:
         return Response({'error': 'Erreur lors de la déconnexion'}, status=status.HTTP_400_BAD_REQUEST)
 
 # --- PROFILE ---
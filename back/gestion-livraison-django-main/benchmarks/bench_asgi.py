@@ -0,0 +1,58 @@
+"""
+Compare le débit des endpoints d'agrégats entre le déploiement WSGI (vues
+DRF synchrones) et le déploiement ASGI (vues async de /api/async/).
+
+Démarrer les deux serveurs :
+    docker-compose --profile wsgi --profile asgi up -d
+
+Puis :
+    python benchmarks/bench_asgi.py --wsgi http://localhost:8001 --asgi http://localhost:8002 \
+        --concurrence 50 --requetes 1000 --sortie resultats_asgi.json
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.outils import afficher_tableau, charger_url, ecrire_json
+
+# (nom, chemin WSGI, chemin ASGI)
+ENDPOINTS = [
+    ('expeditions.statistiques', '/api/expeditions/statistiques/', '/api/async/expeditions/statistiques/'),
+    ('expeditions.evolution', '/api/expeditions/evolution/', '/api/async/expeditions/evolution/'),
+    ('incidents.statistiques', '/api/incidents/statistiques/', '/api/async/incidents/statistiques/'),
+    ('factures.statistiques', '/api/factures/statistiques/', '/api/async/factures/statistiques/'),
+    ('factures.evolution_ca', '/api/factures/evolution_chiffre_affaires/', '/api/async/factures/evolution_chiffre_affaires/'),
+    ('paiements.statistiques', '/api/paiements/statistiques/', '/api/async/paiements/statistiques/'),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--wsgi', default='http://localhost:8001', help="URL du serveur WSGI")
+    parser.add_argument('--asgi', default='http://localhost:8002', help="URL du serveur ASGI")
+    parser.add_argument('--concurrence', type=int, default=50)
+    parser.add_argument('--requetes', type=int, default=500, help="Requêtes par endpoint et par mode")
+    parser.add_argument('--sortie', help="Fichier JSON de résultats")
+    args = parser.parse_args()
+
+    lignes = []
+    for nom, chemin_wsgi, chemin_asgi in ENDPOINTS:
+        for mode, url in (('wsgi', args.wsgi + chemin_wsgi), ('asgi', args.asgi + chemin_asgi)):
+            resume = charger_url(url, args.requetes, args.concurrence)
+            lignes.append({'endpoint': nom, 'mode': mode, **resume})
+            print(f"{nom:28} {mode}: {resume['debit_rps']} req/s, p99 {resume['p99_ms']} ms")
+
+    print()
+    afficher_tableau(lignes, ['endpoint', 'mode', 'debit_rps', 'p50_ms', 'p99_ms', 'erreurs'])
+    if args.sortie:
+        ecrire_json(args.sortie, {
+            'concurrence': args.concurrence,
+            'requetes': args.requetes,
+            'resultats': lignes,
+        })
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Latence p50/p99 des endpoints de liste selon le mode de connexion à
+PostgreSQL (DB_POOL_MODE = aucun | persistant | pool).
+
+Lancer une fois par mode, serveur redémarré avec le bon DB_POOL_MODE :
+    DB_POOL_MODE=aucun docker-compose --profile wsgi up -d --force-recreate web-wsgi
+    python benchmarks/bench_connexions.py --url http://localhost:8001 --mode aucun --sortie aucun.json
+    DB_POOL_MODE=persistant docker-compose --profile wsgi up -d --force-recreate web-wsgi
+    python benchmarks/bench_connexions.py --url http://localhost:8001 --mode persistant --sortie persistant.json
+
+Puis comparer :
+    python benchmarks/bench_connexions.py --comparer aucun.json persistant.json
+"""
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.outils import afficher_tableau, charger_url, ecrire_json
+
+ENDPOINTS_LISTE = [
+    '/api/expeditions/',
+    '/api/incidents/',
+    '/api/factures/',
+    '/api/paiements/',
+    '/api/clients/',
+]
+
+
+def mesurer(args):
+    headers = {'Authorization': f'Bearer {args.token}'} if args.token else None
+    # Échauffement : remplit le pool / ouvre les connexions persistantes
+    for chemin in ENDPOINTS_LISTE:
+        charger_url(args.url + chemin, args.concurrence, args.concurrence, headers)
+
+    resultats = {}
+    for chemin in ENDPOINTS_LISTE:
+        resume = charger_url(args.url + chemin, args.requetes, args.concurrence, headers)
+        resultats[chemin] = resume
+        print(f"{chemin:20} p50 {resume['p50_ms']} ms  p99 {resume['p99_ms']} ms  ({resume['erreurs']} erreurs)")
+    if args.sortie:
+        ecrire_json(args.sortie, {
+            'mode': args.mode,
+            'concurrence': args.concurrence,
+            'requetes': args.requetes,
+            'resultats': resultats,
+        })
+
+
+def comparer(avant_chemin, apres_chemin):
+    with open(avant_chemin, encoding='utf-8') as f:
+        avant = json.load(f)
+    with open(apres_chemin, encoding='utf-8') as f:
+        apres = json.load(f)
+    lignes = []
+    for chemin, mesure_avant in avant['resultats'].items():
+        mesure_apres = apres['resultats'].get(chemin)
+        if not mesure_apres:
+            continue
+        ligne = {'endpoint': chemin}
+        for cle in ('p50_ms', 'p99_ms'):
+            a, b = mesure_avant[cle], mesure_apres[cle]
+            ligne[f"{cle} {avant['mode']}"] = a
+            ligne[f"{cle} {apres['mode']}"] = b
+            ligne[f"{cle} gain"] = f"{(a - b) / a * 100:+.1f}%" if a and b else '-'
+        lignes.append(ligne)
+    colonnes = list(lignes[0]) if lignes else ['endpoint']
+    afficher_tableau(lignes, colonnes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://localhost:8001')
+    parser.add_argument('--mode', default='inconnu', help="Libellé du mode mesuré (aucun, persistant, pool)")
+    parser.add_argument('--token', help="Jeton JWT pour les endpoints authentifiés")
+    parser.add_argument('--concurrence', type=int, default=20)
+    parser.add_argument('--requetes', type=int, default=1000)
+    parser.add_argument('--sortie', help="Fichier JSON de résultats")
+    parser.add_argument('--comparer', nargs=2, metavar=('AVANT', 'APRES'), help="Compare deux fichiers de résultats")
+    args = parser.parse_args()
+
+    if args.comparer:
+        comparer(*args.comparer)
+    else:
+        mesurer(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,428 @@
+"""
+Test de charge : mélange de trafic réaliste ou rejeu d'un journal de requêtes.
+
+Chaque utilisateur virtuel s'authentifie par /accounts/login/ (JWT) puis
+enchaîne les actions de son profil, avec un temps de réflexion aléatoire :
+- agent      : listes, recherches et détails d'expéditions, création d'expédition ;
+- chauffeur  : tournées, validation de livraisons (POST .../valider/) ;
+- comptable  : factures impayées, détails, saisie de paiements ;
+- tableau    : interrogation périodique des endpoints de statistiques.
+
+    python benchmarks/charge.py --url http://localhost:8000 --email agent@exemple.dz --mot-de-passe secret \
+        --utilisateurs 50 --duree 120 --mix agent=40,chauffeur=20,comptable=15,tableau=25 --sortie charge.json
+
+Rejeu d'un journal (JSON lines {"methode", "chemin", "corps", "decalage"} écrit
+par --journal, ou access log gunicorn/nginx/runserver) :
+
+    python benchmarks/charge.py --rejouer access.log --utilisateurs 20 --vitesse 2
+
+Le rapport donne, par endpoint : requêtes, erreurs, taux d'erreur, débit
+et percentiles de latence.
+"""
+import argparse
+import json
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter, defaultdict
+from datetime import date, datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.outils import afficher_tableau, ecrire_json, resumer
+
+RE_IDENTIFIANT = re.compile(r'/(\d+|[A-Za-z]+-[A-Za-z0-9-]+)(?=/)')
+RE_ACCESS_LOG = re.compile(
+    r'\[(?P<date>[^\]]+)\] "(?P<methode>GET|POST|PUT|PATCH|DELETE) (?P<chemin>\S+) HTTP/[\d.]+"'
+)
+
+
+def nom_endpoint(methode, chemin):
+    """'GET /api/expeditions/42/?x=1' -> 'GET /api/expeditions/{id}/'."""
+    return f"{methode} {RE_IDENTIFIANT.sub('/{id}', chemin.split('?', 1)[0])}"
+
+
+class Statistiques:
+    """Latences et codes HTTP par endpoint, partagés entre les threads."""
+
+    def __init__(self):
+        self._verrou = threading.Lock()
+        self.latences = defaultdict(list)
+        self.codes = defaultdict(Counter)
+        self.erreurs = Counter()
+
+    def enregistrer(self, nom, latence_ms, code):
+        with self._verrou:
+            self.codes[nom][code or 'reseau'] += 1
+            if code is None or code >= 400:
+                self.erreurs[nom] += 1
+            else:
+                self.latences[nom].append(latence_ms)
+
+    def rapport(self, duree_s):
+        lignes = []
+        for nom in sorted(self.codes):
+            resume = resumer(self.latences[nom], self.erreurs[nom], duree_s)
+            resume['taux_erreur'] = round(self.erreurs[nom] / resume['requetes'], 4)
+            resume['codes'] = {str(code): n for code, n in self.codes[nom].items()}
+            lignes.append({'endpoint': nom, **resume})
+        toutes = [ms for latences in self.latences.values() for ms in latences]
+        total = resumer(toutes, sum(self.erreurs.values()), duree_s)
+        total['taux_erreur'] = round(total['erreurs'] / total['requetes'], 4) if total['requetes'] else 0
+        return lignes, total
+
+
+class Session:
+    """Client HTTP d'un utilisateur virtuel, avec son jeton JWT."""
+
+    def __init__(self, url, stats, journal=None, timeout=30):
+        self.url = url.rstrip('/')
+        self.stats = stats
+        self.journal = journal
+        self.timeout = timeout
+        self.jeton = None
+        self.identifiants = None
+
+    def connecter(self, email, mot_de_passe):
+        self.identifiants = (email, mot_de_passe)
+        code, donnees = self.requete('POST', '/accounts/login/', {'username': email, 'password': mot_de_passe})
+        if code != 200:
+            raise RuntimeError(f"Échec de connexion de {email} (HTTP {code}) : {donnees}")
+        self.jeton = donnees['access']
+
+    def requete(self, methode, chemin, corps=None, nom=None):
+        """Exécute et mesure une requête ; renvoie (code, json ou None)."""
+        entetes = {'Accept': 'application/json'}
+        donnees = None
+        if corps is not None:
+            donnees = json.dumps(corps).encode('utf-8')
+            entetes['Content-Type'] = 'application/json'
+        if self.jeton:
+            entetes['Authorization'] = f"Bearer {self.jeton}"
+        req = urllib.request.Request(self.url + chemin, data=donnees, headers=entetes, method=methode)
+
+        debut = time.perf_counter()
+        contenu, code = b'', None
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as reponse:
+                contenu, code = reponse.read(), reponse.status
+        except urllib.error.HTTPError as e:
+            contenu, code = e.read(), e.code
+        except (urllib.error.URLError, TimeoutError, ConnectionError):
+            pass
+        latence = (time.perf_counter() - debut) * 1000
+
+        # Jeton expiré : reconnexion, la requête est rejouée sans être comptée
+        if code == 401 and self.jeton and self.identifiants and chemin != '/accounts/login/':
+            self.jeton = None
+            self.connecter(*self.identifiants)
+            return self.requete(methode, chemin, corps, nom)
+
+        self.stats.enregistrer(nom or nom_endpoint(methode, chemin), latence, code)
+        if self.journal:
+            self.journal.ecrire(methode, chemin, corps)
+        try:
+            return code, json.loads(contenu) if contenu else None
+        except ValueError:
+            return code, None
+
+
+class Journal:
+    """Enregistre les requêtes émises en JSON lines, rejouables avec --rejouer."""
+
+    def __init__(self, chemin):
+        self.fichier = open(chemin, 'w', encoding='utf-8')
+        self.debut = time.perf_counter()
+        self._verrou = threading.Lock()
+
+    def ecrire(self, methode, chemin, corps):
+        ligne = json.dumps({'decalage': round(time.perf_counter() - self.debut, 4),
+                            'methode': methode, 'chemin': chemin, 'corps': corps})
+        with self._verrou:
+            self.fichier.write(ligne + '\n')
+
+    def fermer(self):
+        self.fichier.close()
+
+
+def _resultats(donnees):
+    """Liste d'objets d'une réponse, paginée ou non."""
+    if isinstance(donnees, dict):
+        return donnees.get('results', [])
+    return donnees or []
+
+
+class Reservoirs:
+    """Identifiants réels utilisés par les scénarios, chargés au démarrage."""
+
+    def __init__(self, session, pages=5):
+        self._verrou = threading.Lock()
+        self.expeditions = self._charger(session, '/api/expeditions/', 'numexp', pages)
+        self.clients = self._charger(session, '/api/clients/', 'CodeClient', pages)
+        self.a_valider = (self._charger(session, '/api/expeditions/?statut=EN_ATTENTE', 'numexp', pages * 4)
+                          + self._charger(session, '/api/expeditions/?statut=EN_TRANSIT', 'numexp', pages * 4))
+        self.factures = self._charger(session, '/api/factures/impayees/', 'code_facture', 1)
+        self.tarifs = [(t['code_tarif'], t['destination'])
+                       for t in self._charger(session, '/api/tarifs/', None, pages)]
+        random.Random(0).shuffle(self.a_valider)
+
+    @staticmethod
+    def _charger(session, chemin, champ, pages):
+        """Parcourt au plus `pages` pages d'une liste ; renvoie le champ demandé (ou les objets)."""
+        objets = []
+        separateur = '&' if '?' in chemin else '?'
+        for page in range(1, pages + 1):
+            _, donnees = session.requete('GET', f"{chemin}{separateur}page={page}", nom='chargement')
+            objets += _resultats(donnees)
+            if not isinstance(donnees, dict) or not donnees.get('next'):
+                break
+        return [o[champ] for o in objets] if champ else objets
+
+    def prendre_a_valider(self):
+        """Une expédition ne peut être validée qu'une fois."""
+        with self._verrou:
+            return self.a_valider.pop() if self.a_valider else None
+
+
+# -- Profils ------------------------------------------------------------------
+# Chaque action reçoit (session, reservoirs, rng) et émet une requête.
+
+def _liste_expeditions(s, r, rng):
+    statut = rng.choice(['EN_TRANSIT', 'LIVRE', 'EN_ATTENTE'])
+    if rng.random() < 0.5:
+        s.requete('GET', f"/api/expeditions/?page={rng.randint(1, 5)}")
+    else:
+        s.requete('GET', f"/api/expeditions/?statut={statut}")
+
+
+def _recherche_expeditions(s, r, rng):
+    s.requete('GET', f"/api/expeditions/?search={rng.randint(1, 999)}")
+
+
+def _detail_expedition(s, r, rng):
+    if r.expeditions:
+        s.requete('GET', f"/api/expeditions/{rng.choice(r.expeditions)}/")
+
+
+def _creation_expedition(s, r, rng):
+    if r.clients and r.tarifs:
+        code_tarif, destination = rng.choice(r.tarifs)
+        s.requete('POST', '/api/expeditions/', {
+            'poids': f"{rng.uniform(0.5, 40):.2f}", 'volume': f"{rng.uniform(0.01, 0.5):.2f}",
+            'statut': 'EN_ATTENTE', 'code_client': rng.choice(r.clients),
+            'tarification': code_tarif, 'destination': destination,
+        })
+
+
+def _tournees(s, r, rng):
+    s.requete('GET', '/api/tournees/')
+
+
+def _validation_livraison(s, r, rng):
+    numexp = r.prendre_a_valider()
+    if numexp is None:
+        return _tournees(s, r, rng)
+    s.requete('POST', f"/api/expeditions/{numexp}/valider/", {})
+
+
+def _factures_impayees(s, r, rng):
+    s.requete('GET', '/api/factures/impayees/')
+
+
+def _detail_facture(s, r, rng):
+    if r.factures:
+        s.requete('GET', f"/api/factures/{rng.choice(r.factures)}/")
+
+
+def _saisie_paiement(s, r, rng):
+    if r.factures:
+        s.requete('POST', '/api/paiements/', {
+            'date': date.today().isoformat(), 'montant_verse': '1.00',
+            'mode_paiement': rng.choice(['ESPECES', 'VIREMENT', 'CHEQUE']),
+            'code_facture': rng.choice(r.factures),
+        })
+
+
+def _statistiques(s, r, rng):
+    s.requete('GET', rng.choice([
+        '/api/expeditions/statistiques/', '/api/incidents/statistiques/', '/api/factures/statistiques/',
+        '/api/paiements/statistiques/', '/api/expeditions/evolution/', '/api/factures/evolution_chiffre_affaires/',
+        '/api/incidents/zones/',
+    ]))
+
+
+PROFILS = {
+    'agent': [(40, _liste_expeditions), (15, _recherche_expeditions), (35, _detail_expedition),
+              (10, _creation_expedition)],
+    'chauffeur': [(30, _tournees), (50, _validation_livraison), (20, _detail_expedition)],
+    'comptable': [(30, _factures_impayees), (40, _detail_facture), (30, _saisie_paiement)],
+    'tableau': [(100, _statistiques)],
+}
+
+
+def utilisateur_virtuel(args, profil, stats, reservoirs, journal, fin, numero):
+    rng = random.Random(args.graine + numero)
+    session = Session(args.url, stats, journal)
+    session.connecter(args.email, args.mot_de_passe)
+    poids = [p for p, _ in PROFILS[profil]]
+    actions = [a for _, a in PROFILS[profil]]
+    while time.monotonic() < fin:
+        rng.choices(actions, weights=poids)[0](session, reservoirs, rng)
+        if args.pause_ms:
+            time.sleep(rng.expovariate(1000 / args.pause_ms))
+
+
+def repartir_profils(mix, nombre):
+    """Attribue un profil à chaque utilisateur, au prorata des poids du mix."""
+    total = sum(mix.values())
+    bornes, cumul = [], 0
+    for profil, poids in mix.items():
+        cumul += poids / total
+        bornes.append((cumul, profil))
+    return [next(profil for borne, profil in bornes if (i + 0.5) / nombre <= borne + 1e-9) for i in range(nombre)]
+
+
+def lancer_melange(args, stats):
+    mix = dict((nom, int(poids)) for nom, poids in (p.split('=') for p in args.mix.split(',')))
+    inconnus = set(mix) - set(PROFILS)
+    if inconnus:
+        raise SystemExit(f"Profils inconnus : {', '.join(sorted(inconnus))}")
+    preparation = Session(args.url, Statistiques())
+    preparation.connecter(args.email, args.mot_de_passe)
+    reservoirs = Reservoirs(preparation)
+    print(f"Réservoirs : {len(reservoirs.expeditions)} expéditions, {len(reservoirs.a_valider)} à valider, "
+          f"{len(reservoirs.factures)} factures impayées")
+
+    journal = Journal(args.journal) if args.journal else None
+    profils = repartir_profils(mix, args.utilisateurs)
+    print(f"Utilisateurs : {dict(Counter(profils))}")
+    fin = time.monotonic() + args.montee + args.duree
+    threads = []
+    for numero, profil in enumerate(profils):
+        t = threading.Thread(target=utilisateur_virtuel, daemon=True,
+                             args=(args, profil, stats, reservoirs, journal, fin, numero))
+        t.start()
+        threads.append(t)
+        if args.montee:
+            time.sleep(args.montee / len(profils))
+    for t in threads:
+        t.join()
+    if journal:
+        journal.fermer()
+
+
+def _horodatage(texte):
+    """Date d'un access log : format combined (gunicorn, nginx) ou runserver."""
+    for format_date in ('%d/%b/%Y:%H:%M:%S %z', '%d/%b/%Y %H:%M:%S'):
+        try:
+            return datetime.strptime(texte, format_date).timestamp()
+        except ValueError:
+            continue
+    raise ValueError(f"Date d'access log non reconnue : {texte}")
+
+
+def lire_journal(chemin):
+    """[(decalage_s, methode, chemin, corps)] depuis un journal JSON lines ou un access log."""
+    entrees, origine = [], None
+    with open(chemin, encoding='utf-8') as f:
+        for ligne in f:
+            ligne = ligne.strip()
+            if not ligne:
+                continue
+            if ligne.startswith('{'):
+                e = json.loads(ligne)
+                entrees.append((e.get('decalage', 0), e['methode'], e['chemin'], e.get('corps')))
+                continue
+            m = RE_ACCESS_LOG.search(ligne)
+            if not m:
+                continue
+            instant = _horodatage(m['date'])
+            origine = instant if origine is None else origine
+            # Un access log ne contient pas les corps : seuls les GET sont rejouables tels quels
+            entrees.append((instant - origine, m['methode'], m['chemin'], None if m['methode'] == 'GET' else {}))
+    return sorted(entrees, key=lambda e: e[0])
+
+
+def lancer_rejeu(args, stats):
+    entrees = lire_journal(args.rejouer)
+    print(f"Rejeu de {len(entrees)} requêtes ({'vitesse x' + str(args.vitesse) if args.vitesse else 'au plus vite'})")
+    file = queue.Queue()
+    for entree in entrees:
+        file.put(entree)
+    debut = time.monotonic()
+
+    def travailleur():
+        session = Session(args.url, stats)
+        if args.email:
+            session.connecter(args.email, args.mot_de_passe)
+        while True:
+            try:
+                decalage, methode, chemin, corps = file.get_nowait()
+            except queue.Empty:
+                return
+            if args.vitesse:
+                attente = debut + decalage / args.vitesse - time.monotonic()
+                if attente > 0:
+                    time.sleep(attente)
+            session.requete(methode, chemin, corps)
+
+    threads = [threading.Thread(target=travailleur, daemon=True) for _ in range(args.utilisateurs)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://localhost:8000')
+    parser.add_argument('--email', default=os.environ.get('CHARGE_EMAIL'))
+    parser.add_argument('--mot-de-passe', default=os.environ.get('CHARGE_MOT_DE_PASSE'))
+    parser.add_argument('--utilisateurs', type=int, default=20, help="Utilisateurs virtuels simultanés")
+    parser.add_argument('--duree', type=float, default=60, help="Durée du palier, en secondes")
+    parser.add_argument('--montee', type=float, default=0, help="Durée de montée en charge, en secondes")
+    parser.add_argument('--pause-ms', type=float, default=500, help="Temps de réflexion moyen entre deux actions")
+    parser.add_argument('--mix', default='agent=40,chauffeur=20,comptable=15,tableau=25')
+    parser.add_argument('--graine', type=int, default=42)
+    parser.add_argument('--journal', help="Enregistre les requêtes émises (JSON lines) pour un rejeu")
+    parser.add_argument('--rejouer', metavar='FICHIER', help="Rejoue un journal au lieu du mélange")
+    parser.add_argument('--vitesse', type=float, default=1.0,
+                        help="Rejeu : facteur d'accélération du temps (0 = au plus vite)")
+    parser.add_argument('--taux-erreur-max', type=float, help="Code de sortie 1 au-delà de ce taux d'erreur global")
+    parser.add_argument('--sortie', help="Fichier JSON de résultats")
+    args = parser.parse_args()
+    if not args.rejouer and not (args.email and args.mot_de_passe):
+        parser.error("--email et --mot-de-passe (ou CHARGE_EMAIL / CHARGE_MOT_DE_PASSE) sont requis")
+
+    stats = Statistiques()
+    debut = time.perf_counter()
+    if args.rejouer:
+        lancer_rejeu(args, stats)
+    else:
+        lancer_melange(args, stats)
+    duree = time.perf_counter() - debut
+
+    lignes, total = stats.rapport(duree)
+    print()
+    afficher_tableau(lignes, ['endpoint', 'requetes', 'erreurs', 'taux_erreur', 'debit_rps', 'p50_ms', 'p95_ms', 'p99_ms'])
+    print(f"\nTotal : {total['requetes']} requêtes en {duree:.1f} s, {total['debit_rps']} req/s, "
+          f"{total['taux_erreur'] * 100:.2f} % d'erreurs, p50 {total['p50_ms']} ms, p99 {total['p99_ms']} ms")
+    if args.sortie:
+        ecrire_json(args.sortie, {
+            'meta': {'url': args.url, 'utilisateurs': args.utilisateurs, 'duree_s': round(duree, 1),
+                     'mix': None if args.rejouer else args.mix, 'rejeu': args.rejouer},
+            'total': total,
+            'endpoints': lignes,
+        })
+    if args.taux_erreur_max is not None and total['taux_erreur'] > args.taux_erreur_max:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
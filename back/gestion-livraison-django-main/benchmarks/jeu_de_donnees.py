@@ -0,0 +1,47 @@
+"""
+Jeu de données de benchmark, produit par le générateur de
+`manage.py generer_donnees`. Déterministe pour une graine donnée.
+"""
+from datetime import date
+
+from clients.models import Client
+from dashboard.generation import GenerateurDonnees
+from expeditions.models import Expedition
+from facturation.models import Facture
+from logistique.models import Tarification, Tournee
+
+# Date de fin fixe : deux runs de la suite portent sur les mêmes données
+DATE_FIN = date(2026, 1, 31)
+
+
+def generer(taille, reserve=0, graine=42):
+    """
+    Génère `taille` expéditions et les données liées, puis renvoie un dict
+    des identifiants utiles aux scénarios. `reserve` expéditions non
+    facturées sont mises de côté pour les scénarios de rattachement.
+    """
+    generateur = GenerateurDonnees(graine=graine, date_fin=DATE_FIN)
+    generateur.referentiels()
+    generateur.clients(max(1, taille // 10))
+    generateur.expeditions(taille)
+    generateur.tournees(max(1, taille // 100))
+    generateur.reclamations(max(1, taille // 50))
+    generateur.finaliser()
+
+    non_facturees = list(
+        Expedition.objects.filter(etre_facture_set__isnull=True)
+        .order_by('-numexp').values_list('numexp', flat=True)[:reserve]
+    )
+    if len(non_facturees) < reserve:
+        raise ValueError(f"Seulement {len(non_facturees)} expéditions non facturées pour une réserve de {reserve}.")
+
+    return {
+        'expeditions': list(Expedition.objects.exclude(numexp__in=non_facturees)
+                            .order_by('numexp').values_list('numexp', flat=True)[:1000]),
+        'reserve': non_facturees,
+        'factures': list(Facture.objects.filter(est_payee=False)
+                         .order_by('code_facture').values_list('code_facture', flat=True)[:1000]),
+        'clients': list(Client.objects.order_by('CodeClient').values_list('CodeClient', flat=True)[:1000]),
+        'tarifs': list(Tarification.objects.order_by('code_tarif').values_list('code_tarif', 'destination_id')),
+        'tournee': Tournee.objects.filter(statut='EN_COURS').order_by('code_t').values_list('code_t', flat=True)[0],
+    }
@@ -0,0 +1,80 @@
+"""
+Fonctions communes aux scripts de benchmark : mesures HTTP, percentiles,
+résumé et sauvegarde des résultats en JSON.
+"""
+import json
+import statistics
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+def percentile(valeurs, p):
+    """Percentile p (0-100) par interpolation linéaire, valeurs non triées."""
+    if not valeurs:
+        return None
+    triees = sorted(valeurs)
+    rang = (len(triees) - 1) * p / 100
+    bas = int(rang)
+    haut = min(bas + 1, len(triees) - 1)
+    return triees[bas] + (triees[haut] - triees[bas]) * (rang - bas)
+
+
+def resumer(latences_ms, erreurs=0, duree_s=None):
+    """Résumé standard d'une série de latences en millisecondes."""
+    resume = {
+        'requetes': len(latences_ms) + erreurs,
+        'erreurs': erreurs,
+        'p50_ms': round(percentile(latences_ms, 50), 2) if latences_ms else None,
+        'p95_ms': round(percentile(latences_ms, 95), 2) if latences_ms else None,
+        'p99_ms': round(percentile(latences_ms, 99), 2) if latences_ms else None,
+        'moyenne_ms': round(statistics.fmean(latences_ms), 2) if latences_ms else None,
+        'max_ms': round(max(latences_ms), 2) if latences_ms else None,
+    }
+    if duree_s:
+        resume['debit_rps'] = round(len(latences_ms) / duree_s, 1)
+    return resume
+
+
+def requete_http(url, headers=None, timeout=30):
+    """Exécute un GET et renvoie (latence_ms, code_http ou None si erreur réseau)."""
+    req = urllib.request.Request(url, headers=headers or {})
+    debut = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as reponse:
+            reponse.read()
+            code = reponse.status
+    except urllib.error.HTTPError as e:
+        code = e.code
+    except (urllib.error.URLError, TimeoutError, ConnectionError):
+        code = None
+    return (time.perf_counter() - debut) * 1000, code
+
+
+def charger_url(url, total, concurrence, headers=None):
+    """
+    Envoie `total` GET sur `url` avec `concurrence` clients simultanés.
+    Renvoie le résumé (latences, débit, erreurs).
+    """
+    debut = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrence) as pool:
+        mesures = list(pool.map(lambda _: requete_http(url, headers), range(total)))
+    duree = time.perf_counter() - debut
+    latences = [ms for ms, code in mesures if code is not None and code < 400]
+    erreurs = len(mesures) - len(latences)
+    return resumer(latences, erreurs, duree)
+
+
+def ecrire_json(chemin, donnees):
+    with open(chemin, 'w', encoding='utf-8') as f:
+        json.dump(donnees, f, indent=2, ensure_ascii=False, default=str)
+    print(f"Résultats écrits dans {chemin}")
+
+
+def afficher_tableau(lignes, colonnes):
+    """Affiche une liste de dicts sous forme de tableau texte."""
+    largeurs = {c: max(len(c), *(len(str(l.get(c, ''))) for l in lignes)) for c in colonnes}
+    print('  '.join(c.ljust(largeurs[c]) for c in colonnes))
+    for ligne in lignes:
+        print('  '.join(str(ligne.get(c, '')).ljust(largeurs[c]) for c in colonnes))
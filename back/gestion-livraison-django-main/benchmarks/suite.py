@@ -0,0 +1,250 @@
+"""
+Suite de benchmarks des chemins chauds de l'API et des modèles.
+
+Crée une base de test dédiée (test_<NAME>, comme `manage.py test`), y insère
+un jeu de données de la taille demandée, puis mesure chaque scénario :
+latences p50/p95/p99, nombre de requêtes SQL par appel et pic mémoire Python.
+
+    python benchmarks/suite.py --taille 10000 --iterations 50 --sortie bench.json
+    python benchmarks/suite.py --taille 10000 --comparer bench_reference.json
+
+Avec --comparer, un scénario est signalé en régression si son p50 dépasse
+la référence de plus de --seuil (20 % par défaut) ou s'il fait plus de
+requêtes SQL ; le script sort alors avec le code 1.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import date
+from itertools import count
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import override_settings, setup_test_environment  # noqa: E402
+
+from benchmarks.jeu_de_donnees import generer  # noqa: E402
+from benchmarks.outils import afficher_tableau, ecrire_json, percentile  # noqa: E402
+from logistique.models import Tournee  # noqa: E402
+from supervision.instrumentation import Collecteur, activer, brancher_connexion, desactiver  # noqa: E402
+
+
+class Scenarios:
+    """Chaque méthode `s_<nom>` exécute une fois le scénario <nom>."""
+
+    def __init__(self, donnees):
+        self.d = donnees
+        self.client = Client()
+        self.compteur = count()
+
+    def _get(self, url):
+        reponse = self.client.get(url)
+        assert reponse.status_code == 200, (url, reponse.status_code)
+
+    def _post(self, url, data, attendu=(200, 201)):
+        reponse = self.client.post(url, data, content_type='application/json')
+        assert reponse.status_code in attendu, (url, reponse.status_code, reponse.content[:300])
+
+    def _suivant(self, liste):
+        return liste[next(self.compteur) % len(liste)]
+
+    def s_expeditions_liste(self):
+        self._get('/api/expeditions/')
+
+    def s_expeditions_detail(self):
+        self._get(f"/api/expeditions/{self._suivant(self.d['expeditions'])}/")
+
+    def s_expeditions_creation(self):
+        code_tarif, destination = self._suivant(self.d['tarifs'])
+        self._post('/api/expeditions/', {
+            'poids': '12.50', 'volume': '0.40', 'statut': 'EN_ATTENTE',
+            'code_client': self._suivant(self.d['clients']),
+            'tarification': code_tarif, 'destination': destination,
+        })
+
+    def s_factures_liste(self):
+        self._get('/api/factures/')
+
+    def s_factures_detail(self):
+        self._get(f"/api/factures/{self._suivant(self.d['factures'])}/")
+
+    def s_paiement_saisie(self):
+        self._post('/api/paiements/', {
+            'date': date.today().isoformat(), 'montant_verse': '1.00', 'mode_paiement': 'ESPECES',
+            'code_facture': self._suivant(self.d['factures']),
+        })
+
+    def s_facture_rattachement(self):
+        numexp = self.d['reserve'].pop()
+        self._post(f"/api/factures/{self._suivant(self.d['factures'])}/ajouter_expedition/", {'numexp': numexp})
+
+    def s_expeditions_statistiques(self):
+        self._get('/api/expeditions/statistiques/')
+
+    def s_expeditions_evolution(self):
+        self._get('/api/expeditions/evolution/')
+
+    def s_incidents_statistiques(self):
+        self._get('/api/incidents/statistiques/')
+
+    def s_incidents_zones(self):
+        self._get('/api/incidents/zones/')
+
+    def s_incidents_points_chauds(self):
+        self._get('/api/incidents/points_chauds/?periode=mois&du=2025-02-01&au=2026-01-31')
+
+    def s_factures_statistiques(self):
+        self._get('/api/factures/statistiques/')
+
+    def s_factures_evolution_ca(self):
+        self._get('/api/factures/evolution_chiffre_affaires/')
+
+    def s_paiements_statistiques(self):
+        self._get('/api/paiements/statistiques/')
+
+    def s_tournee_controle_capacite(self):
+        Tournee.objects.select_related('vehicule', 'chauffeur').get(pk=self.d['tournee']).save()
+
+    @classmethod
+    def noms(cls):
+        return [nom[2:] for nom in dir(cls) if nom.startswith('s_')]
+
+
+def mesurer(scenarios, nom, iterations, echauffement):
+    fonction = getattr(scenarios, f"s_{nom}")
+    for _ in range(echauffement):
+        fonction()
+
+    # Passe mémoire séparée : tracemalloc fausserait les latences
+    tracemalloc.start()
+    fonction()
+    _, pic = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latences, requetes = [], []
+    for _ in range(iterations):
+        collecteur = Collecteur()
+        jeton = activer(collecteur)
+        debut = time.perf_counter()
+        try:
+            fonction()
+        finally:
+            duree = (time.perf_counter() - debut) * 1000
+            desactiver(jeton)
+        latences.append(duree)
+        requetes.append(collecteur.nb_requetes)
+
+    return {
+        'iterations': iterations,
+        'p50_ms': round(percentile(latences, 50), 3),
+        'p95_ms': round(percentile(latences, 95), 3),
+        'p99_ms': round(percentile(latences, 99), 3),
+        'moyenne_ms': round(sum(latences) / len(latences), 3),
+        'requetes_sql': max(requetes),
+        'memoire_pic_ko': round(pic / 1024, 1),
+    }
+
+
+def comparer(resultats, reference, seuil):
+    regressions = []
+    lignes = []
+    for nom, mesure in resultats['scenarios'].items():
+        ref = reference['scenarios'].get(nom)
+        if not ref:
+            continue
+        ecart = (mesure['p50_ms'] - ref['p50_ms']) / ref['p50_ms'] if ref['p50_ms'] else 0
+        sql_en_plus = mesure['requetes_sql'] - ref['requetes_sql']
+        regression = ecart > seuil or sql_en_plus > 0
+        if regression:
+            regressions.append(nom)
+        lignes.append({
+            'scenario': nom,
+            'p50 ref': ref['p50_ms'], 'p50': mesure['p50_ms'], 'écart': f"{ecart * 100:+.1f}%",
+            'sql ref': ref['requetes_sql'], 'sql': mesure['requetes_sql'],
+            'statut': 'RÉGRESSION' if regression else 'ok',
+        })
+    print()
+    afficher_tableau(lignes, ['scenario', 'p50 ref', 'p50', 'écart', 'sql ref', 'sql', 'statut'])
+    return regressions
+
+
+def _commit_git():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--taille', type=int, default=5000, help="Nombre d'expéditions générées")
+    parser.add_argument('--iterations', type=int, default=30)
+    parser.add_argument('--echauffement', type=int, default=3)
+    parser.add_argument('--scenarios', help="Liste séparée par des virgules (défaut : tous)")
+    parser.add_argument('--sortie', help="Fichier JSON de résultats")
+    parser.add_argument('--comparer', metavar='REFERENCE', help="Résultats JSON de référence")
+    parser.add_argument('--seuil', type=float, default=0.20, help="Tolérance de régression sur le p50")
+    parser.add_argument('--garder-base', action='store_true', help="Ne pas supprimer la base de test")
+    args = parser.parse_args()
+
+    noms = args.scenarios.split(',') if args.scenarios else Scenarios.noms()
+    inconnus = set(noms) - set(Scenarios.noms())
+    if inconnus:
+        parser.error(f"Scénarios inconnus : {', '.join(sorted(inconnus))}")
+
+    setup_test_environment()
+    # Le middleware d'instrumentation poserait son propre collecteur et
+    # masquerait celui de la suite : on le rend transparent.
+    override_settings(SQL_INSTRUMENTATION={'ENTETES': False, 'ECHANTILLONNAGE': 0}).enable()
+    nom_base_origine = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=1, autoclobber=True)
+    brancher_connexion(None, connection)
+    try:
+        reserve = (args.echauffement + args.iterations + 1) * (1 if 'facture_rattachement' in noms else 0)
+        debut = time.perf_counter()
+        donnees = generer(args.taille, reserve=reserve)
+        print(f"Jeu de données ({args.taille} expéditions) créé en {time.perf_counter() - debut:.1f} s")
+
+        scenarios = Scenarios(donnees)
+        resultats = {
+            'meta': {
+                'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'commit': _commit_git(),
+                'taille': args.taille,
+                'iterations': args.iterations,
+                'base': connection.vendor,
+            },
+            'scenarios': {},
+        }
+        for nom in noms:
+            mesure = mesurer(scenarios, nom, args.iterations, args.echauffement)
+            resultats['scenarios'][nom] = mesure
+            print(f"{nom:28} p50 {mesure['p50_ms']:>9} ms  p99 {mesure['p99_ms']:>9} ms  "
+                  f"{mesure['requetes_sql']:>4} SQL  {mesure['memoire_pic_ko']:>9} Ko")
+    finally:
+        if not args.garder_base:
+            connection.creation.destroy_test_db(nom_base_origine, verbosity=1)
+
+    if args.sortie:
+        ecrire_json(args.sortie, resultats)
+    if args.comparer:
+        with open(args.comparer, encoding='utf-8') as f:
+            reference = json.load(f)
+        regressions = comparer(resultats, reference, args.seuil)
+        if regressions:
+            print(f"\n{len(regressions)} régression(s) : {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -2,10 +2,106 @@ from django.contrib import admin
 
 # Register your models here.
 from django.contrib import admin
-from .models import Client, Historique, Reclamation, Rapport, Contient
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.db.models.constants import LOOKUP_SEP
+
+from config.pagination import PaginateurEstime
+
+from .models import Client, Ecriture, Historique, Reclamation, Rapport, Contient
+from .recherche import rechercher
+
+LIMITE_RECHERCHE = 100
+
+
+class RechercheParClientMixin:
+    """
+    Recherche de l'admin par les index de clients/recherche.py plutôt que
+    par des icontains sur toute la table : un nombre retrouve la ligne par sa
+    clé ou les lignes du client de ce code ; un texte (nom, e-mail,
+    téléphone) les lignes des clients qu'il désigne. Sert aussi aux widgets
+    d'autocomplétion qui pointent vers ce modèle.
+    """
+    champ_client = 'code_client'
+    search_fields = ['pk']  # active la barre de recherche ; la recherche elle-même est ci-dessous
+
+    def get_search_results(self, request, queryset, search_term):
+        terme = search_term.strip()
+        if not terme:
+            return queryset, False
+        client = self.champ_client
+        if LOOKUP_SEP not in client:
+            client = self.model._meta.get_field(client).attname
+        critere = Q(**{f'{client}__in': [c['CodeClient'] for c in rechercher(terme, LIMITE_RECHERCHE)]})
+        try:
+            critere |= Q(pk=self.model._meta.pk.to_python(terme))
+        except ValidationError:
+            pass
+        if terme.isdigit():
+            critere |= Q(**{client: int(terme)})
+        return queryset.filter(critere), False
+
+
+class GrandeTableAdminMixin:
+    """Listes de l'admin sans COUNT(*) complet sur les grandes tables (config/pagination.py)."""
+    paginator = PaginateurEstime
+    show_full_result_count = False
+
+
+@admin.register(Client)
+class ClientAdmin(GrandeTableAdminMixin, RechercheParClientMixin, admin.ModelAdmin):
+    champ_client = 'CodeClient'
+    list_display = ['CodeClient', 'Nom', 'Prenom', 'Email', 'Solde', 'PlafondCredit']
+    readonly_fields = ['Solde']  # tenu par le grand livre ; corriger par une écriture d'ajustement
+    ordering = ['CodeClient']
+
+
+@admin.register(Ecriture)
+class EcritureAdmin(GrandeTableAdminMixin, RechercheParClientMixin, admin.ModelAdmin):
+    champ_client = 'CodeClient'
+    list_display = ['CodeEcriture', 'CodeClient', 'TypeEcriture', 'Montant', 'SoldeApres', 'Reference', 'DateEcriture']
+    list_filter = ['TypeEcriture']
+    list_select_related = ['CodeClient']
+    raw_id_fields = ['CodeClient']
+    ordering = ['-CodeEcriture']
+
+    # Ajout seul, et par comptabiliser() pour que le solde suive
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(Historique)
+class HistoriqueAdmin(GrandeTableAdminMixin, admin.ModelAdmin):
+    """Journal d'audit, en lecture seule : écrit par clients/audit.py."""
+    list_display = ['CodeHist', 'DateAction', 'TypeAction', 'Objet', 'CleObjet', 'CodeClient', 'Utilisateur']
+    list_filter = ['TypeAction', 'Objet']
+    list_select_related = ['CodeClient', 'Utilisateur']
+    search_fields = ['=CleObjet']  # index (Objet, CleObjet, DateAction)
+    ordering = ['-DateAction', '-CodeHist']
+    readonly_fields = [f.name for f in Historique._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(Reclamation)
+class ReclamationAdmin(GrandeTableAdminMixin, RechercheParClientMixin, admin.ModelAdmin):
+    champ_client = 'CodeClient'
+    list_display = ['CodeREC', 'Nature', 'Date', 'Etat', 'CodeClient', 'Echeance', 'DateResolution']
+    list_filter = ['Etat', 'Nature']
+    list_select_related = ['CodeClient']
+    autocomplete_fields = ['CodeClient']
+    readonly_fields = ['DateResolution', 'Echeance']
+
 
-admin.site.register(Client)
-admin.site.register(Historique)
-admin.site.register(Reclamation)
 admin.site.register(Rapport)
 admin.site.register(Contient)
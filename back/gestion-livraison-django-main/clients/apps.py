@@ -1,3 +1,7 @@
 from django.apps import AppConfig
 class ClientsConfig(AppConfig):
     name = 'clients'
+
+    def ready(self):
+        from . import audit, reclamations  # noqa: F401 (signaux)
+        audit.connecter()
@@ -0,0 +1,310 @@
+"""
+Journal d'audit (table Historique) des créations, modifications et
+suppressions de clients, expéditions, factures et paiements.
+
+Rien n'est écrit pendant la requête : chaque événement est remis, au commit
+de la transaction qui l'a produit, à un tampon en mémoire du processus. Un
+thread de fond le vide par bulk_create, par lots de AUDIT['TAILLE_LOT'] ou
+toutes les AUDIT['INTERVALLE'] secondes. Une transaction annulée ne laisse
+donc aucune trace, et une requête ne paie que l'ajout au tampon.
+
+Les événements encore en mémoire sont perdus si le processus est tué
+brutalement (un arrêt normal vide le tampon). Le client d'un paiement dont
+la facture n'est pas chargée est résolu au vidage, une requête par lot.
+
+AuditMiddleware rend l'utilisateur de la requête disponible pour les
+événements qu'elle produit.
+"""
+import atexit
+import logging
+import os
+import threading
+from contextvars import ContextVar
+from datetime import datetime, time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.utils import timezone
+
+from config import partitions
+
+from .models import Historique
+
+logger = logging.getLogger(__name__)
+
+_requete_courante = ContextVar('requete_audit', default=None)
+
+
+def config():
+    return settings.AUDIT
+
+
+class AuditMiddleware:
+    """Garde la requête courante : son utilisateur signe les événements d'audit."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        jeton = _requete_courante.set(request)
+        try:
+            return self.get_response(request)
+        finally:
+            _requete_courante.reset(jeton)
+
+    async def __acall__(self, request):
+        jeton = _requete_courante.set(request)
+        try:
+            return await self.get_response(request)
+        finally:
+            _requete_courante.reset(jeton)
+
+
+def _utilisateur_courant():
+    # DRF recopie l'utilisateur authentifié (JWT) sur la requête Django
+    utilisateur = getattr(_requete_courante.get(), 'user', None)
+    if utilisateur is not None and utilisateur.is_authenticated:
+        return utilisateur.pk
+    return None
+
+
+class Journal:
+    """Tampon d'événements d'un processus, vidé en base par un thread de fond."""
+
+    def __init__(self):
+        self._initialiser()
+
+    def _initialiser(self):
+        self._pid = os.getpid()
+        self._tampon = []
+        self._verrou = threading.Lock()
+        self._ecriture = threading.Lock()
+        self._reveil = threading.Event()
+        self._thread = None
+
+    def ajouter(self, historique):
+        if self._pid != os.getpid():
+            # Processus issu d'un fork : ni le tampon ni le thread du parent
+            self._initialiser()
+        with self._verrou:
+            if len(self._tampon) >= config()['TAMPON_MAX']:
+                # Base indisponible depuis longtemps : on perd les plus anciens
+                del self._tampon[:config()['TAILLE_LOT']]
+                logger.warning("Journal d'audit saturé : %s événements abandonnés", config()['TAILLE_LOT'])
+            self._tampon.append(historique)
+            plein = len(self._tampon) >= config()['TAILLE_LOT']
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._boucle, name='journal-audit', daemon=True)
+                self._thread.start()
+        if plein:
+            self._reveil.set()
+
+    def _boucle(self):
+        while True:
+            self._reveil.wait(config()['INTERVALLE'])
+            self._reveil.clear()
+            try:
+                self.vider()
+            except DatabaseError:
+                logger.exception("Journal d'audit : écriture impossible, nouvel essai au prochain cycle")
+            finally:
+                close_old_connections()
+
+    def vider(self):
+        """Écrit tout le tampon ; renvoie le nombre d'événements écrits."""
+        ecrits = 0
+        with self._ecriture:
+            while True:
+                with self._verrou:
+                    lot = self._tampon[:config()['TAILLE_LOT']]
+                if not lot:
+                    return ecrits
+                _resoudre_clients(lot)
+                Historique.objects.bulk_create(lot)
+                with self._verrou:
+                    del self._tampon[:len(lot)]
+                ecrits += len(lot)
+
+    def __len__(self):
+        return len(self._tampon)
+
+
+journal = Journal()
+atexit.register(lambda: journal.vider() if len(journal) else None)
+
+
+def _resoudre_clients(lot):
+    from facturation.models import Facture
+
+    factures = {h._facture for h in lot if h.CodeClient_id is None and getattr(h, '_facture', None)}
+    if not factures:
+        return
+    clients = dict(Facture.objects.filter(pk__in=factures).values_list('pk', 'code_client_id'))
+    for historique in lot:
+        if historique.CodeClient_id is None and getattr(historique, '_facture', None):
+            historique.CodeClient_id = clients.get(historique._facture)
+
+
+# --- Capture ---
+
+class Audite:
+    """Description d'un modèle audité : libellé, champs relevés, client concerné."""
+
+    def __init__(self, objet, libelle, feminin, champs, client):
+        self.objet = objet
+        self.libelle = libelle
+        self.feminin = feminin
+        self.champs = champs
+        self.client = client
+
+    def participe(self, type_action):
+        participe = {'CREATION': 'créé', 'MODIFICATION': 'modifié', 'SUPPRESSION': 'supprimé'}[type_action]
+        return participe + 'e' if self.feminin else participe
+
+
+def _client_paiement(paiement):
+    if paiement._meta.get_field('code_facture').is_cached(paiement):
+        return paiement.code_facture.code_client_id, None
+    # Résolu au vidage du tampon, une requête par lot
+    return None, paiement.code_facture_id
+
+
+def _audites():
+    from expeditions.models import Expedition
+    from facturation.models import Facture, Paiement
+
+    from .models import Client
+
+    return {
+        Client: Audite('client', "Client", False,
+                       ['Nom', 'Prenom', 'Adresse', 'Tel', 'Email', 'PlafondCredit'],
+                       lambda client: (client.pk, None)),
+        Expedition: Audite('expedition', "Expédition", True,
+                           ['statut', 'poids', 'volume', 'code_client', 'destination', 'tarification',
+                            'montant_estime', 'description'],
+                           lambda expedition: (expedition.code_client_id, None)),
+        Facture: Audite('facture', "Facture", True,
+                        ['code_client', 'date_f', 'ht', 'tva', 'ttc', 'est_payee', 'remarques'],
+                        lambda facture: (facture.code_client_id, None)),
+        Paiement: Audite('paiement', "Paiement", False,
+                         ['code_facture', 'date', 'montant_verse', 'mode_paiement', 'remarques'],
+                         _client_paiement),
+    }
+
+
+_ABSENT = object()
+
+
+def _valeurs(audite, instance):
+    """Valeurs chargées des champs audités (un champ différé reste absent)."""
+    return {
+        nom: instance.__dict__.get(instance._meta.get_field(nom).attname, _ABSENT)
+        for nom in audite.champs
+    }
+
+
+def _modifies(audite, instance, update_fields):
+    """
+    Champs audités réellement modifiés depuis le chargement : update_fields
+    ne suffit pas, les modèles à champs tenus le remplissent à chaque save().
+    """
+    initiales = getattr(instance, '_audit_initial', {})
+    actuelles = _valeurs(audite, instance)
+    instance._audit_initial = actuelles
+    return [
+        nom for nom in audite.champs
+        if (update_fields is None or nom in update_fields)
+        and (initiales.get(nom, _ABSENT) is _ABSENT or initiales[nom] != actuelles[nom])
+    ]
+
+
+def _evenement(audite, instance, type_action, update_fields=None):
+    champs = audite.champs
+    if type_action == 'MODIFICATION':
+        champs = _modifies(audite, instance, update_fields)
+        if not champs:
+            return
+    details = {}
+    for nom in champs:
+        champ = instance._meta.get_field(nom)
+        details[champ.attname] = champ.value_from_object(instance)
+    client, facture = audite.client(instance)
+
+    description = f"{audite.libelle} {instance.pk} {audite.participe(type_action)}"
+    if type_action == 'MODIFICATION':
+        description += f" ({', '.join(champs)})"
+    historique = Historique(
+        DateAction=timezone.now(), TypeAction=type_action, Description=description,
+        Objet=audite.objet, CleObjet=str(instance.pk), Details=details,
+        CodeClient_id=client, Utilisateur_id=_utilisateur_courant(),
+    )
+    historique._facture = facture
+    # Remis au journal seulement si la transaction est validée
+    transaction.on_commit(lambda: journal.ajouter(historique))
+
+
+def consigner(type_action, description, objet, cle, client=None, details=None):
+    """Événement d'une opération en masse (import, fusion) qui contourne les signaux des modèles."""
+    if not config()['ACTIF']:
+        return
+    historique = Historique(
+        DateAction=timezone.now(), TypeAction=type_action, Description=description,
+        Objet=objet, CleObjet=str(cle), Details=details,
+        CodeClient_id=client, Utilisateur_id=_utilisateur_courant(),
+    )
+    transaction.on_commit(lambda: journal.ajouter(historique))
+
+
+def connecter():
+    """Branche les signaux d'audit (appelé par ClientsConfig.ready)."""
+    if not config()['ACTIF']:
+        return
+    for modele, audite in _audites().items():
+        def memoriser(sender, instance, audite=audite, **kwargs):
+            instance._audit_initial = _valeurs(audite, instance)
+
+        def enregistrer(sender, instance, created, update_fields=None, audite=audite, **kwargs):
+            if created:
+                instance._audit_initial = _valeurs(audite, instance)
+                _evenement(audite, instance, 'CREATION')
+            else:
+                _evenement(audite, instance, 'MODIFICATION', update_fields)
+
+        def supprimer(sender, instance, audite=audite, **kwargs):
+            _evenement(audite, instance, 'SUPPRESSION')
+
+        post_init.connect(memoriser, sender=modele, weak=False, dispatch_uid=f'audit_init_{audite.objet}')
+        post_save.connect(enregistrer, sender=modele, weak=False, dispatch_uid=f'audit_save_{audite.objet}')
+        post_delete.connect(supprimer, sender=modele, weak=False, dispatch_uid=f'audit_delete_{audite.objet}')
+
+
+# --- Partitions et rétention ---
+
+def maintenir_historique():
+    """
+    Crée les partitions des AUDIT['MOIS_AVANCE'] prochains mois et supprime
+    celles qui dépassent AUDIT['CONSERVATION_MOIS']. Hors PostgreSQL, la
+    rétention se fait par DELETE.
+    """
+    table = Historique._meta.db_table
+    mois_courant = partitions.debut_mois(timezone.now().date())
+    limite = partitions.mois_suivant(mois_courant, -config()['CONSERVATION_MOIS'])
+    if not partitions.est_partitionnee(table):
+        supprimes, _ = Historique.objects.filter(
+            DateAction__lt=timezone.make_aware(datetime.combine(limite, time.min))
+        ).delete()
+        return {'partitions_creees': [], 'partitions_supprimees': [], 'lignes_supprimees': supprimes}
+    creees = partitions.creer_partitions(
+        table, 'DateAction', mois_courant, partitions.mois_suivant(mois_courant, config()['MOIS_AVANCE'])
+    )
+    supprimees = partitions.supprimer_partitions(table, 'DateAction', limite)
+    return {'partitions_creees': creees, 'partitions_supprimees': supprimees, 'lignes_supprimees': None}
@@ -0,0 +1,132 @@
+"""
+Grand livre des comptes clients : chaque mouvement (facture émise ou
+modifiée, paiement reçu, ajustement) ajoute une Ecriture et met à jour
+Client.Solde dans la même transaction. Le solde se lit donc sans
+agrégation sur l'historique des factures et paiements.
+
+Les écritures de factures et paiements sont passées par les signaux de
+facturation/signals.py. Après un chargement en masse qui contourne save(),
+`manage.py rapprocher_soldes` remet les soldes en accord avec les factures,
+les paiements et les ajustements saisis par des écritures de rapprochement.
+"""
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import transaction
+from django.db.models import DecimalField, OuterRef, Sum
+
+from config.sous_requetes import agregat
+
+from .models import Client, Ecriture
+
+ZERO = Decimal('0.00')
+TAILLE_LOT = 2000
+CENTIME = Decimal('0.01')
+MONTANT = DecimalField(max_digits=14, decimal_places=2)
+
+
+def arrondir(montant):
+    """Montant tel que stocké en base (2 décimales), pour comptabiliser ce qui est réellement enregistré."""
+    return Decimal(montant or 0).quantize(CENTIME, rounding=ROUND_HALF_UP)
+
+
+def comptabiliser(client_id, montant, type_ecriture, reference='', libelle=''):
+    """
+    Ajoute une écriture de `montant` (positif : le client doit plus) et met
+    à jour le solde. La ligne client est verrouillée le temps de l'écriture :
+    deux mouvements simultanés d'un même client se suivent sans se perdre.
+    """
+    if not client_id or not montant:
+        return None
+    with transaction.atomic():
+        solde = (
+            Client.objects.select_for_update()
+            .filter(pk=client_id).values_list('Solde', flat=True).first()
+        )
+        if solde is None:
+            return None
+        solde += montant
+        ecriture = Ecriture.objects.create(
+            CodeClient_id=client_id, TypeEcriture=type_ecriture, Montant=montant,
+            SoldeApres=solde, Reference=reference[:50], Libelle=libelle[:255],
+        )
+        Client.objects.filter(pk=client_id).update(Solde=solde)
+    return ecriture
+
+
+def comptabiliser_lot(mouvements, type_ecriture):
+    """
+    comptabiliser() pour une série de mouvements [(client, montant,
+    référence, libellé)] : les clients concernés sont verrouillés en une
+    requête (dans l'ordre des clés), les écritures créées et les soldes
+    écrits par lots. À appeler dans une transaction. Renvoie le nombre
+    d'écritures.
+    """
+    mouvements = [mouvement for mouvement in mouvements if mouvement[0] and mouvement[1]]
+    soldes = dict(
+        Client.objects.select_for_update()
+        .filter(pk__in={client_id for client_id, *_ in mouvements}).order_by('pk').values_list('pk', 'Solde')
+    )
+    ecritures = []
+    for client_id, montant, reference, libelle in mouvements:
+        if client_id not in soldes:
+            continue
+        soldes[client_id] += montant
+        ecritures.append(Ecriture(
+            CodeClient_id=client_id, TypeEcriture=type_ecriture, Montant=montant,
+            SoldeApres=soldes[client_id], Reference=reference[:50], Libelle=libelle[:255],
+        ))
+    Ecriture.objects.bulk_create(ecritures, batch_size=TAILLE_LOT)
+    modifies = {ecriture.CodeClient_id for ecriture in ecritures}
+    Client.objects.bulk_update([Client(pk=client_id, Solde=soldes[client_id]) for client_id in modifies],
+                               ['Solde'], batch_size=TAILLE_LOT)
+    return len(ecritures)
+
+
+def solde_attendu(Facture=None, Paiement=None, Ecriture=Ecriture):
+    """
+    Solde attendu d'un client, en expression à annoter sur Client : TTC
+    facturé - montants versés + ajustements saisis (AJUSTEMENT). Les
+    écritures de RAPPROCHEMENT, dérivées des autres, n'en font pas partie.
+    """
+    if Facture is None:
+        from facturation.models import Facture, Paiement
+
+    facture = agregat(Facture.objects.filter(code_client=OuterRef('pk')), 'code_client',
+                      Sum('ttc', output_field=MONTANT))
+    verse = agregat(Paiement.objects.filter(code_facture__code_client=OuterRef('pk')), 'code_facture__code_client',
+                    Sum('montant_verse', output_field=MONTANT))
+    ajuste = agregat(Ecriture.objects.filter(CodeClient=OuterRef('pk'), TypeEcriture='AJUSTEMENT'), 'CodeClient',
+                     Sum('Montant', output_field=MONTANT))
+    return facture - verse + ajuste
+
+
+def rapprocher(libelle="Rapprochement des factures et paiements", appliquer=True,
+               Client=Client, Ecriture=Ecriture, Facture=None, Paiement=None):
+    """
+    Passe une écriture de rapprochement pour chaque client dont le solde
+    diffère du solde attendu. Renvoie [(client, écart)]. À lancer hors
+    activité : les soldes sont écrits par lots, sans verrou par client.
+    Les modèles sont paramétrables pour servir depuis une migration.
+    """
+    clients = (
+        Client.objects.annotate(attendu=solde_attendu(Facture, Paiement, Ecriture))
+        .order_by('pk').values_list('pk', 'Solde', 'attendu')
+    )
+    ecarts = []
+    for client_id, solde, attendu in clients.iterator(chunk_size=TAILLE_LOT):
+        ecart = arrondir(attendu - solde)
+        if ecart:
+            ecarts.append((client_id, solde, ecart))
+
+    if appliquer:
+        for debut in range(0, len(ecarts), TAILLE_LOT):
+            lot = ecarts[debut:debut + TAILLE_LOT]
+            with transaction.atomic():
+                Ecriture.objects.bulk_create([
+                    Ecriture(CodeClient_id=client_id, TypeEcriture='RAPPROCHEMENT', Montant=ecart,
+                             SoldeApres=solde + ecart, Libelle=libelle)
+                    for client_id, solde, ecart in lot
+                ])
+                clients = [Client(pk=client_id, Solde=solde + ecart) for client_id, solde, ecart in lot]
+                Client.objects.bulk_update(clients, ['Solde'])
+    return [(client_id, ecart) for client_id, _, ecart in ecarts]
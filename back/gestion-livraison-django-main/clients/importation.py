@@ -0,0 +1,215 @@
+"""
+Import de clients en masse (tableur CSV ou liste JSON) et fusion de doublons.
+
+L'import lit les lignes au fil de l'eau et les traite par lots de
+TAILLE_LOT. Pour chaque lot :
+- e-mails mis en minuscules, téléphones normalisés (normaliser_tel) ;
+- clients existants retrouvés par une requête sur lower("Email") (index de
+  la recherche sous PostgreSQL) : un client déjà connu sous une autre casse
+  est mis à jour, pas dupliqué ;
+- un INSERT ... ON CONFLICT ("Email") DO UPDATE crée ou met à jour le lot.
+Les soldes et compteurs tenus ne sont jamais écrits par l'import. Les
+nouveaux clients dont le téléphone est déjà celui d'un autre client sont
+signalés comme doublons probables, à fusionner.
+
+La fusion rattache au client conservé les expéditions, factures (et donc
+leurs paiements), réclamations et l'historique des doublons par des UPDATE
+ensemblistes, reprend leur solde par une écriture au grand livre et leurs
+compteurs de réclamations, puis supprime les doublons.
+"""
+import codecs
+import csv
+from decimal import Decimal, InvalidOperation
+from itertools import chain
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Lower
+
+from expeditions.models import Expedition, ExpeditionArchivee
+from facturation.models import Facture
+
+from . import audit
+from .grand_livre import ZERO, comptabiliser
+from .models import Client, Ecriture, Historique, Reclamation, normaliser_tel
+
+TAILLE_LOT = 1000
+OBLIGATOIRES = ('Nom', 'Prenom', 'Email', 'Tel')
+# En-têtes de colonnes acceptés (sans casse ni espaces) -> champ du modèle
+COLONNES = {
+    'nom': 'Nom', 'prenom': 'Prenom', 'prénom': 'Prenom',
+    'email': 'Email', 'e-mail': 'Email', 'mail': 'Email',
+    'tel': 'Tel', 'telephone': 'Tel', 'téléphone': 'Tel',
+    'adresse': 'Adresse',
+    'plafondcredit': 'PlafondCredit', 'plafond': 'PlafondCredit',
+}
+
+
+class FusionImpossible(Exception):
+    pass
+
+
+def lire_csv(lignes):
+    """
+    Lignes d'un CSV (octets, UTF-8 avec ou sans BOM, séparateur ',' ou ';')
+    en dictionnaires, au fil de la lecture.
+    """
+    texte = codecs.iterdecode(lignes, 'utf-8-sig')
+    entete = next(texte, '')
+    separateur = ';' if entete.count(';') > entete.count(',') else ','
+    return csv.DictReader(chain([entete], texte), delimiter=separateur)
+
+
+def _champs(ligne):
+    valeurs = {}
+    for colonne, valeur in ligne.items():
+        champ = COLONNES.get(str(colonne or '').strip().lower().replace(' ', ''))
+        if champ:
+            valeurs[champ] = '' if valeur is None else str(valeur).strip()
+    return valeurs
+
+
+def _preparer(ligne):
+    """(valeurs du client, erreurs) d'une ligne importée."""
+    valeurs = _champs(ligne)
+    erreurs = [f"{champ} obligatoire" for champ in OBLIGATOIRES if not valeurs.get(champ)]
+    if valeurs.get('Email'):
+        valeurs['Email'] = valeurs['Email'].lower()
+        try:
+            validate_email(valeurs['Email'])
+        except ValidationError:
+            erreurs.append("Email invalide")
+    if valeurs.get('Tel'):
+        valeurs['TelNormalise'] = normaliser_tel(valeurs['Tel'])
+        if len(valeurs['Tel']) > 20 or not valeurs['TelNormalise']:
+            erreurs.append("Tel invalide")
+    for champ in ('Nom', 'Prenom'):
+        if len(valeurs.get(champ, '')) > 100:
+            erreurs.append(f"{champ} trop long")
+    if 'PlafondCredit' in valeurs:
+        try:
+            valeurs['PlafondCredit'] = Decimal(valeurs['PlafondCredit'].replace(',', '.').replace(' ', '')) \
+                if valeurs['PlafondCredit'] else None
+        except InvalidOperation:
+            erreurs.append("PlafondCredit invalide")
+    return valeurs, erreurs
+
+
+def importer(lignes, taille_lot=TAILLE_LOT):
+    """
+    Crée ou met à jour (clé : Email) les clients de `lignes` (itérable de
+    dictionnaires). Renvoie le bilan : créés, mis à jour, lignes rejetées,
+    doublons dans le fichier et doublons probables (même téléphone).
+    """
+    bilan = {'lignes': 0, 'crees': 0, 'mis_a_jour': 0, 'erreurs': [], 'doublons_fichier': [],
+             'doublons_probables': []}
+    vus = set()
+    lot = []
+    for numero, ligne in enumerate(lignes, start=1):
+        bilan['lignes'] += 1
+        valeurs, erreurs = _preparer(ligne)
+        if erreurs:
+            bilan['erreurs'].append({'ligne': numero, 'erreurs': erreurs})
+        elif valeurs['Email'] in vus:
+            bilan['doublons_fichier'].append({'ligne': numero, 'Email': valeurs['Email']})
+        else:
+            vus.add(valeurs['Email'])
+            lot.append((numero, valeurs))
+            if len(lot) >= taille_lot:
+                _importer_lot(lot, bilan)
+                lot = []
+    if lot:
+        _importer_lot(lot, bilan)
+
+    audit.consigner(
+        'IMPORT', f"Import de clients : {bilan['crees']} créé(s), {bilan['mis_a_jour']} mis à jour",
+        'client', '', details={cle: valeur if isinstance(valeur, int) else len(valeur) for cle, valeur in bilan.items()},
+    )
+    return bilan
+
+
+def _importer_lot(lot, bilan):
+    existants = dict(
+        Client.objects.annotate(email=Lower('Email'))
+        .filter(email__in=[valeurs['Email'] for _, valeurs in lot])
+        .values_list('email', 'Email')
+    )
+    nouveaux_tels = {valeurs['TelNormalise'] for _, valeurs in lot if valeurs['Email'] not in existants}
+    par_tel = {}
+    for tel, code, email in (
+        Client.objects.filter(TelNormalise__in=nouveaux_tels).values_list('TelNormalise', 'CodeClient', 'Email')
+    ):
+        par_tel.setdefault(tel, (code, email))
+
+    clients = []
+    champs = set(lot[0][1])
+    for numero, valeurs in lot:
+        if valeurs['Email'] in existants:
+            # Orthographe stockée : c'est elle qui déclenche le conflit sur Email
+            valeurs['Email'] = existants[valeurs['Email']]
+            bilan['mis_a_jour'] += 1
+        else:
+            bilan['crees'] += 1
+            if valeurs['TelNormalise'] in par_tel:
+                code, email = par_tel[valeurs['TelNormalise']]
+                bilan['doublons_probables'].append({'ligne': numero, 'Email': valeurs['Email'],
+                                                    'CodeClient': code, 'EmailExistant': email})
+        champs &= set(valeurs)
+        clients.append(Client(**valeurs))
+
+    # Seules les colonnes présentes sur toutes les lignes du lot sont mises à jour
+    Client.objects.bulk_create(
+        clients, update_conflicts=True, unique_fields=['Email'],
+        update_fields=sorted(champs - {'Email'}),
+    )
+
+
+def fusionner(cible_id, doublons_ids):
+    """
+    Fusionne les clients `doublons_ids` dans `cible_id` et les supprime.
+    Renvoie le nombre de lignes rattachées par table et le solde repris.
+    """
+    doublons = sorted(set(doublons_ids) - {cible_id})
+    if not doublons:
+        raise FusionImpossible("Aucun doublon à fusionner.")
+    with transaction.atomic():
+        # Verrouillés dans l'ordre des clés : deux fusions croisées ne s'interbloquent pas
+        clients = {
+            client.pk: client for client in
+            Client.objects.select_for_update().filter(pk__in=[cible_id, *doublons]).order_by('pk')
+            .only('CodeClient', 'Solde', 'NbReclamations', 'NbReclamationsOuvertes')
+        }
+        manquants = sorted({cible_id, *doublons} - set(clients))
+        if manquants:
+            raise FusionImpossible(f"Client(s) introuvable(s) : {', '.join(map(str, manquants))}.")
+
+        rattaches = {
+            'expeditions': Expedition.objects.filter(code_client__in=doublons).update(code_client=cible_id),
+            'expeditions_archivees': ExpeditionArchivee.objects.filter(code_client__in=doublons)
+            .update(code_client=cible_id),
+            'factures': Facture.objects.filter(code_client__in=doublons).update(code_client=cible_id),
+            'reclamations': Reclamation.objects.filter(CodeClient__in=doublons).update(CodeClient=cible_id),
+            'historiques': Historique.objects.filter(CodeClient__in=doublons).update(CodeClient=cible_id),
+            # Le grand livre des doublons est conservé (SoldeApres reste celui de leur propre compte) ;
+            # leurs ajustements saisis comptent ainsi toujours dans le solde attendu
+            'ecritures': Ecriture.objects.filter(CodeClient__in=doublons).update(CodeClient=cible_id),
+        }
+        # Les factures déplacées par UPDATE ne passent pas par le grand livre : leur solde suit ici
+        solde_repris = sum((clients[code].Solde for code in doublons), ZERO)
+        for code in doublons:
+            comptabiliser(cible_id, clients[code].Solde, 'RAPPROCHEMENT', f"FUSION-{code}",
+                          f"Reprise du solde du client {code} (fusion)")
+        Client.objects.filter(pk=cible_id).update(
+            NbReclamations=F('NbReclamations') + sum(clients[code].NbReclamations for code in doublons),
+            NbReclamationsOuvertes=F('NbReclamationsOuvertes')
+            + sum(clients[code].NbReclamationsOuvertes for code in doublons),
+        )
+        Client.objects.filter(pk__in=doublons).delete()
+        audit.consigner(
+            'FUSION', f"Client(s) {', '.join(map(str, doublons))} fusionné(s) dans le client {cible_id}",
+            'client', cible_id, client=cible_id,
+            details={'doublons': doublons, **rattaches, 'solde_repris': solde_repris},
+        )
+    return {'CodeClient': cible_id, 'doublons': doublons, **rattaches, 'solde_repris': solde_repris}
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from clients import importation
+
+
+class Command(BaseCommand):
+    help = (
+        "Importe des clients depuis un fichier CSV (colonnes Nom, Prenom, Email, Tel, "
+        "Adresse, PlafondCredit) : création ou mise à jour par Email, par lots."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('fichier', help="Chemin du fichier CSV (UTF-8, séparateur ',' ou ';')")
+        parser.add_argument('--taille-lot', type=int, default=importation.TAILLE_LOT,
+                            help="Lignes par INSERT ... ON CONFLICT")
+
+    def handle(self, *args, **options):
+        with open(options['fichier'], 'rb') as fichier:
+            bilan = importation.importer(importation.lire_csv(fichier), options['taille_lot'])
+        for erreur in bilan['erreurs'][:20]:
+            self.stdout.write(f"Ligne {erreur['ligne']} rejetée : {', '.join(erreur['erreurs'])}")
+        if len(bilan['erreurs']) > 20:
+            self.stdout.write(f"... et {len(bilan['erreurs']) - 20} autre(s)")
+        for doublon in bilan['doublons_probables'][:20]:
+            self.stdout.write(
+                f"Ligne {doublon['ligne']} ({doublon['Email']}) : même téléphone que le client "
+                f"{doublon['CodeClient']} ({doublon['EmailExistant']})"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"{bilan['lignes']} ligne(s) : {bilan['crees']} client(s) créé(s), {bilan['mis_a_jour']} mis à jour, "
+            f"{len(bilan['erreurs'])} rejetée(s), {len(bilan['doublons_fichier'])} doublon(s) dans le fichier."
+        ))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from clients import audit
+
+
+class Command(BaseCommand):
+    help = (
+        "Crée d'avance les partitions mensuelles du journal d'audit (Historique) "
+        "et supprime celles qui dépassent la durée de conservation."
+    )
+
+    def handle(self, *args, **options):
+        bilan = audit.maintenir_historique()
+        for nom in bilan['partitions_creees']:
+            self.stdout.write(f"Partition créée : {nom}")
+        for nom in bilan['partitions_supprimees']:
+            self.stdout.write(f"Partition supprimée : {nom}")
+        if bilan['lignes_supprimees'] is not None:
+            self.stdout.write(f"{bilan['lignes_supprimees']} événement(s) supprimé(s) (table non partitionnée)")
+        self.stdout.write(self.style.SUCCESS("Journal d'audit à jour."))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from clients import grand_livre
+
+
+class Command(BaseCommand):
+    help = (
+        "Remet Client.Solde en accord avec les factures, les paiements et les ajustements saisis par des "
+        "écritures de rapprochement (après un chargement en masse qui contourne save())."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--simulation', action='store_true',
+                            help="Afficher les écarts sans rien écrire")
+        parser.add_argument('--libelle', default="Rapprochement des factures et paiements",
+                            help="Libellé des écritures de rapprochement")
+
+    def handle(self, *args, **options):
+        ecarts = grand_livre.rapprocher(options['libelle'], appliquer=not options['simulation'])
+        for client_id, ecart in ecarts[:20]:
+            self.stdout.write(f"Client {client_id} : écart {ecart:+} DA")
+        if len(ecarts) > 20:
+            self.stdout.write(f"... et {len(ecarts) - 20} autre(s)")
+
+        verbe = "à ajuster" if options['simulation'] else "ajusté(s)"
+        self.stdout.write(self.style.SUCCESS(f"{len(ecarts)} solde(s) client {verbe}."))
@@ -0,0 +1,56 @@
+# Generated by Django 6.0 on 2026-10-19 16:05
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+def ouvrir_soldes(apps, schema_editor):
+    """Solde d'ouverture de chaque client depuis ses factures et paiements existants."""
+    from clients.grand_livre import rapprocher
+    rapprocher(
+        libelle="Solde d'ouverture du grand livre",
+        Client=apps.get_model('clients', 'Client'),
+        Ecriture=apps.get_model('clients', 'Ecriture'),
+        Facture=apps.get_model('facturation', 'Facture'),
+        Paiement=apps.get_model('facturation', 'Paiement'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0001_initial'),
+        ('facturation', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='client',
+            name='PlafondCredit',
+            field=models.DecimalField(blank=True, decimal_places=2, help_text='Encours maximal autorisé (vide = pas de plafond)', max_digits=14, null=True),
+        ),
+        migrations.AlterField(
+            model_name='client',
+            name='Solde',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14),
+        ),
+        migrations.CreateModel(
+            name='Ecriture',
+            fields=[
+                ('CodeEcriture', models.BigAutoField(primary_key=True, serialize=False)),
+                ('TypeEcriture', models.CharField(choices=[('FACTURE', 'Facture émise'), ('PAIEMENT', 'Paiement reçu'), ('AJUSTEMENT', 'Ajustement')], max_length=20)),
+                ('Montant', models.DecimalField(decimal_places=2, help_text='Positif : le client doit plus', max_digits=14)),
+                ('SoldeApres', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('Reference', models.CharField(blank=True, default='', help_text='FACT-… ou PAIE-…', max_length=50)),
+                ('Libelle', models.CharField(blank=True, default='', max_length=255)),
+                ('DateEcriture', models.DateTimeField(auto_now_add=True)),
+                ('CodeClient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ecritures', to='clients.client')),
+            ],
+            options={
+                'ordering': ['-CodeEcriture'],
+                'indexes': [models.Index(fields=['CodeClient', '-CodeEcriture'], name='clients_ecr_CodeCli_958d0d_idx')],
+            },
+        ),
+        migrations.RunPython(ouvrir_soldes, migrations.RunPython.noop),
+    ]
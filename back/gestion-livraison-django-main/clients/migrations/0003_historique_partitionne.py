@@ -0,0 +1,68 @@
+# Generated by Django 6.0 on 2026-10-19 16:40
+
+import django.core.serializers.json
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+from config.partitions import partitionner
+
+
+def partitionner_historique(apps, schema_editor):
+    partitionner(schema_editor, 'clients_historique', 'DateAction', 'CodeHist')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0002_grand_livre'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='historique',
+            name='CleObjet',
+            field=models.CharField(blank=True, default='', max_length=50),
+        ),
+        migrations.AddField(
+            model_name='historique',
+            name='Details',
+            field=models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True),
+        ),
+        migrations.AddField(
+            model_name='historique',
+            name='Objet',
+            field=models.CharField(blank=True, default='', max_length=30),
+        ),
+        migrations.AddField(
+            model_name='historique',
+            name='Utilisateur',
+            field=models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='historique',
+            name='CodeClient',
+            field=models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='historiques', to='clients.client'),
+        ),
+        migrations.AlterField(
+            model_name='historique',
+            name='CodeHist',
+            field=models.BigAutoField(primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='historique',
+            name='DateAction',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name='historique',
+            index=models.Index(fields=['CodeClient', '-DateAction', '-CodeHist'], name='historique_client_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historique',
+            index=models.Index(fields=['Objet', 'CleObjet', '-DateAction'], name='historique_objet_idx'),
+        ),
+        migrations.RunPython(partitionner_historique, migrations.RunPython.noop),
+    ]
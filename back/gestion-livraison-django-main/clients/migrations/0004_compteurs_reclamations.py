@@ -0,0 +1,51 @@
+# Generated by Django 6.0 on 2026-10-19 17:20
+
+from django.db import migrations, models
+
+
+def recalculer_compteurs(apps, schema_editor):
+    from clients.reclamations import recalculer
+
+    recalculer(
+        Client=apps.get_model('clients', 'Client'), Rapport=apps.get_model('clients', 'Rapport'),
+        Reclamation=apps.get_model('clients', 'Reclamation'), Contient=apps.get_model('clients', 'Contient'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0003_historique_partitionne'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='client',
+            name='NbReclamations',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='client',
+            name='NbReclamationsOuvertes',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='reclamation',
+            name='DateResolution',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='reclamation',
+            name='Echeance',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='reclamation',
+            index=models.Index(fields=['Date', 'Nature', 'Etat'], include=('Echeance', 'DateResolution'), name='reclamation_stats_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reclamation',
+            index=models.Index(fields=['Etat', 'Echeance'], name='reclamation_echeance_idx'),
+        ),
+        migrations.RunPython(recalculer_compteurs, migrations.RunPython.noop),
+    ]
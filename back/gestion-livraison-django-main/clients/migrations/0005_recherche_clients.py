@@ -0,0 +1,52 @@
+# Generated by Django 6.0 on 2026-10-19 11:10
+
+from django.db import migrations, models
+
+TAILLE_LOT = 2000
+
+
+def normaliser_telephones(apps, schema_editor):
+    from clients.models import normaliser_tel
+
+    Client = apps.get_model('clients', 'Client')
+    lot = []
+    for code, tel in Client.objects.order_by('pk').values_list('pk', 'Tel').iterator(chunk_size=TAILLE_LOT):
+        lot.append(Client(pk=code, TelNormalise=normaliser_tel(tel)))
+        if len(lot) >= TAILLE_LOT:
+            Client.objects.bulk_update(lot, ['TelNormalise'])
+            lot = []
+    Client.objects.bulk_update(lot, ['TelNormalise'])
+
+
+def creer_index(apps, schema_editor):
+    from clients.recherche import creer_index
+
+    creer_index(schema_editor)
+
+
+def supprimer_index(apps, schema_editor):
+    from clients.recherche import supprimer_index
+
+    supprimer_index(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0004_compteurs_reclamations'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='client',
+            name='TelNormalise',
+            field=models.CharField(blank=True, default='', editable=False, max_length=20),
+        ),
+        migrations.RunPython(normaliser_telephones, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['TelNormalise'], name='client_tel_prefixe_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        # Trigrammes sur nom + prénom et préfixe d'e-mail : PostgreSQL uniquement (clients/recherche.py)
+        migrations.RunPython(creer_index, supprimer_index),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 6.0 on 2026-10-19 16:02
+
+from django.db import migrations, models
+from django.db.models import Q
+
+# Libellés des écritures passées jusqu'ici en AJUSTEMENT par grand_livre.rapprocher()
+# (migration 0002, rapprocher_soldes, générateur de données, contrôle de cohérence)
+LIBELLES_RAPPROCHEMENT = [
+    "Solde d'ouverture du grand livre",
+    "Rapprochement des factures et paiements",
+    "Solde des données générées",
+    "Contrôle de cohérence",
+]
+
+
+def retyper_rapprochements(apps, schema_editor):
+    """Les écritures dérivées ne doivent plus compter comme ajustements saisis dans le solde attendu."""
+    Ecriture = apps.get_model('clients', 'Ecriture')
+    Ecriture.objects.filter(
+        Q(Libelle__in=LIBELLES_RAPPROCHEMENT, Reference='') | Q(Reference__startswith='FUSION-'),
+        TypeEcriture='AJUSTEMENT',
+    ).update(TypeEcriture='RAPPROCHEMENT')
+
+
+def retyper_ajustements(apps, schema_editor):
+    Ecriture = apps.get_model('clients', 'Ecriture')
+    Ecriture.objects.filter(TypeEcriture='RAPPROCHEMENT').update(TypeEcriture='AJUSTEMENT')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0005_recherche_clients'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ecriture',
+            name='TypeEcriture',
+            field=models.CharField(choices=[('FACTURE', 'Facture émise'), ('PAIEMENT', 'Paiement reçu'), ('AJUSTEMENT', 'Ajustement'), ('RAPPROCHEMENT', 'Rapprochement')], max_length=20),
+        ),
+        migrations.RunPython(retyper_rapprochements, retyper_ajustements),
+    ]
@@ -1,4 +1,39 @@
-from django.db import models
+import re
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
+from django.utils import timezone
+
+def _exclure_champs_tenus(instance, kwargs):
+    """
+    Un save() de mise à jour n'écrit pas les compteurs et soldes tenus par
+    UPDATE ... SET n = n + x : la valeur chargée avec l'instance peut être
+    dépassée et écraserait les mouvements faits entre-temps.
+    """
+    if instance._state.adding or kwargs.get('force_insert') or kwargs.get('update_fields') is not None:
+        return
+    kwargs['update_fields'] = [
+        champ.name for champ in instance._meta.concrete_fields
+        if not champ.primary_key and champ.name not in instance.CHAMPS_TENUS
+    ]
+
+
+def normaliser_tel(tel):
+    """
+    Chiffres seuls, au format national : '+213 555 12-34-56' et
+    '00213555123456' deviennent '0555123456'. Un début de numéro tapé avec
+    l'indicatif ('+21355') est normalisé de même, pour la recherche par préfixe.
+    """
+    tel = (tel or '').strip()
+    chiffres = re.sub(r'\D', '', tel)
+    international = tel.startswith('+') or chiffres.startswith('00')
+    for indicatif in ('00213', '213'):
+        if chiffres.startswith(indicatif) and (international or len(chiffres) > len(indicatif) + 8):
+            return '0' + chiffres[len(indicatif):]
+    return chiffres
+
 
 # CLIENT table
 class Client(models.Model):
@@ -7,31 +42,115 @@ class Client(models.Model):
     Prenom = models.CharField(max_length=100)
     Adresse = models.TextField()
     Tel = models.CharField(max_length=20)
+    # Tel normalisé (normaliser_tel), recalculé à chaque save() : index de préfixe pour la recherche
+    TelNormalise = models.CharField(max_length=20, blank=True, default='', editable=False)
     Email = models.EmailField(unique=True)  # ensure unique emails
-    Solde = models.DecimalField(max_digits=10, decimal_places=2, default=0.0)
+    # Montant dû par le client, tenu par le grand livre (clients/grand_livre.py) : ne pas modifier directement
+    Solde = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    PlafondCredit = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True,
+                                        help_text="Encours maximal autorisé (vide = pas de plafond)")
+    # Compteurs tenus à jour par clients/reclamations.py : ne pas modifier directement
+    NbReclamations = models.IntegerField(default=0)
+    NbReclamationsOuvertes = models.IntegerField(default=0)
+
+    CHAMPS_TENUS = ('Solde', 'NbReclamations', 'NbReclamationsOuvertes')
+
+    class Meta:
+        indexes = [
+            # LIKE 'préfixe%' : varchar_pattern_ops sous PostgreSQL, quel que soit le collationnement
+            models.Index(fields=['TelNormalise'], name='client_tel_prefixe_idx', opclasses=['varchar_pattern_ops']),
+        ]
 
     def __str__(self):
         return f"{self.Nom} {self.Prenom}"
 
+    def save(self, *args, **kwargs):
+        self.TelNormalise = normaliser_tel(self.Tel)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'Tel' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'TelNormalise'}
+        _exclure_champs_tenus(self, kwargs)
+        super().save(*args, **kwargs)
+
+    @property
+    def CreditDisponible(self):
+        if self.PlafondCredit is None:
+            return None
+        return self.PlafondCredit - self.Solde
 
-# HISTORIQUE table
+
+# HISTORIQUE table: journal d'audit, alimenté par clients/audit.py
+# Sous PostgreSQL, table partitionnée par mois sur DateAction (config/partitions.py) :
+# la clé primaire réelle est (CodeHist, DateAction), CodeHist reste unique par sa séquence.
 class Historique(models.Model):
-    CodeHist = models.AutoField(primary_key=True)
-    DateAction = models.DateTimeField(auto_now_add=True)  # automatically set the current datetime
+    CodeHist = models.BigAutoField(primary_key=True)
+    DateAction = models.DateTimeField(default=timezone.now)  # date de l'événement, pas de son écriture
     TypeAction = models.CharField(max_length=50)
     Description = models.TextField()
+    Objet = models.CharField(max_length=30, blank=True, default='')  # ex. 'expedition'
+    CleObjet = models.CharField(max_length=50, blank=True, default='')
+    Details = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)  # valeurs après l'action
+    # Pas de contrainte en base : l'historique survit à la suppression du client ou de l'utilisateur
     CodeClient = models.ForeignKey(
         Client,
-        on_delete=models.CASCADE,  # if client deleted, delete historique
+        on_delete=models.DO_NOTHING,
+        null=True, blank=True,
+        db_constraint=False, db_index=False,
         related_name='historiques'
     )
+    Utilisateur = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.DO_NOTHING,
+        null=True, blank=True,
+        db_constraint=False, db_index=False,
+        related_name='+'
+    )
+
+    class Meta:
+        indexes = [
+            # Chronologie d'un client, parcourue par curseur sur (DateAction, CodeHist)
+            models.Index(fields=['CodeClient', '-DateAction', '-CodeHist'], name='historique_client_date_idx'),
+            models.Index(fields=['Objet', 'CleObjet', '-DateAction'], name='historique_objet_idx'),
+        ]
 
     def __str__(self):
         return f"{self.TypeAction} - {self.DateAction}"
 
 
+# ECRITURE table: grand livre du compte client, en ajout seul
+class Ecriture(models.Model):
+    TYPE_CHOICES = [
+        ('FACTURE', 'Facture émise'),
+        ('PAIEMENT', 'Paiement reçu'),
+        ('AJUSTEMENT', 'Ajustement'),
+        # Écart ramené par grand_livre.rapprocher() ou solde repris d'un client fusionné
+        ('RAPPROCHEMENT', 'Rapprochement'),
+    ]
+
+    CodeEcriture = models.BigAutoField(primary_key=True)
+    CodeClient = models.ForeignKey(Client, on_delete=models.CASCADE, related_name='ecritures')
+    TypeEcriture = models.CharField(max_length=20, choices=TYPE_CHOICES)
+    Montant = models.DecimalField(max_digits=14, decimal_places=2, help_text="Positif : le client doit plus")
+    SoldeApres = models.DecimalField(max_digits=14, decimal_places=2)
+    Reference = models.CharField(max_length=50, blank=True, default='', help_text="FACT-… ou PAIE-…")
+    Libelle = models.CharField(max_length=255, blank=True, default='')
+    DateEcriture = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-CodeEcriture']
+        indexes = [
+            models.Index(fields=['CodeClient', '-CodeEcriture']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_TypeEcriture_display()} {self.Montant} - {self.CodeClient_id}"
+
+
 # RECLAMATION table
 class Reclamation(models.Model):
+    ETATS_OUVERTS = ('Nouvelle', 'En cours')
+    CHAMPS_TENUS = ('Echeance',)
+
     CodeREC = models.AutoField(primary_key=True)
     Nature = models.CharField(max_length=100)
     Date = models.DateField(auto_now_add=True)
@@ -45,21 +164,52 @@ class Reclamation(models.Model):
         on_delete=models.CASCADE,
         related_name='reclamations'
     )
+    DateResolution = models.DateField(null=True, blank=True)  # renseignée au passage à Résolue/Annulée
+    # Date + plus court Delais des rapports qui la contiennent, tenue par clients/reclamations.py
+    Echeance = models.DateField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Statistiques par mois/nature/état : parcours d'index seul sous PostgreSQL
+            models.Index(fields=['Date', 'Nature', 'Etat'], include=['Echeance', 'DateResolution'],
+                         name='reclamation_stats_idx'),
+            # Réclamations ouvertes hors délai
+            models.Index(fields=['Etat', 'Echeance'], name='reclamation_echeance_idx'),
+        ]
 
     def __str__(self):
         return f"{self.Nature} - {self.Etat}"
 
+    def save(self, *args, **kwargs):
+        if self.Etat in self.ETATS_OUVERTS:
+            self.DateResolution = None
+        elif self.DateResolution is None:
+            self.DateResolution = timezone.localdate()
+        if kwargs.get('update_fields') is not None and 'Etat' in kwargs['update_fields']:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'DateResolution'}
+        _exclure_champs_tenus(self, kwargs)
+        # Atomique : les compteurs du client (clients/reclamations.py) changent avec la ligne
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
 
 # RAPPORT table
 class Rapport(models.Model):
     CodeRapport = models.AutoField(primary_key=True)
     MotifR = models.TextField()
     Delais = models.IntegerField(help_text="Délai en jours")
-    NbrREC = models.IntegerField(default=0)
+    NbrREC = models.IntegerField(default=0)  # nombre de lignes Contient, tenu par clients/reclamations.py
+
+    CHAMPS_TENUS = ('NbrREC',)
 
     def __str__(self):
         return f"Rapport {self.CodeRapport} - {self.MotifR}"
 
+    def save(self, *args, **kwargs):
+        _exclure_champs_tenus(self, kwargs)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
 
 # CONTIENT table: many-to-many relation between Reclamation and Rapport
 class Contient(models.Model):
@@ -70,4 +220,8 @@ class Contient(models.Model):
         unique_together = ('CodeREC', 'CodeRapport')  # prevent duplicate associations
 
     def __str__(self):
-        return f"Reclamation {self.CodeREC.CodeREC} -> Rapport {self.CodeRapport.CodeRapport}"
\ No newline at end of file
+        return f"Reclamation {self.CodeREC.CodeREC} -> Rapport {self.CodeRapport.CodeRapport}"
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
\ No newline at end of file
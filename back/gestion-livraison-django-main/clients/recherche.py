@@ -0,0 +1,96 @@
+"""
+Recherche rapide de clients (saisie semi-automatique des agents).
+
+Selon ce qui est tapé :
+- des chiffres (espaces, +, tirets admis) : préfixe du téléphone normalisé
+  (Client.TelNormalise, index varchar_pattern_ops) ;
+- un texte avec '@' : préfixe de l'e-mail (index sur lower("Email")) ;
+- un autre texte : nom et prénom, sous-chaîne ou ressemblance de mots
+  (pg_trgm), classés par ressemblance décroissante. L'index trigrammes GiST
+  sert à la fois le filtre et le tri (parcours au plus proche voisin) : seuls
+  les `limite` premiers sont lus, même pour un nom très répandu.
+
+Les index trigrammes et e-mail n'existent que sous PostgreSQL (migration
+0005) ; ailleurs, la recherche se rabat sur des icontains sans index.
+"""
+import re
+
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+from .models import Client, normaliser_tel
+
+LONGUEUR_MIN = 3
+CHAMPS = ('CodeClient', 'Nom', 'Prenom', 'Email', 'Tel')
+TELEPHONE = re.compile(r'[\d\s+().-]+')
+
+# Expressions indexées : reprises à l'identique dans les requêtes pour que l'index serve
+EXPRESSION_NOM = """lower("Nom" || ' ' || "Prenom")"""
+EXPRESSION_EMAIL = 'lower("Email")'
+INDEX_POSTGRES = {
+    'client_nom_trgm_idx': f"USING gist (({EXPRESSION_NOM}) gist_trgm_ops)",
+    'client_email_prefixe_idx': f"(({EXPRESSION_EMAIL}) text_pattern_ops)",
+}
+
+
+def creer_index(schema_editor):
+    """Extension pg_trgm et index de recherche (opération de migration, PostgreSQL uniquement)."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    table = schema_editor.quote_name(Client._meta.db_table)
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for nom, definition in INDEX_POSTGRES.items():
+        schema_editor.execute(f"CREATE INDEX IF NOT EXISTS {schema_editor.quote_name(nom)} ON {table} {definition}")
+
+
+def supprimer_index(schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for nom in INDEX_POSTGRES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {schema_editor.quote_name(nom)}")
+
+
+def _motif(texte, suffixe='%', prefixe=''):
+    return prefixe + connection.ops.prep_for_like_query(texte) + suffixe
+
+
+def rechercher(texte, limite=10):
+    """Jusqu'à `limite` clients correspondant à `texte`, les plus pertinents d'abord (liste de dicts)."""
+    texte = ' '.join(texte.split()).lower()
+    clients = Client.objects.all()
+
+    if TELEPHONE.fullmatch(texte):
+        tel = normaliser_tel(texte)
+        if len(tel) < LONGUEUR_MIN:
+            return []
+        clients = clients.filter(TelNormalise__startswith=tel).order_by('TelNormalise', 'CodeClient')
+        return list(clients.values(*CHAMPS)[:limite])
+
+    if len(texte) < LONGUEUR_MIN:
+        return []
+    postgres = connection.vendor == 'postgresql'
+
+    if '@' in texte:
+        if postgres:
+            email = RawSQL(EXPRESSION_EMAIL, [])
+            clients = clients.filter(
+                RawSQL(f"{EXPRESSION_EMAIL} LIKE %s", [_motif(texte)], output_field=BooleanField())
+            ).order_by(email.asc(), 'CodeClient')
+        else:
+            clients = clients.filter(Email__istartswith=texte).order_by('Email', 'CodeClient')
+        return list(clients.values(*CHAMPS)[:limite])
+
+    if postgres:
+        # texte <% nom : un des mots du nom ressemble à texte (pg_trgm.word_similarity_threshold)
+        correspond = RawSQL(
+            f"({EXPRESSION_NOM} LIKE %s OR %s <%% {EXPRESSION_NOM})",
+            [_motif(texte, prefixe='%'), texte], output_field=BooleanField(),
+        )
+        distance = RawSQL(f"%s <<-> {EXPRESSION_NOM}", [texte], output_field=FloatField())
+        clients = clients.filter(correspond).order_by(distance.asc(), 'CodeClient')
+    else:
+        clients = clients.filter(
+            Q(Nom__icontains=texte) | Q(Prenom__icontains=texte)
+        ).order_by('Nom', 'Prenom', 'CodeClient')
+    return list(clients.values(*CHAMPS)[:limite])
@@ -0,0 +1,172 @@
+"""
+Compteurs de réclamations et suivi des délais.
+
+- Client.NbReclamations / NbReclamationsOuvertes et Rapport.NbrREC sont
+  ajustés par UPDATE ... SET n = n ± 1 dans la transaction de la ligne
+  modifiée (Reclamation.save(), Contient.save() et les suppressions sont
+  atomiques) : deux changements simultanés ne se perdent pas.
+- Reclamation.Echeance = Date + plus court Delais des rapports qui la
+  contiennent, recalculée quand un lien Contient ou un Delais change.
+
+`recalculer()` reconstruit tout d'un bloc après un chargement en masse
+(generer_donnees) ou depuis une migration ; ses modèles sont paramétrables.
+"""
+from datetime import timedelta
+
+from django.db.models import Count, F, IntegerField, Min, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, TruncMonth
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Client, Contient, Rapport, Reclamation
+
+TAILLE_LOT = 2000
+ETATS_OUVERTS = Reclamation.ETATS_OUVERTS
+
+
+def _ajuster_client(client_id, total, ouvertes):
+    if client_id and (total or ouvertes):
+        Client.objects.filter(pk=client_id).update(
+            NbReclamations=F('NbReclamations') + total,
+            NbReclamationsOuvertes=F('NbReclamationsOuvertes') + ouvertes,
+        )
+
+
+def _ajuster_rapport(rapport_id, nombre):
+    Rapport.objects.filter(pk=rapport_id).update(NbrREC=F('NbrREC') + nombre)
+
+
+def recalculer_echeances(reclamations, Reclamation=Reclamation, Contient=Contient):
+    """Recalcule Echeance pour les réclamations `reclamations` (queryset ou liste d'identifiants)."""
+    delais = dict(
+        Contient.objects.filter(CodeREC__in=reclamations)
+        .values_list('CodeREC').annotate(delai=Min('CodeRapport__Delais')).order_by()
+    )
+    modifiees = [
+        Reclamation(pk=code, Echeance=date + timedelta(days=delais[code]) if code in delais else None)
+        for code, date, echeance in Reclamation.objects.filter(pk__in=reclamations).values_list('pk', 'Date', 'Echeance')
+        if echeance != (date + timedelta(days=delais[code]) if code in delais else None)
+    ]
+    Reclamation.objects.bulk_update(modifiees, ['Echeance'], batch_size=TAILLE_LOT)
+    return len(modifiees)
+
+
+def recalculer(Client=Client, Rapport=Rapport, Reclamation=Reclamation, Contient=Contient):
+    """Reconstruit compteurs et échéances depuis les tables (quelques requêtes ensemblistes)."""
+    def compte(queryset, champ):
+        return Coalesce(
+            Subquery(queryset.values(champ).annotate(n=Count('pk')).values('n')[:1], output_field=IntegerField()),
+            Value(0),
+        )
+
+    par_client = Reclamation.objects.filter(CodeClient=OuterRef('pk')).order_by()
+    Client.objects.update(
+        NbReclamations=compte(par_client, 'CodeClient'),
+        NbReclamationsOuvertes=compte(par_client.filter(Etat__in=ETATS_OUVERTS), 'CodeClient'),
+    )
+    Rapport.objects.update(NbrREC=compte(Contient.objects.filter(CodeRapport=OuterRef('pk')).order_by(), 'CodeRapport'))
+    Reclamation.objects.filter(Echeance__isnull=False, rapports__isnull=True).update(Echeance=None)
+    codes = list(Contient.objects.values_list('CodeREC', flat=True).distinct().order_by('CodeREC'))
+    return sum(
+        recalculer_echeances(codes[debut:debut + TAILLE_LOT], Reclamation=Reclamation, Contient=Contient)
+        for debut in range(0, len(codes), TAILLE_LOT)
+    )
+
+
+def statistiques(reclamations):
+    """
+    Réclamations par mois, nature et état, en une requête groupée :
+    total, mesurables (échéance connue et, si close, date de résolution) et
+    hors délai (résolue après l'échéance, ou toujours ouverte échéance passée).
+    """
+    aujourd_hui = timezone.localdate()
+    mesurable = Q(Echeance__isnull=False) & (Q(Etat__in=ETATS_OUVERTS) | Q(DateResolution__isnull=False))
+    hors_delai = Q(Echeance__isnull=False) & (
+        Q(DateResolution__gt=F('Echeance'))
+        | Q(Etat__in=ETATS_OUVERTS, Echeance__lt=aujourd_hui)
+    )
+    lignes = (
+        reclamations.annotate(mois=TruncMonth('Date'))
+        .values('mois', 'Nature', 'Etat')
+        .annotate(
+            total=Count('pk'),
+            mesurables=Count('pk', filter=mesurable),
+            hors_delai=Count('pk', filter=hors_delai),
+        )
+        .order_by('mois', 'Nature', 'Etat')
+    )
+    return list(lignes)
+
+
+# --- Compteurs des clients ---
+
+# Avant une modification, la ligne est relue et verrouillée : seul l'écart avec
+# l'état réellement stocké est reporté sur les compteurs.
+
+@receiver(pre_save, sender=Reclamation)
+def relire_reclamation(sender, instance, **kwargs):
+    instance._compte = None if instance._state.adding else (
+        Reclamation.objects.select_for_update().filter(pk=instance.pk).values_list('CodeClient_id', 'Etat').first()
+    )
+
+
+@receiver(post_save, sender=Reclamation)
+def compter_reclamation(sender, instance, created, **kwargs):
+    ouverte = int(instance.Etat in ETATS_OUVERTS)
+    ancien = instance._compte
+    if ancien is None:
+        _ajuster_client(instance.CodeClient_id, 1, ouverte)
+        return
+    ancien_client, ancien_etat = ancien
+    ancienne_ouverte = int(ancien_etat in ETATS_OUVERTS)
+    if ancien_client != instance.CodeClient_id:
+        _ajuster_client(ancien_client, -1, -ancienne_ouverte)
+        _ajuster_client(instance.CodeClient_id, 1, ouverte)
+    else:
+        _ajuster_client(instance.CodeClient_id, 0, ouverte - ancienne_ouverte)
+
+
+@receiver(post_delete, sender=Reclamation)
+def decompter_reclamation(sender, instance, **kwargs):
+    # Valeurs de l'instance supprimée : lues juste avant par le collecteur lors d'une cascade
+    _ajuster_client(instance.CodeClient_id, -1, -int(instance.Etat in ETATS_OUVERTS))
+
+
+# --- Rapports : NbrREC et échéances ---
+
+@receiver(pre_save, sender=Contient)
+def relire_contient(sender, instance, **kwargs):
+    instance._lien = None if instance._state.adding else (
+        Contient.objects.select_for_update().filter(pk=instance.pk).values_list('CodeREC_id', 'CodeRapport_id').first()
+    )
+
+
+@receiver(post_save, sender=Contient)
+def compter_contient(sender, instance, created, **kwargs):
+    ancien = instance._lien
+    if ancien == (instance.CodeREC_id, instance.CodeRapport_id):
+        return
+    if ancien:
+        _ajuster_rapport(ancien[1], -1)
+    _ajuster_rapport(instance.CodeRapport_id, 1)
+    recalculer_echeances({instance.CodeREC_id, *(ancien[:1] if ancien else ())})
+
+
+@receiver(post_delete, sender=Contient)
+def decompter_contient(sender, instance, **kwargs):
+    _ajuster_rapport(instance.CodeRapport_id, -1)
+    recalculer_echeances([instance.CodeREC_id])
+
+
+@receiver(pre_save, sender=Rapport)
+def relire_rapport(sender, instance, **kwargs):
+    instance._delais = None if instance._state.adding else (
+        Rapport.objects.filter(pk=instance.pk).values_list('Delais', flat=True).first()
+    )
+
+
+@receiver(post_save, sender=Rapport)
+def propager_delais(sender, instance, created, **kwargs):
+    if not created and instance._delais != instance.Delais:
+        recalculer_echeances(Contient.objects.filter(CodeRapport=instance).values('CodeREC'))
@@ -0,0 +1,125 @@
+"""
+Vue d'ensemble d'un client (page client du front) en un aller-retour.
+
+Six requêtes quel que soit le volume du client :
+1. le client et ses totaux de facturation (sous-requêtes agrégées) ;
+2. les expéditions par statut (nombre et montant estimé) ;
+3. à 6. les N dernières expéditions, factures, paiements et réclamations,
+   lues en values() avec leurs libellés joints et leurs montants annotés,
+   sans les SerializerMethodField qui relancent une requête par ligne.
+
+Le reste dû est Client.Solde (grand livre) et les réclamations ouvertes
+Client.NbReclamationsOuvertes (clients/reclamations.py) : aucun des deux
+n'est recalculé ici.
+"""
+from decimal import Decimal
+
+from django.db.models import Count, DecimalField, Exists, IntegerField, OuterRef, Sum
+
+from config.sous_requetes import agregat
+from expeditions.models import Expedition
+from facturation.models import EtreFacture, Facture, Paiement
+
+from .models import Client, Reclamation
+
+ZERO = Decimal('0.00')
+MONTANT = DecimalField(max_digits=14, decimal_places=2)
+
+
+def resume_client(client_id, n=5):
+    """Résumé du client `client_id`, ou None s'il n'existe pas."""
+    factures = Facture.objects.filter(code_client=OuterRef('pk'))
+    paiements = Paiement.objects.filter(code_facture__code_client=OuterRef('pk'))
+    client = (
+        Client.objects.filter(pk=client_id)
+        .annotate(
+            nb_factures=agregat(factures, 'code_client', Count('pk', output_field=IntegerField())),
+            nb_factures_impayees=agregat(factures.filter(est_payee=False), 'code_client',
+                                         Count('pk', output_field=IntegerField())),
+            montant_facture=agregat(factures, 'code_client', Sum('ttc', output_field=MONTANT)),
+            nb_paiements=agregat(paiements, 'code_facture__code_client', Count('pk', output_field=IntegerField())),
+            montant_paye=agregat(paiements, 'code_facture__code_client', Sum('montant_verse', output_field=MONTANT)),
+        )
+        .values(
+            'CodeClient', 'Nom', 'Prenom', 'Adresse', 'Tel', 'Email', 'Solde', 'PlafondCredit',
+            'NbReclamations', 'NbReclamationsOuvertes',
+            'nb_factures', 'nb_factures_impayees', 'montant_facture', 'nb_paiements', 'montant_paye',
+        )
+        .first()
+    )
+    if client is None:
+        return None
+
+    par_statut = {
+        ligne['statut']: {'nombre': ligne['nombre'], 'montant_estime': ligne['montant'] or ZERO}
+        for ligne in Expedition.objects.filter(code_client=client_id).order_by()
+        .values('statut').annotate(nombre=Count('pk'), montant=Sum('montant_estime'))
+    }
+    expeditions = list(
+        Expedition.objects.filter(code_client=client_id)
+        .annotate(facturee=Exists(EtreFacture.objects.filter(numexp=OuterRef('pk'))))
+        .order_by('-date_creation', '-numexp')
+        .values('numexp', 'statut', 'poids', 'volume', 'montant_estime', 'date_creation', 'facturee',
+                'destination', 'destination__ville', 'destination__zone_geo')[:n]
+    )
+    for expedition in expeditions:
+        expedition['destination_ville'] = expedition.pop('destination__ville')
+        expedition['destination_zone'] = expedition.pop('destination__zone_geo')
+
+    dernieres_factures = list(
+        Facture.objects.filter(code_client=client_id)
+        .annotate(
+            montant_paye=agregat(Paiement.objects.filter(code_facture=OuterRef('pk')), 'code_facture',
+                                 Sum('montant_verse', output_field=MONTANT)),
+            nb_expeditions=agregat(EtreFacture.objects.filter(code_facture=OuterRef('pk')), 'code_facture',
+                                   Count('pk', output_field=IntegerField())),
+        )
+        .order_by('-date_f', '-code_facture')
+        .values('code_facture', 'date_f', 'ht', 'tva', 'ttc', 'est_payee', 'montant_paye', 'nb_expeditions')[:n]
+    )
+    for facture in dernieres_factures:
+        facture['montant_restant'] = (facture['ttc'] or ZERO) - facture['montant_paye']
+
+    derniers_paiements = list(
+        Paiement.objects.filter(code_facture__code_client=client_id)
+        .order_by('-date', '-reference_p')
+        .values('reference_p', 'date', 'montant_verse', 'mode_paiement', 'code_facture')[:n]
+    )
+    dernieres_reclamations = list(
+        Reclamation.objects.filter(CodeClient=client_id)
+        .order_by('-Date', '-CodeREC')
+        .values('CodeREC', 'Nature', 'Date', 'Etat', 'Echeance', 'DateResolution')[:n]
+    )
+
+    totaux = {
+        'expeditions': {
+            'nombre': sum(ligne['nombre'] for ligne in par_statut.values()),
+            'par_statut': par_statut,
+        },
+        'factures': {
+            'nombre': client.pop('nb_factures'),
+            'impayees': client.pop('nb_factures_impayees'),
+            'montant_facture': client.pop('montant_facture'),
+        },
+        'paiements': {
+            'nombre': client.pop('nb_paiements'),
+            'montant_paye': client.pop('montant_paye'),
+        },
+        'reste_du': client['Solde'],
+        'reclamations': {
+            'nombre': client['NbReclamations'],
+            'ouvertes': client['NbReclamationsOuvertes'],
+        },
+    }
+    plafond = client['PlafondCredit']
+    client['CreditDisponible'] = None if plafond is None else plafond - client['Solde']
+    return {
+        'client': client,
+        'totaux': totaux,
+        'dernieres': {
+            'expeditions': expeditions,
+            'factures': dernieres_factures,
+            'paiements': derniers_paiements,
+            'reclamations': dernieres_reclamations,
+        },
+    }
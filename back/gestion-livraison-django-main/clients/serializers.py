@@ -1,10 +1,33 @@
 from rest_framework import serializers
-from .models import Client, Historique, Reclamation, Rapport, Contient
+from .models import Client, Ecriture, Historique, Reclamation, Rapport, Contient
 
 class ClientSerializer(serializers.ModelSerializer):
+    CreditDisponible = serializers.DecimalField(max_digits=14, decimal_places=2, read_only=True)
+
     class Meta:
         model = Client
         fields = '__all__'
+        read_only_fields = ['Solde', 'NbReclamations', 'NbReclamationsOuvertes']  # tenus par grand_livre.py et reclamations.py
+
+
+class EcritureSerializer(serializers.ModelSerializer):
+    TypeEcriture_display = serializers.CharField(source='get_TypeEcriture_display', read_only=True)
+
+    class Meta:
+        model = Ecriture
+        fields = ['CodeEcriture', 'CodeClient', 'TypeEcriture', 'TypeEcriture_display', 'Montant',
+                  'SoldeApres', 'Reference', 'Libelle', 'DateEcriture']
+        read_only_fields = fields
+
+
+class AjustementSerializer(serializers.Serializer):
+    Montant = serializers.DecimalField(max_digits=14, decimal_places=2)
+    Libelle = serializers.CharField(max_length=255)
+
+    def validate_Montant(self, value):
+        if not value:
+            raise serializers.ValidationError("Le montant de l'ajustement ne peut pas être nul.")
+        return value
 
 
 class HistoriqueSerializer(serializers.ModelSerializer):
@@ -18,13 +41,16 @@ class ReclamationSerializer(serializers.ModelSerializer):
    client_prenom = serializers.CharField(source="CodeClient.Prenom", read_only=True)
    class Meta:
         model = Reclamation
-        fields = ['CodeREC', 'Nature', 'Date', 'Etat', 'CodeClient', 'client_nom', 'client_prenom']
-        read_only_fields = ['CodeREC', 'Date'] # Ces champs sont gérés par la DB
+        fields = ['CodeREC', 'Nature', 'Date', 'Etat', 'CodeClient', 'client_nom', 'client_prenom',
+                  'DateResolution', 'Echeance']
+        read_only_fields = ['CodeREC', 'Date', 'DateResolution', 'Echeance'] # Ces champs sont gérés par la DB
+        expansions = {'CodeClient': 'clients.serializers.ClientSerializer'}
 
 class RapportSerializer(serializers.ModelSerializer):
     class Meta:
         model = Rapport
         fields = '__all__'
+        read_only_fields = ['NbrREC']  # nombre de réclamations liées, tenu par reclamations.py
 
 
 class ContientSerializer(serializers.ModelSerializer):
@@ -0,0 +1,22 @@
+from taches.registre import tache
+
+from . import audit, grand_livre, reclamations
+
+
+@tache('clients.rapprocher_soldes', api=True)
+def rapprocher_soldes(suivi, simulation=False):
+    """Ajuste les soldes clients qui diffèrent des factures, paiements et ajustements saisis."""
+    ecarts = grand_livre.rapprocher(appliquer=not simulation)
+    return {'ecarts': len(ecarts), 'total': sum((ecart for _, ecart in ecarts), grand_livre.ZERO)}
+
+
+@tache('clients.maintenir_historique')
+def maintenir_historique(suivi):
+    """Partitions mensuelles à venir et rétention du journal d'audit."""
+    return audit.maintenir_historique()
+
+
+@tache('clients.recalculer_compteurs_reclamations', api=True)
+def recalculer_compteurs_reclamations(suivi):
+    """Reconstruit les compteurs de réclamations (clients, rapports) et les échéances."""
+    return {'echeances_modifiees': reclamations.recalculer()}
@@ -1,3 +1,151 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from expeditions.models import ExpeditionArchivee
+from facturation.models import Facture, Paiement
+
+from .audit import journal
+from .grand_livre import comptabiliser, rapprocher
+from .importation import fusionner
+from .models import Client, Ecriture, Historique, Reclamation
+
+
+def creer_client(numero):
+    return Client.objects.create(Nom=f"Nom{numero}", Prenom="Test", Adresse="1 rue Didouche, Alger",
+                                 Tel=f"055500000{numero}", Email=f"client{numero}@exemple.dz")
+
+
+def facturer(client, code, ttc):
+    ttc = Decimal(ttc)
+    return Facture.objects.create(code_facture=code, code_client=client, date_f=date.today(),
+                                  ht=ttc, tva=Decimal('0.00'), ttc=ttc)
+
+
+def solde(client):
+    return Client.objects.values_list('Solde', flat=True).get(pk=client.pk)
+
+
+class GrandLivreTests(TestCase):
+    def setUp(self):
+        self.client_ = creer_client(1)
+
+    def test_factures_et_paiements_tiennent_le_solde(self):
+        facture = facturer(self.client_, 'F-1', '119.00')
+        self.assertEqual(solde(self.client_), Decimal('119.00'))
+        Paiement.objects.create(code_facture=facture, date=date.today(), montant_verse=Decimal('19.00'))
+        self.assertEqual(solde(self.client_), Decimal('100.00'))
+        self.assertEqual(rapprocher(), [])
+
+    def test_ajustement_saisi_conserve_par_le_rapprochement(self):
+        facturer(self.client_, 'F-1', '50.00')
+        comptabiliser(self.client_.pk, Decimal('100.00'), 'AJUSTEMENT')
+        self.assertEqual(rapprocher(), [])
+        self.assertEqual(solde(self.client_), Decimal('150.00'))
+
+    def test_ajustement_par_l_api(self):
+        api = APIClient()
+        api.force_authenticate(get_user_model().objects.create_user(
+            username='admin', email='admin@exemple.dz', password='x', is_staff=True,
+        ))
+        reponse = api.post(f'/api/clients/{self.client_.pk}/ajustement/',
+                           {'Montant': '-30.00', 'Libelle': "Geste commercial"}, format='json')
+        self.assertEqual(reponse.status_code, 201)
+        self.assertEqual(rapprocher(), [])
+        self.assertEqual(solde(self.client_), Decimal('-30.00'))
+
+    def test_ecart_corrige_par_une_ecriture_de_rapprochement(self):
+        comptabiliser(self.client_.pk, Decimal('100.00'), 'AJUSTEMENT')
+        # Chargement qui contourne le grand livre
+        Client.objects.filter(pk=self.client_.pk).update(Solde=Decimal('0.00'))
+        self.assertEqual(rapprocher(), [(self.client_.pk, Decimal('100.00'))])
+        self.assertEqual(solde(self.client_), Decimal('100.00'))
+        self.assertTrue(Ecriture.objects.filter(CodeClient=self.client_, TypeEcriture='RAPPROCHEMENT').exists())
+        self.assertEqual(rapprocher(), [])
+
+
+class FusionTests(TestCase):
+    def test_fusion_conserve_grand_livre_et_archives(self):
+        cible, doublon = creer_client(1), creer_client(2)
+        facturer(cible, 'F-1', '100.00')
+        facturer(doublon, 'F-2', '40.00')
+        comptabiliser(doublon.pk, Decimal('-10.00'), 'AJUSTEMENT')
+        ExpeditionArchivee.objects.create(numexp=1, code_client=doublon, code_facture='F-0', statut='LIVRE',
+                                          date_creation=timezone.now(), donnees={})
+        ecritures_doublon = Ecriture.objects.filter(CodeClient=doublon).count()
+
+        bilan = fusionner(cible.pk, [doublon.pk])
+
+        self.assertEqual(bilan['ecritures'], ecritures_doublon)
+        self.assertEqual(bilan['expeditions_archivees'], 1)
+        self.assertFalse(Client.objects.filter(pk=doublon.pk).exists())
+        self.assertEqual(ExpeditionArchivee.objects.get(numexp=1).code_client_id, cible.pk)
+        self.assertEqual(solde(cible), Decimal('130.00'))
+        self.assertEqual(rapprocher(), [])
+
+
+class HistoriqueClientTests(TestCase):
+    def setUp(self):
+        self.client_ = creer_client(1)
+        maintenant = timezone.now()
+        for rang in range(3):
+            Historique.objects.create(DateAction=maintenant - timedelta(minutes=rang), TypeAction='MODIFICATION',
+                                      Description=f"Client modifié {rang}", Objet='client',
+                                      CleObjet=str(self.client_.pk), CodeClient=self.client_)
+        self.url = f'/api/clients/{self.client_.pk}/historique/'
+
+    def test_authentification_requise(self):
+        self.assertEqual(APIClient().get(self.url).status_code, 403)
+
+    def test_pagination_par_curseur(self):
+        api = APIClient()
+        api.force_authenticate(get_user_model().objects.create_user(
+            username='agent', email='agent@exemple.dz', password='x',
+        ))
+        page = api.get(self.url, {'taille': 2})
+        self.assertEqual(page.status_code, 200)
+        self.assertEqual([h['Description'] for h in page.data['results']], ["Client modifié 0", "Client modifié 1"])
+        suite = api.get(page.data['next'])
+        self.assertEqual([h['Description'] for h in suite.data['results']], ["Client modifié 2"])
+        self.assertIsNone(suite.data['next'])
+
+
+class AuditTests(TestCase):
+    def derniers(self):
+        journal.vider()
+        return list(Historique.objects.filter(Objet='client').order_by('-CodeHist')
+                    .values_list('Description', 'Details'))
+
+    def test_modification_ne_liste_que_les_champs_modifies(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            client = creer_client(1)
+        client = Client.objects.get(pk=client.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            client.Adresse = "2 rue Larbi Ben M'hidi, Alger"
+            client.save()
+        description, details = self.derniers()[0]
+        self.assertEqual(description, f"Client {client.pk} modifié (Adresse)")
+        self.assertEqual(details, {'Adresse': "2 rue Larbi Ben M'hidi, Alger"})
+
+    def test_enregistrement_sans_changement_non_trace(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            client = creer_client(1)
+        avant = len(self.derniers())
+        with self.captureOnCommitCallbacks(execute=True):
+            Client.objects.get(pk=client.pk).save()
+        self.assertEqual(len(self.derniers()), avant)
+
 
-# Create your tests here.
+class ReclamationTests(TestCase):
+    def test_echeance_non_ecrasee_par_un_save_complet(self):
+        reclamation = Reclamation.objects.create(Nature="Retard", CodeClient=creer_client(1))
+        perimee = Reclamation.objects.get(pk=reclamation.pk)
+        Reclamation.objects.filter(pk=reclamation.pk).update(Echeance=date(2030, 1, 1))
+        perimee.Nature = "Colis abîmé"
+        perimee.save()
+        reclamation.refresh_from_db()
+        self.assertEqual((reclamation.Nature, reclamation.Echeance), ("Colis abîmé", date(2030, 1, 1)))
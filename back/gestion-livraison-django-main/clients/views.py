@@ -1,34 +1,230 @@
 from django.shortcuts import render
 
 # Create your views here.
-from rest_framework.viewsets import ModelViewSet
+import csv
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework.pagination import CursorPagination
+from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework import status
 from .models import Client, Historique, Reclamation, Rapport, Contient
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
+from config.champs import ChampsDynamiquesMixin
+from .grand_livre import comptabiliser
+from .importation import FusionImpossible, fusionner, importer, lire_csv
+from .reclamations import statistiques as statistiques_reclamations
+from .recherche import rechercher
+from .resume import resume_client
 from .serializers import (
-    ClientSerializer, HistoriqueSerializer, ReclamationSerializer, RapportSerializer, ContientSerializer
+    AjustementSerializer, ClientSerializer, EcritureSerializer, HistoriqueSerializer,
+    ReclamationSerializer, RapportSerializer, ContientSerializer
 )
 
-class ClientViewSet(ModelViewSet):
+class ChronologiePagination(CursorPagination):
+    """
+    Pagination par curseur du journal d'audit : chaque page reprend après la
+    dernière ligne lue (index sur DateAction, CodeHist), sans COUNT ni OFFSET,
+    aussi rapide à la millième page qu'à la première.
+    """
+    page_size = 50
+    page_size_query_param = 'taille'
+    max_page_size = 200
+    ordering = ('-DateAction', '-CodeHist')
+
+
+class ClientViewSet(ChampsDynamiquesMixin, ModelViewSet):
+    """
+    Endpoints du compte client :
+    - GET /api/clients/{id}/solde/ : solde dû et crédit disponible (une requête)
+    - GET /api/clients/{id}/releve/ : écritures du grand livre, paginées
+    - POST /api/clients/{id}/ajustement/ : écriture d'ajustement {Montant, Libelle} (staff)
+    - GET /api/clients/{id}/historique/ : journal d'audit du client, par curseur
+      (?objet=expedition, ?depuis=AAAA-MM-JJ, ?jusqu_a=AAAA-MM-JJ) (authentifié)
+    - GET /api/clients/{id}/resume/?n=5 : client, totaux et N derniers éléments
+      de chaque type, en un nombre fixe de requêtes (clients/resume.py)
+    - GET /api/clients/recherche/?q=...&limite=10 : saisie semi-automatique par
+      nom/prénom (trigrammes), e-mail ou téléphone (préfixe) (clients/recherche.py)
+    - POST /api/clients/importer/ : import en masse, fichier CSV (champ `fichier`)
+      ou liste JSON, création ou mise à jour par Email (staff)
+    - POST /api/clients/{id}/fusionner/ : {doublons: [id, ...]} rattachés à ce
+      client puis supprimés (staff) (clients/importation.py)
+    """
     queryset = Client.objects.all()
     serializer_class = ClientSerializer
     permission_classes = [AllowAny]
+    RESUME_N_MAX = 50
+    RECHERCHE_LIMITE_MAX = 50
+
+    @action(detail=True, methods=['get'])
+    def solde(self, request, pk=None):
+        client = Client.objects.filter(pk=pk).values('CodeClient', 'Solde', 'PlafondCredit').first()
+        if client is None:
+            return Response({"error": "Client introuvable."}, status=status.HTTP_404_NOT_FOUND)
+        plafond = client['PlafondCredit']
+        client['CreditDisponible'] = None if plafond is None else plafond - client['Solde']
+        return Response(client)
+
+    @action(detail=True, methods=['get'])
+    def releve(self, request, pk=None):
+        client = self.get_object()
+        ecritures = client.ecritures.order_by('-CodeEcriture')
+        page = self.paginate_queryset(ecritures)
+        return self.get_paginated_response(EcritureSerializer(page, many=True).data)
+
+    @action(detail=True, methods=['post'], permission_classes=[IsAdminUser])
+    def ajustement(self, request, pk=None):
+        client = self.get_object()
+        serializer = AjustementSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ecriture = comptabiliser(
+            client.pk, serializer.validated_data['Montant'], 'AJUSTEMENT',
+            libelle=serializer.validated_data['Libelle'],
+        )
+        return Response(EcritureSerializer(ecriture).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['get'], permission_classes=[IsAuthenticated])
+    def historique(self, request, pk=None):
+        client = self.get_object()
+        evenements = Historique.objects.filter(CodeClient=client)
+        if request.query_params.get('objet'):
+            evenements = evenements.filter(Objet=request.query_params['objet'])
+        # Bornes sur DateAction elle-même : seules les partitions des mois concernés sont lues
+        for parametre, critere, decalage in (('depuis', 'DateAction__gte', 0), ('jusqu_a', 'DateAction__lt', 1)):
+            valeur = request.query_params.get(parametre)
+            if valeur:
+                jour = parse_date(valeur)
+                if jour is None:
+                    return Response({"error": f"{parametre} : date attendue au format AAAA-MM-JJ."},
+                                    status=status.HTTP_400_BAD_REQUEST)
+                debut = datetime.combine(jour + timedelta(days=decalage), time.min)
+                evenements = evenements.filter(**{critere: timezone.make_aware(debut)})
+        # Sans la vue : l'OrderingFilter du viewset ne doit pas décider du tri du curseur
+        pagination = ChronologiePagination()
+        page = pagination.paginate_queryset(evenements, request)
+        return pagination.get_paginated_response(HistoriqueSerializer(page, many=True).data)
+
+    @action(detail=True, methods=['get'])
+    def resume(self, request, pk=None):
+        n = request.query_params.get('n', '5')
+        if not n.isdigit() or not 1 <= int(n) <= self.RESUME_N_MAX:
+            return Response({"error": f"n : entier entre 1 et {self.RESUME_N_MAX} attendu."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if not str(pk).isdigit():
+            return Response({"error": "Client introuvable."}, status=status.HTTP_404_NOT_FOUND)
+        resume = resume_client(int(pk), int(n))
+        if resume is None:
+            return Response({"error": "Client introuvable."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(resume)
 
-class HistoriqueViewSet(ModelViewSet):
+    @action(detail=False, methods=['get'])
+    def recherche(self, request):
+        limite = request.query_params.get('limite', '10')
+        if not limite.isdigit() or not 1 <= int(limite) <= self.RECHERCHE_LIMITE_MAX:
+            return Response({"error": f"limite : entier entre 1 et {self.RECHERCHE_LIMITE_MAX} attendu."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response(rechercher(request.query_params.get('q', ''), int(limite)))
+
+    @action(detail=False, methods=['post'], permission_classes=[IsAdminUser])
+    def importer(self, request):
+        fichier = request.FILES.get('fichier')
+        if fichier is not None:
+            lignes = lire_csv(fichier)
+        elif isinstance(request.data, list):
+            lignes = request.data
+        else:
+            return Response({"error": "Fichier CSV (champ 'fichier') ou liste JSON de clients attendu."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            bilan = importer(lignes)
+        except (UnicodeDecodeError, csv.Error) as erreur:
+            return Response({"error": f"Fichier illisible : {erreur}"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(bilan)
+
+    @action(detail=True, methods=['post'], permission_classes=[IsAdminUser])
+    def fusionner(self, request, pk=None):
+        client = self.get_object()
+        doublons = request.data.get('doublons')
+        if not isinstance(doublons, list) or not all(isinstance(code, int) for code in doublons):
+            return Response({"error": "doublons : liste d'identifiants de clients attendue."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            return Response(fusionner(client.pk, doublons))
+        except FusionImpossible as erreur:
+            return Response({"error": str(erreur)}, status=status.HTTP_400_BAD_REQUEST)
+
+class HistoriqueViewSet(ChampsDynamiquesMixin, ReadOnlyModelViewSet):
+    """Journal d'audit, en lecture seule : il est écrit par clients/audit.py."""
     queryset = Historique.objects.all()
     serializer_class = HistoriqueSerializer
+    pagination_class = ChronologiePagination
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['CodeClient', 'Objet', 'CleObjet', 'TypeAction', 'Utilisateur']
+
 
+def _part(hors_delai, mesurables):
+    return round(100 * hors_delai / mesurables, 1) if mesurables else None
 
-class ReclamationViewSet(ModelViewSet):
+
+class ReclamationViewSet(ChampsDynamiquesMixin, ModelViewSet):
+    """
+    GET /api/reclamations/statistiques/ : réclamations par mois, nature et
+    état, avec la part traitée hors délai (échéance = Date + plus court
+    Delais des rapports liés). Filtres : ?depuis=, ?jusqu_a= (AAAA-MM-JJ),
+    ?client=, ?nature=. Une seule requête groupée.
+    """
     queryset = Reclamation.objects.all()
     serializer_class = ReclamationSerializer
     permission_classes = [AllowAny]
 
-class RapportViewSet(ModelViewSet):
+    @action(detail=False, methods=['get'])
+    def statistiques(self, request):
+        reclamations = Reclamation.objects.all()
+        for parametre, critere in (('depuis', 'Date__gte'), ('jusqu_a', 'Date__lte')):
+            valeur = request.query_params.get(parametre)
+            if valeur:
+                jour = parse_date(valeur)
+                if jour is None:
+                    return Response({"error": f"{parametre} : date attendue au format AAAA-MM-JJ."},
+                                    status=status.HTTP_400_BAD_REQUEST)
+                reclamations = reclamations.filter(**{critere: jour})
+        if request.query_params.get('client'):
+            if not request.query_params['client'].isdigit():
+                return Response({"error": "client : identifiant numérique attendu."},
+                                status=status.HTTP_400_BAD_REQUEST)
+            reclamations = reclamations.filter(CodeClient_id=request.query_params['client'])
+        if request.query_params.get('nature'):
+            reclamations = reclamations.filter(Nature=request.query_params['nature'])
+
+        lignes = statistiques_reclamations(reclamations)
+        cumuls = {'total': {}, 'par_nature': {}, 'par_etat': {}}
+        for ligne in lignes:
+            ligne['part_hors_delai'] = _part(ligne['hors_delai'], ligne['mesurables'])
+            for groupe, cle in (('total', None), ('par_nature', ligne['Nature']), ('par_etat', ligne['Etat'])):
+                cumul = cumuls[groupe].setdefault(cle, {'total': 0, 'mesurables': 0, 'hors_delai': 0})
+                for champ in cumul:
+                    cumul[champ] += ligne[champ]
+        for groupe in cumuls.values():
+            for cumul in groupe.values():
+                cumul['part_hors_delai'] = _part(cumul['hors_delai'], cumul['mesurables'])
+
+        return Response({
+            'total': cumuls['total'].get(None, {'total': 0, 'mesurables': 0, 'hors_delai': 0, 'part_hors_delai': None}),
+            'par_nature': cumuls['par_nature'],
+            'par_etat': cumuls['par_etat'],
+            'par_mois': lignes,
+        })
+
+class RapportViewSet(ChampsDynamiquesMixin, ModelViewSet):
     queryset = Rapport.objects.all()
     serializer_class = RapportSerializer
 
 
-class ContientViewSet(ModelViewSet):
+class ContientViewSet(ChampsDynamiquesMixin, ModelViewSet):
     queryset = Contient.objects.all()
     serializer_class = ContientSerializer
 
@@ -0,0 +1,43 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+
+def _isoler(fonction):
+    """
+    Enveloppe une requête ORM pour qu'elle s'exécute dans son propre thread,
+    avec sa propre connexion, libérée selon CONN_MAX_AGE à la fin.
+    """
+    def executer():
+        close_old_connections()
+        try:
+            return fonction()
+        finally:
+            close_old_connections()
+    return executer
+
+
+async def en_parallele(**requetes):
+    """
+    Lance plusieurs agrégats indépendants en même temps et renvoie un dict
+    {nom: résultat}.
+
+    L'ORM async de Django (acount, aaggregate...) fait passer toutes les
+    requêtes d'une même vue par un seul thread : un asyncio.gather dessus
+    reste séquentiel. Ici chaque requête part dans un thread distinct
+    (thread_sensitive=False), donc sur une connexion distincte.
+    """
+    noms = list(requetes)
+    resultats = await asyncio.gather(*(
+        sync_to_async(_isoler(fonction), thread_sensitive=False)()
+        for fonction in requetes.values()
+    ))
+    return dict(zip(noms, resultats))
+
+
+class Echo:
+    """Pseudo-fichier pour csv.writer : renvoie la ligne au lieu de l'écrire."""
+
+    def write(self, value):
+        return value
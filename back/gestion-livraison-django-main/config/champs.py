@@ -0,0 +1,291 @@
+"""
+Réponses à la carte : ?fields= et ?expand= sur les viewsets (lectures GET/HEAD).
+
+- ?fields=numexp,statut,client_nom ne garde que ces champs : les autres ne
+  sont ni calculés (méthodes get_*, libellés) ni lus en base. Un chemin
+  pointé restreint un objet imbriqué : ?fields=code_facture,expeditions.numexp.
+- ?expand=code_client remplace la clé étrangère par l'objet lié, sérialisé
+  par le serializer de Meta.expansions ({champ: 'module.Serializer'}).
+  ?fields=code_client.Nom vaut expansion de code_client.
+
+Pour list et retrieve, ChampsDynamiquesMixin adapte aussi le queryset aux
+champs retenus, déduits de la source des champs (Meta.dependances
+{champ: [chemins ORM ou alias]} pour une SerializerMethodField ou une
+méthode du modèle) :
+- select_related / prefetch_related des relations lues, plus de requête par
+  ligne pour un libellé ou une liste d'identifiants ;
+- annotations : Meta.annotations ({alias: expression}) d'un serializer,
+  ajoutées quand un champ retenu en dépend (agrégats calculés en SQL ; la
+  méthode get_* relit l'alias s'il est là, sinon calcule comme avant) ;
+- avec ?fields= ou ?expand= seulement : only() des seules colonnes lues, et
+  les select_related de la vue sont remplacés par ceux des champs. Un champ
+  sans dépendance connue est opaque : ni only(), ni select_related retiré.
+
+Sans paramètre, la réponse est inchangée ; seules les requêtes changent.
+"""
+import re
+
+from django.core.exceptions import FieldDoesNotExist
+from django.utils.module_loading import import_string
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+ACTIONS = ('list', 'retrieve')
+METHODES_LECTURE = ('GET', 'HEAD')
+
+_RE_DISPLAY = re.compile(r'^get_(\w+)_display$')
+
+
+def lire_arbre(valeur):
+    """'a,b.c,b.d' -> {'a': {}, 'b': {'c': {}, 'd': {}}}"""
+    arbre = {}
+    for chemin in valeur.split(','):
+        noeud = arbre
+        for nom in filter(None, (partie.strip() for partie in chemin.split('.'))):
+            noeud = noeud.setdefault(nom, {})
+    return arbre
+
+
+def lire_selection(request):
+    """(champs, expansions) de la requête ; champs vaut None sans ?fields= (tous les champs)."""
+    champs = request.query_params.get('fields')
+    return (lire_arbre(champs) if champs else None), lire_arbre(request.query_params.get('expand', ''))
+
+
+def _meta(serializer, nom):
+    return getattr(getattr(serializer, 'Meta', None), nom, {})
+
+
+# --- Élagage du serializer ---
+
+def elaguer(serializer, champs=None, expansions=None):
+    """
+    Restreint `serializer` (ou l'enfant d'un ListSerializer) à `champs`
+    après les expansions demandées, récursivement sur les serializers
+    imbriqués, et le renvoie. Lève ValidationError sur un champ ou une
+    expansion inconnus.
+    """
+    if isinstance(serializer, serializers.ListSerializer):
+        elaguer(serializer.child, champs, expansions)
+        return serializer
+    expansions = dict(expansions or {})
+    possibles = _meta(serializer, 'expansions')
+    for nom, sous_champs in (champs or {}).items():
+        if sous_champs and nom in possibles:
+            expansions.setdefault(nom, {})
+    inconnues = set(expansions) - set(possibles)
+    if inconnues:
+        raise ValidationError({'expand': f"Expansions inconnues : {', '.join(sorted(inconnues))}."})
+    for nom in expansions:
+        source = serializer.fields[nom].source if nom in serializer.fields else nom
+        options = {'source': source} if source != nom else {}
+        serializer.fields[nom] = import_string(possibles[nom])(read_only=True, **options)
+
+    if champs is not None:
+        inconnus = set(champs) - set(serializer.fields)
+        if inconnus:
+            raise ValidationError({'fields': f"Champs inconnus : {', '.join(sorted(inconnus))}."})
+        for nom in list(serializer.fields):
+            if nom not in champs and nom not in expansions:
+                serializer.fields.pop(nom)
+
+    # Sous-sélections : appliquées aux serializers imbriqués, gardées pour les
+    # SerializerMethodField qui en construisent un (voir sous_selection())
+    serializer._sous_selections = {}
+    for nom, champ in serializer.fields.items():
+        sous_champs, sous_expansions = (champs or {}).get(nom) or None, expansions.get(nom) or {}
+        if isinstance(champ, serializers.BaseSerializer):
+            elaguer(champ, sous_champs, sous_expansions)
+        elif sous_champs or sous_expansions:
+            if not isinstance(champ, serializers.SerializerMethodField):
+                raise ValidationError({'fields': f"{nom} n'a pas de sous-champs."})
+            serializer._sous_selections[nom] = (sous_champs, sous_expansions)
+    return serializer
+
+
+def sous_selection(serializer, nom):
+    """(champs, expansions) demandés pour le champ `nom` d'un serializer élagué."""
+    return getattr(serializer, '_sous_selections', {}).get(nom, (None, {}))
+
+
+# --- Plan de chargement ---
+
+class Plan:
+    """Ce que lisent les champs retenus : colonnes (None : toutes), relations, prefetch, annotations."""
+
+    def __init__(self):
+        self.colonnes = set()
+        self.relations = set()
+        self.prefetch = set()
+        self.annotations = {}
+
+    def opaque(self):
+        self.colonnes = None
+
+    def colonne(self, chemin):
+        if self.colonnes is not None:
+            self.colonnes.add(chemin)
+
+    def relation(self, chemin):
+        self.relations.add(chemin)
+        # only() ne doit différer aucune clé étrangère traversée
+        parties = chemin.split('__')
+        for rang in range(1, len(parties) + 1):
+            self.colonne('__'.join(parties[:rang]))
+
+    def modele_complet(self, modele, prefixe):
+        for champ in modele._meta.concrete_fields:
+            self.colonne(f'{prefixe}{champ.name}')
+
+
+def _lire(plan, modele, attributs, prefixe):
+    """Ajoute au plan la lecture de obj.<attributs> (source d'un champ) sur `modele`."""
+    for rang, attribut in enumerate(attributs):
+        dernier = rang == len(attributs) - 1
+        display = _RE_DISPLAY.match(attribut)
+        if display and dernier:
+            attribut = display[1]
+        try:
+            champ = modele._meta.get_field(attribut)
+        except FieldDoesNotExist:
+            # Propriété ou méthode : tout le modèle lié, ou rien à déduire à la racine
+            if prefixe:
+                plan.modele_complet(modele, prefixe)
+            else:
+                plan.opaque()
+            return
+        chemin = f'{prefixe}{attribut}'
+        if champ.is_relation and (champ.many_to_many or champ.one_to_many or not champ.concrete):
+            # prefetch_related, prolongé par les relations qui suivent
+            suite, lie = [chemin], champ.related_model
+            for attribut in attributs[rang + 1:]:
+                try:
+                    champ = lie._meta.get_field(attribut)
+                except FieldDoesNotExist:
+                    break
+                if not champ.is_relation:
+                    break
+                suite.append(attribut)
+                lie = champ.related_model
+            plan.prefetch.add('__'.join(suite))
+            return
+        if not champ.is_relation or dernier:
+            plan.colonne(chemin)
+            return
+        plan.relation(chemin)
+        modele, prefixe = champ.related_model, f'{chemin}__'
+
+
+def _relation(modele, attributs):
+    """Chemin ORM de obj.<attributs> s'il ne suit que des clés étrangères, None sinon."""
+    for attribut in attributs:
+        try:
+            champ = modele._meta.get_field(attribut)
+        except FieldDoesNotExist:
+            return None
+        if not (champ.concrete and (champ.many_to_one or champ.one_to_one)):
+            return None
+        modele = champ.related_model
+    return '__'.join(attributs)
+
+
+def planifier(serializer, plan=None, prefixe='', racine=True):
+    """Plan de chargement des champs de `serializer` (déjà élagué)."""
+    plan = plan or Plan()
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    modele = getattr(getattr(serializer, 'Meta', None), 'model', None)
+    if modele is None:
+        plan.opaque()
+        return plan
+    dependances = _meta(serializer, 'dependances')
+    annotations = _meta(serializer, 'annotations')
+    for nom, champ in serializer.fields.items():
+        if champ.write_only:
+            continue
+        if nom in dependances:
+            for dependance in dependances[nom]:
+                if dependance in annotations:
+                    # Une annotation ne se pose que sur le modèle de la requête ;
+                    # imbriquée, la méthode retombe sur son calcul par ligne
+                    if racine:
+                        plan.annotations[dependance] = annotations[dependance]
+                else:
+                    _lire(plan, modele, dependance.split('__'), prefixe)
+        elif champ.source == '*':
+            if isinstance(champ, serializers.ModelSerializer):
+                planifier(champ, plan, prefixe, racine)
+            else:
+                plan.opaque()
+        elif isinstance(champ, (serializers.ListSerializer, serializers.ManyRelatedField)):
+            _lire(plan, modele, champ.source_attrs, prefixe)
+        elif isinstance(champ, serializers.BaseSerializer):
+            chemin = _relation(modele, champ.source_attrs)
+            if chemin is None:
+                _lire(plan, modele, champ.source_attrs, prefixe)
+            else:
+                plan.relation(f'{prefixe}{chemin}')
+                planifier(champ, plan, f'{prefixe}{chemin}__', racine=False)
+        elif isinstance(champ, serializers.SerializerMethodField):
+            plan.opaque()
+        elif isinstance(champ, serializers.SlugRelatedField):
+            _lire(plan, modele, champ.source_attrs + champ.slug_field.split('__'), prefixe)
+        elif isinstance(champ, serializers.RelatedField) and not isinstance(champ, serializers.PrimaryKeyRelatedField):
+            # StringRelatedField... : __str__ de l'objet lié
+            _lire(plan, modele, champ.source_attrs + ['__str__'], prefixe)
+        else:
+            _lire(plan, modele, champ.source_attrs, prefixe)
+    return plan
+
+
+def adapter(queryset, serializer, restreindre, tri=()):
+    """
+    Applique à `queryset` le plan de `serializer` : relations et annotations,
+    et avec `restreindre` only(). `tri` : champs relus sur les objets par la
+    pagination (curseur).
+    """
+    plan = planifier(serializer)
+    if plan.annotations:
+        queryset = queryset.annotate(**plan.annotations)
+    if restreindre and plan.colonnes is not None:
+        # Tout ce que lisent les champs est connu : on repart des seules relations utiles
+        queryset = queryset.select_related(None)
+        plan.colonnes.update(nom.lstrip('-') for nom in tri if isinstance(nom, str) and '__' not in nom)
+        queryset = queryset.only(*plan.colonnes)
+    if plan.relations:
+        queryset = queryset.select_related(*plan.relations)
+    if plan.prefetch:
+        queryset = queryset.prefetch_related(*sorted(plan.prefetch))
+    return queryset
+
+
+class ChampsDynamiquesMixin:
+    """
+    ?fields= / ?expand= pour un viewset DRF (à placer avant la classe de
+    base) : élagage des serializers sur les lectures et queryset adapté pour
+    les actions de `actions_champs`.
+    """
+
+    actions_champs = ACTIONS
+
+    @property
+    def selection(self):
+        if not hasattr(self, '_selection'):
+            self._selection = lire_selection(self.request)
+        return self._selection
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        if self.request is not None and self.request.method in METHODES_LECTURE:
+            elaguer(serializer, *self.selection)
+        return serializer
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action not in self.actions_champs or self.request.method not in METHODES_LECTURE:
+            return queryset
+        champs, expansions = self.selection
+        tri = list(queryset.query.order_by)
+        ordre_pagination = getattr(self.paginator, 'ordering', None) or ()
+        tri += [ordre_pagination] if isinstance(ordre_pagination, str) else list(ordre_pagination)
+        return adapter(queryset, self.get_serializer(), champs is not None or bool(expansions), tri)
@@ -0,0 +1,42 @@
+"""
+Pagination de l'admin sur les grandes tables.
+
+Le paginateur de Django compte toutes les lignes (SELECT COUNT(*)) à chaque
+page de liste : sur des millions de lignes, c'est ce comptage qui fait le
+temps de chargement. PaginateurEstime compte exactement jusqu'à SEUIL
+lignes, puis reprend l'estimation du planificateur PostgreSQL (EXPLAIN), en
+temps constant. Le nombre affiché est alors approximatif, les pages restent
+exactes. À utiliser avec show_full_result_count = False, qui évite le
+second comptage de la table entière quand un filtre est actif.
+"""
+import json
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+
+SEUIL = 10000
+
+
+def estimer(queryset):
+    """Nombre de lignes estimé par PostgreSQL pour `queryset`, sans l'exécuter."""
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class PaginateurEstime(Paginator):
+    @cached_property
+    def count(self):
+        if not isinstance(self.object_list, QuerySet) or connections[self.object_list.db].vendor != 'postgresql':
+            return super().count
+        # Compte borné : s'arrête après SEUIL + 1 lignes
+        exact = self.object_list.order_by()[:SEUIL + 1].count()
+        if exact <= SEUIL:
+            return exact
+        return max(estimer(self.object_list), exact)
@@ -0,0 +1,381 @@
+"""
+Partitionnement mensuel (PostgreSQL, partitionnement déclaratif par plage).
+
+Une table partitionnée par mois sur une colonne de date a une partition
+<table>_AAAA_MM par mois et une partition <table>_defaut qui reçoit ce qui
+tombe hors des mois créés, pour qu'une insertion n'échoue jamais. Les
+requêtes filtrées sur la colonne ne lisent que les mois concernés, et la
+rétention se fait en supprimant des partitions entières (DROP TABLE,
+instantané, sans VACUUM) plutôt qu'en DELETE ligne à ligne.
+
+Les partitions à venir sont créées d'avance par une tâche planifiée ; si la
+partition par défaut a reçu des lignes d'un mois entre-temps, elles sont
+déplacées dans la nouvelle partition au moment de sa création.
+
+Conversion d'une table existante : partitionner() dans une migration (copie
+sous verrou, pour les petites tables), convertir_en_ligne() pour les
+grandes tables en service.
+"""
+import re
+from datetime import date
+
+from django.db import connection, transaction
+
+SUFFIXE_DEFAUT = 'defaut'
+# Définition d'index telle que la donnent pg_indexes ou Index.create_sql() : (unique, suite après la table)
+DEFINITION_INDEX = re.compile(r'^CREATE (UNIQUE )?INDEX (?:CONCURRENTLY )?(?:"[^"]+"|\S+) ON (?:ONLY )?\S+ (.*)$', re.S)
+
+
+def debut_mois(jour):
+    return date(jour.year, jour.month, 1)
+
+
+def mois_suivant(jour, nombre=1):
+    mois = jour.month - 1 + nombre
+    return date(jour.year + mois // 12, mois % 12 + 1, 1)
+
+
+def nom_partition(table, mois):
+    return f"{table}_{mois:%Y_%m}"
+
+
+def _q(nom):
+    return connection.ops.quote_name(nom)
+
+
+def est_partitionnee(table):
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+            "WHERE c.relname = %s AND c.relnamespace = 'public'::regnamespace",
+            [table],
+        )
+        return cursor.fetchone() is not None
+
+
+def partitions(table, parent=None):
+    """
+    [(nom, premier jour du mois)] des partitions mensuelles <table>_AAAA_MM
+    de `parent` (par défaut `table`), de la plus ancienne à la plus récente.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT enfant.relname FROM pg_inherits i "
+            "JOIN pg_class parent ON parent.oid = i.inhparent "
+            "JOIN pg_class enfant ON enfant.oid = i.inhrelid "
+            "WHERE parent.relname = %s AND parent.relnamespace = 'public'::regnamespace",
+            [parent or table],
+        )
+        noms = [nom for nom, in cursor.fetchall()]
+    motif = re.compile(rf'^{re.escape(table)}_(\d{{4}})_(\d{{2}})$')
+    mensuelles = []
+    for nom in noms:
+        trouve = motif.match(nom)
+        if trouve:
+            mensuelles.append((nom, date(int(trouve[1]), int(trouve[2]), 1)))
+    return sorted(mensuelles, key=lambda partition: partition[1])
+
+
+def creer_partitions(table, colonne, depuis, jusqu_a, parent=None):
+    """
+    Crée les partitions manquantes des mois de `depuis` à `jusqu_a` inclus
+    (rattachées à `parent`, par défaut `table`). Renvoie les noms des
+    partitions créées.
+    """
+    parent = parent or table
+    existantes = {nom for nom, _ in partitions(table, parent)}
+    defaut = f"{table}_{SUFFIXE_DEFAUT}"
+    creees = []
+    mois = debut_mois(depuis)
+    while mois <= jusqu_a:
+        nom = nom_partition(table, mois)
+        if nom not in existantes:
+            bornes = [mois.isoformat(), mois_suivant(mois).isoformat()]
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(
+                    f"SELECT 1 FROM {_q(defaut)} WHERE {_q(colonne)} >= %s AND {_q(colonne)} < %s LIMIT 1", bornes
+                )
+                if cursor.fetchone() is None:
+                    cursor.execute(
+                        f"CREATE TABLE {_q(nom)} PARTITION OF {_q(parent)} FOR VALUES FROM (%s) TO (%s)", bornes
+                    )
+                else:
+                    # Des lignes du mois sont dans la partition par défaut : on les y reprend
+                    cursor.execute(f"CREATE TABLE {_q(nom)} (LIKE {_q(parent)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+                    cursor.execute(
+                        f"WITH deplacees AS (DELETE FROM {_q(defaut)} WHERE {_q(colonne)} >= %s AND {_q(colonne)} < %s "
+                        f"RETURNING *) INSERT INTO {_q(nom)} SELECT * FROM deplacees", bornes
+                    )
+                    cursor.execute(
+                        f"ALTER TABLE {_q(parent)} ATTACH PARTITION {_q(nom)} FOR VALUES FROM (%s) TO (%s)", bornes
+                    )
+            creees.append(nom)
+        mois = mois_suivant(mois)
+    return creees
+
+
+def supprimer_partitions(table, colonne, avant):
+    """
+    Supprime les partitions mensuelles entièrement antérieures à `avant` et
+    les lignes correspondantes de la partition par défaut. Renvoie les noms
+    des partitions supprimées.
+    """
+    supprimees = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        for nom, mois in partitions(table):
+            if mois_suivant(mois) <= avant:
+                cursor.execute(f"DROP TABLE {_q(nom)}")
+                supprimees.append(nom)
+        cursor.execute(
+            f"DELETE FROM {_q(f'{table}_{SUFFIXE_DEFAUT}')} WHERE {_q(colonne)} < %s", [avant.isoformat()]
+        )
+    return supprimees
+
+
+def _index(cursor, table):
+    """[(nom, définition)] des index de `table`, hors clé primaire et contraintes d'unicité."""
+    cursor.execute(
+        "SELECT indexname, indexdef FROM pg_indexes WHERE schemaname = 'public' AND tablename = %s "
+        "AND indexname NOT IN (SELECT conname FROM pg_constraint WHERE contype IN ('p', 'u'))",
+        [table],
+    )
+    return cursor.fetchall()
+
+
+def _creer_sequence(executer, table, cle):
+    # Pas de colonne IDENTITY sur une table partitionnée avant PostgreSQL 17 : séquence classique
+    sequence = f"{table}_{cle}_seq"
+    executer(f"CREATE SEQUENCE {_q(sequence)} OWNED BY {_q(table)}.{_q(cle)}")
+    executer(f"SELECT setval('{_q(sequence)}', COALESCE((SELECT max({_q(cle)}) FROM {_q(table)}), 0) + 1, false)")
+    executer(f"ALTER TABLE {_q(table)} ALTER COLUMN {_q(cle)} SET DEFAULT nextval('{_q(sequence)}')")
+
+
+def partitionner(schema_editor, table, colonne, cle, mois_avance=3):
+    """
+    Convertit une table ordinaire en table partitionnée par mois sur
+    `colonne` (opération de migration, PostgreSQL uniquement).
+
+    La clé primaire devient (cle, colonne) : PostgreSQL impose la colonne de
+    partitionnement dans toute contrainte d'unicité. Côté Django, `cle` reste
+    la clé primaire, unique par sa séquence. Les index sont recréés sur la
+    table parente (et donc sur chaque partition) ; les clés étrangères
+    sortantes ne sont pas reprises, les modèles partitionnés les déclarent
+    avec db_constraint=False.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    ancienne = f"{table}_avant_partition"
+    executer = schema_editor.execute
+    with schema_editor.connection.cursor() as cursor:
+        index = _index(cursor, table)
+        cursor.execute(f"SELECT min({_q(colonne)}) FROM {_q(table)}")
+        plus_ancienne = cursor.fetchone()[0]
+
+    for nom, _ in index:
+        executer(f"DROP INDEX {_q(nom)}")
+    executer(f"ALTER TABLE {_q(table)} RENAME TO {_q(ancienne)}")
+    executer(f"ALTER TABLE {_q(ancienne)} RENAME CONSTRAINT {_q(f'{table}_pkey')} TO {_q(f'{ancienne}_pkey')}")
+    executer(
+        f"CREATE TABLE {_q(table)} (LIKE {_q(ancienne)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+        f"PARTITION BY RANGE ({_q(colonne)})"
+    )
+    executer(f"ALTER TABLE {_q(table)} ADD CONSTRAINT {_q(f'{table}_pkey')} PRIMARY KEY ({_q(cle)}, {_q(colonne)})")
+    executer(f"CREATE TABLE {_q(f'{table}_{SUFFIXE_DEFAUT}')} PARTITION OF {_q(table)} DEFAULT")
+    for _, definition in index:
+        executer(definition)
+
+    aujourd_hui = date.today()
+    creer_partitions(table, colonne, plus_ancienne or aujourd_hui, mois_suivant(aujourd_hui, mois_avance))
+
+    executer(f"INSERT INTO {_q(table)} SELECT * FROM {_q(ancienne)}")
+    executer(f"DROP TABLE {_q(ancienne)}")
+    _creer_sequence(executer, table, cle)
+
+
+# --- Conversion en ligne ---
+#
+# partitionner() recopie la table dans la transaction de la migration : la
+# table reste verrouillée le temps de la copie. Pour une grande table en
+# service, convertir_en_ligne() procède en trois temps :
+# 1. preparer_conversion() crée la table partitionnée <table>_partitionnee
+#    (mêmes colonnes et index, partitions mensuelles) et pose sur l'ancienne
+#    un déclencheur qui y reporte chaque INSERT, UPDATE et DELETE ;
+# 2. recopier() copie l'existant par tranches de clés, une transaction par
+#    tranche : les écritures de l'application continuent pendant la copie ;
+# 3. terminer_conversion() verrouille brièvement l'ancienne table, vérifie
+#    que tout a été recopié, la supprime et met la nouvelle à sa place.
+# Aucune clé étrangère ne doit pointer vers la table (db_constraint=False) :
+# PostgreSQL ne sait pas référencer une table partitionnée par sa seule clé.
+
+SUFFIXE_CONVERSION = 'partitionnee'
+TAILLE_LOT = 20000
+
+
+class ConversionIncomplete(Exception):
+    pass
+
+
+def _noms_conversion(table):
+    nouvelle = f"{table}_{SUFFIXE_CONVERSION}"
+    return nouvelle, f"{table}_vers_{SUFFIXE_CONVERSION}"
+
+
+def _index_temporaire(nom):
+    return f"{nom[:58]}_conv"
+
+
+def _existe(table):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT to_regclass(%s)", [f"public.{_q(table)}"])
+        return cursor.fetchone()[0] is not None
+
+
+def preparer_conversion(table, colonne, cle, mois_avance=3):
+    """Crée <table>_partitionnee et le déclencheur qui y reporte les écritures faites sur `table`."""
+    nouvelle, declencheur = _noms_conversion(table)
+    with transaction.atomic(), connection.cursor() as cursor:
+        index = _index(cursor, table)
+        cursor.execute(f"SELECT min({_q(colonne)}) FROM {_q(table)}")
+        plus_ancienne = cursor.fetchone()[0]
+        cursor.execute(
+            f"CREATE TABLE {_q(nouvelle)} (LIKE {_q(table)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+            f"PARTITION BY RANGE ({_q(colonne)})"
+        )
+        cursor.execute(
+            f"ALTER TABLE {_q(nouvelle)} ADD CONSTRAINT {_q(f'{nouvelle}_pkey')} PRIMARY KEY ({_q(cle)}, {_q(colonne)})"
+        )
+        cursor.execute(f"CREATE TABLE {_q(f'{table}_{SUFFIXE_DEFAUT}')} PARTITION OF {_q(nouvelle)} DEFAULT")
+        for nom, definition in index:
+            unique, suite = DEFINITION_INDEX.match(definition).groups()
+            cursor.execute(f"CREATE {unique or ''}INDEX {_q(_index_temporaire(nom))} ON {_q(nouvelle)} {suite}")
+
+        aujourd_hui = date.today()
+        creer_partitions(table, colonne, plus_ancienne or aujourd_hui, mois_suivant(aujourd_hui, mois_avance),
+                         parent=nouvelle)
+
+        cursor.execute(f"""
+            CREATE FUNCTION {_q(declencheur)}() RETURNS trigger LANGUAGE plpgsql AS $$
+            BEGIN
+                IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                    DELETE FROM {_q(nouvelle)} WHERE {_q(cle)} = OLD.{_q(cle)} AND {_q(colonne)} = OLD.{_q(colonne)};
+                END IF;
+                IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                    INSERT INTO {_q(nouvelle)} SELECT NEW.*;
+                END IF;
+                RETURN NULL;
+            END $$
+        """)
+        cursor.execute(
+            f"CREATE TRIGGER {_q(declencheur)} AFTER INSERT OR UPDATE OR DELETE ON {_q(table)} "
+            f"FOR EACH ROW EXECUTE FUNCTION {_q(declencheur)}()"
+        )
+
+
+def recopier(table, cle, taille_lot=TAILLE_LOT, rappel=None):
+    """
+    Copie `table` dans <table>_partitionnee par tranches de `taille_lot`
+    clés (entières). Les lignes d'une tranche sont verrouillées en partage
+    le temps de la copie : une modification concurrente attend, puis passe
+    par le déclencheur. Renvoie le nombre de lignes copiées.
+    """
+    nouvelle, _ = _noms_conversion(table)
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT min({_q(cle)}), max({_q(cle)}) FROM {_q(table)}")
+        bas, haut = cursor.fetchone()
+    if bas is None:
+        return 0
+    copiees = 0
+    debut = bas - 1
+    while debut < haut:
+        fin = debut + taille_lot
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"WITH lignes AS (SELECT * FROM {_q(table)} WHERE {_q(cle)} > %s AND {_q(cle)} <= %s FOR SHARE) "
+                f"INSERT INTO {_q(nouvelle)} SELECT * FROM lignes ON CONFLICT DO NOTHING",
+                [debut, fin],
+            )
+            copiees += cursor.rowcount
+        debut = fin
+        if rappel:
+            rappel(min(fin, haut) - bas + 1, haut - bas + 1)
+    return copiees
+
+
+def terminer_conversion(table, cle):
+    """Remplace `table` par <table>_partitionnee, sous un verrou exclusif bref."""
+    nouvelle, declencheur = _noms_conversion(table)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"LOCK TABLE {_q(table)} IN ACCESS EXCLUSIVE MODE")
+        cursor.execute(f"SELECT (SELECT count(*) FROM {_q(table)}), (SELECT count(*) FROM {_q(nouvelle)})")
+        lignes, recopiees = cursor.fetchone()
+        if lignes != recopiees:
+            raise ConversionIncomplete(f"{table} : {lignes} lignes, {recopiees} recopiées ; relancer la recopie.")
+        index = _index(cursor, table)
+        cursor.execute(f"DROP TRIGGER {_q(declencheur)} ON {_q(table)}")
+        cursor.execute(f"DROP FUNCTION {_q(declencheur)}()")
+        cursor.execute(f"DROP TABLE {_q(table)}")
+        cursor.execute(f"ALTER TABLE {_q(nouvelle)} RENAME TO {_q(table)}")
+        cursor.execute(f"ALTER TABLE {_q(table)} RENAME CONSTRAINT {_q(f'{nouvelle}_pkey')} TO {_q(f'{table}_pkey')}")
+        for nom, _ in index:
+            cursor.execute(f"ALTER INDEX {_q(_index_temporaire(nom))} RENAME TO {_q(nom)}")
+        _creer_sequence(cursor.execute, table, cle)
+
+
+def annuler_conversion(table):
+    """Abandonne une conversion en cours : déclencheur et table partitionnée supprimés, `table` intacte."""
+    nouvelle, declencheur = _noms_conversion(table)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"DROP TRIGGER IF EXISTS {_q(declencheur)} ON {_q(table)}")
+        cursor.execute(f"DROP FUNCTION IF EXISTS {_q(declencheur)}()")
+        cursor.execute(f"DROP TABLE IF EXISTS {_q(nouvelle)}")
+
+
+def convertir_en_ligne(table, colonne, cle, taille_lot=TAILLE_LOT, mois_avance=3, rappel=None):
+    """
+    Convertit `table` en table partitionnée par mois sur `colonne` sans
+    l'immobiliser (voir plus haut). Reprend une conversion interrompue.
+    Renvoie le nombre de lignes recopiées, None si la table l'était déjà.
+    """
+    if est_partitionnee(table):
+        return None
+    if not _existe(_noms_conversion(table)[0]):
+        preparer_conversion(table, colonne, cle, mois_avance)
+    copiees = recopier(table, cle, taille_lot, rappel)
+    terminer_conversion(table, cle)
+    return copiees
+
+
+# --- Index sur une table partitionnée ---
+
+def creer_index_concurrent(schema_editor, modele, index):
+    """
+    Équivalent de AddIndexConcurrently pour une table partitionnée, où
+    CREATE INDEX CONCURRENTLY n'est pas admis : index invalide sur la seule
+    table parente, index construit sans blocage sur chaque partition puis
+    rattaché ; le parent devient valide au dernier rattachement. À lancer
+    hors transaction (migration atomic = False). Reprend un essai interrompu.
+    Hors table partitionnée, AddIndexConcurrently ordinaire.
+    """
+    table = modele._meta.db_table
+    if not est_partitionnee(table):
+        schema_editor.add_index(modele, index, concurrently=True)
+        return
+    unique, suite = DEFINITION_INDEX.match(str(index.create_sql(modele, schema_editor))).groups()
+    executer = schema_editor.execute
+    executer(f"CREATE {unique or ''}INDEX IF NOT EXISTS {_q(index.name)} ON ONLY {_q(table)} {suite}")
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT enfant.relname FROM pg_inherits i JOIN pg_class enfant ON enfant.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(%s)", [f"public.{_q(table)}"],
+        )
+        enfants = [nom for nom, in cursor.fetchall()]
+    for enfant in enfants:
+        nom = f"{enfant}_{index.name}"[:63]
+        executer(f"CREATE {unique or ''}INDEX CONCURRENTLY IF NOT EXISTS {_q(nom)} ON {_q(enfant)} {suite}")
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_inherits WHERE inhrelid = to_regclass(%s)", [f"public.{_q(nom)}"])
+            rattache = cursor.fetchone() is not None
+        if not rattache:
+            executer(f"ALTER INDEX {_q(index.name)} ATTACH PARTITION {_q(nom)}")
@@ -0,0 +1,173 @@
+"""
+Lectures sur réplique (alias REPLIQUE['ALIAS'], défini par POSTGRES_REPLICA_HOST).
+
+LectureRepliqueMiddleware repère, avant la vue, les requêtes GET/HEAD
+servies par une action de lecture (REPLIQUE['ACTIONS'] : list, retrieve,
+statistiques...) ou par une vue marquée @lecture_replique (agrégats et
+exports asynchrones). RouteurReplique envoie alors leurs lectures sur la
+réplique ; tout le reste va sur `default`. Restent sur `default`, même
+pendant une requête de lecture :
+- tout ce qui suit une écriture de la même requête (lecture de ses propres
+  écritures) ;
+- les lectures faites dans une transaction ouverte sur `default` ;
+- les modèles de REPLIQUE['MODELES_PRINCIPAL'] (jetons révoqués : une
+  déconnexion doit valoir aussitôt) ;
+- tout, tant que la réplique a plus de REPLIQUE['RETARD_MAX'] secondes de
+  retard ou ne répond pas. Le retard est mesuré au plus une fois toutes les
+  REPLIQUE['INTERVALLE'] secondes par processus.
+
+Sans réplique configurée, le routeur renvoie toujours `default`. Pour
+essayer en local, POSTGRES_REPLICA_HOST peut désigner la base principale
+elle-même : deux alias, une seule base, retard nul.
+"""
+import logging
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+METHODES_LECTURE = ('GET', 'HEAD')
+
+# Retard en secondes ; 0 si le serveur n'est pas en réplication ou a tout rejoué
+SQL_RETARD = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+END
+"""
+
+
+def config():
+    return getattr(settings, 'REPLIQUE', {})
+
+
+def alias():
+    """Alias de la réplique, None si elle n'est pas configurée."""
+    nom = config().get('ALIAS', 'replica')
+    return nom if nom in settings.DATABASES else None
+
+
+class _Lecture:
+    def __init__(self):
+        self.replique = False
+        self.ecriture = False
+
+
+_lecture = ContextVar('lecture_replique', default=None)
+
+
+def lecture_replique(vue):
+    """Marque une vue (fonction) dont les lectures peuvent aller sur la réplique."""
+    vue.lecture_replique = True
+    return vue
+
+
+# --- Garde de retard ---
+
+_etat = {'verifie': None, 'disponible': False, 'retard': None}
+_verrou = threading.Lock()
+
+
+def retard_replique():
+    """Retard de réplication en secondes (lève DatabaseError si la réplique ne répond pas)."""
+    connexion = connections[alias()]
+    if connexion.vendor != 'postgresql':
+        return 0.0
+    with connexion.cursor() as cursor:
+        cursor.execute(SQL_RETARD)
+        return float(cursor.fetchone()[0])
+
+
+def replique_disponible():
+    """Réplique joignable et à jour à REPLIQUE['RETARD_MAX'] près (résultat gardé INTERVALLE secondes)."""
+    maintenant = time.monotonic()
+    if _etat['verifie'] is not None and maintenant - _etat['verifie'] < config().get('INTERVALLE', 5):
+        return _etat['disponible']
+    with _verrou:
+        if _etat['verifie'] is None or maintenant - _etat['verifie'] >= config().get('INTERVALLE', 5):
+            try:
+                retard = retard_replique()
+            except DatabaseError as erreur:
+                logger.warning("Réplique indisponible, lectures sur la base principale : %s", erreur)
+                retard = None
+            disponible = retard is not None and retard <= config().get('RETARD_MAX', 10)
+            if retard is not None and not disponible and _etat['disponible']:
+                logger.warning("Réplique en retard de %.1f s, lectures sur la base principale", retard)
+            _etat.update(verifie=maintenant, disponible=disponible, retard=retard)
+    return _etat['disponible']
+
+
+# --- Routeur ---
+
+class RouteurReplique:
+    """DATABASE_ROUTERS : lectures des requêtes de lecture sur la réplique, le reste sur `default`."""
+
+    def db_for_read(self, model, **hints):
+        lecture = _lecture.get()
+        if (
+            lecture is None or not lecture.replique or lecture.ecriture or alias() is None
+            or model._meta.label_lower in config().get('MODELES_PRINCIPAL', ())
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block or not replique_disponible()
+        ):
+            return DEFAULT_DB_ALIAS
+        return alias()
+
+    def db_for_write(self, model, **hints):
+        lecture = _lecture.get()
+        if lecture is not None:
+            lecture.ecriture = True
+        # Explicite : une instance lue sur la réplique s'enregistre quand même sur `default`
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True  # mêmes données des deux côtés
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == alias():
+            return False
+        return None
+
+
+# --- Middleware ---
+
+class LectureRepliqueMiddleware:
+    """Ouvre pour chaque requête l'état lu par RouteurReplique ; process_view décide de la réplique."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        jeton = _lecture.set(_Lecture())
+        try:
+            return self.get_response(request)
+        finally:
+            _lecture.reset(jeton)
+
+    async def __acall__(self, request):
+        # Contexte propre à la tâche de la requête : rien à rétablir, et une
+        # réponse en streaming (exports) lit encore après le retour de la vue
+        _lecture.set(_Lecture())
+        return await self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        lecture = _lecture.get()
+        if lecture is None or alias() is None or request.method not in METHODES_LECTURE:
+            return None
+        # ViewSet DRF : view_func.actions associe la méthode HTTP à l'action (HEAD suit GET)
+        action = (getattr(view_func, 'actions', None) or {}).get('get')
+        lecture.replique = (
+            getattr(view_func, 'lecture_replique', False) or action in config().get('ACTIONS', ())
+        )
+        return None
@@ -27,7 +27,8 @@ INSTALLED_APPS = [
     'facturation',
     'logistique',
     'expeditions',
-   
+    'supervision',
+    'taches',
 ]
 
 # --- MIDDLEWARE ---
@@ -40,6 +41,9 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'supervision.middleware.InstrumentationSQLMiddleware',
+    'config.routage.LectureRepliqueMiddleware',
+    'clients.audit.AuditMiddleware',
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -58,7 +62,7 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.SessionAuthentication',
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.JWTAuthentificationCache',
         'rest_framework.authentication.BasicAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
@@ -75,6 +79,20 @@ SIMPLE_JWT = {
     'ROTATE_REFRESH_TOKENS': False,
     'BLACKLIST_AFTER_ROTATION': True,
     'AUTH_HEADER_TYPES': ('Bearer',),
+    'TOKEN_REFRESH_SERIALIZER': 'accounts.authentication.RafraichissementSerializer',
+}
+
+# --- AUTHENTIFICATION JWT (accounts.authentication, accounts.revocations) ---
+# Utilisateur résolu gardé CACHE_UTILISATEUR secondes dans le cache Django.
+# Révocations : filtre de Bloom par processus (BLOOM_BITS bits, BLOOM_HACHAGES
+# hachages : ~1 % de faux positifs à 100 000 jetons), complété toutes les
+# SYNCHRO_REVOCATIONS secondes et reconstruit toutes les RECONSTRUCTION_REVOCATIONS.
+AUTHENTIFICATION = {
+    'CACHE_UTILISATEUR': int(os.environ.get('AUTH_CACHE_UTILISATEUR', 60)),
+    'BLOOM_BITS': 2 ** 20,
+    'BLOOM_HACHAGES': 7,
+    'SYNCHRO_REVOCATIONS': float(os.environ.get('AUTH_SYNCHRO_REVOCATIONS', 5)),
+    'RECONSTRUCTION_REVOCATIONS': 3600,
 }
 # --- CORS CONFIG ---
 CORS_ALLOWED_ORIGINS = [
@@ -93,12 +111,84 @@ LOGOUT_REDIRECT_URL = 'login'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
-        'NAME': 'deliverydb',
-        'USER': 'postgres',
-        'PASSWORD': 'postgres',
-        'HOST': 'db',
-        'PORT': '5432',
+        'NAME': os.environ.get('POSTGRES_DB', 'deliverydb'),
+        'USER': os.environ.get('POSTGRES_USER', 'postgres'),
+        'PASSWORD': os.environ.get('POSTGRES_PASSWORD', 'postgres'),
+        'HOST': os.environ.get('POSTGRES_HOST', 'db'),
+        'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+    }
+}
+
+# Gestion des connexions (DB_POOL_MODE) :
+# - 'aucun'      : une connexion ouverte et fermée par requête (runserver) ;
+# - 'persistant' : connexions réutilisées DB_CONN_MAX_AGE secondes, vérifiées
+#                  avant réutilisation (gunicorn WSGI) ;
+# - 'pool'       : pool natif psycopg 3 de DB_POOL_MIN_SIZE à DB_POOL_MAX_SIZE
+#                  connexions par processus (uvicorn ASGI, où les connexions
+#                  persistantes ne sont pas supportées).
+
+# --- RÉPLIQUE EN LECTURE (config/routage.py) ---
+# Avec POSTGRES_REPLICA_HOST, les actions de lecture (ACTIONS des ViewSets,
+# vues @lecture_replique) lisent sur l'alias 'replica', sauf après une
+# écriture dans la même requête ou si la réplique a plus de RETARD_MAX
+# secondes de retard (mesuré toutes les INTERVALLE secondes).
+# En local, POSTGRES_REPLICA_HOST=db : deux alias sur la même base.
+if os.environ.get('POSTGRES_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.environ['POSTGRES_REPLICA_HOST'],
+        'PORT': os.environ.get('POSTGRES_REPLICA_PORT', DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
     }
+DATABASE_ROUTERS = ['config.routage.RouteurReplique']
+REPLIQUE = {
+    'ALIAS': 'replica',
+    'ACTIONS': [
+        'list', 'retrieve', 'statistiques', 'evolution', 'evolution_chiffre_affaires', 'zones', 'points_chauds',
+        'par_statut', 'impayees', 'releve', 'recherche', 'disponibles',
+    ],
+    'MODELES_PRINCIPAL': ['accounts.jetonrevoque'],
+    'RETARD_MAX': float(os.environ.get('REPLICA_RETARD_MAX', 10)),
+    'INTERVALLE': 5,
+}
+
+DB_POOL_MODE = os.environ.get('DB_POOL_MODE', 'aucun')
+for base in DATABASES.values():
+    if DB_POOL_MODE == 'persistant':
+        base['CONN_MAX_AGE'] = int(os.environ.get('DB_CONN_MAX_AGE', 60))
+        base['CONN_HEALTH_CHECKS'] = True
+    elif DB_POOL_MODE == 'pool':
+        base['OPTIONS'] = {
+            'pool': {
+                'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+                'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+                'timeout': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+            },
+        }
+
+# --- ÉVÉNEMENTS TEMPS RÉEL (SSE /api/evenements/) ---
+# 'memoire' : un seul processus web ; 'postgres' : LISTEN/NOTIFY entre plusieurs workers
+EVENEMENTS_BACKEND = os.environ.get('EVENEMENTS_BACKEND', 'memoire')
+
+# --- INSTRUMENTATION SQL (supervision.middleware) ---
+# ENTETES : X-DB-Queries / X-DB-Time sur chaque réponse.
+# ECHANTILLONNAGE : part des requêtes analysées en détail (0 = désactivé).
+SQL_INSTRUMENTATION = {
+    'ENTETES': os.environ.get('SQL_ENTETES', str(DEBUG)).lower() in ('1', 'true', 'yes'),
+    'ECHANTILLONNAGE': float(os.environ.get('SQL_ECHANTILLONNAGE', 0)),
+    'SEUIL_LENT_MS': float(os.environ.get('SQL_SEUIL_LENT_MS', 50)),
+    'NB_LENTES': 5,
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'supervision.sql': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
 }
 
 # --- TEMPLATES & FILES ---
@@ -121,6 +211,57 @@ STATIC_URL = 'static/'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# --- PIÈCES JOINTES DES INCIDENTS (expeditions.pieces_jointes) ---
+# Les blocs des téléversements en cours restent hors de MEDIA_ROOT.
+# Réduction et miniatures : tâche de fond expeditions.traiter_piece_jointe.
+PIECES_JOINTES = {
+    'TAILLE_MAX': int(os.environ.get('PJ_TAILLE_MAX', 25 * 1024 * 1024)),
+    'TAILLE_BLOC_MAX': int(os.environ.get('PJ_TAILLE_BLOC_MAX', 5 * 1024 * 1024)),
+    'REPERTOIRE_TEMPORAIRE': os.environ.get('PJ_REPERTOIRE_TEMPORAIRE', str(BASE_DIR / 'televersements')),
+    'DIMENSION_MAX': int(os.environ.get('PJ_DIMENSION_MAX', 1920)),
+    'DIMENSION_MINIATURE': int(os.environ.get('PJ_DIMENSION_MINIATURE', 320)),
+    'QUALITE_JPEG': 85,
+}
+
+# --- TÂCHES DE FOND (taches, manage.py lancer_worker) ---
+# File en base (table tache) : aucun broker. DELAI_ABANDON : secondes sans
+# signe de vie avant qu'une tâche EN_COURS soit remise en file.
+# PLANIFICATIONS : expressions cron (minute heure jour mois jour-semaine, TIME_ZONE).
+TACHES = {
+    'PROCESSUS': int(os.environ.get('TACHES_PROCESSUS', 1)),
+    'THREADS': int(os.environ.get('TACHES_THREADS', 4)),
+    'INTERVALLE': float(os.environ.get('TACHES_INTERVALLE', 2)),
+    'DELAI_ABANDON': int(os.environ.get('TACHES_DELAI_ABANDON', 600)),
+    'CONSERVATION_JOURS': 30,
+    'PLANIFICATIONS': {
+        'recalcul-factures': {'tache': 'facturation.recalculer_montants', 'cron': '0 2 * * *'},
+        'recalcul-agregats-incidents': {'tache': 'expeditions.recalculer_agregats_incidents', 'cron': '30 2 * * *'},
+        'purge-televersements': {'tache': 'expeditions.purger_televersements', 'cron': '0 3 * * *'},
+        'purge-taches': {'tache': 'taches.purger', 'cron': '15 3 * * 0'},
+        'maintenance-historique': {'tache': 'clients.maintenir_historique', 'cron': '45 3 * * *'},
+        'maintenance-partitions': {'tache': 'expeditions.maintenir_partitions', 'cron': '50 3 * * *'},
+        # Expéditions closes de plus d'un an, factures payées : voir expeditions/archivage.py
+        'archivage-expeditions': {'tache': 'expeditions.archiver', 'cron': '30 4 * * 0'},
+        'purge-jetons-revoques': {'tache': 'accounts.purger_jetons_revoques', 'cron': '20 4 * * *'},
+        # Rapport d'écarts seul ; réparation : manage.py verifier_coherence --reparer
+        'controle-coherence': {'tache': 'supervision.verifier_coherence', 'cron': '0 5 * * *'},
+    },
+}
+
+# --- JOURNAL D'AUDIT (clients.audit, table Historique) ---
+# Événements mis en tampon au commit et écrits par lots (TAILLE_LOT, ou au
+# plus tard toutes les INTERVALLE secondes) par un thread de chaque processus.
+# TAMPON_MAX : au-delà (base indisponible), les plus anciens sont abandonnés.
+# Partitions mensuelles créées MOIS_AVANCE mois d'avance, conservées CONSERVATION_MOIS mois.
+AUDIT = {
+    'ACTIF': os.environ.get('AUDIT_ACTIF', '1') == '1',
+    'TAILLE_LOT': 500,
+    'INTERVALLE': float(os.environ.get('AUDIT_INTERVALLE', 2)),
+    'TAMPON_MAX': 50000,
+    'MOIS_AVANCE': 3,
+    'CONSERVATION_MOIS': int(os.environ.get('AUDIT_CONSERVATION_MOIS', 24)),
+}
+
 # Standard Internationalization
 LANGUAGE_CODE = 'en-us'
 TIME_ZONE = 'UTC'
@@ -0,0 +1,16 @@
+from django.db.models import Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def agregat(queryset, champ, expression):
+    """
+    Sous-requête scalaire : `expression` (Count, Sum...) calculée sur
+    `queryset` (filtré par OuterRef) groupé par `champ`, 0 si aucune ligne.
+    Annotée sur une liste paginée, elle n'est évaluée que pour les lignes
+    de la page, là où un Count() avec jointure agrège toute la table.
+    """
+    return Coalesce(
+        Subquery(queryset.order_by().values(champ).annotate(v=expression).values('v')[:1],
+                 output_field=expression.output_field),
+        Value(0, output_field=expression.output_field),
+    )
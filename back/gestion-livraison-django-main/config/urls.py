@@ -1,9 +1,11 @@
+from django.conf import settings
+from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
 # Imports des vues de tes collègues
-from expeditions.views import ExpeditionViewSet, IncidentViewSet
+from expeditions.views import ExpeditionViewSet, IncidentViewSet, PieceJointeViewSet, TeleversementViewSet
 from facturation.views import FactureViewSet, PaiementViewSet, EtreFactureViewSet
 
 # Imports de TES vues (Logistique)
@@ -14,6 +16,13 @@ from logistique.api_views import (
 
 # Création du router global unique
 from clients.views import ClientViewSet,HistoriqueViewSet,ReclamationViewSet,RapportViewSet, ContientViewSet
+from supervision.views import RequeteCaptureeViewSet
+from taches.views import PlanificationViewSet, TacheViewSet
+
+# Vues asynchrones (agrégats et exports, servies par ASGI)
+from expeditions import async_views as expeditions_async
+from facturation import async_views as facturation_async
+from dashboard import async_views as dashboard_async
 
 
 
@@ -32,6 +41,8 @@ router.register('tournees', TourneeViewSet, basename='tournee')
 # 2. Routes de l'app Expeditions (Travail collègue)
 router.register('expeditions', ExpeditionViewSet, basename='expedition')
 router.register('incidents', IncidentViewSet, basename='incident')
+router.register('pieces-jointes/televersements', TeleversementViewSet, basename='televersement')
+router.register('pieces-jointes', PieceJointeViewSet, basename='piece-jointe')
 
 # 3. Routes de l'app Facturation (Travail collègue)
 router.register('factures', FactureViewSet, basename='facture')
@@ -46,10 +57,36 @@ router.register('reclamations', ReclamationViewSet, basename='reclamation')
 router.register('rapports', RapportViewSet, basename='rapport')
 router.register('contient', ContientViewSet, basename='contient')
 
+# Supervision (staff)
+router.register('supervision/requetes', RequeteCaptureeViewSet, basename='requete-capturee')
+
+# Tâches de fond
+router.register('taches', TacheViewSet, basename='tache')
+router.register('taches-planifiees', PlanificationViewSet, basename='planification')
+
+
+async_urlpatterns = [
+    path('expeditions/statistiques/', expeditions_async.statistiques_expeditions, name='async-expedition-statistiques'),
+    path('expeditions/evolution/', expeditions_async.evolution_expeditions, name='async-expedition-evolution'),
+    path('expeditions/export/', expeditions_async.export_expeditions, name='async-expedition-export'),
+    path('incidents/statistiques/', expeditions_async.statistiques_incidents, name='async-incident-statistiques'),
+    path('factures/statistiques/', facturation_async.statistiques_factures, name='async-facture-statistiques'),
+    path('factures/evolution_chiffre_affaires/', facturation_async.evolution_chiffre_affaires, name='async-facture-evolution'),
+    path('factures/export/', facturation_async.export_factures, name='async-facture-export'),
+    path('paiements/statistiques/', facturation_async.statistiques_paiements, name='async-paiement-statistiques'),
+    path('dashboard/', dashboard_async.tableau_de_bord, name='async-dashboard'),
+]
+
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('accounts/', include('accounts.urls')),
     path('home/', include('dashboard.urls')),
+    path('api/async/', include(async_urlpatterns)),
+    path('api/evenements/', dashboard_async.flux_evenements, name='evenements'),
     path('api/', include(router.urls)), 
-]
\ No newline at end of file
+]
+
+if settings.DEBUG:
+    # En production, /media/ est servi par le serveur web frontal
+    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -0,0 +1,133 @@
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Q, Sum
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework.exceptions import AuthenticationFailed
+
+from accounts.authentication import JWTAuthentificationCache
+from clients.models import Client, Reclamation
+from config.async_utils import en_parallele
+from config.routage import lecture_replique
+from expeditions.models import Expedition, Incident
+from facturation.models import Facture, Paiement
+from logistique.models import Chauffeur, Tournee
+from .evenements import diffuseur
+
+INTERVALLE_PING = 15
+
+
+def _authentifier(request):
+    """
+    Utilisateur du jeton JWT de la requête, None sans jeton valide. EventSource
+    n'envoie pas d'en-têtes : le jeton d'accès est aussi lu dans ?token=.
+    """
+    authentification = JWTAuthentificationCache()
+    try:
+        jeton = request.GET.get('token')
+        if jeton:
+            return authentification.get_user(authentification.get_validated_token(jeton))
+        resultat = authentification.authenticate(request)
+    except AuthenticationFailed:
+        return None
+    return resultat[0] if resultat else None
+
+
+@lecture_replique
+@require_GET
+async def tableau_de_bord(request):
+    """
+    GET /api/async/dashboard/ : chiffres clés de la page d'accueil en un seul appel.
+    Chaque agrégat est indépendant et part sur sa propre connexion.
+    Authentification JWT obligatoire, comme le reste de l'API.
+    """
+    if await sync_to_async(_authentifier)(request) is None:
+        return JsonResponse({"error": "Authentification requise."}, status=401)
+    r = await en_parallele(
+        clients=lambda: Client.objects.count(),
+        expeditions=lambda: Expedition.objects.aggregate(
+            total=Count('numexp'),
+            en_cours=Count('numexp', filter=~Q(statut__in=['LIVRE', 'RETOUR'])),
+            livrees=Count('numexp', filter=Q(statut='LIVRE')),
+        ),
+        factures=lambda: Facture.objects.aggregate(
+            total=Count('code_facture'),
+            impayees=Count('code_facture', filter=Q(est_payee=False)),
+            montant_ttc=Sum('ttc'),
+        ),
+        encaisse=lambda: Paiement.objects.aggregate(total=Sum('montant_verse'))['total'],
+        incidents_ouverts=lambda: Incident.objects.exclude(etat__in=['RESOLU', 'FERME']).count(),
+        reclamations_ouvertes=lambda: Reclamation.objects.filter(Etat__in=['Nouvelle', 'En cours']).count(),
+        tournees_en_cours=lambda: Tournee.objects.filter(statut='EN_COURS').count(),
+        chauffeurs_disponibles=lambda: Chauffeur.objects.filter(statut_dispo=True).count(),
+    )
+    montant_ttc = r['factures']['montant_ttc'] or 0
+    encaisse = r['encaisse'] or 0
+    return JsonResponse({
+        'clients': r['clients'],
+        'expeditions': r['expeditions'],
+        'factures': {
+            'total': r['factures']['total'],
+            'impayees': r['factures']['impayees'],
+            'montant_total_ttc': float(montant_ttc),
+            'montant_encaisse': float(encaisse),
+            'montant_reste_a_payer': float(montant_ttc - encaisse),
+        },
+        'incidents_ouverts': r['incidents_ouverts'],
+        'reclamations_ouvertes': r['reclamations_ouvertes'],
+        'tournees_en_cours': r['tournees_en_cours'],
+        'chauffeurs_disponibles': r['chauffeurs_disponibles'],
+    })
+
+
+@require_GET
+async def flux_evenements(request):
+    """
+    GET /api/evenements/ : flux Server-Sent Events des changements de statut
+    des expéditions, incidents et tournées, au fil des commits.
+
+    Filtres (valeurs multiples séparées par des virgules) :
+    ?types=expedition,incident,tournee &tournee=T-01 &client=12 &zone=CENTRE
+    ?tournee= exige ?types=tournee : les colis d'une tournée (logistique)
+    ne sont pas rattachés aux expéditions, leurs événements n'ont pas de tournée.
+
+    Authentification JWT obligatoire (en-tête Authorization ou ?token=).
+    Nécessite le déploiement ASGI : sous WSGI un flux infini bloque un worker.
+    """
+    if await sync_to_async(_authentifier)(request) is None:
+        return JsonResponse({"error": "Authentification requise."}, status=401)
+
+    filtres = {}
+    for param, cle in (('types', 'type'), ('tournee', 'tournee'), ('client', 'client'), ('zone', 'zone')):
+        valeurs = {v for v in request.GET.get(param, '').split(',') if v}
+        if valeurs:
+            filtres[cle] = valeurs
+    if 'tournee' in filtres and filtres.get('type') != {'tournee'}:
+        return JsonResponse({"error": "?tournee= ne s'applique qu'avec ?types=tournee."}, status=400)
+
+    abonnement = diffuseur.abonner(filtres)
+
+    async def flux():
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                try:
+                    evenement = await asyncio.wait_for(abonnement.file.get(), timeout=INTERVALLE_PING)
+                except asyncio.TimeoutError:
+                    # Commentaire SSE : garde la connexion ouverte derrière les proxys
+                    yield ': ping\n\n'
+                    continue
+                yield (
+                    f"event: {evenement['type']}\n"
+                    f"data: {json.dumps(evenement, cls=DjangoJSONEncoder)}\n\n"
+                )
+        finally:
+            diffuseur.desabonner(abonnement)
+
+    response = StreamingHttpResponse(flux(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,145 @@
+"""
+Diffusion des changements de statut (expéditions, incidents, tournées)
+vers les clients connectés au flux SSE /api/evenements/.
+
+Deux backends, choisis par settings.EVENEMENTS_BACKEND :
+- 'memoire' : diffuseur en mémoire, suffisant avec un seul processus web ;
+- 'postgres' : chaque événement passe par NOTIFY, et un thread LISTEN par
+  processus le redistribue à ses abonnés locaux. Nécessaire dès qu'il y a
+  plusieurs workers (uvicorn --workers N).
+"""
+import asyncio
+import json
+import logging
+import select
+import threading
+
+from django.conf import settings
+from django.db import connection, connections
+
+logger = logging.getLogger(__name__)
+
+CANAL_POSTGRES = 'evenements_livraison'
+
+
+class Abonnement:
+    """File d'attente d'un client SSE, liée à la boucle asyncio de sa requête."""
+
+    def __init__(self, filtres, taille_max=200):
+        self.filtres = {cle: valeur for cle, valeur in filtres.items() if valeur}
+        self.file = asyncio.Queue(maxsize=taille_max)
+        self.boucle = asyncio.get_running_loop()
+
+    def correspond(self, evenement):
+        for cle, valeurs in self.filtres.items():
+            if str(evenement.get(cle)) not in valeurs:
+                return False
+        return True
+
+    def _deposer(self, evenement):
+        # Un client trop lent perd les événements les plus anciens plutôt
+        # que de faire grossir la mémoire du serveur.
+        if self.file.full():
+            self.file.get_nowait()
+        self.file.put_nowait(evenement)
+
+    def envoyer(self, evenement):
+        """Appelable depuis n'importe quel thread."""
+        self.boucle.call_soon_threadsafe(self._deposer, evenement)
+
+
+class Diffuseur:
+    """Diffuseur en mémoire (un par processus)."""
+
+    def __init__(self):
+        self._abonnements = set()
+        self._verrou = threading.Lock()
+
+    def abonner(self, filtres):
+        abonnement = Abonnement(filtres)
+        with self._verrou:
+            self._abonnements.add(abonnement)
+        return abonnement
+
+    def desabonner(self, abonnement):
+        with self._verrou:
+            self._abonnements.discard(abonnement)
+
+    def distribuer(self, evenement):
+        with self._verrou:
+            abonnements = list(self._abonnements)
+        for abonnement in abonnements:
+            if abonnement.correspond(evenement):
+                try:
+                    abonnement.envoyer(evenement)
+                except RuntimeError:
+                    # Boucle de la requête déjà fermée : client parti.
+                    self.desabonner(abonnement)
+
+    def publier(self, evenement):
+        self.distribuer(evenement)
+
+
+class DiffuseurPostgres(Diffuseur):
+    """Diffuseur multi-processus via LISTEN/NOTIFY."""
+
+    def __init__(self):
+        super().__init__()
+        self._ecoute = None
+
+    def abonner(self, filtres):
+        self._demarrer_ecoute()
+        return super().abonner(filtres)
+
+    def publier(self, evenement):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [CANAL_POSTGRES, json.dumps(evenement)])
+
+    def _demarrer_ecoute(self):
+        with self._verrou:
+            if self._ecoute and self._ecoute.is_alive():
+                return
+            self._ecoute = threading.Thread(target=self._ecouter, name='evenements-listen', daemon=True)
+            self._ecoute.start()
+
+    def _ecouter(self):
+        # Connexion dédiée, hors du pool éventuel (DB_POOL_MODE=pool) : elle
+        # reste ouverte tant que le processus écoute.
+        wrapper = connections['default']
+        conn = wrapper.Database.connect(**wrapper.get_connection_params())
+        conn.autocommit = True
+        try:
+            cursor = conn.cursor()
+            cursor.execute(f'LISTEN {CANAL_POSTGRES}')
+            while True:
+                for payload in self._attendre_notifications(conn):
+                    try:
+                        self.distribuer(json.loads(payload))
+                    except ValueError:
+                        logger.warning("Notification illisible ignorée : %r", payload)
+        except Exception:
+            logger.exception("Arrêt de l'écoute LISTEN %s", CANAL_POSTGRES)
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _attendre_notifications(conn, timeout=5):
+        if hasattr(conn, 'poll'):
+            # psycopg2
+            if select.select([conn], [], [], timeout) == ([], [], []):
+                return []
+            conn.poll()
+            payloads = [notification.payload for notification in conn.notifies]
+            conn.notifies.clear()
+            return payloads
+        # psycopg 3
+        return [notification.payload for notification in conn.notifies(timeout=timeout)]
+
+
+def _creer_diffuseur():
+    if getattr(settings, 'EVENEMENTS_BACKEND', 'memoire') == 'postgres':
+        return DiffuseurPostgres()
+    return Diffuseur()
+
+
+diffuseur = _creer_diffuseur()
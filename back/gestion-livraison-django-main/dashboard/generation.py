@@ -0,0 +1,553 @@
+"""
+Générateur de jeux de données synthétiques à grande échelle.
+
+Les lignes sont produites par lots sous forme de tuples, puis insérées par
+COPY (PostgreSQL) ou bulk_create. Les clés primaires sont attribuées par le
+générateur à partir du maximum existant : aucune relecture n'est nécessaire
+entre tables, et les séquences sont recalées en fin de génération.
+
+Pour une même graine et une même date de fin, le jeu produit est identique.
+"""
+import csv
+import io
+import math
+import random
+import time
+from contextlib import contextmanager
+from datetime import datetime, time as heure, timedelta
+from decimal import ROUND_HALF_UP, Decimal
+from itertools import accumulate
+
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from clients import grand_livre
+from clients.models import Client, Contient, Historique, Rapport, Reclamation, normaliser_tel
+from clients.reclamations import recalculer as compteurs_reclamations
+from expeditions.agregats import reconstruire as reconstruire_agregats_incidents
+from expeditions.models import Expedition, ExpeditionArchivee, Incident, IncidentAgregat
+from facturation.models import EtreFacture, Facture, Paiement
+from logistique import models as logistique
+
+CENTIME = Decimal('0.01')
+
+# (numéro, ville, zone, poids démographique)
+WILAYAS = [
+    (1, 'Adrar', 'SUD', 1), (2, 'Chlef', 'OUEST', 2), (3, 'Laghouat', 'SUD', 1), (4, 'Oum El Bouaghi', 'EST', 1),
+    (5, 'Batna', 'EST', 2), (6, 'Bejaia', 'NORD', 2), (7, 'Biskra', 'SUD', 2), (8, 'Bechar', 'SUD', 1),
+    (9, 'Blida', 'CENTRE', 4), (10, 'Bouira', 'CENTRE', 1), (11, 'Tamanrasset', 'SUD', 1), (12, 'Tebessa', 'EST', 1),
+    (13, 'Tlemcen', 'OUEST', 2), (14, 'Tiaret', 'OUEST', 1), (15, 'Tizi Ouzou', 'NORD', 3), (16, 'Alger', 'CENTRE', 10),
+    (17, 'Djelfa', 'CENTRE', 2), (18, 'Jijel', 'NORD', 1), (19, 'Setif', 'EST', 4), (20, 'Saida', 'OUEST', 1),
+    (21, 'Skikda', 'NORD', 2), (22, 'Sidi Bel Abbes', 'OUEST', 2), (23, 'Annaba', 'EST', 3), (24, 'Guelma', 'EST', 1),
+    (25, 'Constantine', 'EST', 5), (26, 'Medea', 'CENTRE', 2), (27, 'Mostaganem', 'OUEST', 2), (28, "M'Sila", 'CENTRE', 2),
+    (29, 'Mascara', 'OUEST', 1), (30, 'Ouargla', 'SUD', 2), (31, 'Oran', 'OUEST', 7), (32, 'El Bayadh', 'SUD', 1),
+    (33, 'Illizi', 'SUD', 1), (34, 'Bordj Bou Arreridj', 'EST', 2), (35, 'Boumerdes', 'CENTRE', 3), (36, 'El Tarf', 'EST', 1),
+    (37, 'Tindouf', 'SUD', 1), (38, 'Tissemsilt', 'OUEST', 1), (39, 'El Oued', 'SUD', 2), (40, 'Khenchela', 'EST', 1),
+    (41, 'Souk Ahras', 'EST', 1), (42, 'Tipaza', 'CENTRE', 2), (43, 'Mila', 'EST', 1), (44, 'Ain Defla', 'CENTRE', 1),
+    (45, 'Naama', 'SUD', 1), (46, 'Ain Temouchent', 'OUEST', 1), (47, 'Ghardaia', 'SUD', 1), (48, 'Relizane', 'OUEST', 1),
+]
+TARIF_BASE_ZONE = {'CENTRE': 400, 'NORD': 500, 'EST': 600, 'OUEST': 600, 'SUD': 900}
+QUARTIERS = ['Centre', 'Nord', 'Sud', 'Est', 'Ouest', 'Gare', 'Cite 500 Logements']
+
+NOMS = ['Benali', 'Haddad', 'Saidi', 'Mansouri', 'Bouzid', 'Khelifi', 'Amrani', 'Belkacem', 'Cherif', 'Djebbar',
+        'Ferhat', 'Guerroudj', 'Hamidi', 'Kaci', 'Larbi', 'Meziane', 'Nouri', 'Ouali', 'Rahmani', 'Zerrouki']
+PRENOMS = ['Amine', 'Karim', 'Yacine', 'Sofiane', 'Nadia', 'Amina', 'Samir', 'Lina', 'Meriem', 'Walid',
+           'Sarah', 'Rachid', 'Imane', 'Farid', 'Yasmine', 'Mehdi', 'Houda', 'Nassim', 'Ines', 'Khaled']
+
+# Statuts d'expédition selon l'ancienneté (en jours) : [(âge max, {statut: poids})]
+STATUTS_PAR_AGE = [
+    (1, {'EN_ATTENTE': 50, 'EN_PREPARATION': 30, 'EN_TRANSIT': 20}),
+    (3, {'EN_PREPARATION': 10, 'EN_TRANSIT': 40, 'EN_CENTRE_TRI': 30, 'EN_COURS_LIVRAISON': 20}),
+    (10, {'EN_CENTRE_TRI': 10, 'EN_COURS_LIVRAISON': 20, 'LIVRE': 60, 'ECHEC_LIVRAISON': 7, 'RETOUR': 3}),
+    (math.inf, {'LIVRE': 90, 'ECHEC_LIVRAISON': 6, 'RETOUR': 4}),
+]
+STATUTS_TERMINAUX = {'LIVRE', 'ECHEC_LIVRAISON', 'RETOUR'}
+TYPES_INCIDENT_ECHEC = ['ADRESSE_INCORRECTE', 'DESTINATAIRE_ABSENT', 'REFUS_RECEPTION', 'PERTE']
+TYPES_INCIDENT = {'RETARD': 40, 'ENDOMMAGEMENT': 15, 'PROBLEME_TECHNIQUE': 10, 'ADRESSE_INCORRECTE': 10,
+                  'DESTINATAIRE_ABSENT': 15, 'PERTE': 3, 'ACCIDENT': 2, 'AUTRE': 5}
+MODES_PAIEMENT = {'ESPECES': 45, 'VIREMENT': 25, 'CHEQUE': 10, 'CARTE': 10, 'MOBILE': 10}
+NATURES_RECLAMATION = ['Retard de livraison', 'Colis endommage', 'Colis perdu', 'Erreur de facturation',
+                       'Comportement du livreur', 'Service client']
+# Type de véhicule : (poids, catégorie de permis, capacité poids, capacité volume, colis min, colis max)
+FLOTTE = {
+    'MOTO': (30, 'A', 80, 0.3, 1, 5),
+    'VOITURE': (40, 'B', 450, 3, 3, 15),
+    'CAMION': (30, 'C', 5000, 30, 10, 60),
+}
+
+
+def _tirage(rng, poids):
+    """Choix pondéré dans un dict {valeur: poids}."""
+    return rng.choices(list(poids), weights=list(poids.values()))[0]
+
+
+def _montant(tarif, poids, volume):
+    base, tarif_poids, tarif_volume = tarif
+    return (base + poids * tarif_poids + volume * tarif_volume).quantize(CENTIME, ROUND_HALF_UP)
+
+
+@contextmanager
+def _dates_libres(*modeles):
+    """
+    Désactive auto_now/auto_now_add le temps d'un bulk_create, pour que les
+    dates générées (étalées sur la période) soient conservées.
+    """
+    champs = [
+        (champ, champ.auto_now, champ.auto_now_add)
+        for modele in modeles for champ in modele._meta.concrete_fields
+        if getattr(champ, 'auto_now', False) or getattr(champ, 'auto_now_add', False)
+    ]
+    for champ, _, _ in champs:
+        champ.auto_now = champ.auto_now_add = False
+    try:
+        yield
+    finally:
+        for champ, auto_now, auto_now_add in champs:
+            champ.auto_now, champ.auto_now_add = auto_now, auto_now_add
+
+
+class Table:
+    """Tampon de lignes d'un modèle, avec le prochain identifiant à attribuer."""
+
+    def __init__(self, modele, colonnes):
+        self.modele = modele
+        self.colonnes = colonnes
+        self.lignes = []
+        self.total = 0
+        self.duree = 0.0
+        self.prochain_id = None
+        if modele._meta.auto_field:
+            dernier = modele.objects.aggregate(m=Max('pk'))['m']
+            self.prochain_id = (dernier or 0) + 1
+
+    def nouvel_id(self):
+        valeur = self.prochain_id
+        self.prochain_id += 1
+        return valeur
+
+    def ajouter(self, *ligne):
+        self.lignes.append(ligne)
+
+
+class Inserteur:
+    """Insertion des tampons par COPY (PostgreSQL) ou bulk_create."""
+
+    def __init__(self, methode='auto', taille_lot=5000):
+        if methode == 'auto':
+            methode = 'copy' if connection.vendor == 'postgresql' else 'bulk'
+        if methode == 'copy' and connection.vendor != 'postgresql':
+            raise ValueError("La méthode COPY nécessite PostgreSQL.")
+        self.methode = methode
+        self.taille_lot = taille_lot
+
+    def vider(self, table):
+        if not table.lignes:
+            return
+        debut = time.perf_counter()
+        with transaction.atomic():
+            if self.methode == 'copy':
+                self._copy(table)
+            else:
+                self._bulk(table)
+        table.duree += time.perf_counter() - debut
+        table.total += len(table.lignes)
+        table.lignes = []
+
+    def _bulk(self, table):
+        modele = table.modele
+        objets = [modele(**dict(zip(table.colonnes, ligne))) for ligne in table.lignes]
+        with _dates_libres(modele):
+            modele.objects.bulk_create(objets, batch_size=self.taille_lot)
+
+    def _copy(self, table):
+        meta = table.modele._meta
+        colonnes = ', '.join(connection.ops.quote_name(meta.get_field(c).column) for c in table.colonnes)
+        sql = f"COPY {connection.ops.quote_name(meta.db_table)} ({colonnes}) FROM STDIN"
+        with connection.cursor() as cursor:
+            brut = cursor.cursor
+            if hasattr(brut, 'copy'):
+                # psycopg 3 : adaptation native des types Python
+                with brut.copy(sql) as copie:
+                    for ligne in table.lignes:
+                        copie.write_row(ligne)
+            else:
+                # psycopg2 : CSV, NULL = champ vide non quoté
+                tampon = io.StringIO()
+                csv.writer(tampon, quoting=csv.QUOTE_NONNUMERIC).writerows(table.lignes)
+                tampon.seek(0)
+                brut.copy_expert(f"{sql} WITH (FORMAT csv)", tampon)
+
+
+class GenerateurDonnees:
+    """
+    Produit clients, destinations, tarifications, expéditions (statuts
+    cohérents avec leur ancienneté), incidents, factures et paiements,
+    tournées avec leurs colis, réclamations et rapports.
+    """
+
+    # Ordre d'insertion (clés étrangères) et de vidage
+    MODELES = [
+        logistique.Destination, logistique.Tarification, Client, Expedition, Incident,
+        Facture, EtreFacture, Paiement, logistique.Chauffeur, logistique.Vehicule,
+        logistique.Expedition, logistique.Tournee, logistique.Tournee.expeditions.through,
+        Reclamation, Rapport, Contient,
+    ]
+
+    def __init__(self, graine=42, jours=365, date_fin=None, methode='auto', taille_lot=5000, journal=None):
+        self.rng = random.Random(graine)
+        self.jours = jours
+        date_fin = date_fin or timezone.localdate()
+        self.fin = timezone.make_aware(datetime.combine(date_fin, heure(23, 59)))
+        self.inserteur = Inserteur(methode, taille_lot)
+        self.taille_lot = taille_lot
+        self.journal = journal or (lambda message: None)
+        self.tables = {}
+
+    # -- utilitaires ---------------------------------------------------------
+
+    def _table(self, modele, *colonnes):
+        if modele not in self.tables:
+            self.tables[modele] = Table(modele, colonnes)
+        return self.tables[modele]
+
+    def _vider(self, *modeles):
+        for modele in modeles:
+            self.inserteur.vider(self.tables[modele])
+
+    def _date(self):
+        """Instant tiré dans la période, plus dense sur les semaines récentes (croissance d'activité)."""
+        age = self.jours * self.rng.random() ** 1.3
+        return self.fin - timedelta(days=age)
+
+    def _age_jours(self, instant):
+        return (self.fin - instant).total_seconds() / 86400
+
+    # -- référentiels --------------------------------------------------------
+
+    def referentiels(self):
+        destinations = [
+            logistique.Destination(code_d=f"DZ-{num:02d}", ville=ville, zone_geo=zone)
+            for num, ville, zone, _ in WILAYAS
+        ]
+        logistique.Destination.objects.bulk_create(destinations, ignore_conflicts=True)
+        tarifs = []
+        for num, _, zone, _ in WILAYAS:
+            base = Decimal(TARIF_BASE_ZONE[zone])
+            tarif_poids = Decimal(self.rng.randint(30, 60))
+            tarif_volume = Decimal(self.rng.randint(80, 150))
+            for service, prefixe, coefficient in (('STANDARD', 'STD', 1), ('EXPRESS', 'EXP', Decimal('1.5'))):
+                tarifs.append(logistique.Tarification(
+                    code_tarif=f"{prefixe}-{num:02d}", type_service=service, destination_id=f"DZ-{num:02d}",
+                    tarif_base_destination=base * coefficient, tarif_poids=tarif_poids * coefficient,
+                    tarif_volume=tarif_volume * coefficient,
+                ))
+        logistique.Tarification.objects.bulk_create(tarifs, ignore_conflicts=True)
+
+        # Valeurs réellement en base (un tarif existant n'est pas écrasé)
+        en_base = {
+            t['code_tarif']: t for t in logistique.Tarification.objects.filter(
+                code_tarif__in=[t.code_tarif for t in tarifs]
+            ).values('code_tarif', 'destination_id', 'type_service',
+                     'tarif_base_destination', 'tarif_poids', 'tarif_volume')
+        }
+        villes = {f"DZ-{num:02d}": (ville, zone, poids) for num, ville, zone, poids in WILAYAS}
+        self.tarifs = []
+        for t in en_base.values():
+            ville, zone, poids = villes[t['destination_id']]
+            self.tarifs.append({
+                'code': t['code_tarif'], 'destination': t['destination_id'], 'ville': ville, 'zone': zone,
+                'valeurs': (t['tarif_base_destination'], t['tarif_poids'], t['tarif_volume']),
+                'poids': poids * (4 if t['type_service'] == 'STANDARD' else 1),
+            })
+        self.tarifs.sort(key=lambda t: t['code'])
+        self.poids_tarifs = list(accumulate(t['poids'] for t in self.tarifs))
+        self.journal(f"Référentiels : {len(destinations)} destinations, {len(self.tarifs)} tarifications")
+
+    def _tarif(self, zone=None):
+        if zone is None:
+            return self.rng.choices(self.tarifs, cum_weights=self.poids_tarifs)[0]
+        return self.rng.choice([t for t in self.tarifs if t['zone'] == zone])
+
+    # -- clients ---------------------------------------------------------------
+
+    def clients(self, nombre):
+        # COPY n'applique pas les valeurs par défaut Python : toutes les colonnes NOT NULL sont fournies
+        table = self._table(Client, 'CodeClient', 'Nom', 'Prenom', 'Adresse', 'Tel', 'TelNormalise', 'Email', 'Solde',
+                            'NbReclamations', 'NbReclamationsOuvertes')
+        premier = table.prochain_id
+        for _ in range(nombre):
+            code = table.nouvel_id()
+            nom, prenom = self.rng.choice(NOMS), self.rng.choice(PRENOMS)
+            ville = self._tarif()['ville']
+            tel = f"0{self.rng.choice('567')}{self.rng.randint(0, 99999999):08d}"
+            table.ajouter(
+                code, nom, prenom,
+                f"{self.rng.randint(1, 250)} rue {self.rng.choice(QUARTIERS)}, {ville}",
+                tel, normaliser_tel(tel),
+                f"{prenom}.{nom}.{code}@exemple.dz".lower(),
+                Decimal('0.00'), 0, 0,
+            )
+            if len(table.lignes) >= self.taille_lot:
+                self._vider(Client)
+        self._vider(Client)
+        # Quelques gros clients concentrent l'activité (loi de Zipf)
+        self.codes_clients = range(premier, premier + nombre)
+        self.poids_clients = list(accumulate(1 / (rang + 1) ** 0.8 for rang in range(nombre)))
+
+    def _client(self):
+        return self.rng.choices(self.codes_clients, cum_weights=self.poids_clients)[0]
+
+    # -- expéditions, incidents, factures, paiements --------------------------
+
+    def expeditions(self, nombre, taux_incident=0.06, taux_facturation=0.85):
+        exps = self._table(Expedition, 'numexp', 'poids', 'volume', 'statut', 'code_client_id', 'tarification_id',
+                           'destination_id', 'date_creation', 'date_modification', 'description', 'montant_estime')
+        self._table(Incident, 'code_inc', 'type', 'commentaire', 'piece_jointe', 'etat', 'resolution', 'wilaya',
+                    'commune', 'numexp_id', 'date_creation', 'date_resolution')
+        self._table(Facture, 'code_facture', 'date_f', 'code_client_id', 'ht', 'tva', 'ttc', 'date_creation',
+                    'remarques', 'est_payee')
+        self._table(EtreFacture, 'id', 'numexp_id', 'code_facture_id', 'date_ajout')
+        self._table(Paiement, 'reference_p', 'date', 'montant_verse', 'mode_paiement', 'code_facture_id',
+                    'date_creation', 'remarques')
+        dernier = (Facture.objects.filter(code_facture__startswith='FACT-G')
+                   .order_by('-code_facture').values_list('code_facture', flat=True).first())
+        self.prochaine_facture = int(dernier[6:]) + 1 if dernier else 1
+
+        cree = 0
+        while cree < nombre:
+            # Une « commande » : 1 à 5 expéditions d'un même client, le même jour
+            taille = min(nombre - cree, _tirage(self.rng, {1: 50, 2: 25, 3: 12, 4: 8, 5: 5}))
+            client = self._client()
+            instant = self._date()
+            lot = [self._expedition(client, instant, taux_incident) for _ in range(taille)]
+            cree += taille
+            if (all(statut in STATUTS_TERMINAUX for _, statut, _, _ in lot)
+                    and self._age_jours(instant) > 7 and self.rng.random() < taux_facturation):
+                self._facture(client, instant, lot)
+            if len(exps.lignes) >= self.taille_lot:
+                self._vider(Expedition, Incident, Facture, EtreFacture, Paiement)
+                self.journal(f"  expéditions : {exps.total}/{nombre}")
+        self._vider(Expedition, Incident, Facture, EtreFacture, Paiement)
+
+    def _expedition(self, client, instant, taux_incident):
+        table = self.tables[Expedition]
+        numexp = table.nouvel_id()
+        tarif = self._tarif()
+        poids = Decimal(str(round(min(max(self.rng.lognormvariate(1.2, 0.9), 0.1), 500), 2)))
+        volume = max(CENTIME, (poids * Decimal(str(self.rng.uniform(0.002, 0.01)))).quantize(CENTIME))
+        age = self._age_jours(instant)
+        statut = _tirage(self.rng, next(repartition for age_max, repartition in STATUTS_PAR_AGE if age < age_max))
+
+        incident = statut in ('ECHEC_LIVRAISON', 'RETOUR') or self.rng.random() < taux_incident
+        if incident:
+            statut = self._incident(numexp, statut, instant, tarif['ville'])
+        montant = _montant(tarif['valeurs'], poids, volume)
+        modification = instant + timedelta(days=min(age, self.rng.uniform(0.1, 6)))
+        description = "Colis fragile" if self.rng.random() < 0.05 else None
+        table.ajouter(numexp, poids, volume, statut, client, tarif['code'], tarif['destination'],
+                      instant, modification, description, montant)
+        return numexp, statut, montant, instant
+
+    def _incident(self, numexp, statut, instant, ville):
+        """Ajoute un incident et renvoie le statut de l'expédition, éventuellement modifié."""
+        table = self.tables[Incident]
+        if statut in ('ECHEC_LIVRAISON', 'RETOUR'):
+            type_incident = self.rng.choice(TYPES_INCIDENT_ECHEC)
+        else:
+            type_incident = _tirage(self.rng, TYPES_INCIDENT)
+        signalement = min(self.fin, instant + timedelta(hours=self.rng.uniform(2, 96)))
+        age = self._age_jours(signalement)
+        if age > 15:
+            etat = _tirage(self.rng, {'RESOLU': 70, 'FERME': 25, 'ANNULE': 5})
+        else:
+            etat = _tirage(self.rng, {'OUVERT': 40, 'EN_COURS': 35, 'RESOLU': 20, 'FERME': 5})
+        resolution = date_resolution = None
+        if etat in ('RESOLU', 'FERME'):
+            date_resolution = min(self.fin, signalement + timedelta(days=self.rng.uniform(0.2, 12)))
+            resolution = "Incident traité avec le client"
+        # Même règle que Incident.save()
+        if type_incident in ('PERTE', 'ENDOMMAGEMENT') and etat == 'RESOLU':
+            statut = 'ECHEC_LIVRAISON'
+        table.ajouter(
+            table.nouvel_id(), type_incident, f"Incident {type_incident.lower()} signalé par le livreur", '',
+            etat, resolution, ville, f"{ville} {self.rng.choice(QUARTIERS)}", numexp, signalement, date_resolution,
+        )
+        return statut
+
+    def _facture(self, client, instant, lot):
+        code = f"FACT-G{self.prochaine_facture:07d}"
+        self.prochaine_facture += 1
+        date_f = min(self.fin, instant + timedelta(days=self.rng.randint(3, 15)))
+        ht = sum(montant for _, _, montant, _ in lot)
+        tva = (ht * Facture.TAUX_TVA).quantize(CENTIME, ROUND_HALF_UP)
+        ttc = ht + tva
+
+        paiements = self.tables[Paiement]
+        age = self._age_jours(date_f)
+        profil = _tirage(self.rng, {'solde': 80, 'partiel': 15, 'impaye': 5} if age > 60
+                         else {'solde': 40, 'partiel': 30, 'impaye': 30})
+        if profil == 'solde' and self.rng.random() < 0.7:
+            versements = [ttc]
+        elif profil == 'solde':
+            acompte = (ttc / 2).quantize(CENTIME)
+            versements = [acompte, ttc - acompte]
+        elif profil == 'partiel':
+            versements = [(ttc * Decimal(str(round(self.rng.uniform(0.2, 0.8), 2)))).quantize(CENTIME)]
+        else:
+            versements = []
+        for montant in versements:
+            date_p = min(self.fin, date_f + timedelta(days=self.rng.randint(0, 45)))
+            paiements.ajouter(paiements.nouvel_id(), date_p.date(), montant, _tirage(self.rng, MODES_PAIEMENT),
+                              code, date_p, None)
+
+        self.tables[Facture].ajouter(code, date_f.date(), client, ht, tva, ttc, date_f, None, profil == 'solde')
+        liens = self.tables[EtreFacture]
+        for numexp, _, _, _ in lot:
+            liens.ajouter(liens.nouvel_id(), numexp, code, date_f)
+
+    # -- tournées ---------------------------------------------------------------
+
+    def tournees(self, nombre):
+        taille_flotte = max(3, nombre // 30)
+        chauffeurs = self._table(logistique.Chauffeur, 'code_chauffeur', 'nom', 'num_permis',
+                                 'categorie_permis', 'statut_dispo')
+        vehicules = self._table(logistique.Vehicule, 'matricule', 'type_vehicule', 'capacite_poids',
+                                'capacite_volume', 'etat')
+        colis = self._table(logistique.Expedition, 'numexp', 'poids', 'volume', 'tarification_id',
+                            'montant_estime', 'date_creation', 'statut')
+        tournees = self._table(logistique.Tournee, 'code_t', 'date_tournee', 'vehicule_id', 'chauffeur_id', 'statut')
+        liens = self._table(logistique.Tournee.expeditions.through, 'id', 'tournee_id', 'expedition_id')
+
+        # Flotte : un chauffeur titulaire du bon permis par véhicule
+        debut_flotte = logistique.Chauffeur.objects.filter(code_chauffeur__startswith='CH-G').count()
+        flotte = []
+        for i in range(debut_flotte, debut_flotte + taille_flotte):
+            type_vehicule = _tirage(self.rng, {t: spec[0] for t, spec in FLOTTE.items()})
+            _, permis, capacite_poids, capacite_volume, _, _ = FLOTTE[type_vehicule]
+            equipe = {'chauffeur': f"CH-G{i:05d}", 'vehicule': f"{900000 + i}", 'type': type_vehicule, 'dispo': True}
+            flotte.append(equipe)
+            vehicules.ajouter(equipe['vehicule'], type_vehicule, capacite_poids, capacite_volume, 'Opérationnel')
+            chauffeurs.ajouter(equipe['chauffeur'], f"{self.rng.choice(PRENOMS)} {self.rng.choice(NOMS)}",
+                               f"{9000000000 + i}", permis, True)
+        self._vider(logistique.Vehicule, logistique.Chauffeur)
+
+        debut_tournees = logistique.Tournee.objects.filter(code_t__startswith='TG').count()
+        for i in range(debut_tournees, debut_tournees + nombre):
+            equipe = flotte[i % taille_flotte]
+            _, _, capacite_poids, capacite_volume, colis_min, colis_max = FLOTTE[equipe['type']]
+            instant = self._date()
+            rang = i - debut_tournees
+            if rang == 0 or (rang < taille_flotte and self.rng.random() < 0.5):
+                # Environ la moitié de la flotte est en tournée aujourd'hui
+                instant = self.fin - timedelta(hours=self.rng.uniform(1, 20))
+            statut = 'TERMINEE'
+            if self._age_jours(instant) < 1 and equipe['dispo']:
+                statut, equipe['dispo'] = 'EN_COURS', False
+            elif self.rng.random() < 0.03:
+                statut = 'INCIDENT'
+            code_t = f"TG{i:07d}"
+            tournees.ajouter(code_t, instant.date(), equipe['vehicule'], equipe['chauffeur'], statut)
+
+            # Colis d'une seule zone, dans la limite de capacité du véhicule
+            zone = self.rng.choice(list(TARIF_BASE_ZONE))
+            limite_poids, limite_volume = Decimal(str(capacite_poids)), Decimal(str(capacite_volume))
+            charge_poids = charge_volume = Decimal('0')
+            for _ in range(self.rng.randint(colis_min, colis_max)):
+                tarif = self._tarif(zone)
+                poids = Decimal(str(round(self.rng.uniform(0.5, capacite_poids / colis_min / 2), 2)))
+                volume = max(CENTIME, Decimal(str(round(self.rng.uniform(0.01, capacite_volume / colis_min / 2), 2))))
+                if charge_poids + poids > limite_poids or charge_volume + volume > limite_volume:
+                    break
+                charge_poids += poids
+                charge_volume += volume
+                numexp = colis.nouvel_id()
+                colis.ajouter(numexp, poids, volume, tarif['code'], _montant(tarif['valeurs'], poids, volume),
+                              instant - timedelta(hours=self.rng.uniform(2, 48)),
+                              'LIVREE' if statut == 'TERMINEE' else 'EN_ATTENTE')
+                liens.ajouter(liens.nouvel_id(), code_t, numexp)
+            if len(colis.lignes) >= self.taille_lot:
+                self._vider(logistique.Expedition, logistique.Tournee, logistique.Tournee.expeditions.through)
+        self._vider(logistique.Expedition, logistique.Tournee, logistique.Tournee.expeditions.through)
+
+        # Comme Tournee.save() : le chauffeur d'une tournée en cours n'est pas disponible
+        logistique.Chauffeur.objects.filter(
+            code_chauffeur__in=[e['chauffeur'] for e in flotte if not e['dispo']]
+        ).update(statut_dispo=False)
+
+    # -- réclamations -------------------------------------------------------------
+
+    def reclamations(self, nombre):
+        table = self._table(Reclamation, 'CodeREC', 'Nature', 'Date', 'Etat', 'CodeClient_id', 'DateResolution')
+        rapports = self._table(Rapport, 'CodeRapport', 'MotifR', 'Delais', 'NbrREC')
+        contient = self._table(Contient, 'id', 'CodeREC_id', 'CodeRapport_id')
+
+        par_nature_mois = {}
+        for _ in range(nombre):
+            code = table.nouvel_id()
+            nature = self.rng.choice(NATURES_RECLAMATION)
+            instant = self._date()
+            if self._age_jours(instant) > 30:
+                etat = _tirage(self.rng, {'Résolue': 80, 'Annulée': 10, 'En cours': 10})
+            else:
+                etat = _tirage(self.rng, {'Nouvelle': 40, 'En cours': 40, 'Résolue': 20})
+            resolution = None
+            if etat in ('Résolue', 'Annulée'):
+                resolution = min(instant + timedelta(days=self.rng.expovariate(1 / 6)), self.fin).date()
+            table.ajouter(code, nature, instant.date(), etat, self._client(), resolution)
+            if etat in ('Résolue', 'En cours'):
+                par_nature_mois.setdefault((nature, instant.strftime('%Y-%m')), []).append(code)
+        self._vider(Reclamation)
+
+        # Un rapport par nature et par mois, regroupant les réclamations traitées
+        for (nature, mois), codes in sorted(par_nature_mois.items()):
+            code_rapport = rapports.nouvel_id()
+            rapports.ajouter(code_rapport, f"{nature} - {mois}", self.rng.randint(2, 15), len(codes))
+            for code in codes:
+                contient.ajouter(contient.nouvel_id(), code, code_rapport)
+            if len(contient.lignes) >= self.taille_lot:
+                self._vider(Rapport, Contient)
+        self._vider(Rapport, Contient)
+
+    # -- fin ------------------------------------------------------------------------
+
+    def recaler_sequences(self):
+        """Les identifiants ayant été fournis explicitement, les séquences PostgreSQL sont recalées."""
+        modeles = [m for m in self.tables if self.tables[m].prochain_id is not None]
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), modeles):
+                cursor.execute(sql)
+
+    def finaliser(self):
+        """
+        À appeler en fin de génération : recale les séquences et recalcule
+        les données dérivées que COPY et bulk_create ne maintiennent pas.
+        """
+        self.recaler_sequences()
+        if self.tables.get(Incident) and self.tables[Incident].total:
+            reconstruire_agregats_incidents()
+        if self.tables.get(Facture) and self.tables[Facture].total:
+            grand_livre.rapprocher("Solde des données générées")
+        if self.tables.get(Reclamation) and self.tables[Reclamation].total:
+            compteurs_reclamations()
+
+    def bilan(self):
+        return [
+            (table.modele._meta.db_table, table.total, table.duree)
+            for table in self.tables.values() if table.total
+        ]
+
+
+def vider_donnees():
+    """
+    Vide les tables alimentées par le générateur (TRUNCATE … CASCADE sur PostgreSQL),
+    ainsi que les archives et agrégats qui en dérivent : sans contrainte de clé
+    étrangère, le CASCADE ne les atteint pas.
+    """
+    modeles = [Historique, ExpeditionArchivee, IncidentAgregat, *reversed(GenerateurDonnees.MODELES)]
+    tables = [modele._meta.db_table for modele in modeles]
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sql_flush(no_style(), tables, reset_sequences=True, allow_cascade=True):
+                cursor.execute(sql)
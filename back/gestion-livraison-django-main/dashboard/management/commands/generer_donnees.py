@@ -0,0 +1,73 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard.generation import GenerateurDonnees, vider_donnees
+
+
+class Command(BaseCommand):
+    help = (
+        "Génère un jeu de données synthétique réaliste (clients, destinations, tarifications, "
+        "expéditions, incidents, factures, paiements, tournées, réclamations) par COPY ou bulk_create. "
+        "Déterministe pour une graine et une date de fin données."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--expeditions', type=int, default=10000)
+        parser.add_argument('--clients', type=int, help="Défaut : expeditions / 10")
+        parser.add_argument('--tournees', type=int, help="Défaut : expeditions / 100")
+        parser.add_argument('--reclamations', type=int, help="Défaut : clients / 5")
+        parser.add_argument('--jours', type=int, default=365, help="Période couverte, en jours")
+        parser.add_argument('--date-fin', type=date.fromisoformat, help="AAAA-MM-JJ (défaut : aujourd'hui)")
+        parser.add_argument('--graine', type=int, default=42)
+        parser.add_argument('--methode', choices=['auto', 'copy', 'bulk'], default='auto',
+                            help="auto : COPY sur PostgreSQL, bulk_create sinon")
+        parser.add_argument('--lot', type=int, default=5000, help="Lignes par lot d'insertion")
+        parser.add_argument('--vider', action='store_true', help="Vide d'abord les tables métier")
+        parser.add_argument('--noinput', '--no-input', action='store_false', dest='interactive')
+
+    def handle(self, *args, **options):
+        if options['vider']:
+            if options['interactive']:
+                reponse = input(
+                    "Toutes les expéditions, factures, clients, tournées et réclamations seront supprimés. "
+                    "Taper 'oui' pour continuer : "
+                )
+                if reponse != 'oui':
+                    raise CommandError("Génération annulée.")
+            vider_donnees()
+            self.stdout.write("Tables métier vidées.")
+
+        nb_expeditions = options['expeditions']
+        nb_clients = options['clients'] or max(1, nb_expeditions // 10)
+        nb_tournees = options['tournees'] if options['tournees'] is not None else nb_expeditions // 100
+        nb_reclamations = options['reclamations'] if options['reclamations'] is not None else nb_clients // 5
+
+        try:
+            generateur = GenerateurDonnees(
+                graine=options['graine'], jours=options['jours'], date_fin=options['date_fin'],
+                methode=options['methode'], taille_lot=options['lot'],
+                journal=self.stdout.write if options['verbosity'] > 1 else None,
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        debut = time.perf_counter()
+        generateur.referentiels()
+        generateur.clients(nb_clients)
+        generateur.expeditions(nb_expeditions)
+        if nb_tournees:
+            generateur.tournees(nb_tournees)
+        if nb_reclamations:
+            generateur.reclamations(nb_reclamations)
+        generateur.finaliser()
+        duree = time.perf_counter() - debut
+
+        self.stdout.write(f"{'table':32} {'lignes':>10} {'lignes/s':>10}")
+        for table, total, duree_insertion in generateur.bilan():
+            debit = total / duree_insertion if duree_insertion else 0
+            self.stdout.write(f"{table:32} {total:>10} {debit:>10.0f}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Jeu de données généré en {duree:.1f} s (méthode {generateur.inserteur.methode}, graine {options['graine']})."
+        ))
@@ -0,0 +1,92 @@
+from django.db import transaction
+from django.db.models.signals import post_init, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from expeditions.models import Expedition, Incident
+from logistique.models import Tournee
+from .evenements import diffuseur
+
+# Champ de statut suivi pour chaque modèle diffusé
+CHAMPS_STATUT = {
+    Expedition: 'statut',
+    Incident: 'etat',
+    Tournee: 'statut',
+}
+
+
+def _zone_expedition(expedition):
+    if expedition is None or not expedition.destination_id:
+        return None
+    return expedition.destination.zone_geo
+
+
+def _evenement_expedition(expedition):
+    return {
+        'client': expedition.code_client_id,
+        'zone': _zone_expedition(expedition),
+    }
+
+
+def _evenement_incident(incident):
+    expedition = incident.numexp
+    return {
+        'expedition': incident.numexp_id,
+        'client': expedition.code_client_id if expedition else None,
+        'zone': _zone_expedition(expedition),
+        'wilaya': incident.wilaya,
+    }
+
+
+def _evenement_tournee(tournee):
+    zone = (
+        tournee.expeditions.exclude(tarification__isnull=True)
+        .values_list('tarification__destination__zone_geo', flat=True)
+        .first()
+    )
+    return {
+        'client': None,
+        'zone': zone,
+        'tournee': tournee.code_t,
+        'chauffeur': tournee.chauffeur_id,
+    }
+
+
+CONSTRUCTEURS = {
+    Expedition: ('expedition', _evenement_expedition),
+    Incident: ('incident', _evenement_incident),
+    Tournee: ('tournee', _evenement_tournee),
+}
+
+
+@receiver(post_init, sender=Expedition)
+@receiver(post_init, sender=Incident)
+@receiver(post_init, sender=Tournee)
+def memoriser_statut_initial(sender, instance, **kwargs):
+    """Garde le statut chargé pour détecter un changement au save()."""
+    instance._statut_initial = instance.__dict__.get(CHAMPS_STATUT[sender])
+
+
+@receiver(post_save, sender=Expedition)
+@receiver(post_save, sender=Incident)
+@receiver(post_save, sender=Tournee)
+def diffuser_changement_statut(sender, instance, created, **kwargs):
+    """Publie le changement de statut une fois la transaction validée."""
+    champ = CHAMPS_STATUT[sender]
+    statut = getattr(instance, champ)
+    ancien = getattr(instance, '_statut_initial', None)
+    if not created and statut == ancien:
+        return
+    instance._statut_initial = statut
+
+    type_evenement, construire = CONSTRUCTEURS[sender]
+    evenement = {
+        'type': type_evenement,
+        'id': instance.pk,
+        'statut': statut,
+        'ancien_statut': None if created else ancien,
+        'cree': created,
+        'date': timezone.now().isoformat(),
+        **construire(instance),
+    }
+    transaction.on_commit(lambda: diffuseur.publier(evenement))
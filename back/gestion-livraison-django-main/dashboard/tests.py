@@ -1,3 +1,26 @@
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from rest_framework_simplejwt.tokens import AccessToken
 
-# Create your tests here.
+
+class VuesAsynchronesTests(TestCase):
+    def setUp(self):
+        utilisateur = get_user_model().objects.create_user(
+            username='agent', email='agent@exemple.dz', password='secret-123',
+        )
+        self.jeton = str(AccessToken.for_user(utilisateur))
+
+    def test_tableau_de_bord_authentification_requise(self):
+        self.assertEqual(self.client.get('/api/async/dashboard/').status_code, 401)
+        reponse = self.client.get('/api/async/dashboard/', HTTP_AUTHORIZATION=f'Bearer {self.jeton}')
+        self.assertEqual(reponse.status_code, 200)
+
+    def test_flux_evenements_authentification_requise(self):
+        self.assertEqual(self.client.get('/api/evenements/').status_code, 401)
+        self.assertEqual(self.client.get('/api/evenements/', {'token': 'invalide'}).status_code, 401)
+
+    def test_filtre_tournee_reserve_aux_evenements_de_tournee(self):
+        for types in ('', 'expedition', 'expedition,tournee'):
+            with self.subTest(types=types):
+                reponse = self.client.get('/api/evenements/', {'token': self.jeton, 'types': types, 'tournee': 'T-01'})
+                self.assertEqual(reponse.status_code, 400)
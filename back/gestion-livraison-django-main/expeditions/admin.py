@@ -1,12 +1,19 @@
 from django.contrib import admin
+from django.db.models import Count, IntegerField, OuterRef
 from django.utils.html import format_html
-from .models import Expedition, Incident
+
+from clients.admin import GrandeTableAdminMixin, RechercheParClientMixin
+from clients.audit import consigner
+from config.sous_requetes import agregat
+
+from .models import Expedition, ExpeditionArchivee, Incident, PieceJointe
 
 
 @admin.register(Expedition)
-class ExpeditionAdmin(admin.ModelAdmin):
+class ExpeditionAdmin(GrandeTableAdminMixin, RechercheParClientMixin, admin.ModelAdmin):
     """
     Interface d'administration pour les expéditions.
+    Recherche : numéro d'expédition, code, nom, e-mail ou téléphone du client.
     """
     
     list_display = [
@@ -25,11 +32,11 @@ class ExpeditionAdmin(admin.ModelAdmin):
         'date_creation',
     ]
     
-    search_fields = [
-        'numexp',
-        'code_client',
-        'description',
-    ]
+    list_select_related = ['code_client']
+    
+    # Listes déroulantes de toute la table remplacées par une recherche
+    autocomplete_fields = ['code_client']
+    raw_id_fields = ['destination', 'tarification']
     
     readonly_fields = [
         'numexp',
@@ -53,6 +60,13 @@ class ExpeditionAdmin(admin.ModelAdmin):
     
     ordering = ['-date_creation']
     
+    def get_queryset(self, request):
+        # Nombre d'incidents calculé pour les seules lignes de la page
+        return super().get_queryset(request).annotate(
+            _nb_incidents=agregat(Incident.objects.filter(numexp=OuterRef('pk')), 'numexp',
+                                  Count('pk', output_field=IntegerField()))
+        )
+    
     def statut_badge(self, obj):
         """Affiche le statut avec une couleur"""
         colors = {
@@ -82,7 +96,7 @@ class ExpeditionAdmin(admin.ModelAdmin):
     
     def nb_incidents(self, obj):
         """Affiche le nombre d'incidents"""
-        count = obj.incidents.count()
+        count = obj._nb_incidents
         if count > 0:
             return format_html(
                 '<span style="color: red; font-weight: bold;">{}</span>',
@@ -93,21 +107,28 @@ class ExpeditionAdmin(admin.ModelAdmin):
     
     actions = ['marquer_en_transit', 'marquer_livre']
     
+    def _changer_statut(self, request, queryset, statut):
+        """Un seul UPDATE pour toute la sélection, tracé par un événement d'audit."""
+        updated = queryset.exclude(statut=statut).update(statut=statut)
+        consigner('MODIFICATION', f"{updated} expédition(s) passée(s) au statut {statut} depuis l'admin",
+                  'expedition', '', details={'statut': statut, 'nombre': updated})
+        return updated
+    
     def marquer_en_transit(self, request, queryset):
         """Action pour marquer les expéditions sélectionnées comme en transit"""
-        updated = queryset.update(statut='EN_TRANSIT')
+        updated = self._changer_statut(request, queryset, 'EN_TRANSIT')
         self.message_user(request, f"{updated} expédition(s) marquée(s) en transit.")
     marquer_en_transit.short_description = "Marquer comme 'En transit'"
     
     def marquer_livre(self, request, queryset):
         """Action pour marquer les expéditions sélectionnées comme livrées"""
-        updated = queryset.update(statut='LIVRE')
+        updated = self._changer_statut(request, queryset, 'LIVRE')
         self.message_user(request, f"{updated} expédition(s) marquée(s) comme livrée(s).")
     marquer_livre.short_description = "Marquer comme 'Livré'"
 
 
 @admin.register(Incident)
-class IncidentAdmin(admin.ModelAdmin):
+class IncidentAdmin(GrandeTableAdminMixin, admin.ModelAdmin):
     """
     Interface d'administration pour les incidents.
     """
@@ -143,12 +164,17 @@ class IncidentAdmin(admin.ModelAdmin):
         'date_resolution',
     ]
     
+    list_select_related = ['numexp']
+    
+    raw_id_fields = ['fichier']
+    autocomplete_fields = ['numexp']
+    
     fieldsets = (
         ('Informations principales', {
             'fields': ('code_inc', 'numexp', 'type', 'etat','wilaya','commune')
         }),
         ('Détails', {
-            'fields': ('commentaire', 'piece_jointe')
+            'fields': ('commentaire', 'piece_jointe', 'fichier')
         }),
         ('Résolution', {
             'fields': ('resolution', 'date_resolution')
@@ -198,4 +224,36 @@ class IncidentAdmin(admin.ModelAdmin):
         from django.utils import timezone
         updated = queryset.update(etat='RESOLU', date_resolution=timezone.now())
         self.message_user(request, f"{updated} incident(s) marqué(s) comme résolu(s).")
-    marquer_resolu.short_description = "Marquer comme 'Résolu'"
\ No newline at end of file
+    marquer_resolu.short_description = "Marquer comme 'Résolu'"
+
+
+@admin.register(PieceJointe)
+class PieceJointeAdmin(admin.ModelAdmin):
+    """
+    Interface d'administration des pièces jointes dédupliquées.
+    """
+
+    list_display = ['id', 'nom_origine', 'type_mime', 'taille', 'largeur', 'hauteur', 'statut_traitement', 'date_creation']
+    list_filter = ['statut_traitement', 'type_mime']
+    search_fields = ['nom_origine', 'sha256']
+    readonly_fields = [f.name for f in PieceJointe._meta.fields]
+
+
+@admin.register(ExpeditionArchivee)
+class ExpeditionArchiveeAdmin(GrandeTableAdminMixin, RechercheParClientMixin, admin.ModelAdmin):
+    """
+    Expéditions archivées (expeditions/archivage.py), en lecture seule.
+    Recherche : numéro d'expédition, code, nom, e-mail ou téléphone du client.
+    """
+
+    list_display = ['numexp', 'code_client', 'code_facture', 'statut', 'montant_estime', 'date_creation', 'date_archivage']
+    list_filter = ['statut']
+    list_select_related = ['code_client']
+    readonly_fields = [f.name for f in ExpeditionArchivee._meta.fields]
+    ordering = ['-numexp']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
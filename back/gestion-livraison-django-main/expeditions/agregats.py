@@ -0,0 +1,72 @@
+"""
+Tenue à jour de IncidentAgregat (compteurs par jour, wilaya, commune et type).
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Value
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+
+def cle_agregat(incident):
+    """(jour, wilaya, commune, type) d'un incident, ou None s'il n'est pas encore daté."""
+    if incident.date_creation is None:
+        return None
+    return (
+        timezone.localdate(incident.date_creation) if timezone.is_aware(incident.date_creation)
+        else incident.date_creation.date(),
+        incident.wilaya or '',
+        incident.commune or '',
+        incident.type,
+    )
+
+
+def ajuster(cle, delta):
+    """Ajoute delta au compteur de la clé, en créant la ligne au besoin."""
+    from .models import IncidentAgregat
+
+    jour, wilaya, commune, type_incident = cle
+    filtre = IncidentAgregat.objects.filter(jour=jour, wilaya=wilaya, commune=commune, type=type_incident)
+    if filtre.update(nombre=F('nombre') + delta):
+        return
+    try:
+        with transaction.atomic():
+            IncidentAgregat.objects.create(
+                jour=jour, wilaya=wilaya, commune=commune, type=type_incident, nombre=delta
+            )
+    except IntegrityError:
+        # Ligne créée entre-temps par une requête concurrente
+        filtre.update(nombre=F('nombre') + delta)
+
+
+def requete_agregation(Incident):
+    """Agrégation de la table incident au grain de IncidentAgregat."""
+    return (
+        Incident.objects.order_by()
+        .annotate(
+            jour=TruncDate('date_creation'),
+            wilaya_norm=Coalesce('wilaya', Value('')),
+            commune_norm=Coalesce('commune', Value('')),
+        )
+        .values('jour', 'wilaya_norm', 'commune_norm', 'type')
+        .annotate(nombre=Count('code_inc'))
+    )
+
+
+def reconstruire(Incident=None, IncidentAgregat=None, taille_lot=5000):
+    """
+    Recalcule tous les agrégats depuis la table incident : après un
+    chargement en masse (bulk_create, COPY, update()) qui ne passe pas
+    par les signaux. Renvoie le nombre de lignes d'agrégat.
+    """
+    if Incident is None:
+        from .models import Incident, IncidentAgregat
+
+    with transaction.atomic():
+        IncidentAgregat.objects.all().delete()
+        lignes = [
+            IncidentAgregat(jour=g['jour'], wilaya=g['wilaya_norm'], commune=g['commune_norm'],
+                            type=g['type'], nombre=g['nombre'])
+            for g in requete_agregation(Incident).iterator(chunk_size=taille_lot)
+        ]
+        IncidentAgregat.objects.bulk_create(lignes, batch_size=taille_lot)
+    return len(lignes)
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class ExpeditionsConfig(AppConfig):
     name = 'expeditions'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,128 @@
+"""
+Archivage des expéditions closes (table expedition_archive).
+
+Unité d'archivage : une facture payée dont toutes les expéditions sont
+closes (LIVRE ou RETOUR) et créées depuis plus de ANCIENNETE_JOURS jours.
+Ses expéditions, leurs incidents et leurs liens etre_facture quittent les
+tables courantes ; chaque expédition devient une ligne ExpeditionArchivee
+dont le document JSON garde les lignes d'origine telles quelles.
+
+Archiver par facture entière fige ses montants : une facture dont une
+partie seulement des expéditions serait archivée verrait son HT recalculé
+à la baisse. Les factures archivées (ayant des expéditions dans l'archive)
+sont donc écartées du recalcul ensembliste et du contrôle de cohérence ;
+Facture.calculer_montants() ajoute leurs montants archivés.
+
+Les factures sont traitées par lots de TAILLE_LOT, une transaction par
+lot : l'éligibilité est revérifiée sous verrou, puis les lignes archivées
+sont créées par bulk_create et les lignes courantes supprimées en SQL
+direct, sans les signaux de suppression (journal d'audit, agrégats
+d'incidents : la carte des points chauds garde l'historique jusqu'à sa
+prochaine reconstruction) ni Expedition.delete().
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from facturation.models import EtreFacture, Facture
+
+from .models import Expedition, ExpeditionArchivee, Incident
+
+STATUTS_CLOS = ('LIVRE', 'RETOUR')
+ANCIENNETE_JOURS = 365
+TAILLE_LOT = 500
+
+
+def factures_archivees():
+    """Condition « la facture a des expéditions archivées » (à exclure des recalculs)."""
+    return Exists(ExpeditionArchivee.objects.filter(code_facture=OuterRef('pk')))
+
+
+def factures_archivables(avant):
+    """Factures payées dont toutes les expéditions sont closes et antérieures à `avant`."""
+    non_closes = Expedition.objects.filter(etre_facture_set__code_facture=OuterRef('pk')).filter(
+        ~Q(statut__in=STATUTS_CLOS) | Q(date_creation__gte=avant)
+    )
+    return (
+        Facture.objects.filter(est_payee=True)
+        .filter(Exists(EtreFacture.objects.filter(code_facture=OuterRef('pk'))))
+        .exclude(Exists(non_closes))
+    )
+
+
+def _supprimer(modele, champ, valeurs):
+    table = connection.ops.quote_name(modele._meta.db_table)
+    colonne = connection.ops.quote_name(modele._meta.get_field(champ).column)
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {table} WHERE {colonne} IN ({', '.join(['%s'] * len(valeurs))})", valeurs)
+        return cursor.rowcount
+
+
+def archiver_lot(codes, avant):
+    """Archive les factures `codes` encore éligibles. Renvoie (factures, expéditions, incidents) archivés."""
+    with transaction.atomic():
+        codes = list(
+            factures_archivables(avant).filter(pk__in=codes)
+            .select_for_update(of=('self',)).values_list('pk', flat=True)
+        )
+        if not codes:
+            return 0, 0, 0
+        liens = {
+            lien['numexp']: lien for lien in
+            EtreFacture.objects.filter(code_facture__in=codes).values('id', 'numexp', 'code_facture', 'date_ajout')
+        }
+        numexps = sorted(liens)
+        incidents = defaultdict(list)
+        for incident in Incident.objects.filter(numexp__in=numexps).order_by('code_inc').values():
+            incidents[incident['numexp_id']].append(incident)
+        ExpeditionArchivee.objects.bulk_create([
+            ExpeditionArchivee(
+                numexp=expedition['numexp'], code_client_id=expedition['code_client_id'],
+                code_facture=liens[expedition['numexp']]['code_facture'], statut=expedition['statut'],
+                montant_estime=expedition['montant_estime'], date_creation=expedition['date_creation'],
+                donnees={
+                    'expedition': expedition,
+                    'incidents': incidents[expedition['numexp']],
+                    'facturation': liens[expedition['numexp']],
+                },
+            )
+            for expedition in Expedition.objects.filter(numexp__in=numexps).select_for_update().values()
+        ])
+        nb_incidents = _supprimer(Incident, 'numexp', numexps)
+        _supprimer(EtreFacture, 'numexp', numexps)
+        nb_expeditions = _supprimer(Expedition, 'numexp', numexps)
+    return len(codes), nb_expeditions, nb_incidents
+
+
+def archiver(anciennete_jours=ANCIENNETE_JOURS, taille_lot=TAILLE_LOT, simulation=False, rappel=None):
+    """
+    Archive les factures éligibles par lots de `taille_lot`. Avec
+    `simulation`, se contente de les compter. `rappel(bilan)` est appelé
+    après chaque lot. Renvoie le bilan : factures, expeditions, incidents.
+    """
+    avant = timezone.now() - timedelta(days=anciennete_jours)
+    factures = factures_archivables(avant).order_by('code_facture')
+    bilan = {'factures': 0, 'expeditions': 0, 'incidents': 0}
+    if simulation:
+        bilan['factures'] = factures.count()
+        bilan['expeditions'] = EtreFacture.objects.filter(code_facture__in=factures.values('pk')).count()
+        bilan['incidents'] = Incident.objects.filter(
+            numexp__in=EtreFacture.objects.filter(code_facture__in=factures.values('pk')).values('numexp')
+        ).count()
+        return bilan
+    dernier = None
+    while True:
+        tranche = factures if dernier is None else factures.filter(code_facture__gt=dernier)
+        codes = list(tranche.values_list('code_facture', flat=True)[:taille_lot])
+        if not codes:
+            return bilan
+        nb_factures, nb_expeditions, nb_incidents = archiver_lot(codes, avant)
+        bilan['factures'] += nb_factures
+        bilan['expeditions'] += nb_expeditions
+        bilan['incidents'] += nb_incidents
+        dernier = codes[-1]
+        if rappel:
+            rappel(bilan)
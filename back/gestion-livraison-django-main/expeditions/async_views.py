@@ -0,0 +1,104 @@
+"""
+Versions asynchrones (ASGI) des endpoints d'agrégats des expéditions.
+
+Endpoints:
+- GET /api/async/expeditions/statistiques/
+- GET /api/async/expeditions/evolution/?months=12
+- GET /api/async/expeditions/export/ : export CSV en streaming
+- GET /api/async/incidents/statistiques/
+"""
+import csv
+
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+
+from config.async_utils import Echo, en_parallele
+from config.routage import lecture_replique
+from .models import Expedition, Incident
+from .views import _month_range, _parse_months, _serie_evolution
+
+
+@lecture_replique
+@require_GET
+async def statistiques_expeditions(request):
+    """Même réponse que ExpeditionViewSet.statistiques, agrégats en parallèle."""
+    resultats = await en_parallele(
+        total=lambda: Expedition.objects.count(),
+        par_statut=lambda: list(
+            Expedition.objects.order_by().values('statut').annotate(count=Count('numexp'))
+        ),
+        montant=lambda: Expedition.objects.aggregate(total=Sum('montant_estime'))['total'],
+    )
+    return JsonResponse({
+        'total_expeditions': resultats['total'],
+        'par_statut': resultats['par_statut'],
+        'montant_total_estime': float(resultats['montant'] or 0),
+    })
+
+
+@lecture_replique
+@require_GET
+async def evolution_expeditions(request):
+    """Taux d'évolution mensuel du nombre d'expéditions"""
+    months = _parse_months(request)
+    start, end, month_starts = _month_range(months)
+    grouped = (
+        Expedition.objects.filter(date_creation__gte=start, date_creation__lt=end)
+        .annotate(month=TruncMonth('date_creation'))
+        .values('month')
+        .annotate(total=Count('numexp'))
+        .order_by('month')
+    )
+    totals = {item['month'].strftime('%Y-%m'): item['total'] async for item in grouped}
+    return JsonResponse({'months': months, 'data': _serie_evolution(totals, month_starts)})
+
+
+@lecture_replique
+@require_GET
+async def export_expeditions(request):
+    """
+    Export CSV de toutes les expéditions (filtre optionnel ?statut=).
+    Les lignes sont lues par paquets et envoyées au fur et à mesure.
+    """
+    queryset = Expedition.objects.order_by('numexp')
+    statut = request.GET.get('statut')
+    if statut:
+        queryset = queryset.filter(statut=statut)
+    colonnes = [
+        'numexp', 'statut', 'code_client_id', 'destination_id', 'tarification_id',
+        'poids', 'volume', 'montant_estime', 'date_creation',
+    ]
+    writer = csv.writer(Echo())
+
+    async def lignes():
+        yield writer.writerow(colonnes)
+        async for ligne in queryset.values(*colonnes).aiterator(chunk_size=2000):
+            yield writer.writerow([ligne[c] for c in colonnes])
+
+    response = StreamingHttpResponse(lignes(), content_type='text/csv')
+    response['Content-Disposition'] = 'attachment; filename="expeditions.csv"'
+    return response
+
+
+@lecture_replique
+@require_GET
+async def statistiques_incidents(request):
+    """Même réponse que IncidentViewSet.statistiques, agrégats en parallèle."""
+    resultats = await en_parallele(
+        total=lambda: Incident.objects.count(),
+        par_type=lambda: list(
+            Incident.objects.order_by().values('type').annotate(count=Count('code_inc'))
+        ),
+        par_etat=lambda: list(
+            Incident.objects.order_by().values('etat').annotate(count=Count('code_inc'))
+        ),
+        non_resolus=lambda: Incident.objects.filter(~Q(etat__in=['RESOLU', 'FERME'])).count(),
+    )
+    return JsonResponse({
+        'total_incidents': resultats['total'],
+        'par_type': resultats['par_type'],
+        'par_etat': resultats['par_etat'],
+        'non_resolus': resultats['non_resolus'],
+    })
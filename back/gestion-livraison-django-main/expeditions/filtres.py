@@ -0,0 +1,41 @@
+"""
+Filtres des listes d'expéditions et d'incidents.
+
+?du= et ?au= (AAAA-MM-JJ, inclus) bornent date_creation elle-même, en
+instants de début de jour : sous PostgreSQL, seules les partitions des mois
+concernés sont lues (expeditions/partitions.py). Un filtre sur
+date_creation__date ne permettrait pas cet élagage.
+"""
+from datetime import datetime, time, timedelta
+
+import django_filters
+from django.utils import timezone
+
+from .models import Expedition, Incident
+
+
+def _debut_jour(jour):
+    return timezone.make_aware(datetime.combine(jour, time.min))
+
+
+class PeriodeFilterSet(django_filters.FilterSet):
+    du = django_filters.DateFilter(method='filtrer_du')
+    au = django_filters.DateFilter(method='filtrer_au')
+
+    def filtrer_du(self, queryset, name, value):
+        return queryset.filter(date_creation__gte=_debut_jour(value))
+
+    def filtrer_au(self, queryset, name, value):
+        return queryset.filter(date_creation__lt=_debut_jour(value + timedelta(days=1)))
+
+
+class ExpeditionFilter(PeriodeFilterSet):
+    class Meta:
+        model = Expedition
+        fields = ['statut', 'code_client', 'tarification', 'destination']
+
+
+class IncidentFilter(PeriodeFilterSet):
+    class Meta:
+        model = Incident
+        fields = ['type', 'etat', 'numexp']
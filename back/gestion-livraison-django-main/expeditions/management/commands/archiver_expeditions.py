@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from expeditions import archivage
+
+
+class Command(BaseCommand):
+    help = (
+        "Archive les expéditions closes (livrées ou retournées) des factures payées, avec leurs "
+        "incidents et liens de facturation, dans la table expedition_archive."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--anciennete-jours', type=int, default=archivage.ANCIENNETE_JOURS,
+                            help="Âge minimal des expéditions archivées (%(default)s jours)")
+        parser.add_argument('--taille-lot', type=int, default=archivage.TAILLE_LOT,
+                            help="Factures par lot (%(default)s)")
+        parser.add_argument('--simulation', action='store_true', help="Compter sans archiver")
+
+    def handle(self, *args, **options):
+        def rappel(bilan):
+            self.stdout.write(f"\r{bilan['factures']} facture(s), {bilan['expeditions']} expédition(s)", ending='')
+            self.stdout.flush()
+
+        bilan = archivage.archiver(options['anciennete_jours'], options['taille_lot'],
+                                   simulation=options['simulation'], rappel=rappel)
+        if not options['simulation'] and bilan['factures']:
+            self.stdout.write('')
+        verbe = "à archiver" if options['simulation'] else "archivée(s)"
+        self.stdout.write(self.style.SUCCESS(
+            f"{bilan['factures']} facture(s) {verbe} : {bilan['expeditions']} expédition(s), "
+            f"{bilan['incidents']} incident(s)."
+        ))
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from config.partitions import TAILLE_LOT, ConversionIncomplete, annuler_conversion
+from expeditions import partitions
+
+
+class Command(BaseCommand):
+    help = (
+        "Convertit en ligne les tables expedition et incident en tables partitionnées par mois "
+        "(PostgreSQL), sans interrompre les écritures. Reprend une conversion interrompue."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('tables', nargs='*', help=f"Parmi : {', '.join(partitions.TABLES)} (toutes par défaut)")
+        parser.add_argument('--taille-lot', type=int, default=TAILLE_LOT, help="Lignes par lot recopié (%(default)s)")
+        parser.add_argument('--annuler', action='store_true',
+                            help="Abandonner une conversion en cours (la table d'origine est conservée)")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError("Le partitionnement nécessite PostgreSQL.")
+        inconnues = set(options['tables']) - set(partitions.TABLES)
+        if inconnues:
+            raise CommandError(f"Table(s) inconnue(s) : {', '.join(sorted(inconnues))}")
+
+        for table in options['tables'] or partitions.TABLES:
+            if options['annuler']:
+                annuler_conversion(table)
+                self.stdout.write(f"{table} : conversion annulée")
+                continue
+
+            def rappel(faites, total, table=table):
+                self.stdout.write(f"\r{table} : {faites}/{total} clé(s) parcourue(s)", ending='')
+                self.stdout.flush()
+
+            try:
+                copiees = partitions.convertir(table, options['taille_lot'], rappel)
+            except ConversionIncomplete as erreur:
+                raise CommandError(str(erreur))
+            if copiees is None:
+                self.stdout.write(f"{table} : déjà partitionnée")
+            else:
+                self.stdout.write(f"\n{table} : {copiees} ligne(s) recopiée(s)")
+        self.stdout.write(self.style.SUCCESS("Partitionnement terminé."))
@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from expeditions.agregats import reconstruire
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcule la table incident_agregat (carte des points chauds) depuis la table incident. "
+        "À lancer après un chargement en masse qui ne passe pas par save()/delete()."
+    )
+
+    def handle(self, *args, **options):
+        debut = time.perf_counter()
+        nombre = reconstruire()
+        self.stdout.write(self.style.SUCCESS(
+            f"{nombre} lignes d'agrégat recalculées en {time.perf_counter() - debut:.1f} s."
+        ))
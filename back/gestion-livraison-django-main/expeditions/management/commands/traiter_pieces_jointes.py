@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from expeditions import pieces_jointes
+from expeditions.models import PieceJointe
+
+
+class Command(BaseCommand):
+    help = (
+        "Traite les pièces jointes restées en attente (réduction, miniature) et "
+        "abandonne les téléversements par blocs inactifs."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reprendre', action='store_true',
+                            help="Reprendre aussi les pièces restées EN_COURS ou en échec")
+        parser.add_argument('--expiration', type=int, default=48, metavar='HEURES',
+                            help="Inactivité au-delà de laquelle un téléversement est abandonné (défaut : 48)")
+
+    def handle(self, *args, **options):
+        statuts = ['EN_ATTENTE', 'EN_COURS', 'ECHEC'] if options['reprendre'] else ['EN_ATTENTE']
+        traitees = echecs = 0
+        for piece_id in PieceJointe.objects.filter(statut_traitement__in=statuts).values_list('pk', flat=True):
+            try:
+                if pieces_jointes.traiter(piece_id, reprendre=options['reprendre']):
+                    traitees += 1
+            except Exception as exc:
+                echecs += 1
+                self.stderr.write(f"Pièce jointe {piece_id} : {exc}")
+
+        abandonnes = pieces_jointes.purger_televersements(options['expiration'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{traitees} pièce(s) jointe(s) traitée(s), {echecs} en échec, "
+            f"{abandonnes} téléversement(s) expiré(s) abandonné(s)."
+        ))
@@ -0,0 +1,50 @@
+# Generated by Django 6.0 on 2026-10-19 15:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def remplir_agregats(apps, schema_editor):
+    from expeditions.agregats import reconstruire
+
+    reconstruire(apps.get_model('expeditions', 'Incident'), apps.get_model('expeditions', 'IncidentAgregat'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expeditions', '0003_expedition_destination_and_more'),
+        ('logistique', '0003_alter_utilisateur_managers'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='expedition',
+            name='destination',
+            field=models.ForeignKey(blank=True, help_text="Destination finale de l'exp??dition", null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='expeditions', to='logistique.destination', verbose_name='Destination'),
+        ),
+        migrations.AlterField(
+            model_name='incident',
+            name='commune',
+            field=models.CharField(blank=True, help_text="Commune où l'incident a eu lieu", max_length=100, null=True, verbose_name='Commune'),
+        ),
+        migrations.CreateModel(
+            name='IncidentAgregat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('jour', models.DateField(verbose_name='Jour')),
+                ('wilaya', models.CharField(blank=True, default='', max_length=100, verbose_name='Wilaya')),
+                ('commune', models.CharField(blank=True, default='', max_length=100, verbose_name='Commune')),
+                ('type', models.CharField(choices=[('RETARD', 'Retard de livraison'), ('PERTE', 'Colis perdu'), ('ENDOMMAGEMENT', 'Colis endommagé'), ('PROBLEME_TECHNIQUE', 'Problème technique'), ('ADRESSE_INCORRECTE', 'Adresse incorrecte'), ('DESTINATAIRE_ABSENT', 'Destinataire absent'), ('REFUS_RECEPTION', 'Refus de réception'), ('ACCIDENT', 'Accident'), ('AUTRE', 'Autre')], max_length=30, verbose_name="Type d'incident")),
+                ('nombre', models.IntegerField(default=0, verbose_name="Nombre d'incidents")),
+            ],
+            options={
+                'verbose_name': "Agrégat d'incidents",
+                'verbose_name_plural': "Agrégats d'incidents",
+                'db_table': 'incident_agregat',
+                'indexes': [models.Index(fields=['type', 'jour'], name='incident_ag_type_2b985e_idx')],
+                'constraints': [models.UniqueConstraint(fields=('jour', 'wilaya', 'commune', 'type'), name='unique_incident_agregat')],
+            },
+        ),
+        migrations.RunPython(remplir_agregats, migrations.RunPython.noop),
+    ]
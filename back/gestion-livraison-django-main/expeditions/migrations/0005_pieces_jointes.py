@@ -0,0 +1,66 @@
+# Generated by Django 6.0 on 2026-10-19 14:47
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expeditions', '0004_incident_agregat'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PieceJointe',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True, verbose_name='Empreinte SHA-256')),
+                ('fichier', models.FileField(max_length=255, upload_to='pieces_jointes/', verbose_name='Fichier')),
+                ('nom_origine', models.CharField(max_length=255, verbose_name="Nom d'origine")),
+                ('type_mime', models.CharField(blank=True, default='', max_length=100, verbose_name='Type MIME')),
+                ('taille', models.PositiveBigIntegerField(verbose_name='Taille (octets)')),
+                ('largeur', models.PositiveIntegerField(blank=True, null=True, verbose_name='Largeur')),
+                ('hauteur', models.PositiveIntegerField(blank=True, null=True, verbose_name='Hauteur')),
+                ('miniature', models.FileField(blank=True, max_length=255, null=True, upload_to='pieces_jointes/miniatures/', verbose_name='Miniature')),
+                ('statut_traitement', models.CharField(choices=[('EN_ATTENTE', 'En attente de traitement'), ('EN_COURS', 'Traitement en cours'), ('TRAITEE', 'Traitée'), ('NON_IMAGE', 'Pas une image'), ('ECHEC', 'Échec du traitement')], default='EN_ATTENTE', max_length=20, verbose_name='Statut du traitement')),
+                ('erreur', models.TextField(blank=True, default='', verbose_name='Erreur de traitement')),
+                ('date_creation', models.DateTimeField(auto_now_add=True, verbose_name='Date de dépôt')),
+                ('date_traitement', models.DateTimeField(blank=True, null=True, verbose_name='Date de traitement')),
+            ],
+            options={
+                'verbose_name': 'Pièce jointe',
+                'verbose_name_plural': 'Pièces jointes',
+                'db_table': 'piece_jointe',
+                'ordering': ['-date_creation'],
+                'indexes': [models.Index(fields=['statut_traitement'], name='piece_joint_statut__7fafc4_idx')],
+            },
+        ),
+        migrations.AddField(
+            model_name='incident',
+            name='fichier',
+            field=models.ForeignKey(blank=True, help_text='Pièce jointe dédupliquée ; piece_jointe pointe sur le même fichier', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='incidents', to='expeditions.piecejointe', verbose_name='Fichier joint'),
+        ),
+        migrations.CreateModel(
+            name='Televersement',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('nom_fichier', models.CharField(max_length=255, verbose_name='Nom du fichier')),
+                ('type_mime', models.CharField(blank=True, default='', max_length=100, verbose_name='Type MIME')),
+                ('taille_totale', models.PositiveBigIntegerField(verbose_name='Taille totale (octets)')),
+                ('recu', models.PositiveBigIntegerField(default=0, verbose_name='Octets reçus')),
+                ('sha256_attendu', models.CharField(blank=True, default='', max_length=64, verbose_name='Empreinte attendue')),
+                ('statut', models.CharField(choices=[('EN_COURS', 'En cours'), ('TERMINE', 'Terminé'), ('ABANDONNE', 'Abandonné')], default='EN_COURS', max_length=20, verbose_name='Statut')),
+                ('date_creation', models.DateTimeField(auto_now_add=True, verbose_name='Date de début')),
+                ('date_modification', models.DateTimeField(auto_now=True, verbose_name='Dernier bloc reçu')),
+                ('piece_jointe', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='televersements', to='expeditions.piecejointe', verbose_name='Pièce jointe produite')),
+            ],
+            options={
+                'verbose_name': 'Téléversement',
+                'verbose_name_plural': 'Téléversements',
+                'db_table': 'televersement',
+                'indexes': [models.Index(fields=['statut', 'date_modification'], name='televerseme_statut_7830bb_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-19 10:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0004_compteurs_reclamations'),
+        ('expeditions', '0005_pieces_jointes'),
+        ('logistique', '0003_alter_utilisateur_managers'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='expedition',
+            name='expedition_code_cl_f99eeb_idx',
+        ),
+        migrations.AddIndex(
+            model_name='expedition',
+            index=models.Index(fields=['code_client', '-date_creation'], name='expedition_client_date_idx'),
+        ),
+    ]
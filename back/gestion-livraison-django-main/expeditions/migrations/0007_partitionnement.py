@@ -0,0 +1,57 @@
+# Generated by Django 6.0 on 2026-10-19 17:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from config.partitions import partitionner
+from expeditions.partitions import SEUIL_MIGRATION, lignes_estimees
+
+
+def partitionner_tables(apps, schema_editor):
+    # Au-delà du seuil, la copie sous verrou serait trop longue : manage.py partitionner_tables
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table, cle in (('expedition', 'numexp'), ('incident', 'code_inc')):
+        with schema_editor.connection.cursor() as cursor:
+            lignes = lignes_estimees(cursor, table)
+        if lignes <= SEUIL_MIGRATION:
+            partitionner(schema_editor, table, 'date_creation', cle)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0005_recherche_clients'),
+        ('expeditions', '0006_index_client_date'),
+        ('facturation', '0003_etrefacture_numexp_sans_contrainte'),
+        ('logistique', '0003_alter_utilisateur_managers'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='expedition',
+            name='code_client',
+            field=models.ForeignKey(blank=True, db_constraint=False, help_text='Client qui envoie le colis', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='expeditions', to='clients.client', verbose_name='Client'),
+        ),
+        migrations.AlterField(
+            model_name='expedition',
+            name='destination',
+            field=models.ForeignKey(blank=True, db_constraint=False, help_text="Destination finale de l'exp??dition", null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='expeditions', to='logistique.destination', verbose_name='Destination'),
+        ),
+        migrations.AlterField(
+            model_name='expedition',
+            name='tarification',
+            field=models.ForeignKey(blank=True, db_constraint=False, help_text='Tarif appliqué pour cette expédition', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='expeditions', to='logistique.tarification', verbose_name='Tarification'),
+        ),
+        migrations.AlterField(
+            model_name='incident',
+            name='fichier',
+            field=models.ForeignKey(blank=True, db_constraint=False, help_text='Pièce jointe dédupliquée ; piece_jointe pointe sur le même fichier', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='incidents', to='expeditions.piecejointe', verbose_name='Fichier joint'),
+        ),
+        migrations.AlterField(
+            model_name='incident',
+            name='numexp',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='incidents', to='expeditions.expedition', verbose_name='Expédition concernée'),
+        ),
+        migrations.RunPython(partitionner_tables, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 6.0 on 2026-10-19 18:05
+
+import django.core.serializers.json
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0005_recherche_clients'),
+        ('expeditions', '0007_partitionnement'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExpeditionArchivee',
+            fields=[
+                ('numexp', models.IntegerField(primary_key=True, serialize=False, verbose_name="Numéro d'expédition")),
+                ('code_facture', models.CharField(db_index=True, max_length=50, verbose_name='Facture')),
+                ('statut', models.CharField(choices=[('EN_ATTENTE', 'En attente'), ('EN_PREPARATION', 'En préparation'), ('EN_TRANSIT', 'En transit'), ('EN_CENTRE_TRI', 'En centre de tri'), ('EN_COURS_LIVRAISON', 'En cours de livraison'), ('LIVRE', 'Livré'), ('ECHEC_LIVRAISON', 'Échec de livraison'), ('RETOUR', "Retourné à l'expéditeur")], max_length=20, verbose_name='Statut')),
+                ('montant_estime', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Montant estimé (DA)')),
+                ('date_creation', models.DateTimeField(verbose_name='Date de création')),
+                ('date_archivage', models.DateTimeField(default=django.utils.timezone.now, verbose_name="Date d'archivage")),
+                ('donnees', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='Données archivées')),
+                ('code_client', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='expeditions_archivees', to='clients.client', verbose_name='Client')),
+            ],
+            options={
+                'verbose_name': 'Expédition archivée',
+                'verbose_name_plural': 'Expéditions archivées',
+                'db_table': 'expedition_archive',
+                'ordering': ['-date_creation'],
+            },
+        ),
+    ]
@@ -1,4 +1,10 @@
+import os
+import uuid
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.utils import timezone
 from django.core.validators import MinValueValidator
 from decimal import Decimal
 
@@ -7,6 +13,11 @@ class Expedition(models.Model):
     """
     Modèle pour gérer les expéditions de colis.
     Calcule automatiquement le montant total basé sur poids, volume et tarification.
+
+    Sous PostgreSQL, table partitionnée par mois sur date_creation
+    (expeditions/partitions.py) : la clé primaire réelle est (numexp,
+    date_creation), numexp reste unique par sa séquence. Les clés étrangères
+    vers et depuis la table sont déclarées sans contrainte en base.
     """
     
    
@@ -53,6 +64,7 @@ class Expedition(models.Model):
     code_client = models.ForeignKey(
         'clients.Client',
         on_delete=models.SET_NULL,
+        db_constraint=False,
         null=True,
         blank=True,
         verbose_name="Client",
@@ -64,6 +76,7 @@ class Expedition(models.Model):
     tarification = models.ForeignKey(
         'logistique.Tarification',
         on_delete=models.SET_NULL,
+        db_constraint=False,
         null=True,
         blank=True,
         verbose_name="Tarification",
@@ -74,6 +87,7 @@ class Expedition(models.Model):
     destination = models.ForeignKey(
         'logistique.Destination',
         on_delete=models.SET_NULL,
+        db_constraint=False,
         null=True,
         blank=True,
         verbose_name="Destination",
@@ -116,7 +130,8 @@ class Expedition(models.Model):
         ordering = ['-date_creation']
         indexes = [
             models.Index(fields=['statut']),
-            models.Index(fields=['code_client']),
+            # Dernières expéditions d'un client (sert aussi les filtres sur code_client seul)
+            models.Index(fields=['code_client', '-date_creation'], name='expedition_client_date_idx'),
             models.Index(fields=['date_creation']),
             models.Index(fields=['destination']),
         ]
@@ -129,17 +144,19 @@ class Expedition(models.Model):
         Calcul automatique du montant estimé
         Formule : Montant = Tarif base + (Poids × Tarif poids) + (Volume × Tarif volume)
         """
-        if self.tarification:
-            p_dec = Decimal(str(self.poids))
-            v_dec = Decimal(str(self.volume))
-            self.montant_estime = (
-                self.tarification.tarif_base_destination + 
-                (p_dec * self.tarification.tarif_poids) + 
-                (v_dec * self.tarification.tarif_volume)
-            )
-        else:
-            self.montant_estime = None
+        self.montant_estime = self.calculer_montant_estime()
         super().save(*args, **kwargs)
+
+    def calculer_montant_estime(self):
+        if not self.tarification:
+            return None
+        p_dec = Decimal(str(self.poids))
+        v_dec = Decimal(str(self.volume))
+        return (
+            self.tarification.tarif_base_destination + 
+            (p_dec * self.tarification.tarif_poids) + 
+            (v_dec * self.tarification.tarif_volume)
+        )
     
     def peut_etre_modifie(self):
         """
@@ -157,6 +174,9 @@ class Expedition(models.Model):
 class Incident(models.Model):
     """
     Modèle pour gérer les incidents liés aux expéditions.
+
+    Sous PostgreSQL, table partitionnée par mois sur date_creation, comme
+    Expedition : clé primaire réelle (code_inc, date_creation).
     """
     
     TYPE_CHOICES = [
@@ -202,6 +222,17 @@ class Incident(models.Model):
         verbose_name="Pièce jointe",
         help_text="Photo ou document justificatif"
     )
+
+    fichier = models.ForeignKey(
+        'PieceJointe',
+        on_delete=models.SET_NULL,
+        db_constraint=False,
+        null=True,
+        blank=True,
+        related_name='incidents',
+        verbose_name="Fichier joint",
+        help_text="Pièce jointe dédupliquée ; piece_jointe pointe sur le même fichier"
+    )
     
     etat = models.CharField(
         max_length=20,
@@ -233,6 +264,7 @@ class Incident(models.Model):
     numexp = models.ForeignKey(
         Expedition,
         on_delete=models.CASCADE,
+        db_constraint=False,
         verbose_name="Expédition concernée",
         related_name='incidents'
     )
@@ -275,3 +307,155 @@ class Incident(models.Model):
             self.date_resolution = timezone.now()
         
         super().save(*args, **kwargs)
+
+
+class IncidentAgregat(models.Model):
+    """
+    Nombre d'incidents par jour, lieu et type, tenu à jour à chaque
+    création, modification ou suppression d'incident (expeditions/signals.py).
+    Sert la carte des points chauds sans parcourir la table incident.
+    Reconstruction complète : manage.py recalculer_agregats_incidents.
+    """
+
+    jour = models.DateField(verbose_name="Jour")
+    wilaya = models.CharField(max_length=100, blank=True, default='', verbose_name="Wilaya")
+    commune = models.CharField(max_length=100, blank=True, default='', verbose_name="Commune")
+    type = models.CharField(max_length=30, choices=Incident.TYPE_CHOICES, verbose_name="Type d'incident")
+    nombre = models.IntegerField(default=0, verbose_name="Nombre d'incidents")
+
+    class Meta:
+        db_table = 'incident_agregat'
+        verbose_name = "Agrégat d'incidents"
+        verbose_name_plural = "Agrégats d'incidents"
+        constraints = [
+            models.UniqueConstraint(fields=['jour', 'wilaya', 'commune', 'type'], name='unique_incident_agregat'),
+        ]
+        indexes = [
+            models.Index(fields=['type', 'jour']),
+        ]
+
+    def __str__(self):
+        return f"{self.jour} {self.wilaya}/{self.commune} {self.type} : {self.nombre}"
+
+
+class ExpeditionArchivee(models.Model):
+    """
+    Expédition close archivée (expeditions/archivage.py) : livrée ou
+    retournée, facturée, facture payée. La ligne d'expédition, ses incidents
+    et son lien de facturation sont retirés des tables courantes et conservés
+    ici en un document JSON (compressé par PostgreSQL au-delà de 2 Ko).
+    GET /api/expeditions/{id}/ la retrouve quand elle n'est plus dans
+    expedition.
+    """
+
+    numexp = models.IntegerField(primary_key=True, verbose_name="Numéro d'expédition")
+    # Pas de contrainte en base : l'archive survit à la suppression du client
+    code_client = models.ForeignKey(
+        'clients.Client',
+        on_delete=models.DO_NOTHING,
+        null=True, blank=True,
+        db_constraint=False,
+        related_name='expeditions_archivees',
+        verbose_name="Client"
+    )
+    code_facture = models.CharField(max_length=50, db_index=True, verbose_name="Facture")
+    statut = models.CharField(max_length=20, choices=Expedition.STATUT_CHOICES, verbose_name="Statut")
+    montant_estime = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True,
+                                         verbose_name="Montant estimé (DA)")
+    date_creation = models.DateTimeField(verbose_name="Date de création")
+    date_archivage = models.DateTimeField(default=timezone.now, verbose_name="Date d'archivage")
+    # {'expedition': {champ: valeur}, 'incidents': [{champ: valeur}], 'facturation': {champ: valeur}}
+    donnees = models.JSONField(encoder=DjangoJSONEncoder, verbose_name="Données archivées")
+
+    class Meta:
+        db_table = 'expedition_archive'
+        verbose_name = "Expédition archivée"
+        verbose_name_plural = "Expéditions archivées"
+        ordering = ['-date_creation']
+
+    def __str__(self):
+        return f"EXP-{self.numexp} (archivée)"
+
+
+class PieceJointe(models.Model):
+    """
+    Fichier joint aux incidents, stocké une seule fois par contenu
+    (empreinte SHA-256). Les images sont réduites et une miniature est
+    produite en arrière-plan (expeditions/pieces_jointes.py).
+    """
+
+    STATUT_CHOICES = [
+        ('EN_ATTENTE', 'En attente de traitement'),
+        ('EN_COURS', 'Traitement en cours'),
+        ('TRAITEE', 'Traitée'),
+        ('NON_IMAGE', "Pas une image"),
+        ('ECHEC', 'Échec du traitement'),
+    ]
+
+    sha256 = models.CharField(max_length=64, unique=True, verbose_name="Empreinte SHA-256")
+    fichier = models.FileField(upload_to='pieces_jointes/', max_length=255, verbose_name="Fichier")
+    nom_origine = models.CharField(max_length=255, verbose_name="Nom d'origine")
+    type_mime = models.CharField(max_length=100, blank=True, default='', verbose_name="Type MIME")
+    taille = models.PositiveBigIntegerField(verbose_name="Taille (octets)")
+    largeur = models.PositiveIntegerField(null=True, blank=True, verbose_name="Largeur")
+    hauteur = models.PositiveIntegerField(null=True, blank=True, verbose_name="Hauteur")
+    miniature = models.FileField(upload_to='pieces_jointes/miniatures/', max_length=255, null=True, blank=True,
+                                 verbose_name="Miniature")
+    statut_traitement = models.CharField(max_length=20, choices=STATUT_CHOICES, default='EN_ATTENTE',
+                                         verbose_name="Statut du traitement")
+    erreur = models.TextField(blank=True, default='', verbose_name="Erreur de traitement")
+    date_creation = models.DateTimeField(auto_now_add=True, verbose_name="Date de dépôt")
+    date_traitement = models.DateTimeField(null=True, blank=True, verbose_name="Date de traitement")
+
+    class Meta:
+        db_table = 'piece_jointe'
+        verbose_name = "Pièce jointe"
+        verbose_name_plural = "Pièces jointes"
+        ordering = ['-date_creation']
+        indexes = [
+            models.Index(fields=['statut_traitement']),
+        ]
+
+    def __str__(self):
+        return f"{self.nom_origine} ({self.sha256[:12]})"
+
+
+class Televersement(models.Model):
+    """
+    Téléversement par blocs, reprenable, d'une pièce jointe. Les blocs sont
+    ajoutés à un fichier temporaire hors de MEDIA_ROOT ; `recu` donne
+    l'offset à partir duquel reprendre après une coupure.
+    """
+
+    STATUT_CHOICES = [
+        ('EN_COURS', 'En cours'),
+        ('TERMINE', 'Terminé'),
+        ('ABANDONNE', 'Abandonné'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    nom_fichier = models.CharField(max_length=255, verbose_name="Nom du fichier")
+    type_mime = models.CharField(max_length=100, blank=True, default='', verbose_name="Type MIME")
+    taille_totale = models.PositiveBigIntegerField(verbose_name="Taille totale (octets)")
+    recu = models.PositiveBigIntegerField(default=0, verbose_name="Octets reçus")
+    sha256_attendu = models.CharField(max_length=64, blank=True, default='', verbose_name="Empreinte attendue")
+    statut = models.CharField(max_length=20, choices=STATUT_CHOICES, default='EN_COURS', verbose_name="Statut")
+    piece_jointe = models.ForeignKey(PieceJointe, on_delete=models.SET_NULL, null=True, blank=True,
+                                     related_name='televersements', verbose_name="Pièce jointe produite")
+    date_creation = models.DateTimeField(auto_now_add=True, verbose_name="Date de début")
+    date_modification = models.DateTimeField(auto_now=True, verbose_name="Dernier bloc reçu")
+
+    class Meta:
+        db_table = 'televersement'
+        verbose_name = "Téléversement"
+        verbose_name_plural = "Téléversements"
+        indexes = [
+            models.Index(fields=['statut', 'date_modification']),
+        ]
+
+    def __str__(self):
+        return f"{self.nom_fichier} {self.recu}/{self.taille_totale}"
+
+    @property
+    def chemin_temporaire(self):
+        return os.path.join(settings.PIECES_JOINTES['REPERTOIRE_TEMPORAIRE'], f"{self.id}.part")
@@ -0,0 +1,59 @@
+"""
+Partitionnement mensuel des tables expedition et incident sur date_creation
+(PostgreSQL, config/partitions.py).
+
+Les listes, statistiques et évolutions filtrent ou trient sur date_creation :
+bornées sur cette colonne (filtres `du` / `au` des vues), elles ne lisent que
+les partitions des mois concernés.
+
+Conversion des tables existantes :
+- petites tables : directement par la migration 0007 (copie sous verrou) ;
+- au-delà de SEUIL_MIGRATION lignes estimées, la migration les laisse en
+  l'état et `manage.py partitionner_tables` les convertit en ligne, sans
+  interrompre les écritures.
+Les partitions des MOIS_AVANCE prochains mois sont ensuite créées chaque
+nuit par la tâche expeditions.maintenir_partitions. Pas de rétention : les
+expéditions et incidents se conservent.
+"""
+from django.db import connection
+from django.utils import timezone
+
+from config import partitions
+
+from .models import Expedition, Incident
+
+MOIS_AVANCE = 3
+SEUIL_MIGRATION = 200000
+
+# {table: (colonne de partitionnement, clé)}
+TABLES = {
+    modele._meta.db_table: ('date_creation', modele._meta.pk.column)
+    for modele in (Expedition, Incident)
+}
+
+
+def lignes_estimees(cursor, table):
+    """Nombre de lignes d'après les statistiques de PostgreSQL (sans parcourir la table)."""
+    cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)", [f'public.{table}'])
+    ligne = cursor.fetchone()
+    return max(ligne[0], 0) if ligne else 0
+
+
+def convertir(table, taille_lot=partitions.TAILLE_LOT, rappel=None):
+    """Conversion en ligne de `table` ; None si elle est déjà partitionnée (ou hors PostgreSQL)."""
+    if connection.vendor != 'postgresql':
+        return None
+    colonne, cle = TABLES[table]
+    return partitions.convertir_en_ligne(table, colonne, cle, taille_lot, MOIS_AVANCE, rappel)
+
+
+def maintenir():
+    """Crée les partitions des MOIS_AVANCE prochains mois. Renvoie {table: [partitions créées]}."""
+    mois_courant = partitions.debut_mois(timezone.now().date())
+    creees = {}
+    for table, (colonne, _) in TABLES.items():
+        if partitions.est_partitionnee(table):
+            creees[table] = partitions.creer_partitions(
+                table, colonne, mois_courant, partitions.mois_suivant(mois_courant, MOIS_AVANCE)
+            )
+    return creees
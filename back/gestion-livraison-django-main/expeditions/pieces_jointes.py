@@ -0,0 +1,253 @@
+"""
+Pièces jointes des incidents : dépôt dédupliqué et traitement d'images.
+
+Un fichier est identifié par son SHA-256 : la même photo envoyée deux fois
+n'est stockée qu'une fois (pieces_jointes/<2 premiers>/<sha256><ext>).
+La réduction des grandes photos et la miniature ne sont pas faites dans la
+requête : une tâche de fond expeditions.traiter_piece_jointe est mise en
+file avec le dépôt, ce qui laisse IncidentViewSet.create répondre dès le
+fichier écrit. `manage.py traiter_pieces_jointes` reprend ce qui serait
+resté en attente.
+"""
+import hashlib
+import io
+import logging
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from taches.file_attente import mettre_en_file
+
+from .models import Incident, PieceJointe, Televersement
+
+logger = logging.getLogger(__name__)
+
+TAILLE_LECTURE = 64 * 1024
+
+
+class ErreurPieceJointe(ValueError):
+    """Dépôt refusé ; le message est renvoyé tel quel au client."""
+
+
+class DecalageBloc(ErreurPieceJointe):
+    """Bloc reçu à un offset différent de ce qui a déjà été reçu."""
+
+    def __init__(self, recu):
+        super().__init__(f"Offset invalide : {recu} octets déjà reçus.")
+        self.recu = recu
+
+
+def config():
+    return settings.PIECES_JOINTES
+
+
+def empreinte(fichier):
+    """SHA-256 d'un fichier ouvert, lu par blocs depuis le début."""
+    fichier.seek(0)
+    sha = hashlib.sha256()
+    for bloc in iter(lambda: fichier.read(TAILLE_LECTURE), b''):
+        sha.update(bloc)
+    fichier.seek(0)
+    return sha.hexdigest()
+
+
+def _chemin(sha, extension):
+    return f"pieces_jointes/{sha[:2]}/{sha}{extension}"
+
+
+def enregistrer(fichier, nom_origine, type_mime=''):
+    """
+    Stocke `fichier` s'il n'est pas déjà connu. Renvoie (piece, creee).
+    La tâche de traitement d'image est créée dans la transaction courante :
+    les workers ne la voient qu'au commit.
+    """
+    taille = fichier.size if hasattr(fichier, 'size') else os.fstat(fichier.fileno()).st_size
+    if taille > config()['TAILLE_MAX']:
+        raise ErreurPieceJointe(f"Fichier trop volumineux ({taille} octets, maximum {config()['TAILLE_MAX']}).")
+
+    sha = empreinte(fichier)
+    existante = PieceJointe.objects.filter(sha256=sha).first()
+    if existante:
+        return existante, False
+
+    extension = os.path.splitext(nom_origine)[1].lower()[:10]
+    nom = _chemin(sha, extension)
+    if not default_storage.exists(nom):
+        nom = default_storage.save(nom, File(fichier))
+    try:
+        with transaction.atomic():
+            piece = PieceJointe.objects.create(
+                sha256=sha, fichier=nom, nom_origine=os.path.basename(nom_origine)[:255],
+                type_mime=(type_mime or '')[:100], taille=taille,
+            )
+    except IntegrityError:
+        # Même contenu déposé en parallèle : le fichier porte le même nom
+        return PieceJointe.objects.get(sha256=sha), False
+
+    mettre_en_file('expeditions.traiter_piece_jointe', {'piece_id': piece.pk}, cle_unicite=f"piece_jointe:{piece.pk}")
+    return piece, True
+
+
+# --- Téléversement par blocs ---
+
+def ecrire_bloc(televersement_id, offset, flux, longueur):
+    """
+    Ajoute `longueur` octets lus dans `flux` au fichier temporaire du
+    téléversement. `offset` doit être égal au nombre d'octets déjà reçus :
+    un bloc renvoyé après une coupure est ainsi refusé plutôt que dupliqué.
+    """
+    if longueur <= 0:
+        raise ErreurPieceJointe("Bloc vide.")
+    if longueur > config()['TAILLE_BLOC_MAX']:
+        raise ErreurPieceJointe(f"Bloc trop volumineux (maximum {config()['TAILLE_BLOC_MAX']} octets).")
+
+    with transaction.atomic():
+        televersement = Televersement.objects.select_for_update().get(pk=televersement_id)
+        if televersement.statut != 'EN_COURS':
+            raise ErreurPieceJointe(f"Téléversement {televersement.get_statut_display().lower()}.")
+        if offset != televersement.recu:
+            raise DecalageBloc(televersement.recu)
+        if televersement.recu + longueur > televersement.taille_totale:
+            raise ErreurPieceJointe("Le bloc dépasse la taille annoncée.")
+
+        chemin = televersement.chemin_temporaire
+        os.makedirs(os.path.dirname(chemin), exist_ok=True)
+        ecrits = 0
+        with open(chemin, 'ab') as sortie:
+            # Un fichier laissé plus long par un bloc interrompu est recoupé
+            sortie.truncate(televersement.recu)
+            while ecrits < longueur:
+                morceau = flux.read(min(TAILLE_LECTURE, longueur - ecrits))
+                if not morceau:
+                    break
+                sortie.write(morceau)
+                ecrits += len(morceau)
+        if ecrits != longueur:
+            raise ErreurPieceJointe(f"Bloc incomplet : {ecrits} octets reçus sur {longueur}.")
+
+        televersement.recu += ecrits
+        televersement.save(update_fields=['recu', 'date_modification'])
+    return televersement
+
+
+def terminer(televersement):
+    """Vérifie le fichier reçu et le dépose comme pièce jointe."""
+    if televersement.statut == 'TERMINE':
+        return televersement.piece_jointe
+    if televersement.statut != 'EN_COURS':
+        raise ErreurPieceJointe("Téléversement abandonné.")
+    if televersement.recu != televersement.taille_totale:
+        raise ErreurPieceJointe(f"Téléversement incomplet : {televersement.recu}/{televersement.taille_totale} octets.")
+
+    with open(televersement.chemin_temporaire, 'rb') as fichier:
+        if televersement.sha256_attendu and empreinte(fichier) != televersement.sha256_attendu.lower():
+            raise ErreurPieceJointe("L'empreinte SHA-256 du fichier reçu ne correspond pas.")
+        with transaction.atomic():
+            piece, _ = enregistrer(fichier, televersement.nom_fichier, televersement.type_mime)
+            televersement.piece_jointe = piece
+            televersement.statut = 'TERMINE'
+            televersement.save(update_fields=['piece_jointe', 'statut', 'date_modification'])
+    supprimer_temporaire(televersement)
+    return piece
+
+
+def abandonner(televersement):
+    televersement.statut = 'ABANDONNE'
+    televersement.save(update_fields=['statut', 'date_modification'])
+    supprimer_temporaire(televersement)
+
+
+def supprimer_temporaire(televersement):
+    try:
+        os.remove(televersement.chemin_temporaire)
+    except FileNotFoundError:
+        pass
+
+
+def purger_televersements(heures):
+    """Abandonne les téléversements sans nouveau bloc depuis `heures` heures."""
+    limite = timezone.now() - timedelta(hours=heures)
+    abandonnes = 0
+    for televersement in Televersement.objects.filter(statut='EN_COURS', date_modification__lt=limite):
+        abandonner(televersement)
+        abandonnes += 1
+    return abandonnes
+
+
+# --- Traitement d'images (tâche de fond) ---
+
+def _jpeg(image, qualite):
+    if image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    tampon = io.BytesIO()
+    image.save(tampon, format='JPEG', quality=qualite, optimize=True)
+    return tampon.getvalue()
+
+
+def traiter(piece_id, reprendre=False):
+    """
+    Réduit l'image à DIMENSION_MAX (orientation EXIF appliquée) et produit
+    la miniature. Renvoie False si la pièce est déjà prise par un autre
+    worker. `reprendre` : traiter aussi une pièce restée EN_COURS ou ECHEC.
+    """
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    statuts = ['EN_ATTENTE', 'EN_COURS', 'ECHEC'] if reprendre else ['EN_ATTENTE']
+    if not PieceJointe.objects.filter(pk=piece_id, statut_traitement__in=statuts).update(statut_traitement='EN_COURS'):
+        return False
+    piece = PieceJointe.objects.get(pk=piece_id)
+    reglages = config()
+
+    try:
+        with piece.fichier.open('rb') as f:
+            image = Image.open(f)
+            image.load()
+    except UnidentifiedImageError:
+        _conclure(piece, 'NON_IMAGE')
+        return True
+    except Exception as exc:
+        _conclure(piece, 'ECHEC', erreur=str(exc))
+        raise
+
+    try:
+        image = ImageOps.exif_transpose(image)
+        ancien_nom = None
+        dimension_max = reglages['DIMENSION_MAX']
+        if max(image.size) > dimension_max:
+            image.thumbnail((dimension_max, dimension_max))
+            contenu = _jpeg(image, reglages['QUALITE_JPEG'])
+            ancien_nom = piece.fichier.name
+            piece.fichier.name = default_storage.save(_chemin(piece.sha256, f"_{dimension_max}.jpg"),
+                                                      ContentFile(contenu))
+            piece.taille = len(contenu)
+            piece.type_mime = 'image/jpeg'
+
+        miniature = image.copy()
+        dimension = reglages['DIMENSION_MINIATURE']
+        miniature.thumbnail((dimension, dimension))
+        piece.miniature.save(f"{piece.sha256}.jpg", ContentFile(_jpeg(miniature, reglages['QUALITE_JPEG'])), save=False)
+        piece.largeur, piece.hauteur = image.size
+
+        with transaction.atomic():
+            _conclure(piece, 'TRAITEE')
+            if ancien_nom:
+                Incident.objects.filter(fichier=piece).update(piece_jointe=piece.fichier.name)
+        if ancien_nom:
+            default_storage.delete(ancien_nom)
+    except Exception as exc:
+        _conclure(piece, 'ECHEC', erreur=str(exc))
+        raise
+    return True
+
+
+def _conclure(piece, statut, erreur=''):
+    piece.statut_traitement = statut
+    piece.erreur = erreur
+    piece.date_traitement = timezone.now()
+    piece.save()
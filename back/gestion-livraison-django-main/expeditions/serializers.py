@@ -1,8 +1,26 @@
+from decimal import Decimal
+
 from rest_framework import serializers
-from .models import Expedition, Incident
+from django.conf import settings
+from django.db.models import Exists, OuterRef
+from .models import Expedition, ExpeditionArchivee, Incident, PieceJointe, Televersement
+from .pieces_jointes import ErreurPieceJointe, enregistrer
 from clients.models import Client
+from facturation.models import EtreFacture
 from logistique.models import Tarification, Destination
 
+
+def _facturee():
+    return Exists(EtreFacture.objects.filter(numexp=OuterRef('pk')))
+
+
+def _peut_etre_supprime(obj):
+    # Annotation est_facturee posée par ?fields= (config/champs.py), sinon une requête
+    if hasattr(obj, 'est_facturee'):
+        return not obj.est_facturee
+    return bool(obj.peut_etre_supprime())
+
+
 class ExpeditionListSerializer(serializers.ModelSerializer):
     """Serializer simplifié pour la liste des expéditions"""
     client_nom = serializers.CharField(source='code_client.nom', read_only=True)
@@ -19,6 +37,16 @@ class ExpeditionListSerializer(serializers.ModelSerializer):
             'code_client', 'client_nom', 'destination', 'destination_ville', 'destination_zone', 'montant_estime', 'date_creation',
             'peut_etre_modifie', 'peut_etre_supprime',
         ]
+        # ?fields= / ?expand= (config/champs.py)
+        dependances = {
+            'peut_etre_modifie': ['statut'],
+            'peut_etre_supprime': ['est_facturee'],
+        }
+        annotations = {'est_facturee': _facturee()}
+        expansions = {
+            'code_client': 'clients.serializers.ClientSerializer',
+            'destination': 'logistique.serializers.DestinationSerializer',
+        }
 
     def get_peut_etre_modifie(self, obj):
         try:
@@ -28,7 +56,7 @@ class ExpeditionListSerializer(serializers.ModelSerializer):
 
     def get_peut_etre_supprime(self, obj):
         try:
-            return bool(obj.peut_etre_supprime())
+            return _peut_etre_supprime(obj)
         except Exception:
             return False
 
@@ -52,6 +80,17 @@ class ExpeditionDetailSerializer(serializers.ModelSerializer):
             'description', 'montant_estime', 'date_creation', 'date_modification',
             'peut_etre_modifie', 'peut_etre_supprime', 'nb_incidents',
         ]
+        dependances = {
+            'peut_etre_modifie': ['statut'],
+            'peut_etre_supprime': ['est_facturee'],
+            'nb_incidents': [],
+        }
+        annotations = {'est_facturee': _facturee()}
+        expansions = {
+            'code_client': 'clients.serializers.ClientSerializer',
+            'destination': 'logistique.serializers.DestinationSerializer',
+            'tarification': 'logistique.serializers.TarificationSerializer',
+        }
     
     def get_nb_incidents(self, obj):
         return obj.incidents.count()
@@ -64,7 +103,7 @@ class ExpeditionDetailSerializer(serializers.ModelSerializer):
     
     def get_peut_etre_supprime(self, obj):
         try:
-            return bool(obj.peut_etre_supprime())
+            return _peut_etre_supprime(obj)
         except Exception:
             return False
 
@@ -124,27 +163,128 @@ class ExpeditionCreateUpdateSerializer(serializers.ModelSerializer):
         
         if data.get('volume') is not None and data['volume'] < 0:
             raise serializers.ValidationError({"volume": "Le volume doit être positif"})
+
+        if not self.instance:
+            self._verifier_plafond_credit(data)
         
         return data
 
+    def _verifier_plafond_credit(self, data):
+        """
+        Refuse l'expédition si elle porterait l'encours du client au-delà de
+        son plafond. Lit Client.Solde, tenu par le grand livre, sans agréger
+        factures et paiements.
+        """
+        client = data.get('code_client')
+        if client is None or client.PlafondCredit is None:
+            return
+        montant = Expedition(
+            poids=data.get('poids'), volume=data.get('volume'), tarification=data.get('tarification')
+        ).calculer_montant_estime() or Decimal('0.00')
+        if client.Solde + montant > client.PlafondCredit:
+            raise serializers.ValidationError({
+                'code_client': (
+                    f"Plafond de crédit dépassé : solde {client.Solde} DA + expédition {montant} DA "
+                    f"> plafond {client.PlafondCredit} DA."
+                )
+            })
+
+
+class PieceJointeSerializer(serializers.ModelSerializer):
+    """Pièce jointe dédupliquée, avec sa miniature une fois traitée"""
+    statut_traitement_display = serializers.CharField(source='get_statut_traitement_display', read_only=True)
+
+    class Meta:
+        model = PieceJointe
+        fields = [
+            'id', 'sha256', 'fichier', 'miniature', 'nom_origine', 'type_mime', 'taille',
+            'largeur', 'hauteur', 'statut_traitement', 'statut_traitement_display', 'date_creation',
+        ]
+        read_only_fields = fields
+
+
+class TeleversementSerializer(serializers.ModelSerializer):
+    """Téléversement par blocs : `recu` est l'offset du prochain bloc"""
+    statut_display = serializers.CharField(source='get_statut_display', read_only=True)
+    piece_jointe_info = PieceJointeSerializer(source='piece_jointe', read_only=True)
+
+    class Meta:
+        model = Televersement
+        fields = [
+            'id', 'nom_fichier', 'type_mime', 'taille_totale', 'sha256_attendu', 'recu',
+            'statut', 'statut_display', 'piece_jointe', 'piece_jointe_info', 'date_creation',
+        ]
+        read_only_fields = ['id', 'recu', 'statut', 'piece_jointe', 'date_creation']
+
+    def validate_taille_totale(self, value):
+        taille_max = settings.PIECES_JOINTES['TAILLE_MAX']
+        if value <= 0:
+            raise serializers.ValidationError("La taille doit être positive.")
+        if value > taille_max:
+            raise serializers.ValidationError(f"Fichier trop volumineux (maximum {taille_max} octets).")
+        return value
+
+    def validate_sha256_attendu(self, value):
+        if value and len(value) != 64:
+            raise serializers.ValidationError("Empreinte SHA-256 attendue en hexadécimal (64 caractères).")
+        return value.lower()
+
+
+class ExpeditionArchiveeSerializer(serializers.ModelSerializer):
+    """Expédition archivée, au format du détail d'une expédition (lecture seule)"""
+    statut_display = serializers.CharField(source='get_statut_display', read_only=True)
+
+    class Meta:
+        model = ExpeditionArchivee
+        fields = [
+            'numexp', 'code_client', 'code_facture', 'statut', 'statut_display', 'montant_estime',
+            'date_creation', 'date_archivage',
+        ]
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        expedition = instance.donnees['expedition']
+        for champ in ('poids', 'volume', 'description', 'date_modification'):
+            data[champ] = expedition.get(champ)
+        data['destination'] = expedition.get('destination_id')
+        data['tarification'] = expedition.get('tarification_id')
+        data['nb_incidents'] = len(instance.donnees['incidents'])
+        data['peut_etre_modifie'] = data['peut_etre_supprime'] = False
+        data['archivee'] = True
+        return data
+
 
 class IncidentListSerializer(serializers.ModelSerializer):
     """Serializer simplifié pour la liste des incidents"""
     type_display = serializers.CharField(source='get_type_display', read_only=True)
     etat_display = serializers.CharField(source='get_etat_display', read_only=True)
     expedition = serializers.SerializerMethodField()
+    miniature = serializers.SerializerMethodField()
     
     class Meta:
         model = Incident
         fields = [
             'code_inc', 'type', 'type_display', 'etat', 'etat_display',
             'numexp', 'expedition', 'wilaya', "commune",'commentaire', 'date_creation', 
-            
+            'miniature',
         ]
+        dependances = {
+            'expedition': ['numexp__numexp'],
+            'miniature': ['fichier__miniature'],
+        }
+        expansions = {'numexp': 'expeditions.serializers.ExpeditionListSerializer'}
     
     def get_expedition(self, obj):
      return f"EXP-{obj.numexp.numexp}" if obj.numexp else None
 
+    def get_miniature(self, obj):
+        """URL de la miniature ; None tant que le traitement n'est pas fait"""
+        if not (obj.fichier and obj.fichier.miniature):
+            return None
+        url = obj.fichier.miniature.url
+        requete = self.context.get('request')
+        return requete.build_absolute_uri(url) if requete else url
+
 
 class IncidentDetailSerializer(serializers.ModelSerializer):
     """Serializer détaillé pour un incident"""
@@ -152,14 +292,16 @@ class IncidentDetailSerializer(serializers.ModelSerializer):
     etat_display = serializers.CharField(source='get_etat_display', read_only=True)
     expedition_info = ExpeditionListSerializer(source='numexp', read_only=True)
     expedition = serializers.SerializerMethodField()
+    fichier_info = PieceJointeSerializer(source='fichier', read_only=True)
     
     class Meta:
         model = Incident
         fields = [
             'code_inc', 'type', 'type_display', 'etat', 'etat_display',
             'numexp', 'expedition','wilaya','commune' , 'expedition_info', 'commentaire', 
-            'piece_jointe', 'resolution', 'date_creation', 'date_resolution'
+            'piece_jointe', 'fichier', 'fichier_info', 'resolution', 'date_creation', 'date_resolution'
         ]
+        dependances = {'expedition': ['numexp__numexp']}
     
     def get_expedition(self, obj):
      return f"EXP-{obj.numexp.numexp}" if obj.numexp else None
@@ -175,11 +317,17 @@ class IncidentDetailSerializer(serializers.ModelSerializer):
 class IncidentCreateUpdateSerializer(serializers.ModelSerializer):
     """Serializer pour créer/modifier un incident"""
     code_inc = serializers.CharField(read_only=True)
+    fichier = serializers.PrimaryKeyRelatedField(
+        queryset=PieceJointe.objects.all(),
+        required=False,
+        allow_null=True,
+        help_text="Pièce jointe déjà téléversée (/api/pieces-jointes/)"
+    )
     
     class Meta:
         model = Incident
         fields = [
-            'code_inc', 'type', 'commentaire', 'piece_jointe', 
+            'code_inc', 'type', 'commentaire', 'piece_jointe', 'fichier',
             'etat', 'resolution', 'numexp','wilaya', 'commune'
         ]
         extra_kwargs = {
@@ -225,3 +373,28 @@ class IncidentCreateUpdateSerializer(serializers.ModelSerializer):
                 })
         
         return data
+
+    def _rattacher_piece_jointe(self, validated_data):
+        """
+        Un fichier envoyé dans piece_jointe est dédupliqué en PieceJointe ;
+        piece_jointe reprend alors le chemin du fichier stocké.
+        """
+        if 'piece_jointe' in validated_data:
+            envoi = validated_data.pop('piece_jointe')
+            if envoi:
+                try:
+                    validated_data['fichier'], _ = enregistrer(envoi, envoi.name, getattr(envoi, 'content_type', ''))
+                except ErreurPieceJointe as exc:
+                    raise serializers.ValidationError({'piece_jointe': str(exc)})
+            elif 'fichier' not in validated_data:
+                validated_data['fichier'] = None
+        if 'fichier' in validated_data:
+            fichier = validated_data['fichier']
+            validated_data['piece_jointe'] = fichier.fichier.name if fichier else None
+        return validated_data
+
+    def create(self, validated_data):
+        return super().create(self._rattacher_piece_jointe(validated_data))
+
+    def update(self, instance, validated_data):
+        return super().update(instance, self._rattacher_piece_jointe(validated_data))
@@ -0,0 +1,47 @@
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+
+from .agregats import ajuster, cle_agregat
+from .models import Incident
+
+CHAMPS_CLE = ('date_creation', 'wilaya', 'commune', 'type')
+INCONNUE = object()
+
+
+@receiver(post_init, sender=Incident)
+def memoriser_cle_agregat(sender, instance, **kwargs):
+    """Garde la clé d'agrégat chargée pour détecter un déplacement au save()."""
+    if all(champ in instance.__dict__ for champ in CHAMPS_CLE):
+        instance._cle_agregat = cle_agregat(instance)
+    else:
+        # Instance chargée avec only()/defer() : clé relue avant le save()
+        instance._cle_agregat = INCONNUE
+
+
+@receiver(pre_save, sender=Incident)
+def relire_cle_agregat(sender, instance, **kwargs):
+    if instance._cle_agregat is not INCONNUE:
+        return
+    ancien = Incident.objects.filter(pk=instance.pk).only(*CHAMPS_CLE).first() if instance.pk else None
+    instance._cle_agregat = ancien._cle_agregat if ancien else None
+
+
+@receiver(post_save, sender=Incident)
+def maj_agregat_incident(sender, instance, created, **kwargs):
+    nouvelle = cle_agregat(instance)
+    ancienne = None if created else instance._cle_agregat
+    if nouvelle == ancienne:
+        return
+    if ancienne is not None:
+        ajuster(ancienne, -1)
+    ajuster(nouvelle, 1)
+    instance._cle_agregat = nouvelle
+
+
+@receiver(post_delete, sender=Incident)
+def retirer_agregat_incident(sender, instance, **kwargs):
+    cle = instance._cle_agregat
+    if cle is INCONNUE or cle is None:
+        cle = cle_agregat(instance)
+    if cle is not None:
+        ajuster(cle, -1)
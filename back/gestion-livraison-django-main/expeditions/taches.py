@@ -0,0 +1,35 @@
+from taches.registre import tache
+
+from . import archivage, partitions, pieces_jointes
+from .agregats import reconstruire
+
+
+@tache('expeditions.traiter_piece_jointe', delai_relance=60)
+def traiter_piece_jointe(suivi, piece_id):
+    """Réduit une photo d'incident et produit sa miniature."""
+    traitee = pieces_jointes.traiter(piece_id, reprendre=suivi.tache.tentatives > 1)
+    return {'piece_id': piece_id, 'traitee': traitee}
+
+
+@tache('expeditions.purger_televersements')
+def purger_televersements(suivi, heures=48):
+    """Abandonne les téléversements de pièces jointes inactifs."""
+    return {'abandonnes': pieces_jointes.purger_televersements(heures)}
+
+
+@tache('expeditions.recalculer_agregats_incidents')
+def recalculer_agregats_incidents(suivi):
+    """Reconstruit la table incident_agregat (carte des points chauds)."""
+    return {'lignes': reconstruire()}
+
+
+@tache('expeditions.maintenir_partitions')
+def maintenir_partitions(suivi):
+    """Crée d'avance les partitions mensuelles des tables expedition et incident."""
+    return {'partitions_creees': partitions.maintenir()}
+
+
+@tache('expeditions.archiver')
+def archiver(suivi, anciennete_jours=archivage.ANCIENNETE_JOURS):
+    """Archive les expéditions closes des factures payées (expedition_archive)."""
+    return archivage.archiver(anciennete_jours)
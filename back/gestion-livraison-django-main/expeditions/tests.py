@@ -1,3 +1,57 @@
+from decimal import Decimal
+
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from clients.models import Client
+from logistique.models import Destination, Tarification
+
+from .models import Expedition
+from .serializers import ExpeditionListSerializer
+
+
+class ChampsALaCarteTests(TestCase):
+    url = '/api/expeditions/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.client_ = Client.objects.create(Nom="Benali", Prenom="Karim", Adresse="1 rue Didouche, Alger",
+                                            Tel="0555000001", Email="karim@exemple.dz")
+        destination = Destination.objects.create(ville="Oran", zone_geo='OUEST')
+        tarification = Tarification.objects.create(code_tarif='T-1', type_service='STANDARD',
+                                                   tarif_base_destination=Decimal('500.00'),
+                                                   tarif_poids=Decimal('10.00'), tarif_volume=Decimal('5.00'),
+                                                   destination=destination)
+        Expedition.objects.create(poids=Decimal('2.00'), volume=Decimal('1.00'), code_client=cls.client_,
+                                  destination=destination, tarification=tarification)
+
+    def setUp(self):
+        self.api = APIClient()
+
+    def lignes(self, **params):
+        reponse = self.api.get(self.url, params)
+        self.assertEqual(reponse.status_code, 200)
+        return reponse.data['results']
+
+    def test_sans_parametre_reponse_inchangee(self):
+        attendu = ExpeditionListSerializer(Expedition.objects.all(), many=True).data
+        self.assertEqual(self.lignes(), attendu)
+
+    def test_fields_elague_la_reponse(self):
+        self.assertEqual(self.lignes(fields='numexp,statut'), [
+            {'numexp': Expedition.objects.get().numexp, 'statut': 'EN_ATTENTE'},
+        ])
+
+    def test_expand_remplace_la_cle_etrangere(self):
+        ligne = self.lignes(expand='code_client')[0]
+        self.assertIsInstance(ligne['code_client'], dict)
+        self.assertEqual(ligne['code_client']['Nom'], "Benali")
+
+    def test_sous_champs_d_une_expansion(self):
+        self.assertEqual(self.lignes(fields='numexp,code_client.Nom')[0]['code_client'], {'Nom': "Benali"})
+
+    def test_champ_ou_expansion_inconnus_refuses(self):
+        for params in ({'fields': 'numexp,inconnu'}, {'expand': 'tarification'}, {'fields': 'statut.libelle'}):
+            with self.subTest(params=params):
+                self.assertEqual(self.api.get(self.url, params).status_code, 400)
 
-# Create your tests here.
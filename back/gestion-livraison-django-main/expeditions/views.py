@@ -1,20 +1,31 @@
-from rest_framework import viewsets, status
+import re
+
+from rest_framework import mixins, viewsets, status
 from rest_framework.decorators import action
+from rest_framework.parsers import FormParser, MultiPartParser
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
-from django.db.models import Count, Q
-from django.db.models.functions import TruncMonth
+from datetime import date, timedelta
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+from django.http import Http404
 from django.utils import timezone
-from .models import Expedition, Incident
+from .models import Expedition, ExpeditionArchivee, Incident, IncidentAgregat, PieceJointe, Televersement
+from . import pieces_jointes
+from .filtres import ExpeditionFilter, IncidentFilter
+from config.champs import ChampsDynamiquesMixin
 from rest_framework.permissions import AllowAny
 from .serializers import (
     ExpeditionListSerializer,
     ExpeditionDetailSerializer,
+    ExpeditionArchiveeSerializer,
     ExpeditionCreateUpdateSerializer,
     IncidentListSerializer,
     IncidentDetailSerializer,
-    IncidentCreateUpdateSerializer
+    IncidentCreateUpdateSerializer,
+    PieceJointeSerializer,
+    TeleversementSerializer,
 )
 def _add_months(dt, months):
     month_index = dt.month - 1 + months
@@ -30,7 +41,64 @@ def _month_range(months):
     month_starts = [_add_months(start, i) for i in range(months)]
     return start, end, month_starts
 
-class ExpeditionViewSet(viewsets.ModelViewSet):
+
+def _parse_months(request):
+    try:
+        months = int(request.GET.get('months', 12))
+    except ValueError:
+        months = 12
+    return max(1, months)
+
+
+_RE_CONTENT_RANGE = re.compile(r'^bytes (\d+)-(\d+)/(\d+|\*)$')
+
+
+def _filtres_agregats(request, du_defaut=None, au_defaut=None):
+    """
+    Filtres IncidentAgregat depuis ?du=, ?au= (AAAA-MM-JJ), ?type= (liste
+    séparée par des virgules) et ?wilaya=. Renvoie (filtres, erreur).
+    """
+    filtres = {}
+    for parametre, lookup, defaut in (('du', 'jour__gte', du_defaut), ('au', 'jour__lte', au_defaut)):
+        valeur = request.query_params.get(parametre)
+        if valeur:
+            try:
+                defaut = date.fromisoformat(valeur)
+            except ValueError:
+                return None, f"{parametre} doit être une date AAAA-MM-JJ."
+        if defaut:
+            filtres[lookup] = defaut
+    types = [t for t in request.query_params.get('type', '').split(',') if t]
+    if types:
+        inconnus = set(types) - {code for code, _ in Incident.TYPE_CHOICES}
+        if inconnus:
+            return None, f"Types d'incident inconnus : {', '.join(sorted(inconnus))}."
+        filtres['type__in'] = types
+    if request.query_params.get('wilaya'):
+        filtres['wilaya'] = request.query_params['wilaya']
+    return filtres, None
+
+
+def _serie_evolution(totals, month_starts):
+    """Construit la série mensuelle avec le taux d'évolution d'un mois sur l'autre."""
+    data = []
+    prev_total = None
+    for month_start in month_starts:
+        key = month_start.strftime('%Y-%m')
+        total = totals.get(key, 0)
+        if prev_total in (None, 0):
+            evolution = None
+        else:
+            evolution = round(((total - prev_total) / prev_total) * 100, 2)
+        data.append({
+            'month': key,
+            'total_expeditions': total,
+            'evolution_percent': evolution,
+        })
+        prev_total = total
+    return data
+
+class ExpeditionViewSet(ChampsDynamiquesMixin, viewsets.ModelViewSet):
     """
     ViewSet pour gérer les expéditions.
     
@@ -42,14 +110,19 @@ class ExpeditionViewSet(viewsets.ModelViewSet):
     - DELETE /api/expeditions/{id}/ : Supprimer une expédition
     - GET /api/expeditions/statistiques/ : Stats des expéditions
     - GET /api/expeditions/par_statut/ : Grouper par statut
+
+    Une expédition archivée (expeditions/archivage.py) reste accessible en
+    lecture par GET /api/expeditions/{id}/ et /incidents/, avec "archivee": true.
+
+    ?du= / ?au= (AAAA-MM-JJ) bornent la date de création (liste et statistiques).
     """
     permission_classes = [AllowAny]
     queryset = Expedition.objects.select_related('code_client', 'tarification', 'destination').all()
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     
-    # Filtres disponibles
-    filterset_fields = ['statut', 'code_client', 'tarification', 'destination']
-    search_fields = ['numexp', 'description', 'code_client__nom', 'destination__ville']
+    # Filtres disponibles (dont la période ?du= / ?au=)
+    filterset_class = ExpeditionFilter
+    search_fields = ['numexp', 'description', 'code_client__Nom', 'destination__ville']
     ordering_fields = ['date_creation', 'montant_estime', 'poids', 'volume']
     ordering = ['-date_creation']
     
@@ -61,6 +134,22 @@ class ExpeditionViewSet(viewsets.ModelViewSet):
             return ExpeditionCreateUpdateSerializer
         return ExpeditionDetailSerializer
     
+    def _archive(self):
+        """Expédition archivée de l'URL, ou None."""
+        numexp = str(self.kwargs.get(self.lookup_url_kwarg or self.lookup_field, ''))
+        if not numexp.isdigit():
+            return None
+        return ExpeditionArchivee.objects.filter(pk=int(numexp)).first()
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            return super().retrieve(request, *args, **kwargs)
+        except Http404:
+            archive = self._archive()
+            if archive is None:
+                raise
+            return Response(ExpeditionArchiveeSerializer(archive).data)
+
     def destroy(self, request, *args, **kwargs):
         """Vérifier avant suppression"""
         instance = self.get_object()
@@ -74,15 +163,13 @@ class ExpeditionViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def statistiques(self, request):
         """Statistiques globales des expéditions"""
-        total = self.queryset.count()
-        par_statut = self.queryset.values('statut').annotate(count=Count('numexp'))
+        expeditions = self.filter_queryset(self.get_queryset()).order_by()
+        par_statut = expeditions.values('statut').annotate(count=Count('numexp'))
         
         stats = {
-            'total_expeditions': total,
+            'total_expeditions': expeditions.count(),
             'par_statut': list(par_statut),
-            'montant_total_estime': sum(
-                exp.montant_estime for exp in self.queryset if exp.montant_estime
-            )
+            'montant_total_estime': expeditions.aggregate(total=Sum('montant_estime'))['total'] or 0,
         }
         return Response(stats)
     @action(detail=True, methods=['post'])
@@ -112,13 +199,7 @@ class ExpeditionViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def evolution(self, request):
         """Taux d'évolution mensuel du nombre d'expéditions"""
-        try:
-            months = int(request.query_params.get('months', 12))
-        except ValueError:
-            months = 12
-        if months < 1:
-            months = 1
-
+        months = _parse_months(request)
         start, end, month_starts = _month_range(months)
         grouped = (
             self.queryset.filter(date_creation__gte=start, date_creation__lt=end)
@@ -128,34 +209,24 @@ class ExpeditionViewSet(viewsets.ModelViewSet):
             .order_by('month')
         )
         totals = {item['month'].strftime('%Y-%m'): item['total'] for item in grouped}
-
-        data = []
-        prev_total = None
-        for month_start in month_starts:
-            key = month_start.strftime('%Y-%m')
-            total = totals.get(key, 0)
-            if prev_total in (None, 0):
-                evolution = None
-            else:
-                evolution = round(((total - prev_total) / prev_total) * 100, 2)
-            data.append({
-                'month': key,
-                'total_expeditions': total,
-                'evolution_percent': evolution,
-            })
-            prev_total = total
-
-        return Response({'months': months, 'data': data})
+        return Response({'months': months, 'data': _serie_evolution(totals, month_starts)})
     @action(detail=True, methods=['get'])
     def incidents(self, request, pk=None):
         """Liste des incidents d'une expédition"""
-        expedition = self.get_object()
-        incidents = expedition.incidents.all()
+        try:
+            expedition = self.get_object()
+        except Http404:
+            archive = self._archive()
+            if archive is None:
+                raise
+            return Response(archive.donnees['incidents'])
+        # Un incident est signalé après son expédition : les partitions antérieures sont écartées
+        incidents = expedition.incidents.filter(date_creation__gte=expedition.date_creation)
         serializer = IncidentListSerializer(incidents, many=True)
         return Response(serializer.data)
 
 
-class IncidentViewSet(viewsets.ModelViewSet):
+class IncidentViewSet(ChampsDynamiquesMixin, viewsets.ModelViewSet):
     """
     ViewSet pour gérer les incidents.
     
@@ -166,14 +237,16 @@ class IncidentViewSet(viewsets.ModelViewSet):
     - PUT /api/incidents/{id}/ : Modifier un incident
     - DELETE /api/incidents/{id}/ : Supprimer un incident
     - GET /api/incidents/statistiques/ : Stats des incidents
+    - GET /api/incidents/zones/ : Lieux avec le plus d'incidents
+    - GET /api/incidents/points_chauds/ : Incidents par lieu × type × semaine/mois
     - POST /api/incidents/{id}/resoudre/ : Marquer comme résolu
     """
     
-    queryset = Incident.objects.select_related('numexp').all()
+    queryset = Incident.objects.select_related('numexp', 'fichier').all()
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     permission_classes = [AllowAny]
     # Filtres disponibles
-    filterset_fields = ['type', 'etat', 'numexp']
+    filterset_class = IncidentFilter
     search_fields = ['code_inc', 'commentaire', 'resolution']
     ordering_fields = ['date_creation', 'date_resolution', 'etat']
     ordering = ['-date_creation']
@@ -226,15 +299,15 @@ class IncidentViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def statistiques(self, request):
         """Statistiques des incidents"""
-        total = self.queryset.count()
-        par_type = self.queryset.values('type').annotate(count=Count('code_inc'))
-        par_etat = self.queryset.values('etat').annotate(count=Count('code_inc'))
+        incidents = self.filter_queryset(self.get_queryset()).order_by()
+        par_type = incidents.values('type').annotate(count=Count('code_inc'))
+        par_etat = incidents.values('etat').annotate(count=Count('code_inc'))
         
         stats = {
-            'total_incidents': total,
+            'total_incidents': incidents.count(),
             'par_type': list(par_type),
             'par_etat': list(par_etat),
-            'non_resolus': self.queryset.filter(
+            'non_resolus': incidents.filter(
                 ~Q(etat__in=['RESOLU', 'FERME'])
             ).count()
         }
@@ -249,16 +322,63 @@ class IncidentViewSet(viewsets.ModelViewSet):
         if limit < 1:
             limit = 1
 
+        # Lu dans les agrégats journaliers plutôt que dans la table incident
+        filtres, erreur = _filtres_agregats(request)
+        if erreur:
+            return Response({"error": erreur}, status=status.HTTP_400_BAD_REQUEST)
         zones = (
-            self.queryset.exclude(wilaya__isnull=True)
-            .exclude(wilaya__exact='')
+            IncidentAgregat.objects.filter(**filtres)
+            .exclude(wilaya='')
             .values('wilaya', 'commune')
-            .annotate(total=Count('code_inc'))
+            .annotate(total=Sum('nombre'))
+            .filter(total__gt=0)
             .order_by('-total')
         )
-        if limit:
-            zones = zones[:limit]
-        return Response(list(zones))
+        return Response(list(zones[:limit]))
+
+    @action(detail=False, methods=['get'])
+    def points_chauds(self, request):
+        """
+        Carte des points chauds : nombre d'incidents par wilaya (et commune)
+        × type × semaine ou mois, depuis les agrégats journaliers.
+
+        Paramètres : ?periode=semaine|mois, ?du=AAAA-MM-JJ, ?au=AAAA-MM-JJ,
+        ?type=RETARD,PERTE, ?wilaya=Alger, ?niveau=wilaya|commune
+        """
+        periode = request.query_params.get('periode', 'semaine')
+        niveau = request.query_params.get('niveau', 'commune')
+        if periode not in ('semaine', 'mois') or niveau not in ('wilaya', 'commune'):
+            return Response(
+                {"error": "periode doit valoir semaine ou mois, niveau wilaya ou commune."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        aujourd_hui = timezone.localdate()
+        if periode == 'semaine':
+            du_defaut = aujourd_hui - timedelta(weeks=11, days=aujourd_hui.weekday())
+        else:
+            du_defaut = _add_months(aujourd_hui.replace(day=1), -11)
+        filtres, erreur = _filtres_agregats(request, du_defaut=du_defaut, au_defaut=aujourd_hui)
+        if erreur:
+            return Response({"error": erreur}, status=status.HTTP_400_BAD_REQUEST)
+
+        champs = ['wilaya', 'commune'] if niveau == 'commune' else ['wilaya']
+        tronquer = TruncWeek if periode == 'semaine' else TruncMonth
+        lignes = list(
+            IncidentAgregat.objects.filter(**filtres)
+            .annotate(debut_periode=tronquer('jour'))
+            .values('debut_periode', *champs, 'type')
+            .annotate(total=Sum('nombre'))
+            .filter(total__gt=0)
+            .order_by('debut_periode', '-total')
+        )
+        return Response({
+            'periode': periode,
+            'niveau': niveau,
+            'du': filtres['jour__gte'],
+            'au': filtres['jour__lte'],
+            'total': sum(ligne['total'] for ligne in lignes),
+            'resultats': lignes,
+        })
     @action(detail=True, methods=['post'])
     def resoudre(self, request, pk=None):
         """Marquer un incident comme résolu"""
@@ -276,4 +396,106 @@ class IncidentViewSet(viewsets.ModelViewSet):
         incident.save()
         
         serializer = IncidentDetailSerializer(incident)
-        return Response(serializer.data)
\ No newline at end of file
+        return Response(serializer.data)
+
+
+class PieceJointeViewSet(ChampsDynamiquesMixin, mixins.CreateModelMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Pièces jointes dédupliquées des incidents.
+
+    Endpoints:
+    - GET /api/pieces-jointes/ : Liste (filtrable par statut_traitement)
+    - GET /api/pieces-jointes/{id}/ : Détail, avec la miniature une fois traitée
+    - POST /api/pieces-jointes/ : Dépôt direct d'un petit fichier (multipart, champ `fichier`)
+
+    Les grands fichiers passent par /api/pieces-jointes/televersements/.
+    """
+
+    queryset = PieceJointe.objects.all()
+    serializer_class = PieceJointeSerializer
+    permission_classes = [AllowAny]
+    parser_classes = [MultiPartParser, FormParser]
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['statut_traitement', 'sha256']
+
+    def create(self, request, *args, **kwargs):
+        envoi = request.FILES.get('fichier')
+        if not envoi:
+            return Response({"error": "Le champ fichier est obligatoire."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            piece, creee = pieces_jointes.enregistrer(envoi, envoi.name, envoi.content_type)
+        except pieces_jointes.ErreurPieceJointe as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(
+            self.get_serializer(piece).data,
+            status=status.HTTP_201_CREATED if creee else status.HTTP_200_OK
+        )
+
+
+class TeleversementViewSet(ChampsDynamiquesMixin, mixins.CreateModelMixin, mixins.RetrieveModelMixin,
+                           mixins.DestroyModelMixin, viewsets.GenericViewSet):
+    """
+    Téléversement par blocs, reprenable, des pièces jointes.
+
+    Endpoints:
+    - POST /api/pieces-jointes/televersements/ : Ouvrir (nom_fichier, taille_totale, sha256_attendu)
+    - GET /api/pieces-jointes/televersements/{id}/ : Où reprendre (`recu`)
+    - PUT /api/pieces-jointes/televersements/{id}/bloc/ : Envoyer un bloc (corps brut)
+    - POST /api/pieces-jointes/televersements/{id}/terminer/ : Vérifier et créer la pièce jointe
+    - DELETE /api/pieces-jointes/televersements/{id}/ : Abandonner
+
+    Un bloc porte son offset dans l'en-tête `Content-Range: bytes 0-1048575/5000000`
+    (ou `?offset=`). Un offset différent de `recu` renvoie 409 avec `recu` :
+    le client reprend à cet offset.
+    """
+
+    queryset = Televersement.objects.select_related('piece_jointe')
+    serializer_class = TeleversementSerializer
+    permission_classes = [AllowAny]
+
+    def perform_destroy(self, instance):
+        pieces_jointes.abandonner(instance)
+
+    @action(detail=True, methods=['put'])
+    def bloc(self, request, pk=None):
+        """Ajoute un bloc lu directement dans le corps de la requête"""
+        try:
+            longueur = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            longueur = 0
+
+        plage = request.headers.get('Content-Range')
+        if plage:
+            correspondance = _RE_CONTENT_RANGE.match(plage.strip())
+            if not correspondance:
+                return Response({"error": "Content-Range invalide (bytes debut-fin/total)."},
+                                status=status.HTTP_400_BAD_REQUEST)
+            offset, fin = int(correspondance.group(1)), int(correspondance.group(2))
+            if fin - offset + 1 != longueur:
+                return Response({"error": "Content-Range ne correspond pas à la taille du bloc."},
+                                status=status.HTTP_400_BAD_REQUEST)
+        else:
+            try:
+                offset = int(request.query_params.get('offset', ''))
+            except ValueError:
+                return Response({"error": "Offset du bloc manquant (Content-Range ou ?offset=)."},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+        televersement = self.get_object()
+        try:
+            televersement = pieces_jointes.ecrire_bloc(televersement.pk, offset, request.stream, longueur)
+        except pieces_jointes.DecalageBloc as exc:
+            return Response({"error": str(exc), "recu": exc.recu}, status=status.HTTP_409_CONFLICT)
+        except pieces_jointes.ErreurPieceJointe as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self.get_serializer(televersement).data)
+
+    @action(detail=True, methods=['post'])
+    def terminer(self, request, pk=None):
+        """Clôt le téléversement une fois tous les octets reçus"""
+        televersement = self.get_object()
+        try:
+            pieces_jointes.terminer(televersement)
+        except pieces_jointes.ErreurPieceJointe as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self.get_serializer(televersement).data)
@@ -1,7 +1,16 @@
+from decimal import Decimal
+
 from django.contrib import admin
+from django.db.models import Count, DecimalField, IntegerField, OuterRef, Sum
 from django.utils.html import format_html
+
+from clients.admin import GrandeTableAdminMixin, RechercheParClientMixin
+from config.sous_requetes import agregat
+from taches.file_attente import mettre_en_file
 from .models import Facture, Paiement, EtreFacture
 
+MONTANT = DecimalField(max_digits=14, decimal_places=2)
+
 
 class EtreFactureInline(admin.TabularInline):
     """
@@ -24,9 +33,10 @@ class PaiementInline(admin.TabularInline):
 
 
 @admin.register(Facture)
-class FactureAdmin(admin.ModelAdmin):
+class FactureAdmin(GrandeTableAdminMixin, RechercheParClientMixin, admin.ModelAdmin):
     """
     Interface d'administration pour les factures.
+    Recherche : code facture exact, code, nom, e-mail ou téléphone du client.
     """
     
     list_display = [
@@ -46,11 +56,9 @@ class FactureAdmin(admin.ModelAdmin):
         'date_f',
     ]
     
-    search_fields = [
-        'code_facture',
-        'code_client',
-        'remarques',
-    ]
+    list_select_related = ['code_client']
+    
+    autocomplete_fields = ['code_client']
     
     readonly_fields = [
         'code_facture',
@@ -86,6 +94,23 @@ class FactureAdmin(admin.ModelAdmin):
     
     ordering = ['-date_f', '-code_facture']
     
+    def get_queryset(self, request):
+        # Montant payé et nombres de lignes liées, calculés pour les seules factures de la page
+        return super().get_queryset(request).annotate(
+            _montant_paye=agregat(Paiement.objects.filter(code_facture=OuterRef('pk')), 'code_facture',
+                                  Sum('montant_verse', output_field=MONTANT)),
+            _nb_paiements=agregat(Paiement.objects.filter(code_facture=OuterRef('pk')), 'code_facture',
+                                  Count('pk', output_field=IntegerField())),
+            _nb_expeditions=agregat(EtreFacture.objects.filter(code_facture=OuterRef('pk')), 'code_facture',
+                                    Count('pk', output_field=IntegerField())),
+        )
+    
+    def _paye(self, obj):
+        if hasattr(obj, '_montant_paye'):
+            return obj._montant_paye
+        # Formulaire d'ajout : facture pas encore enregistrée
+        return obj.montant_paye() if obj.pk else Decimal('0.00')
+    
     def ht_display(self, obj):
         """Affiche le montant HT formaté"""
         return f"{obj.ht:,.2f} DA"
@@ -101,29 +126,29 @@ class FactureAdmin(admin.ModelAdmin):
     def ttc_display(self, obj):
         """Affiche le montant TTC formaté"""
         return format_html(
-            '<strong>{:,.2f} DA</strong>',
-            obj.ttc
+            '<strong>{} DA</strong>',
+            f"{obj.ttc or 0:,.2f}"
         )
     ttc_display.short_description = 'TTC'
     ttc_display.admin_order_field = 'ttc'
     
     def montant_paye_display(self, obj):
         """Affiche le montant déjà payé"""
-        montant = obj.montant_paye()
+        montant = self._paye(obj)
         return format_html(
-            '<span style="color: green; font-weight: bold;">{:,.2f} DA</span>',
-            montant
+            '<span style="color: green; font-weight: bold;">{} DA</span>',
+            f"{montant:,.2f}"
         )
     montant_paye_display.short_description = 'Montant payé'
     
     def reste_a_payer_display(self, obj):
         """Affiche le reste à payer"""
-        reste = obj.reste_a_payer()
+        reste = (obj.ttc or Decimal('0.00')) - self._paye(obj)
         color = 'red' if reste > 0 else 'green'
         return format_html(
-            '<span style="color: {}; font-weight: bold;">{:,.2f} DA</span>',
+            '<span style="color: {}; font-weight: bold;">{} DA</span>',
             color,
-            reste
+            f"{reste:,.2f}"
         )
     reste_a_payer_display.short_description = 'Reste à payer'
     
@@ -134,8 +159,7 @@ class FactureAdmin(admin.ModelAdmin):
                 '<span style="background-color: green; color: white; padding: 3px 10px; border-radius: 3px;">PAYÉE</span>'
             )
         else:
-            reste = obj.reste_a_payer()
-            if reste == obj.ttc:
+            if not self._paye(obj):
                 status = 'NON PAYÉE'
                 color = 'red'
             else:
@@ -150,32 +174,31 @@ class FactureAdmin(admin.ModelAdmin):
     
     def nb_expeditions(self, obj):
         """Affiche le nombre d'expéditions"""
-        count = obj.expeditions_facturees.count()
-        return format_html('<strong>{}</strong>', count)
+        return format_html('<strong>{}</strong>', obj._nb_expeditions)
     nb_expeditions.short_description = 'Expéditions'
     
     def nb_paiements(self, obj):
         """Affiche le nombre de paiements"""
-        count = obj.paiements.count()
-        return format_html('<strong>{}</strong>', count)
+        return format_html('<strong>{}</strong>', obj._nb_paiements)
     nb_paiements.short_description = 'Paiements'
     
     actions = ['recalculer_montants']
     
     def recalculer_montants(self, request, queryset):
-        """Action pour recalculer les montants des factures sélectionnées"""
-        for facture in queryset:
-            facture.calculer_montant_depuis_expeditions()
-            facture.save()
-        self.message_user(request, f"{queryset.count()} facture(s) recalculée(s).")
+        """Action pour recalculer les montants des factures sélectionnées (tâche de fond)"""
+        codes = list(queryset.values_list('code_facture', flat=True))
+        tache = mettre_en_file('facturation.recalculer_montants', {'codes': codes}, demandeur=request.user)
+        self.message_user(request, f"Recalcul de {len(codes)} facture(s) lancé en tâche de fond (tâche #{tache.pk}).")
     recalculer_montants.short_description = "Recalculer les montants"
 
 
 @admin.register(Paiement)
-class PaiementAdmin(admin.ModelAdmin):
+class PaiementAdmin(GrandeTableAdminMixin, RechercheParClientMixin, admin.ModelAdmin):
     """
     Interface d'administration pour les paiements.
+    Recherche : référence exacte, code, nom, e-mail ou téléphone du client.
     """
+    champ_client = 'code_facture__code_client'
     
     list_display = [
         'reference_p',
@@ -191,11 +214,7 @@ class PaiementAdmin(admin.ModelAdmin):
         'date',
     ]
     
-    search_fields = [
-        'reference_p',
-        'code_facture__code_facture',
-        'remarques',
-    ]
+    list_select_related = ['code_facture']
     
     readonly_fields = [
         'reference_p',
@@ -222,8 +241,8 @@ class PaiementAdmin(admin.ModelAdmin):
     def montant_verse_display(self, obj):
         """Affiche le montant versé formaté"""
         return format_html(
-            '<strong style="color: green;">{:,.2f} DA</strong>',
-            obj.montant_verse
+            '<strong style="color: green;">{} DA</strong>',
+            f"{obj.montant_verse:,.2f}"
         )
     montant_verse_display.short_description = 'Montant versé'
     montant_verse_display.admin_order_field = 'montant_verse'
@@ -247,7 +266,7 @@ class PaiementAdmin(admin.ModelAdmin):
 
 
 @admin.register(EtreFacture)
-class EtreFactureAdmin(admin.ModelAdmin):
+class EtreFactureAdmin(GrandeTableAdminMixin, admin.ModelAdmin):
     """
     Interface d'administration pour la table de liaison EtreFacture.
     """
@@ -262,6 +281,8 @@ class EtreFactureAdmin(admin.ModelAdmin):
         'date_ajout',
     ]
     
+    list_select_related = ['numexp', 'code_facture']
+    
     search_fields = [
         'numexp__numexp',
         'code_facture__code_facture',
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class FacturationConfig(AppConfig):
     name = 'facturation'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,112 @@
+"""
+Versions asynchrones (ASGI) des endpoints d'agrégats de la facturation.
+
+Endpoints:
+- GET /api/async/factures/statistiques/
+- GET /api/async/factures/evolution_chiffre_affaires/?months=12
+- GET /api/async/factures/export/ : export CSV en streaming
+- GET /api/async/paiements/statistiques/
+"""
+import csv
+from decimal import Decimal
+
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+
+from config.async_utils import Echo, en_parallele
+from config.routage import lecture_replique
+from .models import Facture, Paiement
+from .views import _month_range, _parse_months, _serie_chiffre_affaires
+
+
+@lecture_replique
+@require_GET
+async def statistiques_factures(request):
+    """
+    Même réponse que FactureViewSet.statistiques. Le montant payé est agrégé
+    en SQL au lieu d'appeler montant_paye() sur chaque facture.
+    """
+    resultats = await en_parallele(
+        total=lambda: Facture.objects.count(),
+        total_ttc=lambda: Facture.objects.aggregate(total=Sum('ttc'))['total'],
+        total_paye=lambda: Paiement.objects.aggregate(total=Sum('montant_verse'))['total'],
+        payees=lambda: Facture.objects.filter(est_payee=True).count(),
+        impayees=lambda: Facture.objects.filter(est_payee=False).count(),
+    )
+    total_ttc = resultats['total_ttc'] or Decimal('0.00')
+    total_paye = resultats['total_paye'] or Decimal('0.00')
+    return JsonResponse({
+        'total_factures': resultats['total'],
+        'factures_payees': resultats['payees'],
+        'factures_impayees': resultats['impayees'],
+        'montant_total_ttc': float(total_ttc),
+        'montant_total_paye': float(total_paye),
+        'montant_reste_a_payer': float(total_ttc - total_paye),
+    })
+
+
+@lecture_replique
+@require_GET
+async def evolution_chiffre_affaires(request):
+    """Evolution mensuelle du chiffre d'affaires TTC"""
+    months = _parse_months(request)
+    start, end, month_starts = _month_range(months)
+    grouped = (
+        Facture.objects.filter(date_f__gte=start.date(), date_f__lt=end.date())
+        .annotate(month=TruncMonth('date_f'))
+        .values('month')
+        .annotate(total=Sum('ttc'))
+        .order_by('month')
+    )
+    totals = {
+        item['month'].strftime('%Y-%m'): item['total'] or Decimal('0.00')
+        async for item in grouped
+    }
+    return JsonResponse({'months': months, 'data': _serie_chiffre_affaires(totals, month_starts)})
+
+
+@lecture_replique
+@require_GET
+async def export_factures(request):
+    """
+    Export CSV des factures (filtre optionnel ?est_payee=true|false).
+    Les lignes sont lues par paquets et envoyées au fur et à mesure.
+    """
+    queryset = Facture.objects.order_by('code_facture')
+    est_payee = request.GET.get('est_payee')
+    if est_payee in ('true', 'false'):
+        queryset = queryset.filter(est_payee=(est_payee == 'true'))
+    colonnes = ['code_facture', 'date_f', 'code_client_id', 'ht', 'tva', 'ttc', 'est_payee']
+    writer = csv.writer(Echo())
+
+    async def lignes():
+        yield writer.writerow(colonnes)
+        async for ligne in queryset.values(*colonnes).aiterator(chunk_size=2000):
+            yield writer.writerow([ligne[c] for c in colonnes])
+
+    response = StreamingHttpResponse(lignes(), content_type='text/csv')
+    response['Content-Disposition'] = 'attachment; filename="factures.csv"'
+    return response
+
+
+@lecture_replique
+@require_GET
+async def statistiques_paiements(request):
+    """Même réponse que PaiementViewSet.statistiques, agrégats en parallèle."""
+    resultats = await en_parallele(
+        total=lambda: Paiement.objects.count(),
+        montant=lambda: Paiement.objects.aggregate(total=Sum('montant_verse'))['total'],
+        par_mode=lambda: list(
+            Paiement.objects.order_by().values('mode_paiement').annotate(
+                count=Count('reference_p'),
+                total=Sum('montant_verse')
+            )
+        ),
+    )
+    return JsonResponse({
+        'total_paiements': resultats['total'],
+        'montant_total': float(resultats['montant'] or 0),
+        'par_mode_paiement': resultats['par_mode'],
+    })
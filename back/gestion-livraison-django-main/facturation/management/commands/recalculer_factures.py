@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from facturation import recalcul
+from facturation.models import Facture
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcule HT, TVA, TTC et est_payee des factures depuis les expéditions liées et les paiements, "
+        "par UPDATE ensemblistes sur des tranches de factures. Les écarts de TTC sont passés au grand livre."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('codes', nargs='*', help="Codes des factures (toutes par défaut)")
+        parser.add_argument('--client', type=int, help="Seulement les factures de ce client")
+        parser.add_argument('--depuis', help="Date de facturation minimale (AAAA-MM-JJ)")
+        parser.add_argument('--jusqu-au', dest='jusqu_au', help="Date de facturation maximale (AAAA-MM-JJ)")
+        parser.add_argument('--taille-lot', type=int, default=recalcul.TAILLE_LOT,
+                            help="Factures par tranche (%(default)s)")
+
+    def handle(self, *args, **options):
+        factures = Facture.objects.all()
+        if options['codes']:
+            factures = factures.filter(code_facture__in=options['codes'])
+        if options['client']:
+            factures = factures.filter(code_client=options['client'])
+        if options['depuis']:
+            factures = factures.filter(date_f__gte=options['depuis'])
+        if options['jusqu_au']:
+            factures = factures.filter(date_f__lte=options['jusqu_au'])
+
+        debut = time.perf_counter()
+        bilan = recalcul.recalculer(
+            factures, taille_lot=options['taille_lot'],
+            rappel=lambda fait, modifiees: self.stdout.write(f"{fait} factures traitées, {modifiees} modifiée(s)")
+            if options['verbosity'] > 1 else None,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"{bilan['factures']} facture(s) recalculée(s), {bilan['modifiees']} modifiée(s), "
+            f"{bilan['ecritures']} écriture(s) au grand livre en {time.perf_counter() - debut:.1f} s."
+        ))
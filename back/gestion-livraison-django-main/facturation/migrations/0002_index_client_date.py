@@ -0,0 +1,22 @@
+# Generated by Django 6.0 on 2026-10-19 10:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0004_compteurs_reclamations'),
+        ('facturation', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='facture',
+            name='facture_code_cl_6a6f6f_idx',
+        ),
+        migrations.AddIndex(
+            model_name='facture',
+            index=models.Index(fields=['code_client', '-date_f', '-code_facture'], name='facture_client_date_idx'),
+        ),
+    ]
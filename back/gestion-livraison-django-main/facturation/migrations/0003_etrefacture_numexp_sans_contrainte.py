@@ -0,0 +1,20 @@
+# Generated by Django 6.0 on 2026-10-19 17:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expeditions', '0006_index_client_date'),
+        ('facturation', '0002_index_client_date'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='etrefacture',
+            name='numexp',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='etre_facture_set', to='expeditions.expedition', verbose_name='Expédition'),
+        ),
+    ]
@@ -1,8 +1,8 @@
-from django.db import models
+from django.db import models, transaction
 from django.core.validators import MinValueValidator
 from django.core.exceptions import ValidationError
 from decimal import Decimal
-from expeditions.models import Expedition
+from expeditions.models import Expedition, ExpeditionArchivee
 
 
 class Facture(models.Model):
@@ -82,7 +82,8 @@ class Facture(models.Model):
         verbose_name_plural = "Factures"
         ordering = ['-date_f', '-code_facture']
         indexes = [
-            models.Index(fields=['code_client']),
+            # Dernières factures d'un client (sert aussi les filtres sur code_client seul)
+            models.Index(fields=['code_client', '-date_f', '-code_facture'], name='facture_client_date_idx'),
             models.Index(fields=['date_f']),
             models.Index(fields=['est_payee']),
         ]
@@ -93,12 +94,15 @@ class Facture(models.Model):
     def calculer_montants(self):
         """
         Calcule HT, TVA et TTC.
-        HT = somme des montants des expéditions
+        HT = somme des montants des expéditions (archivées comprises)
         TVA = HT × 0.19
         TTC = HT + TVA
         """
         expeditions = self.expeditions_facturees.all()
-        self.ht = sum(exp.numexp.montant_estime or Decimal('0.00') for exp in expeditions)
+        archivees = ExpeditionArchivee.objects.filter(code_facture=self.pk).aggregate(
+            total=models.Sum('montant_estime')
+        )['total']
+        self.ht = sum(exp.numexp.montant_estime or Decimal('0.00') for exp in expeditions) + (archivees or Decimal('0.00'))
         self.tva = self.ht * self.TAUX_TVA
         self.ttc = self.ht + self.tva
     
@@ -137,7 +141,9 @@ class Facture(models.Model):
         self.save(update_fields=['est_payee'])
     
     def save(self, *args, **kwargs):
-        super().save(*args, **kwargs)
+        # Atomique : l'écriture au grand livre client (facturation/signals.py) part avec la facture
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
 
 class Paiement(models.Model):
@@ -235,18 +241,20 @@ class Paiement(models.Model):
             if ancien_paiement.code_facture_id != self.code_facture_id:
                 ancienne_facture = ancien_paiement.code_facture
         self.full_clean()
-        super().save(*args, **kwargs)
-        self.code_facture.verifier_paiement_complet()
-        if ancienne_facture:
-            ancienne_facture.verifier_paiement_complet()
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            self.code_facture.verifier_paiement_complet()
+            if ancienne_facture:
+                ancienne_facture.verifier_paiement_complet()
     
     def delete(self, *args, **kwargs):
         """
         Met à jour le statut de la facture après suppression.
         """
         facture = self.code_facture
-        super().delete(*args, **kwargs)
-        facture.verifier_paiement_complet()
+        with transaction.atomic():
+            super().delete(*args, **kwargs)
+            facture.verifier_paiement_complet()
 
 
 class EtreFacture(models.Model):
@@ -258,6 +266,7 @@ class EtreFacture(models.Model):
     numexp = models.ForeignKey(
         Expedition,
         on_delete=models.CASCADE,
+        db_constraint=False,  # expedition est partitionnée : pas de contrainte possible sur numexp seul
         verbose_name="Expédition",
         related_name='etre_facture_set'
     )
@@ -303,15 +312,17 @@ class EtreFacture(models.Model):
     
     def save(self, *args, **kwargs):
         self.full_clean()
-        super().save(*args, **kwargs)
-        self.code_facture.calculer_montant_depuis_expeditions()
-        self.code_facture.save(update_fields=['ht', 'tva', 'ttc'])
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            self.code_facture.calculer_montant_depuis_expeditions()
+            self.code_facture.save(update_fields=['ht', 'tva', 'ttc'])
 
     def delete(self, *args, **kwargs):
         """
         Recalcule le montant de la facture après retrait d'une expédition.
         """
         facture = self.code_facture
-        super().delete(*args, **kwargs)
-        facture.calculer_montant_depuis_expeditions()
-        facture.save()
+        with transaction.atomic():
+            super().delete(*args, **kwargs)
+            facture.calculer_montant_depuis_expeditions()
+            facture.save()
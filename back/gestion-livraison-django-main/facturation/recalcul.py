@@ -0,0 +1,138 @@
+"""
+Recalcul ensembliste des factures : HT, TVA et TTC depuis les expéditions
+liées, est_payee depuis les paiements.
+
+Les factures sont parcourues par tranches de clés (code_facture, TAILLE_LOT
+par tranche). Pour chaque tranche, dans une transaction :
+1. les factures de la tranche sont verrouillées et leurs montants relus ;
+2. sous PostgreSQL, un seul UPDATE ... FROM joint les sommes des
+   expéditions et des paiements de la tranche et n'écrit que les lignes qui
+   changent ; ailleurs, les mêmes sommes sont lues par deux requêtes
+   groupées et les lignes modifiées écrites par bulk_update ;
+3. les écarts de TTC sont passés au grand livre client en une série
+   d'écritures, comme le ferait Facture.save().
+
+Arrondis : TVA = arrondi(HT × 19 %), TTC = arrondi(HT × 1,19), au centime le
+plus proche (demi vers le haut), comme PostgreSQL arrondit les montants
+enregistrés par Facture.save().
+"""
+from django.db import connection, transaction
+from django.db.models import Sum
+
+from clients.grand_livre import ZERO, arrondir, comptabiliser_lot
+from expeditions.archivage import factures_archivees
+
+from .models import EtreFacture, Facture, Paiement
+
+TAILLE_LOT = 5000
+
+# Une tranche : sommes des expéditions et des paiements des factures de %(codes)s
+SQL_POSTGRES = """
+UPDATE {facture} AS f
+SET ht = n.ht, tva = n.tva, ttc = n.ttc, est_payee = n.ttc - n.paye <= 0
+FROM (
+    SELECT c.code, COALESCE(h.ht, 0) AS ht,
+           ROUND(COALESCE(h.ht, 0) * %(taux)s, 2) AS tva,
+           ROUND(COALESCE(h.ht, 0) * (1 + %(taux)s), 2) AS ttc,
+           COALESCE(p.paye, 0) AS paye
+    FROM unnest(%(codes)s::varchar[]) AS c(code)
+    LEFT JOIN (
+        SELECT ef.code_facture_id, SUM(e.montant_estime) AS ht
+        FROM {etre_facture} AS ef JOIN {expedition} AS e ON e.numexp = ef.numexp_id
+        WHERE ef.code_facture_id = ANY(%(codes)s)
+        GROUP BY ef.code_facture_id
+    ) AS h ON h.code_facture_id = c.code
+    LEFT JOIN (
+        SELECT code_facture_id, SUM(montant_verse) AS paye
+        FROM {paiement}
+        WHERE code_facture_id = ANY(%(codes)s)
+        GROUP BY code_facture_id
+    ) AS p ON p.code_facture_id = c.code
+) AS n
+WHERE f.code_facture = n.code
+  AND (f.ht, f.tva, f.ttc, f.est_payee) IS DISTINCT FROM (n.ht, n.tva, n.ttc, n.ttc - n.paye <= 0)
+RETURNING f.code_facture, f.ttc
+"""
+
+
+def _sql_postgres():
+    noms = {
+        nom: connection.ops.quote_name(modele._meta.db_table)
+        for nom, modele in (('facture', Facture), ('etre_facture', EtreFacture), ('paiement', Paiement),
+                            ('expedition', EtreFacture._meta.get_field('numexp').related_model))
+    }
+    return SQL_POSTGRES.format(**noms)
+
+
+def _mettre_a_jour_postgres(anciens):
+    """{code: nouveau TTC} des factures de la tranche modifiées par l'UPDATE ... FROM."""
+    with connection.cursor() as cursor:
+        cursor.execute(_sql_postgres(), {'codes': list(anciens), 'taux': Facture.TAUX_TVA})
+        return dict(cursor.fetchall())
+
+
+def _mettre_a_jour(anciens):
+    """Même calcul que _mettre_a_jour_postgres, en deux agrégations et un bulk_update."""
+    codes = list(anciens)
+    hts = dict(
+        EtreFacture.objects.filter(code_facture__in=codes).order_by()
+        .values_list('code_facture').annotate(ht=Sum('numexp__montant_estime'))
+    )
+    payes = dict(
+        Paiement.objects.filter(code_facture__in=codes).order_by()
+        .values_list('code_facture').annotate(paye=Sum('montant_verse'))
+    )
+    modifiees = []
+    for code, (_, ht, tva, ttc, est_payee) in anciens.items():
+        nouveau_ht = arrondir(hts.get(code))
+        nouvelle = Facture(
+            code_facture=code, ht=nouveau_ht, tva=arrondir(nouveau_ht * Facture.TAUX_TVA),
+            ttc=arrondir(nouveau_ht * (1 + Facture.TAUX_TVA)),
+        )
+        nouvelle.est_payee = nouvelle.ttc - (payes.get(code) or ZERO) <= ZERO
+        if (nouvelle.ht, nouvelle.tva, nouvelle.ttc, nouvelle.est_payee) != (ht, tva, ttc, est_payee):
+            modifiees.append(nouvelle)
+    Facture.objects.bulk_update(modifiees, ['ht', 'tva', 'ttc', 'est_payee'])
+    return {facture.code_facture: facture.ttc for facture in modifiees}
+
+
+def recalculer(factures=None, taille_lot=TAILLE_LOT, rappel=None):
+    """
+    Recalcule les factures de `factures` (QuerySet, toutes par défaut).
+    `rappel(traitees, modifiees)` est appelé après chaque tranche. Renvoie
+    le bilan : factures traitées, modifiées et écritures au grand livre.
+    Les factures archivées (expeditions/archivage.py) ont des montants figés
+    et sont écartées.
+    """
+    if factures is None:
+        factures = Facture.objects.all()
+    factures = factures.exclude(factures_archivees()).order_by('code_facture')
+    mettre_a_jour = _mettre_a_jour_postgres if connection.vendor == 'postgresql' else _mettre_a_jour
+    bilan = {'factures': 0, 'modifiees': 0, 'ecritures': 0}
+    dernier = None
+    while True:
+        tranche = factures if dernier is None else factures.filter(code_facture__gt=dernier)
+        with transaction.atomic():
+            anciens = {
+                code: valeurs for code, *valeurs in
+                tranche.select_for_update(of=('self',))
+                .values_list('code_facture', 'code_client', 'ht', 'tva', 'ttc', 'est_payee')[:taille_lot]
+            }
+            if not anciens:
+                break
+            nouveaux_ttc = mettre_a_jour(anciens)
+            bilan['ecritures'] += comptabiliser_lot(
+                [
+                    (anciens[code][0], arrondir(ttc) - arrondir(anciens[code][3]), f"FACT-{code}",
+                     f"Facture {code} recalculée : montant TTC {ttc} DA")
+                    for code, ttc in nouveaux_ttc.items()
+                ],
+                'FACTURE',
+            )
+        # Dernière clé dans l'ordre de la base (sa collation, pas celle de Python)
+        dernier = next(reversed(anciens))
+        bilan['factures'] += len(anciens)
+        bilan['modifiees'] += len(nouveaux_ttc)
+        if rappel:
+            rappel(bilan['factures'], bilan['modifiees'])
+    return bilan
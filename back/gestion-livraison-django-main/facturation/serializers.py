@@ -1,7 +1,25 @@
+from django.db.models import Count, DecimalField, OuterRef, Sum
 from rest_framework import serializers
+from config.champs import elaguer, sous_selection
+from config.sous_requetes import agregat
 from .models import Facture, Paiement, EtreFacture
 from expeditions.models import Expedition
 
+# Agrégats par facture posés par ?fields= (config/champs.py) : une sous-requête
+# par page au lieu de deux requêtes par facture
+ANNOTATIONS_FACTURE = {
+    'nb_expeditions_liees': agregat(EtreFacture.objects.filter(code_facture=OuterRef('pk')), 'code_facture',
+                                    Count('id')),
+    'total_paye': agregat(Paiement.objects.filter(code_facture=OuterRef('pk')), 'code_facture',
+                          Sum('montant_verse', output_field=DecimalField(max_digits=14, decimal_places=2))),
+}
+
+
+def _montant_paye(obj):
+    paye = getattr(obj, 'total_paye', None)
+    return obj.montant_paye() if paye is None else paye
+
+
 class FactureListSerializer(serializers.ModelSerializer):
     """Serializer simplifié pour la liste des factures (fields compatibles front)"""
     code_client = serializers.PrimaryKeyRelatedField(read_only=True)
@@ -9,6 +27,7 @@ class FactureListSerializer(serializers.ModelSerializer):
     client_prenom = serializers.CharField(source='code_client.Prenom', read_only=True)
     nb_expeditions = serializers.SerializerMethodField()
     montant_paye = serializers.SerializerMethodField()
+    montant_restant = serializers.SerializerMethodField()
     date_echeance = serializers.SerializerMethodField()
 
     class Meta:
@@ -18,25 +37,31 @@ class FactureListSerializer(serializers.ModelSerializer):
             'ht', 'tva', 'ttc', 'est_payee', 'nb_expeditions',
             'montant_paye', 'montant_restant', 'date_echeance', 'date_creation', 'remarques'
         ]
+        dependances = {
+            'nb_expeditions': ['nb_expeditions_liees'],
+            'montant_paye': ['total_paye'],
+            'montant_restant': ['ttc', 'total_paye'],
+            'date_echeance': ['date_f'],
+        }
+        annotations = ANNOTATIONS_FACTURE
+        expansions = {'code_client': 'clients.serializers.ClientSerializer'}
 
     def get_nb_expeditions(self, obj):
+        if hasattr(obj, 'nb_expeditions_liees'):
+            return obj.nb_expeditions_liees
         return obj.expeditions_facturees.count()
 
     def get_montant_paye(self, obj):
         try:
-            return float(obj.montant_paye())
+            return float(_montant_paye(obj))
         except Exception:
             return 0.0
     
     def get_montant_restant(self, obj):
         try:
-            return float(obj.reste_a_payer())
+            return float(obj.ttc - _montant_paye(obj))
         except Exception:
-            ttc = getattr(obj, 'ttc', 0) or 0
-            try:
-                return float(ttc) - float(obj.montant_paye())
-            except Exception:
-                return 0.0
+            return 0.0
 
     def get_date_echeance(self, obj):
         if obj.date_f:
@@ -58,11 +83,21 @@ class FactureDetailSerializer(serializers.ModelSerializer):
     class Meta:
         model = Facture
         fields = '__all__'
+        dependances = {
+            'expeditions': ['expeditions_facturees__numexp__code_client', 'expeditions_facturees__numexp__destination'],
+            'paiements': ['paiements'],
+            'montant_paye': ['total_paye'],
+            'montant_restant': ['ttc', 'total_paye'],
+            'date_echeance': ['date_f'],
+        }
+        annotations = ANNOTATIONS_FACTURE
+        expansions = {'code_client': 'clients.serializers.ClientSerializer'}
 
     def get_expeditions(self, obj):
         from expeditions.serializers import ExpeditionListSerializer
         expeditions = [ef.numexp for ef in obj.expeditions_facturees.all()]
-        return ExpeditionListSerializer(expeditions, many=True).data
+        # ?fields=expeditions.numexp,expeditions.statut : seuls ces champs sont calculés
+        return elaguer(ExpeditionListSerializer(expeditions, many=True), *sous_selection(self, 'expeditions')).data
 
     def get_paiements(self, obj):
         paiements = obj.paiements.all()
@@ -80,19 +115,15 @@ class FactureDetailSerializer(serializers.ModelSerializer):
 
     def get_montant_paye(self, obj):
         try:
-            return float(obj.montant_paye())
+            return float(_montant_paye(obj))
         except Exception:
             return 0.0
 
     def get_montant_restant(self, obj):
         try:
-            return float(obj.reste_a_payer())
+            return float(obj.ttc - _montant_paye(obj))
         except Exception:
-            ttc = getattr(obj, 'ttc', 0) or 0
-            try:
-                return float(ttc) - float(obj.montant_paye())
-            except Exception:
-                return 0.0
+            return 0.0
 
     def get_date_echeance(self, obj):
         if obj.date_f:
@@ -149,6 +180,7 @@ class PaiementListSerializer(serializers.ModelSerializer):
             'id', 'reference', 'date', 'montant_verse', 'mode_paiement',
             'mode_paiement_display', 'code_facture', 'date_creation', 'remarques'
         ]
+        dependances = {'reference': ['reference_p']}
     
     def get_reference(self, obj):
         """Formater la référence pour l'affichage"""
@@ -164,6 +196,7 @@ class PaiementDetailSerializer(serializers.ModelSerializer):
     class Meta:
         model = Paiement
         fields = '__all__'
+        dependances = {'reference': ['reference_p']}
     
     def get_reference(self, obj):
         return f"PAY-{obj.reference_p:05d}"
@@ -261,6 +294,14 @@ class EtreFactureSerializer(serializers.ModelSerializer):
     class Meta:
         model = EtreFacture
         fields = '__all__'
+        dependances = {
+            'expedition_info': ['numexp__numexp', 'numexp__montant_estime', 'numexp__statut'],
+            'facture_info': ['code_facture__code_facture', 'code_facture__ttc', 'code_facture__date_f'],
+        }
+        expansions = {
+            'numexp': 'expeditions.serializers.ExpeditionListSerializer',
+            'code_facture': 'facturation.serializers.FactureListSerializer',
+        }
 
     def get_expedition_info(self, obj):
         return {
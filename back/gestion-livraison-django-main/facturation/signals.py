@@ -0,0 +1,109 @@
+"""
+Écritures du grand livre client (clients/grand_livre.py) à chaque
+mouvement de facture ou de paiement. Avant l'enregistrement, la ligne en
+base est relue et verrouillée : seul l'écart avec ce qui était réellement
+stocké est comptabilisé, même si deux requêtes modifient la même facture.
+Facture.save() et Paiement.save() sont atomiques, l'écriture part avec la
+ligne modifiée.
+"""
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from clients.grand_livre import ZERO, arrondir, comptabiliser
+
+from .models import Facture, Paiement
+
+# update_fields sans montant ni client (ex. est_payee) : rien à comptabiliser
+IGNORE = object()
+
+
+def _client_facture(facture_id):
+    return Facture.objects.filter(pk=facture_id).values_list('code_client_id', flat=True).first()
+
+
+def _relire(modele, instance, champs, update_fields=None):
+    if update_fields is not None and not {champ.split('__')[0] for champ in champs} & set(update_fields):
+        return IGNORE
+    if instance._state.adding:
+        return None
+    return modele.objects.select_for_update().filter(pk=instance.pk).values_list(*champs).first()
+
+
+# --- Factures ---
+
+@receiver(pre_save, sender=Facture)
+def relire_facture(sender, instance, update_fields=None, **kwargs):
+    instance._comptabilise = _relire(Facture, instance, ('code_client', 'ttc'), update_fields)
+
+
+@receiver(post_save, sender=Facture)
+def comptabiliser_facture(sender, instance, created, **kwargs):
+    if instance._comptabilise is IGNORE:
+        return
+    ancien_client, ancien_ttc = instance._comptabilise or (None, ZERO)
+    ttc = arrondir(instance.ttc)
+    reference = f"FACT-{instance.code_facture}"
+    if ancien_client == instance.code_client_id:
+        comptabiliser(instance.code_client_id, ttc - arrondir(ancien_ttc), 'FACTURE', reference,
+                      f"Facture {instance.code_facture} : montant TTC {ttc} DA")
+    else:
+        # Facture réattribuée : elle quitte l'ancien compte avec ses paiements
+        deja_paye = ZERO if created else instance.montant_paye()
+        comptabiliser(ancien_client, deja_paye - arrondir(ancien_ttc), 'FACTURE', reference,
+                      f"Facture {instance.code_facture} transférée à un autre client")
+        comptabiliser(instance.code_client_id, ttc - deja_paye, 'FACTURE', reference,
+                      f"Facture {instance.code_facture} : montant TTC {ttc} DA")
+
+
+@receiver(pre_delete, sender=Facture)
+def relire_facture_supprimee(sender, instance, **kwargs):
+    instance._comptabilise = _relire(Facture, instance, ('code_client', 'ttc'))
+
+
+@receiver(post_delete, sender=Facture)
+def annuler_facture(sender, instance, **kwargs):
+    # Les paiements, supprimés en cascade juste avant, ont déjà été contre-passés
+    if instance._comptabilise:
+        client, ttc = instance._comptabilise
+        comptabiliser(client, -arrondir(ttc), 'FACTURE', f"FACT-{instance.code_facture}",
+                      f"Facture {instance.code_facture} supprimée")
+
+
+# --- Paiements ---
+
+@receiver(pre_save, sender=Paiement)
+def relire_paiement(sender, instance, update_fields=None, **kwargs):
+    instance._comptabilise = _relire(Paiement, instance, ('code_facture', 'montant_verse'), update_fields)
+
+
+@receiver(post_save, sender=Paiement)
+def comptabiliser_paiement(sender, instance, created, **kwargs):
+    if instance._comptabilise is IGNORE:
+        return
+    reference = f"PAIE-{instance.reference_p}"
+    montant = arrondir(instance.montant_verse)
+    ancien = instance._comptabilise
+    client = _client_facture(instance.code_facture_id)
+    if ancien and ancien[0] == instance.code_facture_id:
+        comptabiliser(client, arrondir(ancien[1]) - montant, 'PAIEMENT', reference,
+                      f"Paiement {instance.reference_p} corrigé : {montant} DA")
+    else:
+        if ancien:
+            comptabiliser(_client_facture(ancien[0]), arrondir(ancien[1]), 'PAIEMENT', reference,
+                          f"Paiement {instance.reference_p} réaffecté à une autre facture")
+        comptabiliser(client, -montant, 'PAIEMENT', reference,
+                      f"Paiement {instance.reference_p} ({instance.get_mode_paiement_display()}) "
+                      f"sur facture {instance.code_facture_id}")
+
+
+@receiver(pre_delete, sender=Paiement)
+def relire_paiement_supprime(sender, instance, **kwargs):
+    instance._comptabilise = _relire(Paiement, instance, ('code_facture__code_client', 'montant_verse'))
+
+
+@receiver(post_delete, sender=Paiement)
+def annuler_paiement(sender, instance, **kwargs):
+    if instance._comptabilise:
+        client, montant = instance._comptabilise
+        comptabiliser(client, arrondir(montant), 'PAIEMENT', f"PAIE-{instance.reference_p}",
+                      f"Paiement {instance.reference_p} supprimé")
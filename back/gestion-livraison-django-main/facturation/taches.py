@@ -0,0 +1,16 @@
+from taches.registre import tache
+
+from . import recalcul
+from .models import Facture
+
+
+@tache('facturation.recalculer_montants', api=True)
+def recalculer_montants(suivi, codes=None):
+    """Recalcule HT, TVA, TTC et est_payee des factures (toutes, ou celles de `codes`)."""
+    factures = Facture.objects.all()
+    if codes:
+        factures = factures.filter(code_facture__in=codes)
+    total = len(codes) if codes else factures.count()
+    return recalcul.recalculer(
+        factures, rappel=lambda fait, modifiees: suivi.avancer(fait, total, f"{fait}/{total} factures"),
+    )
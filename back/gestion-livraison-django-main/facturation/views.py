@@ -8,6 +8,7 @@ from django.db.models.functions import TruncMonth
 from django.utils import timezone
 from decimal import Decimal
 from rest_framework.permissions import AllowAny
+from config.champs import ChampsDynamiquesMixin
 import traceback
 import sys
 
@@ -40,19 +41,47 @@ def _month_range(months):
     return start, end, month_starts
 
 
+def _parse_months(request):
+    try:
+        months = int(request.GET.get('months', 12))
+    except ValueError:
+        months = 12
+    return max(1, months)
+
+
+def _serie_chiffre_affaires(totals, month_starts):
+    """Construit la série mensuelle du CA TTC avec le taux d'évolution."""
+    data = []
+    prev_total = None
+    for month_start in month_starts:
+        key = month_start.strftime('%Y-%m')
+        total = totals.get(key, Decimal('0.00'))
+        if prev_total in (None, Decimal('0.00')):
+            evolution = None
+        else:
+            evolution = round(((total - prev_total) / prev_total) * 100, 2)
+        data.append({
+            'month': key,
+            'total_ttc': float(total),
+            'evolution_percent': float(evolution) if evolution is not None else None,
+        })
+        prev_total = total
+    return data
+
+
 # --------- FactureViewSet ---------
 
-class FactureViewSet(viewsets.ModelViewSet):
+class FactureViewSet(ChampsDynamiquesMixin, viewsets.ModelViewSet):
     """
     ViewSet pour gérer les factures.
     """
     permission_classes = [AllowAny]
-    queryset = Facture.objects.all()
+    queryset = Facture.objects.select_related('code_client').all()
     lookup_field = 'code_facture'
     lookup_url_kwarg = 'code_facture'
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     filterset_fields = ['code_client', 'est_payee', 'date_f']
-    search_fields = ['code_facture', 'remarques', 'code_client__nom']
+    search_fields = ['code_facture', 'remarques', 'code_client__Nom']
     ordering_fields = ['date_f', 'ttc', 'date_creation']
     ordering = ['-date_f']
 
@@ -107,12 +136,7 @@ class FactureViewSet(viewsets.ModelViewSet):
     # Evolution du CA
     @action(detail=False, methods=['get'])
     def evolution_chiffre_affaires(self, request):
-        try:
-            months = int(request.query_params.get('months', 12))
-        except ValueError:
-            months = 12
-        months = max(1, months)
-
+        months = _parse_months(request)
         start, end, month_starts = _month_range(months)
         grouped = (
             self.queryset.filter(date_f__gte=start.date(), date_f__lt=end.date())
@@ -122,24 +146,7 @@ class FactureViewSet(viewsets.ModelViewSet):
             .order_by('month')
         )
         totals = {item['month'].strftime('%Y-%m'): item['total'] or Decimal('0.00') for item in grouped}
-
-        data = []
-        prev_total = None
-        for month_start in month_starts:
-            key = month_start.strftime('%Y-%m')
-            total = totals.get(key, Decimal('0.00'))
-            if prev_total in (None, Decimal('0.00')):
-                evolution = None
-            else:
-                evolution = round(((total - prev_total) / prev_total) * 100, 2)
-            data.append({
-                'month': key,
-                'total_ttc': float(total),
-                'evolution_percent': float(evolution) if evolution is not None else None,
-            })
-            prev_total = total
-
-        return Response({'months': months, 'data': data})
+        return Response({'months': months, 'data': _serie_chiffre_affaires(totals, month_starts)})
 
     # Factures impayées
     @action(detail=False, methods=['get'])
@@ -174,7 +181,7 @@ class FactureViewSet(viewsets.ModelViewSet):
 
 # --------- PaiementViewSet ---------
 
-class PaiementViewSet(viewsets.ModelViewSet):
+class PaiementViewSet(ChampsDynamiquesMixin, viewsets.ModelViewSet):
     queryset = Paiement.objects.select_related('code_facture').all()
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     permission_classes = [AllowAny]
@@ -239,7 +246,7 @@ class PaiementViewSet(viewsets.ModelViewSet):
 
 # --------- EtreFactureViewSet ---------
 
-class EtreFactureViewSet(viewsets.ModelViewSet):
+class EtreFactureViewSet(ChampsDynamiquesMixin, viewsets.ModelViewSet):
     queryset = EtreFacture.objects.select_related('numexp', 'code_facture').all()
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['numexp', 'code_facture']
@@ -1,4 +1,5 @@
 from rest_framework import viewsets , permissions
+from config.champs import ChampsDynamiquesMixin
 from .models import Chauffeur, Vehicule, Destination, Tarification, Tournee , Expedition
 
 from .serializers import (
@@ -6,33 +7,33 @@ from .serializers import (
     DestinationSerializer, TarificationSerializer, TourneeSerializer , ExpeditionSerializer
 )
 
-class ChauffeurViewSet(viewsets.ModelViewSet):
+class ChauffeurViewSet(ChampsDynamiquesMixin, viewsets.ModelViewSet):
     queryset = Chauffeur.objects.all()
     serializer_class = ChauffeurSerializer
     permission_classes = [permissions.IsAuthenticated]
 
-class VehiculeViewSet(viewsets.ModelViewSet):
+class VehiculeViewSet(ChampsDynamiquesMixin, viewsets.ModelViewSet):
     queryset = Vehicule.objects.all()
     serializer_class = VehiculeSerializer
     permission_classes = [permissions.IsAuthenticated]
 
-class DestinationViewSet(viewsets.ModelViewSet):
+class DestinationViewSet(ChampsDynamiquesMixin, viewsets.ModelViewSet):
     queryset = Destination.objects.all()
     serializer_class = DestinationSerializer
     permission_classes = [permissions.IsAuthenticated]
 
-class TarificationViewSet(viewsets.ModelViewSet):
+class TarificationViewSet(ChampsDynamiquesMixin, viewsets.ModelViewSet):
     queryset = Tarification.objects.all()
     serializer_class = TarificationSerializer
     permission_classes = [permissions.IsAuthenticated]
 
-class TourneeViewSet(viewsets.ModelViewSet):
+class TourneeViewSet(ChampsDynamiquesMixin, viewsets.ModelViewSet):
   
     queryset = Tournee.objects.all()
     serializer_class = TourneeSerializer
     permission_classes = [permissions.IsAuthenticated]
 
-class ExpeditionViewSet(viewsets.ModelViewSet):
+class ExpeditionViewSet(ChampsDynamiquesMixin, viewsets.ModelViewSet):
     queryset = Expedition.objects.all()
     serializer_class = ExpeditionSerializer
     permission_classes = [permissions.IsAuthenticated]
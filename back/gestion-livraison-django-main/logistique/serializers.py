@@ -14,6 +14,7 @@ class TarificationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Tarification
         fields = '__all__'
+        expansions = {'destination': 'logistique.serializers.DestinationSerializer'}
 
 class ChauffeurSerializer(serializers.ModelSerializer):
     class Meta:
@@ -51,4 +52,9 @@ class TourneeSerializer(serializers.ModelSerializer):
     class Meta:
          model = Tournee
          fields = '__all__'
+         # ?expand= (config/champs.py) : objets complets au lieu des identifiants
+         expansions = {
+             'chauffeur': 'logistique.serializers.ChauffeurSerializer',
+             'vehicule': 'logistique.serializers.VehiculeSerializer',
+         }
 
@@ -0,0 +1,10 @@
+from django.contrib import admin
+from .models import RequeteCapturee
+
+
+@admin.register(RequeteCapturee)
+class RequeteCaptureeAdmin(admin.ModelAdmin):
+    list_display = ['empreinte', 'nb_executions', 'duree_totale_ms', 'duree_max_ms', 'site_appel', 'derniere_vue']
+    search_fields = ['sql', 'site_appel', 'chemin']
+    readonly_fields = [f.name for f in RequeteCapturee._meta.fields]
+    ordering = ['-duree_totale_ms']
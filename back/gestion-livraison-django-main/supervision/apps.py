@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class SupervisionConfig(AppConfig):
+    name = 'supervision'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from .instrumentation import brancher_connexion
+
+        connection_created.connect(brancher_connexion, dispatch_uid='supervision_instrumentation_sql')
@@ -0,0 +1,269 @@
+"""
+Contrôle de cohérence des valeurs dénormalisées (audit de nuit).
+
+Invariants vérifiés, dans cet ordre (réparer l'un peut décaler le suivant) :
+- expeditions : montant_estime = tarif de base + poids × tarif poids +
+  volume × tarif volume de sa tarification, NULL sans tarification ;
+- factures : HT = somme des expéditions liées, TVA et TTC arrondis au
+  centime, est_payee = TTC - paiements <= 0 (règles de facturation/recalcul.py),
+  hors factures archivées (expeditions/archivage.py) ;
+- soldes : Client.Solde = TTC facturé - montants versés + ajustements
+  saisis (grand_livre.solde_attendu) ;
+- chauffeurs : statut_dispo faux si et seulement si le chauffeur a une
+  tournée EN_COURS.
+
+Chaque table est découpée en tranches de TAILLE_TRANCHE clés, vérifiées en
+parallèle par un pool de processus lancés par spawn (un fork copierait
+les threads et connexions du worker de tâches). Une tranche coûte un comptage et une
+requête filtrée sur des sous-requêtes agrégées : aucune ligne saine ne
+remonte jusqu'à Python. Avec `reparer`, les lignes en écart d'une tranche
+sont verrouillées, recalculées puis corrigées par lots : les factures par
+recalcul.recalculer(), les soldes par des écritures de rapprochement au grand livre.
+"""
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.db import connections, transaction
+from django.db.models import Case, DecimalField, Exists, F, OuterRef, Q, Sum, Value, When
+from django.db.models.functions import Round
+
+from clients.grand_livre import arrondir, comptabiliser_lot, solde_attendu
+from clients.models import Client
+from config.sous_requetes import agregat
+from expeditions.archivage import factures_archivees
+from expeditions.models import Expedition
+from facturation import recalcul
+from facturation.models import EtreFacture, Facture, Paiement
+from logistique.models import Chauffeur, Tournee
+
+TAILLE_TRANCHE = 50000
+PROCESSUS = min(4, os.cpu_count() or 1)
+EXEMPLES = 20
+MONTANT = DecimalField(max_digits=14, decimal_places=2)
+
+
+class Invariant:
+    """
+    `ecarts(filtre)` : QuerySet values() des lignes en écart, `filtre(champ)`
+    étant le Q qui restreint `champ` à la tranche. `corriger(lignes)` répare
+    ces lignes et renvoie le nombre de lignes corrigées.
+    """
+
+    def __init__(self, nom, libelle, modele, ecarts, corriger):
+        self.nom = nom
+        self.libelle = libelle
+        self.modele = modele
+        self.cle = modele._meta.pk.attname
+        self.ecarts = ecarts
+        self.corriger = corriger
+
+    def reparer(self, filtre):
+        with transaction.atomic():
+            # Verrouiller d'abord, recalculer ensuite : l'écart est relu sur les valeurs à jour
+            cles = list(
+                self.modele.objects.select_for_update()
+                .filter(pk__in=self.ecarts(filtre).values(self.cle)).order_by('pk')
+                .values_list('pk', flat=True)
+            )
+            if not cles:
+                return 0
+            return self.corriger(list(self.ecarts(lambda champ: Q(**{f'{champ}__in': cles}))))
+
+
+# --- Expéditions ---
+
+def _ecarts_expeditions(filtre):
+    attendu = Case(
+        When(tarification__isnull=True, then=Value(None)),
+        default=Round(
+            F('tarification__tarif_base_destination') + F('poids') * F('tarification__tarif_poids')
+            + F('volume') * F('tarification__tarif_volume'),
+            2,
+        ),
+        output_field=MONTANT,
+    )
+    return (
+        Expedition.objects.filter(filtre('numexp')).annotate(attendu=attendu)
+        .filter(
+            Q(tarification__isnull=True, montant_estime__isnull=False)
+            | Q(tarification__isnull=False, montant_estime__isnull=True)
+            | Q(tarification__isnull=False, montant_estime__isnull=False) & ~Q(montant_estime=F('attendu'))
+        )
+        .order_by('numexp').values('numexp', 'montant_estime', 'attendu')
+    )
+
+
+def _corriger_expeditions(lignes):
+    Expedition.objects.bulk_update(
+        [Expedition(numexp=ligne['numexp'], montant_estime=ligne['attendu']) for ligne in lignes],
+        ['montant_estime'],
+    )
+    return len(lignes)
+
+
+# --- Factures ---
+
+def _ecarts_factures(filtre):
+    ht = Round(agregat(EtreFacture.objects.filter(code_facture=OuterRef('pk')), 'code_facture',
+                       Sum('numexp__montant_estime', output_field=MONTANT)), 2, output_field=MONTANT)
+    paye = agregat(Paiement.objects.filter(code_facture=OuterRef('pk')), 'code_facture',
+                   Sum('montant_verse', output_field=MONTANT))
+    return (
+        Facture.objects.filter(filtre('code_facture')).exclude(factures_archivees())
+        .annotate(ht_attendu=ht, paye=paye)
+        .annotate(
+            tva_attendue=Round(F('ht_attendu') * Facture.TAUX_TVA, 2, output_field=MONTANT),
+            ttc_attendu=Round(F('ht_attendu') * (1 + Facture.TAUX_TVA), 2, output_field=MONTANT),
+        )
+        .annotate(reste=Round(F('ttc_attendu') - F('paye'), 2, output_field=MONTANT))
+        .filter(
+            ~Q(ht=F('ht_attendu')) | ~Q(tva=F('tva_attendue')) | ~Q(ttc=F('ttc_attendu'))
+            | Q(est_payee=True, reste__gt=0) | Q(est_payee=False, reste__lte=0)
+        )
+        .order_by('code_facture')
+        .values('code_facture', 'ht', 'ht_attendu', 'tva', 'tva_attendue', 'ttc', 'ttc_attendu', 'est_payee', 'reste')
+    )
+
+
+def _corriger_factures(lignes):
+    bilan = recalcul.recalculer(Facture.objects.filter(pk__in=[ligne['code_facture'] for ligne in lignes]))
+    return bilan['modifiees']
+
+
+# --- Soldes clients ---
+
+def _ecarts_soldes(filtre):
+    return (
+        Client.objects.filter(filtre('CodeClient'))
+        .annotate(attendu=Round(solde_attendu(), 2, output_field=MONTANT))
+        .filter(~Q(Solde=F('attendu')))
+        .order_by('CodeClient').values('CodeClient', 'Solde', 'attendu')
+    )
+
+
+def _corriger_soldes(lignes):
+    return comptabiliser_lot(
+        [(ligne['CodeClient'], arrondir(ligne['attendu'] - ligne['Solde']), '', "Contrôle de cohérence")
+         for ligne in lignes],
+        'RAPPROCHEMENT',
+    )
+
+
+# --- Chauffeurs ---
+
+def _en_mission():
+    return Exists(Tournee.objects.filter(chauffeur=OuterRef('pk'), statut='EN_COURS'))
+
+
+def _ecarts_chauffeurs(filtre):
+    return (
+        Chauffeur.objects.filter(filtre('code_chauffeur')).annotate(en_mission=_en_mission())
+        .filter(Q(statut_dispo=True, en_mission=True) | Q(statut_dispo=False, en_mission=False))
+        .order_by('code_chauffeur').values('code_chauffeur', 'statut_dispo', 'en_mission')
+    )
+
+
+def _corriger_chauffeurs(lignes):
+    return Chauffeur.objects.filter(pk__in=[ligne['code_chauffeur'] for ligne in lignes]).update(
+        statut_dispo=~_en_mission(),
+    )
+
+
+INVARIANTS = {
+    invariant.nom: invariant for invariant in [
+        Invariant('expeditions', "Montant estimé des expéditions", Expedition,
+                  _ecarts_expeditions, _corriger_expeditions),
+        Invariant('factures', "Montants et statut de paiement des factures", Facture,
+                  _ecarts_factures, _corriger_factures),
+        Invariant('soldes', "Soldes clients (grand livre)", Client, _ecarts_soldes, _corriger_soldes),
+        Invariant('chauffeurs', "Disponibilité des chauffeurs", Chauffeur, _ecarts_chauffeurs, _corriger_chauffeurs),
+    ]
+}
+
+
+def tranches(modele, taille=TAILLE_TRANCHE):
+    """[(début exclu, fin incluse)] couvrant la table par tranches de `taille` clés (None : non borné)."""
+    cles = modele.objects.order_by('pk').values_list('pk', flat=True)
+    bornes = []
+    debut = None
+    while True:
+        suite = cles if debut is None else cles.filter(pk__gt=debut)
+        fin = next(iter(suite[taille - 1:taille]), None)
+        bornes.append((debut, fin))
+        if fin is None:
+            return bornes
+        debut = fin
+
+
+def _plage(debut, fin):
+    def filtre(champ):
+        q = Q()
+        if debut is not None:
+            q &= Q(**{f'{champ}__gt': debut})
+        if fin is not None:
+            q &= Q(**{f'{champ}__lte': fin})
+        return q
+    return filtre
+
+
+def verifier_tranche(nom, debut, fin, reparer=False):
+    """Vérifie (et répare) une tranche d'un invariant. Exécuté dans les processus du pool."""
+    invariant = INVARIANTS[nom]
+    filtre = _plage(debut, fin)
+    ecarts = invariant.ecarts(filtre)
+    resultat = {
+        'lignes': invariant.modele.objects.filter(filtre(invariant.cle)).count(),
+        'ecarts': ecarts.count(),
+        'repares': 0,
+    }
+    resultat['exemples'] = list(ecarts[:EXEMPLES]) if resultat['ecarts'] else []
+    if reparer and resultat['ecarts']:
+        resultat['repares'] = invariant.reparer(filtre)
+    return resultat
+
+
+def _verifier_dans_pool(*arguments):
+    try:
+        return verifier_tranche(*arguments)
+    finally:
+        connections.close_all()
+
+
+def verifier(noms=None, reparer=False, processus=PROCESSUS, taille=TAILLE_TRANCHE, rappel=None):
+    """
+    Rapport d'écarts des invariants `noms` (tous par défaut) :
+    {nom: {libelle, lignes, ecarts, repares, exemples, duree}}.
+    `rappel(faites, total)` est appelé à chaque tranche terminée.
+    """
+    rapport = {}
+    for nom in noms or INVARIANTS:
+        invariant = INVARIANTS[nom]
+        debut = time.perf_counter()
+        bornes = tranches(invariant.modele, taille)
+        total = {'libelle': invariant.libelle, 'lignes': 0, 'ecarts': 0, 'repares': 0, 'exemples': []}
+
+        def cumuler(resultat, faites):
+            for champ in ('lignes', 'ecarts', 'repares'):
+                total[champ] += resultat[champ]
+            total['exemples'].extend(resultat['exemples'][:EXEMPLES - len(total['exemples'])])
+            if rappel:
+                rappel(faites, len(bornes))
+
+        if processus <= 1 or len(bornes) == 1:
+            for faites, (bas, haut) in enumerate(bornes, start=1):
+                cumuler(verifier_tranche(nom, bas, haut, reparer), faites)
+        else:
+            # spawn : processus neufs, sans les threads ni les connexions du parent
+            with ProcessPoolExecutor(min(processus, len(bornes)), mp_context=multiprocessing.get_context('spawn'),
+                                     initializer=django.setup) as pool:
+                travaux = [pool.submit(_verifier_dans_pool, nom, bas, haut, reparer) for bas, haut in bornes]
+                for faites, travail in enumerate(as_completed(travaux), start=1):
+                    cumuler(travail.result(), faites)
+
+        total['exemples'].sort(key=lambda ligne: ligne[invariant.cle])
+        total['duree'] = round(time.perf_counter() - debut, 2)
+        rapport[nom] = total
+    return rapport
@@ -0,0 +1,353 @@
+"""
+Index advisor : propose des index composites et partiels à partir de la
+charge SQL réelle, estime leur gain et écrit les migrations.
+
+1. Charge : les formes SQL cumulées dans RequeteCapturee par le middleware
+   d'instrumentation (SQL_INSTRUMENTATION['ECHANTILLONNAGE'] > 0, avec leurs
+   paramètres), ou pg_stat_statements (toutes les requêtes, sans paramètres).
+2. Candidats : dans chaque requête, les prédicats sur les colonnes d'une
+   table (Django qualifie toujours "table"."colonne") :
+   - égalités et IN d'abord, puis une plage ou les colonnes du ORDER BY :
+     index composite (au plus MAX_COLONNES colonnes) ;
+   - booléens, NOT IN sur une liste de choix, IS NULL : condition d'un
+     index partiel (factures impayées, incidents ouverts...).
+   Un candidat déjà couvert par un index existant est écarté.
+3. Gain : avec l'extension hypopg, chaque candidat est créé en index
+   hypothétique et les requêtes de la charge sur sa table sont rejouées
+   sous EXPLAIN (sans exécution) ; gain = baisse du coût estimé pondérée par
+   le nombre d'exécutions. Sans hypopg, les candidats sont listés sans
+   estimation.
+4. Migrations : AddIndexConcurrently (migration atomic = False) ; sur une
+   table partitionnée, config.partitions.creer_index_concurrent().
+"""
+import hashlib
+import json
+import os
+import re
+from collections import namedtuple
+from datetime import datetime
+
+import django
+from django.apps import apps
+from django.db import DatabaseError, connection, models, transaction
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.writer import MigrationWriter
+
+from config.partitions import est_partitionnee
+
+from .models import RequeteCapturee
+
+SEUIL_GAIN = 0.10
+MAX_COLONNES = 3
+LIMITE_CHARGE = 200
+
+Requete = namedtuple('Requete', 'sql params executions source')
+
+_RE_PREDICAT = re.compile(
+    r'(?P<non>NOT \(?)?"(?P<table>\w+)"\."(?P<colonne>\w+)"'
+    r'(?:\s*(?P<op>=|<=|>=|<|>|IN|IS NOT NULL|IS NULL)\s*(?P<valeur>\((?:\s*(?:%s|\$\d+)\s*,?)+\)|%s|\$\d+)?)?'
+    r'(?=\s*(?:\)|AND\b|OR\b|ORDER\b|GROUP\b|LIMIT\b|$))?'
+)
+_RE_WHERE = re.compile(r'\bWHERE\b(.*?)(?=\bGROUP BY\b|\bORDER BY\b|\bLIMIT\b|\bHAVING\b|$)', re.S)
+_RE_ORDER = re.compile(r'\bORDER BY\b(.*?)(?=\bLIMIT\b|\bOFFSET\b|\bFOR UPDATE\b|\)|$)', re.S)
+_RE_TRI = re.compile(r'"(\w+)"\."(\w+)"( DESC)?')
+_RE_PARAM = re.compile(r'%s|\$\d+')
+
+
+# --- Charge ---
+
+def charge_capturee(min_executions=1, limite=LIMITE_CHARGE):
+    return [
+        Requete(r.sql, r.params, r.nb_executions, 'captures')
+        for r in RequeteCapturee.objects.filter(nb_executions__gte=min_executions)
+        .order_by('-duree_totale_ms')[:limite]
+    ]
+
+
+def charge_pg_stat_statements(min_executions=1, limite=LIMITE_CHARGE):
+    """Requêtes de pg_stat_statements sur la base courante ([] si l'extension est absente)."""
+    if connection.vendor != 'postgresql':
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_stat_statements'")
+        if cursor.fetchone() is None:
+            return []
+        cursor.execute(
+            "SELECT query, calls FROM pg_stat_statements "
+            "WHERE dbid = (SELECT oid FROM pg_database WHERE datname = current_database()) "
+            "AND calls >= %s AND query ~* '^\\s*(SELECT|UPDATE|DELETE)' "
+            "ORDER BY total_exec_time DESC LIMIT %s",
+            [min_executions, limite],
+        )
+        return [Requete(sql, None, appels, 'pg_stat_statements') for sql, appels in cursor.fetchall()]
+
+
+# --- Candidats ---
+
+class Candidat:
+    def __init__(self, modele, colonnes, condition):
+        self.modele = modele
+        self.colonnes = colonnes      # noms de champs, '-' pour un tri décroissant
+        self.condition = condition    # Q ou None
+        self.requetes = []
+        self.gain = None              # part du coût pondéré économisée (0 à 1), None sans estimation
+        self.cout_avant = self.cout_apres = None
+
+    @property
+    def cle(self):
+        return (self.modele._meta.label_lower, tuple(self.colonnes), repr(self.condition))
+
+    @property
+    def index(self):
+        empreinte = hashlib.sha1(repr(self.cle).encode()).hexdigest()[:6]
+        # 22 + '_' + 6 + 'p' : 30 caractères au plus, limite de Django pour Index.name (models.E034)
+        nom = f"{self.modele._meta.db_table[:12]}_{'_'.join(c.lstrip('-')[:6] for c in self.colonnes)}"[:22]
+        return models.Index(fields=self.colonnes, condition=self.condition,
+                            name=f"{nom}_{empreinte}{'p' if self.condition else ''}")
+
+    def __str__(self):
+        condition = f" WHERE {_lisible(self.condition)}" if self.condition else ''
+        return f"{self.modele._meta.label}({', '.join(self.colonnes)}){condition}"
+
+
+def _lisible(q):
+    termes = [_lisible(t) if isinstance(t, models.Q) else f"{t[0]}={t[1]!r}" for t in q.children]
+    texte = f" {q.connector} ".join(termes)
+    return f"NOT ({texte})" if q.negated else texte
+
+
+def _tables():
+    return {modele._meta.db_table: modele for modele in apps.get_models()}
+
+
+def _valeurs(sql, debut, fin, params):
+    """Paramètres liés aux marqueurs de sql[debut:fin], None s'ils sont inconnus."""
+    if params is None:
+        return None
+    rang = len(_RE_PARAM.findall(sql[:debut]))
+    return list(params[rang:rang + len(_RE_PARAM.findall(sql[debut:fin]))])
+
+
+def _predicats(requete, tables):
+    """{table: {'egalites': [champ], 'plages': [champ], 'conditions': [Q]}} des WHERE de la requête."""
+    trouves = {}
+    for where in _RE_WHERE.finditer(requete.sql):
+        for predicat in _RE_PREDICAT.finditer(requete.sql, where.start(1), where.end(1)):
+            modele = tables.get(predicat['table'])
+            champ = modele and next(
+                (f for f in modele._meta.concrete_fields if f.column == predicat['colonne']), None
+            )
+            if champ is None:
+                continue
+            par_table = trouves.setdefault(modele, {'egalites': [], 'plages': [], 'conditions': []})
+            op, non = predicat['op'], bool(predicat['non'])
+            valeurs = _valeurs(requete.sql, predicat.start(), predicat.end(), requete.params)
+            if op is None:
+                if isinstance(champ, models.BooleanField):
+                    par_table['conditions'].append(models.Q(**{champ.name: not non}))
+            elif op in ('IS NULL', 'IS NOT NULL'):
+                par_table['conditions'].append(models.Q(**{f'{champ.name}__isnull': (op == 'IS NULL') != non}))
+            elif op == 'IN' and champ.choices and valeurs and len(valeurs) > 1:
+                q = models.Q(**{f'{champ.name}__in': valeurs})
+                par_table['conditions'].append(~q if non else q)
+            elif op in ('=', 'IN') and not non:
+                if isinstance(champ, models.BooleanField) and valeurs and len(valeurs) == 1:
+                    par_table['conditions'].append(models.Q(**{champ.name: valeurs[0]}))
+                elif champ.name not in par_table['egalites']:
+                    par_table['egalites'].append(champ.name)
+            elif op in ('<', '<=', '>', '>=') and champ.name not in par_table['plages']:
+                par_table['plages'].append(champ.name)
+    return trouves
+
+
+def _tri(requete, tables):
+    """{modele: [champ ou -champ]} du dernier ORDER BY de la requête."""
+    ordres = _RE_ORDER.findall(requete.sql)
+    tri = {}
+    for table, colonne, desc in _RE_TRI.findall(ordres[-1] if ordres else ''):
+        modele = tables.get(table)
+        champ = modele and next((f for f in modele._meta.concrete_fields if f.column == colonne), None)
+        if champ is not None:
+            tri.setdefault(modele, []).append(f"{'-' if desc else ''}{champ.name}")
+    return tri
+
+
+def _index_existants(modele):
+    """[[colonnes]] des index non partiels existants (clé primaire comprise)."""
+    with connection.cursor() as cursor:
+        contraintes = connection.introspection.get_constraints(cursor, modele._meta.db_table)
+    return [c['columns'] for c in contraintes.values() if (c['index'] or c['primary_key']) and c['columns']]
+
+
+def _couvert(candidat, existants):
+    if candidat.condition is not None:
+        return False
+    colonnes = [candidat.modele._meta.get_field(c.lstrip('-')).column for c in candidat.colonnes]
+    return any(existant[:len(colonnes)] == colonnes for existant in existants)
+
+
+def candidats(charge):
+    """Candidats tirés de la charge, dédoublonnés, hors index existants."""
+    tables = _tables()
+    trouves = {}
+    for requete in charge:
+        tri = _tri(requete, tables)
+        for modele, predicats in _predicats(requete, tables).items():
+            cles = list(predicats['egalites'])
+            suite = predicats['plages'][:1] or [c for c in tri.get(modele, []) if c.lstrip('-') not in cles]
+            cles = (cles + suite)[:MAX_COLONNES]
+            condition = None
+            for q in predicats['conditions']:
+                condition = q if condition is None else condition & q
+            if not cles:
+                if condition is None:
+                    continue
+                cles = [modele._meta.pk.name]
+            candidat = Candidat(modele, cles, condition)
+            candidat = trouves.setdefault(candidat.cle, candidat)
+            candidat.requetes.append(requete)
+    existants = {}
+    retenus = []
+    for candidat in trouves.values():
+        if candidat.modele not in existants:
+            existants[candidat.modele] = _index_existants(candidat.modele)
+        if not _couvert(candidat, existants[candidat.modele]):
+            retenus.append(candidat)
+    return retenus
+
+
+# --- Estimation (hypopg) ---
+
+def hypopg_disponible():
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'hypopg'")
+        return cursor.fetchone() is not None
+
+
+def _cout(cursor, requete):
+    """Coût estimé du plan, None si la requête ne peut pas être expliquée."""
+    if requete.params is None:
+        if connection.pg_version < 160000:
+            return None  # EXPLAIN (GENERIC_PLAN) : PostgreSQL 16+
+        options, params = 'GENERIC_PLAN, FORMAT JSON', None
+    else:
+        options, params = 'FORMAT JSON', requete.params
+    try:
+        with transaction.atomic():
+            cursor.execute(f"EXPLAIN ({options}) {requete.sql}", params)
+            plan = cursor.fetchone()[0]
+    except DatabaseError:
+        return None
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]['Plan']['Total Cost']
+
+
+def estimer(liste, charge):
+    """Renseigne gain, cout_avant et cout_apres de chaque candidat (index hypothétiques)."""
+    with connection.schema_editor(collect_sql=True) as editeur, connection.cursor() as cursor:
+        couts = {}
+        for candidat in liste:
+            table = candidat.modele._meta.db_table
+            concernees = [r for r in charge if f'"{table}"' in r.sql]
+            avant = {id(r): couts.setdefault(id(r), _cout(cursor, r)) for r in concernees}
+            concernees = [r for r in concernees if avant[id(r)] is not None]
+            if not concernees:
+                continue
+            cursor.execute("SELECT * FROM hypopg_create_index(%s)",
+                           [str(candidat.index.create_sql(candidat.modele, editeur))])
+            try:
+                apres = {id(r): _cout(cursor, r) for r in concernees}
+            finally:
+                cursor.execute("SELECT hypopg_reset()")
+            candidat.cout_avant = sum(avant[id(r)] * r.executions for r in concernees)
+            candidat.cout_apres = sum((apres[id(r)] or avant[id(r)]) * r.executions for r in concernees)
+            if candidat.cout_avant:
+                candidat.gain = 1 - candidat.cout_apres / candidat.cout_avant
+    return liste
+
+
+def conseiller(source='captures', min_executions=1, limite=LIMITE_CHARGE):
+    """(charge, candidats triés par gain décroissant, estimation faite ou non)."""
+    lire = charge_pg_stat_statements if source == 'pg_stat_statements' else charge_capturee
+    charge = lire(min_executions, limite)
+    liste = candidats(charge)
+    estime = hypopg_disponible()
+    if estime:
+        estimer(liste, charge)
+    liste.sort(key=lambda c: (c.gain is None, -(c.gain or 0), -len(c.requetes)))
+    return charge, liste, estime
+
+
+# --- Migrations ---
+
+GABARIT_MIGRATION = '''\
+# Generated by Django {version} on {date}
+# Index proposés par manage.py conseiller_index ; à reporter dans Meta.indexes :
+{rappels}
+{imports}
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY ne s'exécute pas dans une transaction
+    atomic = False
+
+    dependencies = [
+        ({app!r}, {parent!r}),
+    ]
+
+    operations = [
+{operations}
+    ]
+'''
+
+GABARIT_PARTITIONNEE = '''\
+
+
+def {fonction}(apps, schema_editor):
+    creer_index_concurrent(schema_editor, apps.get_model({app!r}, {modele!r}), {index})
+'''
+
+
+def ecrire_migrations(liste):
+    """Écrit une migration par application ; renvoie les chemins des fichiers créés."""
+    graphe = MigrationLoader(None, ignore_no_migrations=True).graph
+    par_app = {}
+    for candidat in liste:
+        par_app.setdefault(candidat.modele._meta.app_label, []).append(candidat)
+    chemins = []
+    for app, candidats_app in par_app.items():
+        parent = max(graphe.leaf_nodes(app))[1]
+        numero = int(parent.split('_')[0]) + 1
+        imports = {'from django.db import migrations, models'}
+        fonctions, operations, rappels = [], [], []
+        for candidat in candidats_app:
+            index, index_imports = MigrationWriter.serialize(candidat.index)
+            imports |= index_imports - {'from django.db import models'}
+            modele = candidat.modele._meta.model_name
+            rappels.append(f"#   {candidat.modele.__name__} : {index}")
+            if est_partitionnee(candidat.modele._meta.db_table):
+                imports.add('from config.partitions import creer_index_concurrent')
+                fonction = f"creer_{candidat.index.name}"
+                fonctions.append(GABARIT_PARTITIONNEE.format(fonction=fonction, app=app, modele=modele, index=index))
+                operations.append(
+                    f"        migrations.SeparateDatabaseAndState(\n"
+                    f"            state_operations=[migrations.AddIndex(model_name={modele!r}, index={index})],\n"
+                    f"            database_operations=[migrations.RunPython({fonction}, migrations.RunPython.noop)],\n"
+                    f"        ),"
+                )
+            else:
+                imports.add('from django.contrib.postgres.operations import AddIndexConcurrently')
+                operations.append(f"        AddIndexConcurrently(model_name={modele!r}, index={index}),")
+        contenu = GABARIT_MIGRATION.format(
+            version=django.get_version(), date=datetime.now().strftime('%Y-%m-%d %H:%M'),
+            rappels='\n'.join(rappels), imports='\n'.join(sorted(imports)) + ''.join(fonctions),
+            app=app, parent=parent, operations='\n'.join(operations),
+        )
+        chemin = os.path.join(apps.get_app_config(app).path, 'migrations', f'{numero:04d}_index_conseilles.py')
+        with open(chemin, 'w', encoding='utf-8') as fichier:
+            fichier.write(contenu)
+        chemins.append(chemin)
+    return chemins
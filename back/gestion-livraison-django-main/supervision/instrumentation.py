@@ -0,0 +1,125 @@
+"""
+Collecte des requêtes SQL exécutées pendant une requête HTTP.
+
+Un execute_wrapper est posé une fois sur chaque connexion (signal
+connection_created). Il ne fait rien tant qu'aucun Collecteur n'est actif
+dans le contexte courant : hors requête instrumentée, le surcoût se limite
+à un ContextVar.get(). Le contexte suit les vues async et les threads de
+sync_to_async, donc les requêtes de en_parallele() sont aussi comptées.
+"""
+import hashlib
+import os
+import re
+import sys
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+import django
+from django.conf import settings
+
+_collecteur_courant = ContextVar('collecteur_sql', default=None)
+
+_RE_LISTE_IN = re.compile(r'\((?:\s*%s\s*,)+\s*%s\s*\)')
+_RE_CHAINE = re.compile(r"'(?:[^']|'')*'")
+_RE_NOMBRE = re.compile(r'\b\d+\b')
+_RE_ESPACES = re.compile(r'\s+')
+
+_RACINE_PROJET = str(settings.BASE_DIR)
+_SUPERVISION = os.path.dirname(os.path.abspath(__file__))
+_DJANGO = os.path.dirname(os.path.abspath(django.__file__))
+
+
+def normaliser_sql(sql):
+    """SQL sans valeurs littérales : deux requêtes N+1 ont la même forme."""
+    sql = _RE_LISTE_IN.sub('(%s...)', sql)
+    sql = _RE_CHAINE.sub('?', sql)
+    sql = _RE_NOMBRE.sub('?', sql)
+    return _RE_ESPACES.sub(' ', sql).strip()
+
+
+def empreinte_sql(sql):
+    return hashlib.sha1(normaliser_sql(sql).encode('utf-8')).hexdigest()
+
+
+def site_appel():
+    """
+    Premier cadre de pile appartenant au code du projet. À défaut (requête
+    émise par une dépendance, ex. le COUNT de la pagination DRF), premier
+    cadre hors de Django.
+    """
+    cadre = sys._getframe(2)
+    dependance = ''
+    while cadre is not None:
+        fichier = cadre.f_code.co_filename
+        if not fichier.startswith((_SUPERVISION, _DJANGO)):
+            if fichier.startswith(_RACINE_PROJET) and 'site-packages' not in fichier:
+                return f"{os.path.relpath(fichier, _RACINE_PROJET)}:{cadre.f_lineno} ({cadre.f_code.co_name})"
+            if not dependance and 'site-packages' in fichier:
+                chemin = fichier.split('site-packages' + os.sep, 1)[-1]
+                dependance = f"{chemin}:{cadre.f_lineno} ({cadre.f_code.co_name})"
+        cadre = cadre.f_back
+    return dependance
+
+
+class Collecteur:
+    """Requêtes d'une requête HTTP. `detaille` active SQL, paramètres et site d'appel."""
+
+    def __init__(self, detaille=False):
+        self.detaille = detaille
+        self.nb_requetes = 0
+        self.duree_ms = 0.0
+        self.requetes = []
+
+    def enregistrer(self, sql, params, duree_ms, site):
+        self.nb_requetes += 1
+        self.duree_ms += duree_ms
+        if self.detaille:
+            self.requetes.append({
+                'sql': sql,
+                'params': params,
+                'duree_ms': duree_ms,
+                'site': site,
+                'empreinte': empreinte_sql(sql),
+            })
+
+    def doublons(self):
+        """Empreintes exécutées plusieurs fois : [(empreinte, nombre, exemple)]."""
+        compteur = Counter(r['empreinte'] for r in self.requetes)
+        exemples = {}
+        for r in self.requetes:
+            exemples.setdefault(r['empreinte'], r)
+        return [
+            (empreinte, nombre, exemples[empreinte])
+            for empreinte, nombre in compteur.most_common()
+            if nombre > 1
+        ]
+
+    def plus_lentes(self, n):
+        return sorted(self.requetes, key=lambda r: r['duree_ms'], reverse=True)[:n]
+
+
+def _wrapper(execute, sql, params, many, context):
+    collecteur = _collecteur_courant.get()
+    if collecteur is None:
+        return execute(sql, params, many, context)
+    site = site_appel() if collecteur.detaille else ''
+    debut = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        collecteur.enregistrer(sql, params, (time.perf_counter() - debut) * 1000, site)
+
+
+def brancher_connexion(sender, connection, **kwargs):
+    """Receveur de connection_created : pose le wrapper une seule fois par connexion."""
+    if _wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_wrapper)
+
+
+def activer(collecteur):
+    return _collecteur_courant.set(collecteur)
+
+
+def desactiver(jeton):
+    _collecteur_courant.reset(jeton)
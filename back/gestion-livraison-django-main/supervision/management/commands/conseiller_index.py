@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from supervision import conseil_index
+
+SOURCES = ('captures', 'pg_stat_statements')
+
+
+class Command(BaseCommand):
+    help = (
+        "Propose des index composites et partiels d'après la charge SQL (requêtes capturées ou "
+        "pg_stat_statements), estime leur gain avec hypopg et écrit les migrations en option."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', choices=SOURCES, default='captures',
+                            help="Origine de la charge (%(default)s)")
+        parser.add_argument('--min-executions', type=int, default=1,
+                            help="Ignorer les requêtes exécutées moins souvent (%(default)s)")
+        parser.add_argument('--limite', type=int, default=conseil_index.LIMITE_CHARGE,
+                            help="Requêtes de la charge analysées, les plus coûteuses d'abord (%(default)s)")
+        parser.add_argument('--seuil', type=float, default=conseil_index.SEUIL_GAIN,
+                            help="Gain minimal pour retenir un index estimé, entre 0 et 1 (%(default)s)")
+        parser.add_argument('--migrations', action='store_true',
+                            help="Écrire les migrations des index retenus (CREATE INDEX CONCURRENTLY)")
+
+    def handle(self, *args, **options):
+        if not 0 <= options['seuil'] < 1:
+            raise CommandError("--seuil doit être compris entre 0 et 1.")
+
+        charge, candidats, estime = conseil_index.conseiller(
+            options['source'], options['min_executions'], options['limite'],
+        )
+        if not charge:
+            raise CommandError(
+                "Aucune requête à analyser : activer SQL_INSTRUMENTATION['ECHANTILLONNAGE'] "
+                "ou l'extension pg_stat_statements."
+            )
+        if not estime:
+            self.stdout.write(self.style.WARNING("Extension hypopg absente : gains non estimés."))
+        retenus = [c for c in candidats if c.gain is None or c.gain >= options['seuil']]
+        self.stdout.write(f"{len(charge)} requête(s) analysée(s), {len(retenus)} index proposé(s)")
+        for candidat in retenus:
+            if candidat.gain is None:
+                gain = "gain non estimé"
+            else:
+                gain = f"gain {candidat.gain:.0%} (coût {candidat.cout_avant:.0f} -> {candidat.cout_apres:.0f})"
+            self.stdout.write(f"  {candidat} : {len(candidat.requetes)} requête(s), {gain}")
+            self.stdout.write(f"    {candidat.index.name}")
+
+        if options['migrations'] and retenus:
+            for chemin in conseil_index.ecrire_migrations(retenus):
+                self.stdout.write(f"Migration écrite : {chemin}")
+            self.stdout.write("Reporter les index listés en tête de chaque migration dans Meta.indexes des modèles.")
+        self.stdout.write(self.style.SUCCESS("Analyse terminée."))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from supervision import coherence
+
+
+class Command(BaseCommand):
+    help = (
+        "Contrôle les valeurs dénormalisées (montants d'expéditions, factures, soldes clients, "
+        "disponibilité des chauffeurs) par tranches, en parallèle, et répare les écarts en option."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('invariants', nargs='*', help=f"Parmi : {', '.join(coherence.INVARIANTS)} (tous par défaut)")
+        parser.add_argument('--reparer', action='store_true', help="Corriger les écarts trouvés")
+        parser.add_argument('--processus', type=int, default=coherence.PROCESSUS,
+                            help="Processus de vérification (%(default)s)")
+        parser.add_argument('--taille-tranche', type=int, default=coherence.TAILLE_TRANCHE,
+                            help="Lignes par tranche (%(default)s)")
+
+    def handle(self, *args, **options):
+        inconnus = set(options['invariants']) - set(coherence.INVARIANTS)
+        if inconnus:
+            raise CommandError(f"Invariant(s) inconnu(s) : {', '.join(sorted(inconnus))}")
+
+        rapport = coherence.verifier(options['invariants'], reparer=options['reparer'],
+                                     processus=options['processus'], taille=options['taille_tranche'])
+        ecarts = 0
+        for nom, resultat in rapport.items():
+            ecarts += resultat['ecarts']
+            ligne = (f"{nom} ({resultat['libelle']}) : {resultat['lignes']} ligne(s), "
+                     f"{resultat['ecarts']} écart(s)")
+            if options['reparer']:
+                ligne += f", {resultat['repares']} réparé(s)"
+            self.stdout.write(f"{ligne} en {resultat['duree']} s")
+            for exemple in resultat['exemples']:
+                self.stdout.write(f"  {exemple}")
+        style = self.style.SUCCESS if not ecarts or options['reparer'] else self.style.WARNING
+        self.stdout.write(style(f"{ecarts} écart(s) au total."))
@@ -0,0 +1,146 @@
+import json
+import logging
+import random
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .instrumentation import Collecteur, activer, desactiver
+
+logger = logging.getLogger('supervision.sql')
+
+
+def _config():
+    return getattr(settings, 'SQL_INSTRUMENTATION', {})
+
+
+class InstrumentationSQLMiddleware:
+    """
+    Mesure les requêtes SQL de chaque requête HTTP.
+
+    - SQL_INSTRUMENTATION['ENTETES'] : ajoute X-DB-Queries et X-DB-Time (ms)
+      à toutes les réponses (compteur seul, sans SQL ni pile d'appel).
+    - SQL_INSTRUMENTATION['ECHANTILLONNAGE'] : part des requêtes (0 à 1)
+      analysées en détail : empreintes dupliquées, requêtes les plus lentes
+      avec leur site d'appel, journalisées en JSON sur le logger
+      'supervision.sql' et enregistrées dans RequeteCapturee.
+
+    Entêtes et échantillonnage désactivés, la requête n'est pas instrumentée.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def _nouveau_collecteur(self):
+        config = _config()
+        taux = config.get('ECHANTILLONNAGE', 0)
+        detaille = taux > 0 and random.random() < taux
+        if not detaille and not config.get('ENTETES'):
+            return None
+        return Collecteur(detaille=detaille)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        collecteur = self._nouveau_collecteur()
+        if collecteur is None:
+            return self.get_response(request)
+        jeton = activer(collecteur)
+        try:
+            response = self.get_response(request)
+        finally:
+            desactiver(jeton)
+        self._entetes(response, collecteur)
+        if collecteur.detaille:
+            self._rapport(request, response, collecteur)
+        return response
+
+    async def __acall__(self, request):
+        collecteur = self._nouveau_collecteur()
+        if collecteur is None:
+            return await self.get_response(request)
+        jeton = activer(collecteur)
+        try:
+            response = await self.get_response(request)
+        finally:
+            desactiver(jeton)
+        self._entetes(response, collecteur)
+        if collecteur.detaille:
+            await sync_to_async(self._rapport)(request, response, collecteur)
+        return response
+
+    @staticmethod
+    def _entetes(response, collecteur):
+        if _config().get('ENTETES'):
+            response['X-DB-Queries'] = str(collecteur.nb_requetes)
+            response['X-DB-Time'] = f"{collecteur.duree_ms:.2f}"
+
+    def _rapport(self, request, response, collecteur):
+        config = _config()
+        lentes = collecteur.plus_lentes(config.get('NB_LENTES', 5))
+        doublons = collecteur.doublons()
+        logger.info(json.dumps({
+            'methode': request.method,
+            'chemin': request.path,
+            'statut': response.status_code,
+            'nb_requetes': collecteur.nb_requetes,
+            'duree_sql_ms': round(collecteur.duree_ms, 2),
+            'doublons': [
+                {'empreinte': empreinte, 'nombre': nombre, 'sql': exemple['sql'][:300], 'site': exemple['site']}
+                for empreinte, nombre, exemple in doublons[:10]
+            ],
+            'plus_lentes': [
+                {'duree_ms': round(r['duree_ms'], 2), 'sql': r['sql'][:500], 'site': r['site']}
+                for r in lentes
+            ],
+        }, ensure_ascii=False))
+        self._enregistrer(request, collecteur, config.get('SEUIL_LENT_MS', 50))
+
+    @staticmethod
+    def _enregistrer(request, collecteur, seuil_ms):
+        """
+        Cumule dans RequeteCapturee les formes SQL lentes ou répétées,
+        base de l'endpoint EXPLAIN et de l'index advisor.
+        """
+        from .models import RequeteCapturee
+
+        par_empreinte = {}
+        for r in collecteur.requetes:
+            cumul = par_empreinte.setdefault(r['empreinte'], {'requete': r, 'nombre': 0, 'total': 0.0, 'max': 0.0})
+            cumul['nombre'] += 1
+            cumul['total'] += r['duree_ms']
+            if r['duree_ms'] >= cumul['max']:
+                cumul['max'] = r['duree_ms']
+                cumul['requete'] = r
+        for empreinte, cumul in par_empreinte.items():
+            if cumul['max'] < seuil_ms and cumul['nombre'] == 1:
+                continue
+            requete = cumul['requete']
+            params = json.loads(json.dumps(list(requete['params'] or []), cls=DjangoJSONEncoder))
+            defauts = {
+                'sql': requete['sql'],
+                'params': params,
+                'site_appel': requete['site'][:255],
+                'chemin': request.path[:255],
+            }
+            obj, cree = RequeteCapturee.objects.get_or_create(
+                empreinte=empreinte,
+                defaults={**defauts, 'nb_executions': cumul['nombre'], 'duree_totale_ms': cumul['total'], 'duree_max_ms': cumul['max']},
+            )
+            if not cree:
+                RequeteCapturee.objects.filter(pk=obj.pk).update(
+                    nb_executions=F('nb_executions') + cumul['nombre'],
+                    duree_totale_ms=F('duree_totale_ms') + cumul['total'],
+                    duree_max_ms=Greatest('duree_max_ms', cumul['max']),
+                    derniere_vue=timezone.now(),
+                    **defauts,
+                )
@@ -0,0 +1,36 @@
+# Generated by Django 6.0 on 2026-10-19 14:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequeteCapturee',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('empreinte', models.CharField(max_length=40, unique=True, verbose_name='Empreinte')),
+                ('sql', models.TextField(verbose_name='SQL')),
+                ('params', models.JSONField(blank=True, default=list, verbose_name='Paramètres (dernière capture)')),
+                ('site_appel', models.CharField(blank=True, max_length=255, verbose_name="Site d'appel Python")),
+                ('chemin', models.CharField(blank=True, max_length=255, verbose_name='Dernier endpoint')),
+                ('nb_executions', models.PositiveBigIntegerField(default=0, verbose_name='Exécutions')),
+                ('duree_totale_ms', models.FloatField(default=0, verbose_name='Durée totale (ms)')),
+                ('duree_max_ms', models.FloatField(default=0, verbose_name='Durée max (ms)')),
+                ('premiere_vue', models.DateTimeField(auto_now_add=True, verbose_name='Première capture')),
+                ('derniere_vue', models.DateTimeField(auto_now=True, verbose_name='Dernière capture')),
+            ],
+            options={
+                'verbose_name': 'Requête capturée',
+                'verbose_name_plural': 'Requêtes capturées',
+                'db_table': 'requete_capturee',
+                'ordering': ['-duree_totale_ms'],
+            },
+        ),
+    ]
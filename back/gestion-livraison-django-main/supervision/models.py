@@ -0,0 +1,33 @@
+from django.db import models
+
+
+class RequeteCapturee(models.Model):
+    """
+    Requête SQL relevée par le middleware d'instrumentation sur une requête
+    HTTP échantillonnée. Une ligne par empreinte (SQL normalisé) : les
+    compteurs s'accumulent au fil des captures.
+    """
+
+    empreinte = models.CharField(max_length=40, unique=True, verbose_name="Empreinte")
+    sql = models.TextField(verbose_name="SQL")
+    params = models.JSONField(default=list, blank=True, verbose_name="Paramètres (dernière capture)")
+    site_appel = models.CharField(max_length=255, blank=True, verbose_name="Site d'appel Python")
+    chemin = models.CharField(max_length=255, blank=True, verbose_name="Dernier endpoint")
+    nb_executions = models.PositiveBigIntegerField(default=0, verbose_name="Exécutions")
+    duree_totale_ms = models.FloatField(default=0, verbose_name="Durée totale (ms)")
+    duree_max_ms = models.FloatField(default=0, verbose_name="Durée max (ms)")
+    premiere_vue = models.DateTimeField(auto_now_add=True, verbose_name="Première capture")
+    derniere_vue = models.DateTimeField(auto_now=True, verbose_name="Dernière capture")
+
+    class Meta:
+        db_table = 'requete_capturee'
+        verbose_name = "Requête capturée"
+        verbose_name_plural = "Requêtes capturées"
+        ordering = ['-duree_totale_ms']
+
+    def __str__(self):
+        return f"{self.empreinte[:8]} - {self.nb_executions} exécutions"
+
+    @property
+    def duree_moyenne_ms(self):
+        return self.duree_totale_ms / self.nb_executions if self.nb_executions else 0
@@ -0,0 +1,15 @@
+from rest_framework import serializers
+from .models import RequeteCapturee
+
+
+class RequeteCaptureeSerializer(serializers.ModelSerializer):
+    duree_moyenne_ms = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = RequeteCapturee
+        fields = [
+            'id', 'empreinte', 'sql', 'params', 'site_appel', 'chemin',
+            'nb_executions', 'duree_totale_ms', 'duree_max_ms', 'duree_moyenne_ms',
+            'premiere_vue', 'derniere_vue',
+        ]
+        dependances = {'duree_moyenne_ms': ['duree_totale_ms', 'nb_executions']}
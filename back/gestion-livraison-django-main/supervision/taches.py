@@ -0,0 +1,9 @@
+from taches.registre import tache
+
+from . import coherence
+
+
+@tache('supervision.verifier_coherence', api=True)
+def verifier_coherence(suivi, invariants=None, reparer=False):
+    """Contrôle de cohérence des valeurs dénormalisées : rapport d'écarts, réparation en option."""
+    return coherence.verifier(invariants, reparer=reparer, rappel=lambda faites, total: suivi.avancer(faites, total))
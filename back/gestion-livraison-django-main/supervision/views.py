@@ -0,0 +1,53 @@
+from django.db import connection, transaction
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+from config.champs import ChampsDynamiquesMixin
+
+from .models import RequeteCapturee
+from .serializers import RequeteCaptureeSerializer
+
+
+class RequeteCaptureeViewSet(ChampsDynamiquesMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Requêtes SQL capturées par le middleware d'instrumentation (staff uniquement).
+
+    Endpoints:
+    - GET /api/supervision/requetes/ : formes SQL les plus coûteuses
+    - GET /api/supervision/requetes/{id}/ : détail d'une capture
+    - POST /api/supervision/requetes/{id}/explain/ : EXPLAIN (ANALYZE, BUFFERS)
+    """
+    queryset = RequeteCapturee.objects.all()
+    serializer_class = RequeteCaptureeSerializer
+    permission_classes = [IsAdminUser]
+    search_fields = ['sql', 'site_appel', 'chemin']
+    ordering_fields = ['duree_totale_ms', 'duree_max_ms', 'nb_executions', 'derniere_vue']
+    ordering = ['-duree_totale_ms']
+
+    @action(detail=True, methods=['post'])
+    def explain(self, request, pk=None):
+        """
+        Rejoue la requête capturée sous EXPLAIN (ANALYZE, BUFFERS).
+        ANALYZE exécute réellement la requête : seuls les SELECT sont acceptés
+        et tout est annulé en fin de transaction.
+        """
+        requete = self.get_object()
+        if connection.vendor != 'postgresql':
+            return Response(
+                {"error": "EXPLAIN (ANALYZE, BUFFERS) nécessite PostgreSQL."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not requete.sql.lstrip().upper().startswith('SELECT'):
+            return Response(
+                {"error": "Seules les requêtes SELECT peuvent être analysées."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute('EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) ' + requete.sql, requete.params or None)
+                plan = cursor.fetchone()[0]
+            transaction.set_rollback(True)
+        return Response({'id': requete.pk, 'sql': requete.sql, 'params': requete.params, 'plan': plan})
@@ -0,0 +1,41 @@
+from django.contrib import admin
+
+from . import file_attente
+from .models import Planification, Tache
+
+
+@admin.register(Tache)
+class TacheAdmin(admin.ModelAdmin):
+    list_display = ['id', 'nom', 'statut', 'progression', 'tentatives', 'file', 'priorite', 'demandeur',
+                    'date_creation', 'date_fin']
+    list_filter = ['statut', 'nom', 'file']
+    search_fields = ['nom', 'message', 'erreur']
+    readonly_fields = [f.name for f in Tache._meta.fields]
+    ordering = ['-date_creation']
+    actions = ['annuler_taches', 'relancer_taches']
+
+    def annuler_taches(self, request, queryset):
+        annulees = sum(file_attente.annuler(tache) for tache in queryset)
+        self.message_user(request, f"{annulees} tâche(s) annulée(s).")
+    annuler_taches.short_description = "Annuler"
+
+    def relancer_taches(self, request, queryset):
+        for tache in queryset.exclude(statut__in=Tache.STATUTS_ACTIFS):
+            file_attente.mettre_en_file(tache.nom, tache.arguments, priorite=tache.priorite, demandeur=request.user)
+        self.message_user(request, "Tâche(s) remise(s) en file.")
+    relancer_taches.short_description = "Relancer (nouvelle tâche)"
+
+
+@admin.register(Planification)
+class PlanificationAdmin(admin.ModelAdmin):
+    list_display = ['nom', 'tache', 'cron', 'actif', 'derniere_execution', 'prochaine_execution']
+    list_editable = ['actif']
+    readonly_fields = ['derniere_execution', 'prochaine_execution', 'derniere_tache']
+
+    def save_model(self, request, obj, form, change):
+        from django.utils import timezone
+        from .cron import Cron
+
+        if not change or 'cron' in form.changed_data:
+            obj.prochaine_execution = Cron(obj.cron).suivante(timezone.localtime())
+        super().save_model(request, obj, form, change)
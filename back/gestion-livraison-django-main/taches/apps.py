@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class TachesConfig(AppConfig):
+    name = 'taches'
+
+    def ready(self):
+        from django.utils.module_loading import autodiscover_modules
+
+        # Chaque application déclare ses tâches dans <app>/taches.py
+        autodiscover_modules('taches')
@@ -0,0 +1,92 @@
+"""
+Expressions cron à cinq champs : minute heure jour mois jour-de-semaine.
+Chaque champ accepte *, une valeur, une plage a-b, un pas (*/15, 8-18/2)
+et des listes séparées par des virgules. Jour de semaine : 0 ou 7 = dimanche.
+Comme cron, si jour et jour-de-semaine sont tous deux restreints, l'un
+ou l'autre suffit.
+"""
+from datetime import timedelta
+
+CHAMPS = (
+    ('minute', 0, 59),
+    ('heure', 0, 23),
+    ('jour', 1, 31),
+    ('mois', 1, 12),
+    ('jour_semaine', 0, 7),
+)
+
+# Huit ans et un jour : écart maximal entre deux 29 février (2096 -> 2104). Les
+# expressions sans aucune date possible (0 0 30 2 *) sont refusées dès l'analyse.
+HORIZON = timedelta(days=8 * 366 + 1)
+
+# Nombre de jours maximal de chaque mois (29 février compris)
+JOURS_MAX = {1: 31, 2: 29, 3: 31, 4: 30, 5: 31, 6: 30, 7: 31, 8: 31, 9: 30, 10: 31, 11: 30, 12: 31}
+
+
+class ExpressionCronInvalide(ValueError):
+    pass
+
+
+def _valeurs(champ, nom, minimum, maximum):
+    valeurs = set()
+    for morceau in champ.split(','):
+        plage, _, pas = morceau.partition('/')
+        try:
+            pas = int(pas) if pas else 1
+            if plage == '*':
+                debut, fin = minimum, maximum
+            elif '-' in plage:
+                debut, fin = (int(v) for v in plage.split('-', 1))
+            else:
+                debut = fin = int(plage)
+                if pas > 1:
+                    fin = maximum
+        except ValueError:
+            raise ExpressionCronInvalide(f"Champ {nom} invalide : {champ}") from None
+        if pas < 1 or debut < minimum or fin > maximum or debut > fin:
+            raise ExpressionCronInvalide(f"Champ {nom} hors limites ({minimum}-{maximum}) : {champ}")
+        valeurs.update(range(debut, fin + 1, pas))
+    return valeurs
+
+
+class Cron:
+    def __init__(self, expression):
+        champs = expression.split()
+        if len(champs) != 5:
+            raise ExpressionCronInvalide(f"Cinq champs attendus : {expression!r}")
+        self.expression = expression
+        (self.minutes, self.heures, self.jours, self.mois, jours_semaine) = (
+            _valeurs(champ, nom, minimum, maximum) for champ, (nom, minimum, maximum) in zip(champs, CHAMPS)
+        )
+        # 7 = dimanche = 0 ; Python : lundi = 0, dimanche = 6
+        self.jours_semaine = {(j - 1) % 7 for j in jours_semaine}
+        self.jour_restreint = champs[2] != '*'
+        self.jour_semaine_restreint = champs[4] != '*'
+        if (self.jour_restreint and not self.jour_semaine_restreint
+                and min(self.jours) > max(JOURS_MAX[mois] for mois in self.mois)):
+            raise ExpressionCronInvalide(f"Aucune date ne correspond à {expression!r}")
+
+    def _jour_correspond(self, moment):
+        jour = moment.day in self.jours
+        semaine = moment.weekday() in self.jours_semaine
+        if self.jour_restreint and self.jour_semaine_restreint:
+            return jour or semaine
+        return jour and semaine
+
+    def suivante(self, apres):
+        """Premier instant strictement postérieur à `apres` qui correspond."""
+        moment = apres.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limite = apres + HORIZON
+        while moment <= limite:
+            if moment.month not in self.mois:
+                annee, mois = (moment.year + 1, 1) if moment.month == 12 else (moment.year, moment.month + 1)
+                moment = moment.replace(year=annee, month=mois, day=1, hour=0, minute=0)
+            elif not self._jour_correspond(moment):
+                moment = (moment + timedelta(days=1)).replace(hour=0, minute=0)
+            elif moment.hour not in self.heures:
+                moment = (moment + timedelta(hours=1)).replace(minute=0)
+            elif moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+            else:
+                return moment
+        raise ExpressionCronInvalide(f"Aucune date ne correspond à {self.expression!r}")
@@ -0,0 +1,237 @@
+"""
+Opérations sur la file : mise en file, réservation par un worker,
+exécution, relance des échecs et des tâches dont le worker a disparu.
+
+La réservation est une mise à jour conditionnelle (statut EN_ATTENTE →
+EN_COURS) sur une candidate lue avec FOR UPDATE SKIP LOCKED : sur
+PostgreSQL, deux workers ne se disputent jamais la même ligne ; ailleurs,
+le perdant voit 0 ligne modifiée et passe à la candidate suivante.
+"""
+import logging
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import registre
+from .models import Planification, Tache
+
+logger = logging.getLogger(__name__)
+
+INTERVALLE_PROGRESSION = 1.0
+
+
+class TacheAnnulee(Exception):
+    """Levée par Suivi.avancer() quand une annulation a été demandée."""
+
+
+def config():
+    return settings.TACHES
+
+
+def mettre_en_file(nom, arguments=None, *, priorite=0, executer_apres=None, demandeur=None,
+                   cle_unicite=None, file=None, tentatives_max=None):
+    """
+    Ajoute une tâche à la file. Avec `cle_unicite`, renvoie la tâche active
+    existante plutôt que d'en créer une seconde (double clic, planification
+    qui se chevauche).
+    """
+    definition = registre.obtenir(nom)
+    valeurs = dict(
+        nom=nom,
+        arguments=arguments or {},
+        file=file or definition.file,
+        priorite=priorite,
+        executer_apres=executer_apres or timezone.now(),
+        demandeur=demandeur if demandeur is not None and demandeur.is_authenticated else None,
+        cle_unicite=cle_unicite,
+        tentatives_max=tentatives_max or definition.tentatives_max,
+    )
+    if cle_unicite:
+        existante = Tache.objects.filter(cle_unicite=cle_unicite, statut__in=Tache.STATUTS_ACTIFS).first()
+        if existante:
+            return existante
+        try:
+            with transaction.atomic():
+                return Tache.objects.create(**valeurs)
+        except IntegrityError:
+            return Tache.objects.get(cle_unicite=cle_unicite, statut__in=Tache.STATUTS_ACTIFS)
+    return Tache.objects.create(**valeurs)
+
+
+def reserver(worker, files):
+    """Réserve la prochaine tâche prête d'une des `files`, ou None."""
+    maintenant = timezone.now()
+    for _ in range(5):
+        with transaction.atomic():
+            candidate = (
+                Tache.objects.select_for_update(skip_locked=True)
+                .filter(statut='EN_ATTENTE', file__in=files, executer_apres__lte=maintenant)
+                .order_by('-priorite', 'executer_apres', 'id')
+                .values_list('pk', flat=True)
+                .first()
+            )
+            if candidate is None:
+                return None
+            reservee = Tache.objects.filter(pk=candidate, statut='EN_ATTENTE').update(
+                statut='EN_COURS', worker=worker, date_debut=maintenant, date_battement=maintenant,
+                tentatives=F('tentatives') + 1,
+            )
+        if reservee:
+            return Tache.objects.get(pk=candidate)
+    return None
+
+
+class Suivi:
+    """Passé à la fonction de la tâche pour publier sa progression."""
+
+    def __init__(self, tache):
+        self.tache = tache
+        self._derniere_ecriture = 0.0
+
+    def avancer(self, fait, total=None, message=None, forcer=False):
+        """
+        Publie l'avancement (fait/total en %, ou fait en % si total est
+        None). Les écritures sont espacées d'une seconde ; lève TacheAnnulee
+        si une annulation a été demandée entre-temps.
+        """
+        progression = 100.0 * fait / total if total else float(fait)
+        self.tache.progression = round(min(100.0, max(0.0, progression)), 1)
+        if message is not None:
+            self.tache.message = message[:255]
+        maintenant = time.monotonic()
+        if not forcer and maintenant - self._derniere_ecriture < INTERVALLE_PROGRESSION:
+            return
+        self._derniere_ecriture = maintenant
+        Tache.objects.filter(pk=self.tache.pk).update(
+            progression=self.tache.progression, message=self.tache.message, date_battement=timezone.now()
+        )
+        if Tache.objects.filter(pk=self.tache.pk, annulation_demandee=True).exists():
+            raise TacheAnnulee()
+
+
+def executer(tache):
+    """Exécute une tâche réservée et enregistre son issue."""
+    close_old_connections()
+    try:
+        try:
+            definition = registre.obtenir(tache.nom)
+        except KeyError as exc:
+            _conclure(tache, 'ECHEC', erreur=str(exc))
+            return
+        debut = time.perf_counter()
+        try:
+            resultat = definition(Suivi(tache), **tache.arguments)
+        except TacheAnnulee:
+            _conclure(tache, 'ANNULEE', message="Annulée en cours d'exécution")
+        except Exception:
+            _echouer(tache, definition, traceback.format_exc())
+        else:
+            _conclure(tache, 'TERMINEE', resultat=resultat, progression=100.0)
+            logger.info("Tâche #%s %s terminée en %.1f s", tache.pk, tache.nom, time.perf_counter() - debut)
+    finally:
+        close_old_connections()
+
+
+def _conclure(tache, statut, **champs):
+    champs.update(statut=statut, date_fin=timezone.now())
+    Tache.objects.filter(pk=tache.pk).update(**champs)
+    for champ, valeur in champs.items():
+        setattr(tache, champ, valeur)
+
+
+def _echouer(tache, definition, erreur):
+    if tache.tentatives < tache.tentatives_max:
+        delai = definition.delai_relance * 2 ** (tache.tentatives - 1)
+        logger.warning("Tâche #%s %s en échec (tentative %s/%s), relance dans %s s",
+                       tache.pk, tache.nom, tache.tentatives, tache.tentatives_max, delai)
+        Tache.objects.filter(pk=tache.pk).update(
+            statut='EN_ATTENTE', erreur=erreur, worker='',
+            executer_apres=timezone.now() + timedelta(seconds=delai),
+        )
+    else:
+        logger.error("Tâche #%s %s en échec définitif :\n%s", tache.pk, tache.nom, erreur)
+        _conclure(tache, 'ECHEC', erreur=erreur)
+
+
+def battre(ids):
+    """Signe de vie des tâches en cours d'un worker."""
+    if ids:
+        Tache.objects.filter(pk__in=ids, statut='EN_COURS').update(date_battement=timezone.now())
+
+
+def relancer_abandonnees():
+    """
+    Remet en file les tâches EN_COURS sans signe de vie depuis
+    DELAI_ABANDON secondes (worker tué), ou les passe en échec si leurs
+    tentatives sont épuisées.
+    """
+    limite = timezone.now() - timedelta(seconds=config()['DELAI_ABANDON'])
+    abandonnees = Tache.objects.filter(statut='EN_COURS', date_battement__lt=limite)
+    echecs = abandonnees.filter(tentatives__gte=F('tentatives_max')).update(
+        statut='ECHEC', erreur="Worker interrompu pendant l'exécution", date_fin=timezone.now()
+    )
+    relancees = abandonnees.update(statut='EN_ATTENTE', worker='', executer_apres=timezone.now())
+    return relancees, echecs
+
+
+def annuler(tache):
+    """Annule une tâche en attente ; demande l'arrêt d'une tâche en cours."""
+    if Tache.objects.filter(pk=tache.pk, statut='EN_ATTENTE').update(statut='ANNULEE', date_fin=timezone.now()):
+        tache.refresh_from_db()
+        return True
+    if Tache.objects.filter(pk=tache.pk, statut='EN_COURS').update(annulation_demandee=True):
+        tache.refresh_from_db()
+        return True
+    return False
+
+
+# --- Planifications ---
+
+def synchroniser_planifications():
+    """Recopie settings.TACHES['PLANIFICATIONS'] dans la table Planification."""
+    from .cron import Cron
+
+    for nom, definition in config().get('PLANIFICATIONS', {}).items():
+        registre.obtenir(definition['tache'])
+        cron = Cron(definition['cron'])
+        planification, creee = Planification.objects.get_or_create(
+            nom=nom,
+            defaults={'tache': definition['tache'], 'cron': definition['cron'],
+                      'arguments': definition.get('arguments', {})},
+        )
+        if creee or planification.cron != definition['cron'] or planification.prochaine_execution is None:
+            planification.prochaine_execution = cron.suivante(timezone.localtime())
+        planification.tache = definition['tache']
+        planification.cron = definition['cron']
+        planification.arguments = definition.get('arguments', {})
+        planification.save()
+
+
+def declencher_planifications():
+    """
+    Met en file les planifications arrivées à échéance. L'avancement de
+    prochaine_execution est conditionnel : avec plusieurs workers, un seul
+    déclenche chaque échéance.
+    """
+    from .cron import Cron
+
+    maintenant = timezone.now()
+    declenchees = []
+    for planification in Planification.objects.filter(actif=True, prochaine_execution__lte=maintenant):
+        suivante = Cron(planification.cron).suivante(timezone.localtime(maintenant))
+        with transaction.atomic():
+            gagnee = Planification.objects.filter(
+                pk=planification.pk, prochaine_execution=planification.prochaine_execution
+            ).update(prochaine_execution=suivante, derniere_execution=maintenant)
+            if not gagnee:
+                continue
+            tache = mettre_en_file(planification.tache, planification.arguments,
+                                   cle_unicite=f"planification:{planification.nom}")
+            Planification.objects.filter(pk=planification.pk).update(derniere_tache=tache)
+        declenchees.append(tache)
+    return declenchees
@@ -0,0 +1,74 @@
+import multiprocessing
+import signal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from taches import file_attente
+from taches.worker import Worker
+
+
+def _processus_worker(options):
+    worker = Worker(**options)
+    signal.signal(signal.SIGTERM, worker.arreter)
+    signal.signal(signal.SIGINT, worker.arreter)
+    worker.lancer()
+
+
+class Command(BaseCommand):
+    help = (
+        "Exécute les tâches de fond de la table tache (file en base, sans broker) "
+        "et déclenche les planifications cron. Arrêt propre sur SIGTERM/SIGINT."
+    )
+
+    def add_arguments(self, parser):
+        config = settings.TACHES
+        parser.add_argument('--processus', type=int, default=config['PROCESSUS'],
+                            help="Processus workers (défaut : %(default)s)")
+        parser.add_argument('--threads', type=int, default=config['THREADS'],
+                            help="Threads d'exécution par processus (défaut : %(default)s)")
+        parser.add_argument('--files', default='defaut',
+                            help="Files servies, séparées par des virgules (défaut : defaut)")
+        parser.add_argument('--intervalle', type=float, default=config['INTERVALLE'],
+                            help="Secondes entre deux interrogations de la file quand elle est vide")
+        parser.add_argument('--sans-planificateur', action='store_true',
+                            help="Ne pas déclencher les planifications (un autre worker s'en charge)")
+        parser.add_argument('--une-fois', action='store_true',
+                            help="Vider la file puis s'arrêter")
+
+    def handle(self, *args, **options):
+        file_attente.synchroniser_planifications()
+        options_worker = {
+            'threads': max(1, options['threads']),
+            'files': [f for f in options['files'].split(',') if f],
+            'intervalle': options['intervalle'],
+            'planificateur': not options['sans_planificateur'],
+            'une_fois': options['une_fois'],
+        }
+        self.stdout.write(
+            f"Worker : {options['processus']} processus × {options_worker['threads']} threads, "
+            f"files {', '.join(options_worker['files'])}"
+        )
+
+        if options['processus'] <= 1:
+            _processus_worker(options_worker)
+            return
+
+        # Les connexions ne doivent pas être partagées avec les processus fils
+        connections.close_all()
+        contexte = multiprocessing.get_context('fork')
+        enfants = [contexte.Process(target=_processus_worker, args=(options_worker,), daemon=False)
+                   for _ in range(options['processus'])]
+        for enfant in enfants:
+            enfant.start()
+
+        def relayer(signum, frame):
+            for enfant in enfants:
+                if enfant.is_alive():
+                    enfant.terminate()
+
+        signal.signal(signal.SIGTERM, relayer)
+        signal.signal(signal.SIGINT, relayer)
+        for enfant in enfants:
+            enfant.join()
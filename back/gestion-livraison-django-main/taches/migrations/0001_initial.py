@@ -0,0 +1,83 @@
+# Generated by Django 6.0 on 2026-10-19 15:20
+
+import django.core.serializers.json
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nom', models.CharField(help_text='Nom enregistré avec @tache', max_length=100, verbose_name='Tâche')),
+                ('arguments', models.JSONField(blank=True, default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='Arguments')),
+                ('file', models.CharField(default='defaut', max_length=50, verbose_name='File')),
+                ('priorite', models.SmallIntegerField(default=0, help_text='La plus haute passe en premier', verbose_name='Priorité')),
+                ('statut', models.CharField(choices=[('EN_ATTENTE', 'En attente'), ('EN_COURS', 'En cours'), ('TERMINEE', 'Terminée'), ('ECHEC', 'Échec'), ('ANNULEE', 'Annulée')], default='EN_ATTENTE', max_length=20, verbose_name='Statut')),
+                ('cle_unicite', models.CharField(blank=True, help_text='Une seule tâche active (en attente ou en cours) par clé', max_length=150, null=True, verbose_name="Clé d'unicité")),
+                ('tentatives', models.PositiveSmallIntegerField(default=0, verbose_name='Tentatives')),
+                ('tentatives_max', models.PositiveSmallIntegerField(default=3, verbose_name='Tentatives max')),
+                ('executer_apres', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Exécuter après')),
+                ('progression', models.FloatField(default=0, verbose_name='Progression (%)')),
+                ('message', models.CharField(blank=True, default='', max_length=255, verbose_name='Message')),
+                ('resultat', models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True, verbose_name='Résultat')),
+                ('erreur', models.TextField(blank=True, default='', verbose_name='Erreur')),
+                ('annulation_demandee', models.BooleanField(default=False, verbose_name='Annulation demandée')),
+                ('worker', models.CharField(blank=True, default='', max_length=100, verbose_name='Worker')),
+                ('date_creation', models.DateTimeField(auto_now_add=True, verbose_name='Date de création')),
+                ('date_debut', models.DateTimeField(blank=True, null=True, verbose_name='Début')),
+                ('date_fin', models.DateTimeField(blank=True, null=True, verbose_name='Fin')),
+                ('date_battement', models.DateTimeField(blank=True, null=True, verbose_name='Dernier signe de vie')),
+                ('demandeur', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='taches', to=settings.AUTH_USER_MODEL, verbose_name='Demandeur')),
+            ],
+            options={
+                'verbose_name': 'Tâche de fond',
+                'verbose_name_plural': 'Tâches de fond',
+                'db_table': 'tache',
+                'ordering': ['-date_creation'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Planification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nom', models.CharField(max_length=100, unique=True, verbose_name='Nom')),
+                ('tache', models.CharField(max_length=100, verbose_name='Tâche')),
+                ('arguments', models.JSONField(blank=True, default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='Arguments')),
+                ('cron', models.CharField(help_text='ex. 30 2 * * * (chaque nuit à 2h30)', max_length=100, verbose_name='Expression cron')),
+                ('actif', models.BooleanField(default=True, verbose_name='Active')),
+                ('derniere_execution', models.DateTimeField(blank=True, null=True, verbose_name='Dernier déclenchement')),
+                ('prochaine_execution', models.DateTimeField(blank=True, null=True, verbose_name='Prochain déclenchement')),
+                ('derniere_tache', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='taches.tache', verbose_name='Dernière tâche')),
+            ],
+            options={
+                'verbose_name': 'Planification',
+                'verbose_name_plural': 'Planifications',
+                'db_table': 'tache_planification',
+                'ordering': ['nom'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='tache',
+            index=models.Index(fields=['statut', 'file', 'executer_apres', 'priorite'], name='tache_reservation_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tache',
+            index=models.Index(fields=['nom', 'statut'], name='tache_nom_853a93_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='tache',
+            constraint=models.UniqueConstraint(condition=models.Q(('statut__in', ['EN_ATTENTE', 'EN_COURS'])), fields=('cle_unicite',), name='unique_tache_active_par_cle'),
+        ),
+    ]
@@ -0,0 +1,123 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils import timezone
+
+
+class Tache(models.Model):
+    """
+    Tâche de fond en file d'attente, exécutée par `manage.py lancer_worker`.
+    La table sert de file : un worker réserve une tâche EN_ATTENTE par une
+    mise à jour conditionnelle, puis publie progression et battement
+    jusqu'à la fin. Une tâche créée dans une transaction n'est visible des
+    workers qu'après son commit.
+    """
+
+    STATUT_CHOICES = [
+        ('EN_ATTENTE', 'En attente'),
+        ('EN_COURS', 'En cours'),
+        ('TERMINEE', 'Terminée'),
+        ('ECHEC', 'Échec'),
+        ('ANNULEE', 'Annulée'),
+    ]
+    STATUTS_ACTIFS = ('EN_ATTENTE', 'EN_COURS')
+
+    nom = models.CharField(max_length=100, verbose_name="Tâche", help_text="Nom enregistré avec @tache")
+    arguments = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder, verbose_name="Arguments")
+    file = models.CharField(max_length=50, default='defaut', verbose_name="File")
+    priorite = models.SmallIntegerField(default=0, verbose_name="Priorité", help_text="La plus haute passe en premier")
+    statut = models.CharField(max_length=20, choices=STATUT_CHOICES, default='EN_ATTENTE', verbose_name="Statut")
+    cle_unicite = models.CharField(
+        max_length=150, null=True, blank=True, verbose_name="Clé d'unicité",
+        help_text="Une seule tâche active (en attente ou en cours) par clé"
+    )
+
+    tentatives = models.PositiveSmallIntegerField(default=0, verbose_name="Tentatives")
+    tentatives_max = models.PositiveSmallIntegerField(default=3, verbose_name="Tentatives max")
+    executer_apres = models.DateTimeField(default=timezone.now, verbose_name="Exécuter après")
+
+    progression = models.FloatField(default=0, verbose_name="Progression (%)")
+    message = models.CharField(max_length=255, blank=True, default='', verbose_name="Message")
+    resultat = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder, verbose_name="Résultat")
+    erreur = models.TextField(blank=True, default='', verbose_name="Erreur")
+    annulation_demandee = models.BooleanField(default=False, verbose_name="Annulation demandée")
+
+    worker = models.CharField(max_length=100, blank=True, default='', verbose_name="Worker")
+    demandeur = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='taches', verbose_name="Demandeur"
+    )
+    date_creation = models.DateTimeField(auto_now_add=True, verbose_name="Date de création")
+    date_debut = models.DateTimeField(null=True, blank=True, verbose_name="Début")
+    date_fin = models.DateTimeField(null=True, blank=True, verbose_name="Fin")
+    date_battement = models.DateTimeField(null=True, blank=True, verbose_name="Dernier signe de vie")
+
+    class Meta:
+        db_table = 'tache'
+        verbose_name = "Tâche de fond"
+        verbose_name_plural = "Tâches de fond"
+        ordering = ['-date_creation']
+        indexes = [
+            # Réservation : tâches prêtes d'une file, par priorité
+            models.Index(fields=['statut', 'file', 'executer_apres', 'priorite'], name='tache_reservation_idx'),
+            models.Index(fields=['nom', 'statut']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['cle_unicite'],
+                condition=models.Q(statut__in=['EN_ATTENTE', 'EN_COURS']),
+                name='unique_tache_active_par_cle',
+            ),
+        ]
+
+    def __str__(self):
+        return f"#{self.pk} {self.nom} ({self.get_statut_display()})"
+
+    @property
+    def est_terminee(self):
+        return self.statut not in self.STATUTS_ACTIFS
+
+    @property
+    def duree_secondes(self):
+        if not self.date_debut:
+            return None
+        return ((self.date_fin or timezone.now()) - self.date_debut).total_seconds()
+
+
+class Planification(models.Model):
+    """
+    Exécution périodique d'une tâche selon une expression cron à cinq
+    champs (minute heure jour mois jour-de-semaine). Les planifications de
+    settings.TACHES['PLANIFICATIONS'] sont recopiées ici au démarrage des
+    workers ; `actif` reste modifiable depuis l'admin.
+    """
+
+    nom = models.CharField(max_length=100, unique=True, verbose_name="Nom")
+    tache = models.CharField(max_length=100, verbose_name="Tâche")
+    arguments = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder, verbose_name="Arguments")
+    cron = models.CharField(max_length=100, verbose_name="Expression cron", help_text="ex. 30 2 * * * (chaque nuit à 2h30)")
+    actif = models.BooleanField(default=True, verbose_name="Active")
+    derniere_execution = models.DateTimeField(null=True, blank=True, verbose_name="Dernier déclenchement")
+    prochaine_execution = models.DateTimeField(null=True, blank=True, verbose_name="Prochain déclenchement")
+    derniere_tache = models.ForeignKey(
+        Tache, on_delete=models.SET_NULL, null=True, blank=True, related_name='+',
+        verbose_name="Dernière tâche"
+    )
+
+    class Meta:
+        db_table = 'tache_planification'
+        verbose_name = "Planification"
+        verbose_name_plural = "Planifications"
+        ordering = ['nom']
+
+    def __str__(self):
+        return f"{self.nom} ({self.cron})"
+
+    def clean(self):
+        from .cron import Cron, ExpressionCronInvalide
+
+        try:
+            Cron(self.cron)
+        except ExpressionCronInvalide as exc:
+            raise ValidationError({'cron': str(exc)})
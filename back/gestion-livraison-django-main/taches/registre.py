@@ -0,0 +1,61 @@
+"""
+Registre des tâches de fond. Chaque application déclare les siennes dans
+un module `taches.py`, importé au démarrage (TachesConfig.ready) :
+
+    from taches.registre import tache
+
+    @tache('facturation.recalculer_montants', api=True)
+    def recalculer_montants(suivi, codes=None):
+        ...
+        suivi.avancer(fait, total)
+        return {'factures': total}
+
+La fonction reçoit un Suivi (progression, annulation) puis les arguments
+de la tâche, qui doivent être sérialisables en JSON, comme le résultat.
+"""
+_taches = {}
+
+
+class DefinitionTache:
+    def __init__(self, fonction, nom, file, tentatives_max, delai_relance, api):
+        self.fonction = fonction
+        self.nom = nom
+        self.file = file
+        self.tentatives_max = tentatives_max
+        self.delai_relance = delai_relance
+        self.api = api
+        self.__doc__ = fonction.__doc__
+
+    def __call__(self, suivi, **arguments):
+        return self.fonction(suivi, **arguments)
+
+    def differer(self, arguments=None, **options):
+        """Met la tâche en file ; voir file_attente.mettre_en_file."""
+        from .file_attente import mettre_en_file
+        return mettre_en_file(self.nom, arguments, **options)
+
+
+def tache(nom, file='defaut', tentatives_max=3, delai_relance=30, api=False):
+    """
+    Enregistre une tâche de fond. `delai_relance` : secondes avant la
+    première nouvelle tentative, doublées à chaque échec. `api` : tâche
+    lançable par POST /api/taches/ par un utilisateur non staff.
+    """
+    def decorateur(fonction):
+        if nom in _taches:
+            raise ValueError(f"Tâche déjà enregistrée : {nom}")
+        definition = DefinitionTache(fonction, nom, file, tentatives_max, delai_relance, api)
+        _taches[nom] = definition
+        return definition
+    return decorateur
+
+
+def obtenir(nom):
+    try:
+        return _taches[nom]
+    except KeyError:
+        raise KeyError(f"Tâche inconnue : {nom}") from None
+
+
+def toutes():
+    return dict(_taches)
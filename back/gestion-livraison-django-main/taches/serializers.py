@@ -0,0 +1,47 @@
+from rest_framework import serializers
+
+from . import registre
+from .models import Planification, Tache
+
+
+class TacheSerializer(serializers.ModelSerializer):
+    statut_display = serializers.CharField(source='get_statut_display', read_only=True)
+    est_terminee = serializers.BooleanField(read_only=True)
+    duree_secondes = serializers.FloatField(read_only=True)
+    demandeur = serializers.StringRelatedField(read_only=True)
+
+    class Meta:
+        model = Tache
+        fields = [
+            'id', 'nom', 'arguments', 'file', 'priorite', 'statut', 'statut_display', 'est_terminee',
+            'progression', 'message', 'resultat', 'erreur', 'tentatives', 'tentatives_max',
+            'annulation_demandee', 'executer_apres', 'date_creation', 'date_debut', 'date_fin',
+            'duree_secondes', 'demandeur',
+        ]
+        read_only_fields = fields
+        dependances = {'est_terminee': ['statut'], 'duree_secondes': ['date_debut', 'date_fin']}
+
+
+class LancementTacheSerializer(serializers.Serializer):
+    """Corps de POST /api/taches/"""
+    nom = serializers.CharField()
+    arguments = serializers.DictField(required=False, default=dict)
+    priorite = serializers.IntegerField(required=False, default=0, min_value=-100, max_value=100)
+
+    def validate_nom(self, value):
+        try:
+            definition = registre.obtenir(value)
+        except KeyError as exc:
+            raise serializers.ValidationError(str(exc.args[0]))
+        utilisateur = self.context['request'].user
+        if not (definition.api or utilisateur.is_staff):
+            raise serializers.ValidationError("Cette tâche ne peut pas être lancée depuis l'API.")
+        return value
+
+
+class PlanificationSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Planification
+        fields = ['id', 'nom', 'tache', 'arguments', 'cron', 'actif', 'derniere_execution',
+                  'prochaine_execution', 'derniere_tache']
+        read_only_fields = fields
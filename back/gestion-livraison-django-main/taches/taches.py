@@ -0,0 +1,16 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Tache
+from .registre import tache
+
+
+@tache('taches.purger')
+def purger(suivi, jours=None):
+    """Supprime les tâches finies depuis plus de `jours` jours."""
+    jours = jours or settings.TACHES['CONSERVATION_JOURS']
+    limite = timezone.now() - timedelta(days=jours)
+    supprimees, _ = Tache.objects.exclude(statut__in=Tache.STATUTS_ACTIFS).filter(date_fin__lt=limite).delete()
+    return {'supprimees': supprimees}
@@ -0,0 +1,44 @@
+from datetime import datetime
+
+from django.test import SimpleTestCase
+
+from .cron import Cron, ExpressionCronInvalide
+
+
+class CronTests(SimpleTestCase):
+    def test_prochaine_minute_strictement_posterieure(self):
+        self.assertEqual(Cron('* * * * *').suivante(datetime(2026, 1, 1, 10, 0, 30)), datetime(2026, 1, 1, 10, 1))
+
+    def test_pas_et_plage(self):
+        cron = Cron('*/15 8-18/2 * * *')
+        self.assertEqual(cron.suivante(datetime(2026, 1, 1, 8, 50)), datetime(2026, 1, 1, 10, 0))
+        self.assertEqual(cron.suivante(datetime(2026, 1, 1, 18, 45)), datetime(2026, 1, 2, 8, 0))
+
+    def test_changement_de_mois_et_d_annee(self):
+        self.assertEqual(Cron('0 5 1 * *').suivante(datetime(2026, 12, 15)), datetime(2027, 1, 1, 5, 0))
+
+    def test_jour_de_semaine_dimanche_0_ou_7(self):
+        # 2026-10-19 est un lundi
+        attendu = datetime(2026, 10, 25, 3, 0)
+        self.assertEqual(Cron('0 3 * * 0').suivante(datetime(2026, 10, 19)), attendu)
+        self.assertEqual(Cron('0 3 * * 7').suivante(datetime(2026, 10, 19)), attendu)
+
+    def test_jour_ou_jour_de_semaine_si_les_deux_sont_restreints(self):
+        # Le 15 du mois ou un vendredi : le vendredi 23 vient avant le 15 novembre
+        self.assertEqual(Cron('0 0 15 * 5').suivante(datetime(2026, 10, 19)), datetime(2026, 10, 23))
+
+    def test_29_fevrier(self):
+        cron = Cron('0 0 29 2 *')
+        self.assertEqual(cron.suivante(datetime(2025, 3, 1)), datetime(2028, 2, 29))
+        # 2100 n'est pas bissextile : huit ans d'attente
+        self.assertEqual(cron.suivante(datetime(2097, 3, 1)), datetime(2104, 2, 29))
+
+    def test_date_impossible_refusee_a_l_analyse(self):
+        for expression in ('0 0 30 2 *', '0 0 31 4,6,9,11 *'):
+            with self.subTest(expression=expression), self.assertRaises(ExpressionCronInvalide):
+                Cron(expression)
+
+    def test_expressions_invalides(self):
+        for expression in ('* * * *', '60 * * * *', '* 24 * * *', '* * 0 * *', '*/0 * * * *', 'a * * * *', '5-1 * * * *'):
+            with self.subTest(expression=expression), self.assertRaises(ExpressionCronInvalide):
+                Cron(expression)
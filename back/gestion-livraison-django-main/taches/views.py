@@ -0,0 +1,85 @@
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.response import Response
+
+from config.champs import ChampsDynamiquesMixin
+
+from . import file_attente, registre
+from .models import Planification, Tache
+from .serializers import LancementTacheSerializer, PlanificationSerializer, TacheSerializer
+
+
+class TacheViewSet(ChampsDynamiquesMixin, mixins.CreateModelMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Tâches de fond : lancement et suivi depuis l'application.
+
+    Endpoints:
+    - POST /api/taches/ : Lancer une tâche {nom, arguments, priorite} → 202
+    - GET /api/taches/ : Mes tâches (toutes pour le staff), filtrables par statut et nom
+    - GET /api/taches/{id}/ : Statut, progression et résultat (à interroger jusqu'à est_terminee)
+    - POST /api/taches/{id}/annuler/ : Annuler (arrêt coopératif si déjà en cours)
+    - GET /api/taches/disponibles/ : Tâches lançables
+    """
+    serializer_class = TacheSerializer
+    permission_classes = [IsAuthenticated]
+    filterset_fields = ['statut', 'nom']
+    ordering_fields = ['date_creation', 'date_fin', 'priorite']
+    ordering = ['-date_creation']
+
+    def get_queryset(self):
+        queryset = Tache.objects.select_related('demandeur')
+        if not self.request.user.is_staff:
+            queryset = queryset.filter(demandeur=self.request.user)
+        return queryset
+
+    def create(self, request, *args, **kwargs):
+        lancement = LancementTacheSerializer(data=request.data, context={'request': request})
+        lancement.is_valid(raise_exception=True)
+        tache = file_attente.mettre_en_file(
+            lancement.validated_data['nom'],
+            lancement.validated_data['arguments'],
+            priorite=lancement.validated_data['priorite'],
+            demandeur=request.user,
+        )
+        return Response(TacheSerializer(tache).data, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=True, methods=['post'])
+    def annuler(self, request, pk=None):
+        tache = self.get_object()
+        if not file_attente.annuler(tache):
+            return Response(
+                {"error": f"La tâche est déjà {tache.get_statut_display().lower()}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(TacheSerializer(tache).data)
+
+    @action(detail=False, methods=['get'])
+    def disponibles(self, request):
+        return Response([
+            {'nom': nom, 'description': (definition.__doc__ or '').strip(), 'file': definition.file}
+            for nom, definition in sorted(registre.toutes().items())
+            if definition.api or request.user.is_staff
+        ])
+
+
+class PlanificationViewSet(ChampsDynamiquesMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Planifications cron (staff uniquement).
+
+    Endpoints:
+    - GET /api/taches-planifiees/ : Liste avec prochain déclenchement
+    - POST /api/taches-planifiees/{id}/declencher/ : Lancer maintenant
+    """
+    queryset = Planification.objects.select_related('derniere_tache')
+    serializer_class = PlanificationSerializer
+    permission_classes = [IsAdminUser]
+
+    @action(detail=True, methods=['post'])
+    def declencher(self, request, pk=None):
+        planification = self.get_object()
+        tache = file_attente.mettre_en_file(
+            planification.tache, planification.arguments, demandeur=request.user,
+            cle_unicite=f"planification:{planification.nom}",
+        )
+        return Response(TacheSerializer(tache).data, status=status.HTTP_202_ACCEPTED)
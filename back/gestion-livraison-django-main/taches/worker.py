@@ -0,0 +1,77 @@
+"""
+Boucle d'un worker : réserve des tâches tant qu'un thread est libre,
+publie le signe de vie des tâches en cours, déclenche les planifications
+échues et relance les tâches abandonnées par un worker disparu.
+"""
+import logging
+import os
+import socket
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.db import DatabaseError, close_old_connections
+
+from . import file_attente
+
+logger = logging.getLogger(__name__)
+
+
+class Worker:
+    def __init__(self, threads, files, intervalle, planificateur=True, une_fois=False):
+        self.threads = threads
+        self.files = files
+        self.intervalle = intervalle
+        self.planificateur = planificateur
+        self.une_fois = une_fois
+        self.nom = f"{socket.gethostname()}:{os.getpid()}"
+        self.arret = threading.Event()
+
+    def arreter(self, *args):
+        if not self.arret.is_set():
+            logger.info("Worker %s : arrêt demandé, fin des tâches en cours", self.nom)
+        self.arret.set()
+
+    def lancer(self):
+        en_cours = {}
+        with ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='tache') as pool:
+            while not self.arret.is_set():
+                try:
+                    reservees = self._cycle(pool, en_cours)
+                except DatabaseError:
+                    # Base indisponible ou redémarrée : on réessaie au cycle suivant
+                    logger.exception("Worker %s : erreur de base de données", self.nom)
+                    close_old_connections()
+                    self.arret.wait(self.intervalle)
+                    continue
+
+                if self.une_fois and not en_cours and not reservees:
+                    break
+                if en_cours:
+                    terminees, _ = wait(en_cours, timeout=self.intervalle, return_when=FIRST_COMPLETED)
+                    for future in terminees:
+                        tache_id = en_cours.pop(future)
+                        if future.exception():
+                            # Erreur hors de la tâche (base indisponible...) : relancée par relancer_abandonnees
+                            logger.error("Worker %s : tâche #%s interrompue", self.nom, tache_id,
+                                         exc_info=future.exception())
+                else:
+                    self.arret.wait(self.intervalle)
+        close_old_connections()
+
+    def _cycle(self, pool, en_cours):
+        """Tâches de maintenance puis réservation jusqu'à occuper tous les threads."""
+        close_old_connections()
+        if self.planificateur:
+            file_attente.declencher_planifications()
+            file_attente.relancer_abandonnees()
+        file_attente.battre(list(en_cours.values()))
+
+        reservees = 0
+        while len(en_cours) < self.threads and not self.arret.is_set():
+            tache = file_attente.reserver(self.nom, self.files)
+            if tache is None:
+                break
+            logger.info("Worker %s : tâche #%s %s", self.nom, tache.pk, tache.nom)
+            en_cours[pool.submit(file_attente.executer, tache)] = tache.pk
+            reservees += 1
+        return reservees
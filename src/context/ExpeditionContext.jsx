@@ -1,5 +1,6 @@
-import React, { createContext, useState, useCallback } from "react";
+import React, { createContext, useState, useCallback, useEffect } from "react";
 import { api } from "../services/api";
+import { ecouterEvenements } from "../services/evenements";
 
 export const ExpeditionContext = createContext();
 
@@ -136,6 +137,19 @@ export const ExpeditionProvider = ({ children }) => {
     }
   }, []);
 
+  // --- Statuts en temps réel (remplace le re-fetch de la liste) ---
+  useEffect(() => {
+    return ecouterEvenements({ types: ["expedition"] }, (evt) => {
+      if (evt.cree) {
+        fetchExpeditions().catch(() => {});
+        return;
+      }
+      setExpeditions((prev) =>
+        prev.map((e) => (e.numexp === evt.id ? { ...e, statut: evt.statut } : e))
+      );
+    });
+  }, [fetchExpeditions]);
+
   const ajouterExpedition = async (expedition) => {
     try {
       const payloadFrontend = {
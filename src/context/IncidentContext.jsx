@@ -1,6 +1,7 @@
-import { createContext, useState, useCallback } from "react";
+import { createContext, useState, useCallback, useEffect } from "react";
 import { message } from "antd";
 import { api } from "../services/api";
+import { ecouterEvenements } from "../services/evenements";
 
 export const IncidentContext = createContext();
 
@@ -34,6 +35,19 @@ export const IncidentProvider = ({ children }) => {
     }
   }, []);
 
+  // --- États en temps réel (remplace le re-fetch de la liste) ---
+  useEffect(() => {
+    return ecouterEvenements({ types: ["incident"] }, (evt) => {
+      if (evt.cree) {
+        fetchIncidents();
+        return;
+      }
+      setIncidents((prev) =>
+        prev.map((i) => (i.code_inc === evt.id ? { ...i, etat: evt.statut } : i))
+      );
+    });
+  }, [fetchIncidents]);
+
   // --- Fetch expéditions ---
   const fetchExpeditions = useCallback(async () => {
     try {
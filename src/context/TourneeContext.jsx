@@ -1,7 +1,8 @@
-import React, { createContext, useState, useCallback } from "react";
+import React, { createContext, useState, useCallback, useEffect } from "react";
 import { tournees as apiTournees } from "../services/api.js";
 import { message } from "antd";
 import { api } from "../services/api.js";
+import { ecouterEvenements } from "../services/evenements";
 export const TourneeContext = createContext();
 
 
@@ -32,6 +33,13 @@ export const TourneeProvider = ({ children }) => {
     }
   }, []);
 
+  // --- Recharger seulement quand une tournée change de statut ---
+  useEffect(() => {
+    return ecouterEvenements({ types: ["tournee"] }, () => {
+      fetchTournees();
+    });
+  }, [fetchTournees]);
+
   // --- Ajouter tournée ---
   const ajouterTournee = async (data) => {
     try {
@@ -49,10 +49,25 @@ export const clients = {
   create: (payload) => apiClient.post("/clients/", payload).then((r) => r.data),
   update: (id, payload) => apiClient.put(`/clients/${id}/`, payload).then((r) => r.data),
   delete: (id) => apiClient.delete(`/clients/${id}/`).then((r) => r.data),
+  // Journal d'audit par curseur : passer `suivante` (champ next de la page précédente) pour continuer
+  historique: (id, params = {}, suivante = null) =>
+    (suivante ? apiClient.get(suivante) : apiClient.get(`/clients/${id}/historique/`, { params })).then((r) => r.data),
+  // Page client : client, totaux et n derniers éléments de chaque type en un appel
+  resume: (id, n = 5) => apiClient.get(`/clients/${id}/resume/`, { params: { n } }).then((r) => r.data),
+  // Saisie semi-automatique : nom/prénom, e-mail (avec @) ou téléphone, 3 caractères minimum
+  recherche: (q, limite = 10) => apiClient.get("/clients/recherche/", { params: { q, limite } }).then((r) => r.data),
+  // Import en masse (staff) : fichier CSV, création ou mise à jour par Email
+  importer: (fichier) => {
+    const formData = new FormData();
+    formData.append("fichier", fichier);
+    return apiClient.post("/clients/importer/", formData, { headers: { "Content-Type": "multipart/form-data" } }).then((r) => r.data);
+  },
+  fusionner: (id, doublons) => apiClient.post(`/clients/${id}/fusionner/`, { doublons }).then((r) => r.data),
 };
 
 export const expeditions = {
-   getAll: () => apiClient.get("/expeditions/").then((r) => r.data),
+   // params : fields, expand (ex. { fields: "numexp,statut,client_nom" }), filtres
+   getAll: (params = {}) => apiClient.get("/expeditions/", { params }).then((r) => r.data),
   getByClient: (clientId) => apiClient.get(`/expeditions/?code_client=${clientId}`).then((r) => r.data),
   create: (payload) => apiClient.post("/expeditions/", payload).then((r) => r.data),
   update: (id, payload) => apiClient.put(`/expeditions/${id}/`, payload).then((r) => r.data),
@@ -61,8 +76,9 @@ export const expeditions = {
 };
 
 export const factures = {
- getAll: () => apiClient.get("/factures/").then((r) => r.data),
-getById: (id) => apiClient.get(`/factures/${id}/`).then((r) => r.data),
+ getAll: (params = {}) => apiClient.get("/factures/", { params }).then((r) => r.data),
+  // params : fields, expand (ex. { fields: "code_facture,ttc,expeditions.numexp" })
+getById: (id, params = {}) => apiClient.get(`/factures/${id}/`, { params }).then((r) => r.data),
   getByClient: (clientId) => apiClient.get(`/factures/?code_client=${clientId}`).then((r) => r.data),
   create: (payload) => apiClient.post("/factures/", payload).then((r) => r.data),
   update: (id, payload) => apiClient.put(`/factures/${id}/`, payload).then((r) => r.data),
@@ -88,9 +104,11 @@ export const reclamations = {
   create: (payload) => apiClient.post("/reclamations/", payload).then((r) => r.data),
   update: (id, payload) => apiClient.patch(`/reclamations/${id}/`, payload).then((r) => r.data),
   delete: (id) => apiClient.delete(`/reclamations/${id}/`).then((r) => r.data),
+  // { total, par_nature, par_etat, par_mois } ; params : depuis, jusqu_a, client, nature
+  statistiques: (params = {}) => apiClient.get("/reclamations/statistiques/", { params }).then((r) => r.data),
 }
 export const incidents = {
-  getAll: () => apiClient.get("/incidents/").then((r) => r.data),
+  getAll: (params = {}) => apiClient.get("/incidents/", { params }).then((r) => r.data),
   getById: (id) => apiClient.get(`/incidents/${id}/`).then((r) => r.data),
   create: (payload) => apiClient.post("/incidents/", payload).then((r) => r.data),
   // PUT pour mise à jour complète (tous les champs requis)
@@ -99,7 +117,8 @@ export const incidents = {
   patch: (id, payload) => apiClient.patch(`/incidents/${id}/`, payload).then((r) => r.data),
   delete: (id) => apiClient.delete(`/incidents/${id}/`).then((r) => r.data),
   resoudre: (id, resolution) => apiClient.post(`/incidents/${id}/resoudre/`, { resolution }).then((r) => r.data),
-  statistiques: () => apiClient.get("/incidents/statistiques/").then((r) => r.data),
+  // params : du, au (AAAA-MM-JJ), type, etat, numexp
+  statistiques: (params = {}) => apiClient.get("/incidents/statistiques/", { params }).then((r) => r.data),
 };
 export const chauffeurs = {
   getAll: () => apiClient.get("/chauffeurs/").then((r) => r.data),
@@ -160,7 +179,21 @@ export const tarifications = {
 };
 
 
-
+export const taches = {
+  disponibles: () => apiClient.get("/taches/disponibles/").then((r) => r.data),
+  lancer: (nom, args = {}) => apiClient.post("/taches/", { nom, arguments: args }).then((r) => r.data),
+  getById: (id) => apiClient.get(`/taches/${id}/`).then((r) => r.data),
+  annuler: (id) => apiClient.post(`/taches/${id}/annuler/`).then((r) => r.data),
+  // Interroge la tâche jusqu'à sa fin ; onProgress reçoit la tâche à chaque passage
+  attendre: async (id, onProgress, intervalle = 1000) => {
+    for (;;) {
+      const tache = await taches.getById(id);
+      if (onProgress) onProgress(tache);
+      if (tache.est_terminee) return tache;
+      await new Promise((resolve) => setTimeout(resolve, intervalle));
+    }
+  },
+};
 
 
 export const api = {
@@ -175,6 +208,7 @@ export const api = {
   tournees,
   destinations,
   tarifications,
+  taches,
 };
 
 export default apiClient;
\ No newline at end of file
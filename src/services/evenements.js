@@ -0,0 +1,38 @@
+// Flux temps réel des changements de statut (SSE, backend ASGI requis)
+import AuthService from "./authService.js";
+
+// Serveur uvicorn du profil docker-compose "asgi" : runserver (WSGI) bufferise le flux
+const EVENEMENTS_URL =
+  import.meta.env.VITE_EVENEMENTS_URL || "http://localhost:8002/api/evenements/";
+
+/**
+ * S'abonne au flux /api/evenements/.
+ * filtres : { types: ["expedition"], tournee (avec types: ["tournee"] seulement), client, zone }
+ * Retourne une fonction de désabonnement (à appeler dans le cleanup d'un useEffect).
+ */
+export const ecouterEvenements = (filtres, onEvenement) => {
+  if (typeof EventSource === "undefined") return () => {};
+
+  const params = new URLSearchParams();
+  Object.entries(filtres || {}).forEach(([cle, valeur]) => {
+    if (valeur === undefined || valeur === null || valeur === "") return;
+    params.set(cle, Array.isArray(valeur) ? valeur.join(",") : valeur);
+  });
+  // EventSource n'envoie pas d'en-têtes : le jeton passe dans l'URL
+  const token = AuthService.getAccessToken();
+  if (token) params.set("token", token);
+
+  const source = new EventSource(`${EVENEMENTS_URL}?${params.toString()}`);
+  const handler = (e) => {
+    try {
+      onEvenement(JSON.parse(e.data));
+    } catch (error) {
+      console.error("Événement illisible", error);
+    }
+  };
+  ["expedition", "incident", "tournee"].forEach((type) =>
+    source.addEventListener(type, handler)
+  );
+  // EventSource se reconnecte tout seul (délai "retry" envoyé par le serveur)
+  return () => source.close();
+};